@@ -0,0 +1,70 @@
+"""
+bench_conversion_context.py
+Convert an import graph where many files import one large shared base: with one
+ConversionContext for the whole graph against a fresh EarlyModelToModel per file (which
+re-converts and re-indexes the base for every importer).
+
+Usage: python benchmarks/bench_conversion_context.py [--importers N] [--base-messages M]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from conversion_context import ConversionContext  # noqa: E402
+from earlymodel_to_model import EarlyModelToModel  # noqa: E402
+from tests.test_utils import load_early_model_with_imports  # noqa: E402
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+def write_graph(directory, importers, base_messages):
+    with open(os.path.join(directory, 'base.def'), 'w') as f:
+        f.write(synthetic_def(base_messages))
+    top = []
+    for i in range(importers):
+        with open(os.path.join(directory, f'user{i}.def'), 'w') as f:
+            f.write(f'import "base.def" as B\nmessage User{i} : B::Msg0 {{ extra{i}: int; kind: B::Kind0 }}\n')
+        top.append(f'import "user{i}.def" as U{i}\n')
+    path = os.path.join(directory, 'top.def')
+    with open(path, 'w') as f:
+        f.write(''.join(top) + 'message Top { x: int }\n')
+    return path
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--importers', type=int, default=20)
+    ap.add_argument('--base-messages', type=int, default=500)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_graph(tmp, args.importers, args.base_messages)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, models = load_early_model_with_imports(path)
+    ordered = list(models.values())  # dependencies first
+
+    t0 = time.perf_counter()
+    for early in ordered:
+        EarlyModelToModel().process(early)
+    per_file = time.perf_counter() - t0
+
+    context = ConversionContext()
+    t0 = time.perf_counter()
+    for early in ordered:
+        EarlyModelToModel(context).process(early)
+    shared = time.perf_counter() - t0
+
+    print(f"{len(ordered)} files, base of {args.base_messages} messages")
+    print(f"{'fresh converter per file':>28} {per_file * 1000:10.1f} ms")
+    print(f"{'shared ConversionContext':>28} {shared * 1000:10.1f} ms"
+          f"  (converted {context.converted}, indexed {context.indexed})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+bench_debug_trace.py
+Time the front end (load, early transforms, EarlyModel -> Model, resolving every field reference)
+on a synthetic .def file with tracing off and with all trace output enabled (written to a null
+stream, i.e. the cost of the old always-on debug prints without the terminal).
+
+Usage: python benchmarks/bench_debug_trace.py [--messages N] [--repeat R]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from debug_trace import enable_tracing, disable_tracing  # noqa: E402
+from early_model_workspace import EarlyModelWorkspace  # noqa: E402
+from earlymodel_to_model import EarlyModelToModel  # noqa: E402
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+def front_end(def_path):
+    model = EarlyModelToModel().process(EarlyModelWorkspace(def_path).load())
+    stack = list(model.namespaces)
+    while stack:
+        ns = stack.pop()
+        stack.extend(ns.namespaces)
+        for msg in ns.messages:
+            for field in msg.fields:
+                for ref in getattr(field, 'type_refs', []) or []:
+                    if ref is not None and getattr(ref, 'qfn', None):
+                        model.resolve_reference(ref)
+    return model
+
+
+def best_of(def_path, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        front_end(def_path)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--messages', type=int, default=1000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as out_dir:
+        def_path = os.path.join(out_dir, 'bench.def')
+        with open(def_path, 'w', encoding='utf-8') as f:
+            f.write(synthetic_def(args.messages))
+        disable_tracing()
+        off = best_of(def_path, args.repeat)
+        enable_tracing(stream=io.StringIO())
+        try:
+            on = best_of(def_path, 1)
+        finally:
+            disable_tracing()
+    print(f"{args.messages} messages")
+    print(f"tracing off: {off * 1000:10.1f} ms")
+    print(f"tracing on:  {on * 1000:10.1f} ms  ({on / off:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+bench_def_file_loader_parallel.py
+Time load_def_files on a synthetic import graph (a root importing N files, each importing the
+previous one) with a growing number of worker processes.
+
+Usage: python benchmarks/bench_def_file_loader_parallel.py [--files N] [--messages M] [--workers 1,2,4,8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from def_file_loader import load_def_files  # noqa: E402
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+def write_graph(out_dir, n_files, n_messages):
+    body = synthetic_def(n_messages)
+    for i in range(n_files):
+        imports = f'import "f{i - 1}.def"\n' if i else ''
+        with open(os.path.join(out_dir, f"f{i}.def"), 'w', encoding='utf-8') as f:
+            f.write(imports + body)
+    root = os.path.join(out_dir, 'root.def')
+    with open(root, 'w', encoding='utf-8') as f:
+        f.write(''.join(f'import "f{i}.def"\n' for i in range(n_files)) + 'message Root { x: int }\n')
+    return root
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--files', type=int, default=64)
+    ap.add_argument('--messages', type=int, default=200)
+    ap.add_argument('--workers', default=f"1,2,4,{os.cpu_count() or 1}")
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as out_dir:
+        root = write_graph(out_dir, args.files, args.messages)
+        print(f"{args.files + 1} files, {args.messages} messages each")
+        print(f"{'workers':>8} {'ms':>10} {'speedup':>8}")
+        base = None
+        for workers in sorted({int(w) for w in args.workers.split(',')}):
+            t0 = time.perf_counter()
+            models = load_def_files(root, workers=workers)
+            elapsed = time.perf_counter() - t0
+            assert len(models) == args.files + 1
+            base = base or elapsed
+            print(f"{workers:8d} {elapsed * 1000:10.1f} {base / elapsed:8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+bench_def_file_loader_scaling.py
+Time parsing and EarlyModel building on synthetic .def files of increasing size, to show that
+the front end scales linearly with the number of messages.
+
+Usage: python benchmarks/bench_def_file_loader_scaling.py [--max-messages N] [--mode lalr|earley]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from lark_parser import parse_message_dsl  # noqa: E402
+from def_file_loader import EarlyModelBuilder  # noqa: E402
+
+
+def synthetic_def(n_messages, per_namespace=100):
+    parts = []
+    for ns in range(0, n_messages, per_namespace):
+        parts.append(f"/// Namespace {ns}\nnamespace N{ns} {{\n")
+        parts.append(f"    enum Kind{ns} {{ A, B = 4, C }}\n")
+        for i in range(ns, min(ns + per_namespace, n_messages)):
+            parts.append(
+                f"    /// Message {i}\n"
+                f"    message Msg{i} {{\n"
+                f"        id: int;\n"
+                f"        name: string = \"m{i}\";\n"
+                f"        kind: Kind{ns};\n"
+                f"        flags: options {{ X, Y, Z }};\n"
+                f"        tags: string[];\n"
+                f"        lookup: Map<string, int>;\n"
+                f"    }}\n"
+            )
+        parts.append("}\n")
+    return ''.join(parts)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--max-messages', type=int, default=10000)
+    ap.add_argument('--mode', default='lalr')
+    args = ap.parse_args()
+    sizes = []
+    n = args.max_messages
+    while n >= 1000 and len(sizes) < 4:
+        sizes.insert(0, n)
+        n //= 2
+    print(f"{'messages':>9} {'parse ms':>10} {'build ms':>10} {'build us/msg':>13}")
+    for n in sizes:
+        text = synthetic_def(n)
+        t0 = time.perf_counter()
+        tree = parse_message_dsl(text, mode=args.mode)
+        t1 = time.perf_counter()
+        model = EarlyModelBuilder('bench', 'bench.def').build(tree)
+        t2 = time.perf_counter()
+        assert sum(len(ns.messages) for ns in model.namespaces) == n
+        print(f"{n:9d} {(t1 - t0) * 1000:10.1f} {(t2 - t1) * 1000:10.1f} {(t2 - t1) * 1e6 / n:13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+bench_def_file_loader_treeless.py
+Compare wall time and peak Python memory of the tree-building loader modes against the tree-less
+mode (LALR parser with EarlyModelBuilder embedded) on a large synthetic .def file.
+
+Usage: python benchmarks/bench_def_file_loader_treeless.py [--messages N] [--repeat R]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from def_file_loader import build_early_model  # noqa: E402
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+def run(text, mode, repeat):
+    build_early_model(text, 'bench', 'bench.def', parse_mode=mode)  # build the parser outside the timing
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        build_early_model(text, 'bench', 'bench.def', parse_mode=mode)
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    build_early_model(text, 'bench', 'bench.def', parse_mode=mode)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--messages', type=int, default=20000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+    text = synthetic_def(args.messages)
+    print(f"{args.messages} messages, {len(text) / 1e6:.1f} MB of .def text")
+    print(f"{'mode':>9} {'best ms':>10} {'peak MB':>10}")
+    for mode in ('lalr', 'treeless'):
+        best, peak = run(text, mode, args.repeat)
+        print(f"{mode:>9} {best * 1000:10.1f} {peak / 1e6:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+bench_def_file_stream.py
+Compare load_def_file with the streaming mmap reader on a large synthetic .def file: time to the
+first top-level item, total time, and peak Python memory while the items are consumed (the
+streaming consumer drops each item once it has seen it).
+
+Usage: python benchmarks/bench_def_file_stream.py [--messages N]
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from def_file_loader import load_def_file  # noqa: E402
+from def_file_stream import iter_def_file  # noqa: E402
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+def measure(consume, trace):
+    gc.collect()
+    if trace:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    first = consume()
+    total = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    if trace:
+        tracemalloc.stop()
+    return first - t0, total, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--messages', type=int, default=20000)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as out_dir:
+        path = os.path.join(out_dir, 'big.def')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(synthetic_def(args.messages, per_namespace=10))
+        print(f"{args.messages} messages, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        def whole():
+            load_def_file(path)
+            return time.perf_counter()
+
+        def streamed():
+            first = None
+            for _ in iter_def_file(path):
+                if first is None:
+                    first = time.perf_counter()
+            return first
+
+        load_def_file(path)  # build parsers outside the timings
+        print(f"{'reader':>10} {'first ms':>10} {'total ms':>10} {'peak MB':>10}")
+        for name, consume in (('whole', whole), ('streaming', streamed)):
+            first, total, _ = measure(consume, trace=False)
+            _, _, peak = measure(consume, trace=True)
+            print(f"{name:>10} {first * 1000:10.1f} {total * 1000:10.1f} {peak / 1e6:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
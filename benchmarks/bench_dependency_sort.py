@@ -0,0 +1,52 @@
+"""
+bench_dependency_sort.py
+Time topological_sort_earlymodels and dependency_levels on synthetic import graphs: a long
+import chain (deeper than the recursion limit) and a wide random DAG.
+
+Usage: python benchmarks/bench_dependency_sort.py [--files N] [--imports K]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from early_model import EarlyModel  # noqa: E402
+from early_model_transforms.dependency_sort import topological_sort_earlymodels, dependency_levels  # noqa: E402
+
+
+def make_model(name, imports):
+    return EarlyModel(namespaces=[], enums=[], messages=[], options=[], compounds=[],
+                      imports_raw=[(f'{dep}.def', None) for dep in imports], file=f'{name}.def')
+
+
+def chain(n):
+    return {f'f{i}.def': make_model(f'f{i}', [f'f{i + 1}'] if i + 1 < n else []) for i in range(n)}
+
+
+def random_dag(n, k, seed=16):
+    rng = random.Random(seed)
+    return {f'f{i}.def': make_model(f'f{i}', [f'f{rng.randrange(i + 1, n)}' for _ in range(k)] if i + 1 < n else [])
+            for i in range(n)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--files', type=int, default=50000)
+    ap.add_argument('--imports', type=int, default=5)
+    args = ap.parse_args()
+    for name, models in (('chain', chain(args.files)), ('random DAG', random_dag(args.files, args.imports))):
+        t0 = time.perf_counter()
+        topological_sort_earlymodels(models)
+        t1 = time.perf_counter()
+        levels = dependency_levels(models)
+        t2 = time.perf_counter()
+        print(f"{name:>10}: {len(models)} files, sort {(t1 - t0) * 1000:.1f} ms, "
+              f"levels {(t2 - t1) * 1000:.1f} ms ({len(levels)} levels)")
+
+
+if __name__ == '__main__':
+    main()
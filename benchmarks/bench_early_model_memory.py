@@ -0,0 +1,105 @@
+"""
+bench_early_model_memory.py
+Memory held by a 100k-field EarlyModel: the __slots__ node classes against plain-__dict__ classes
+with per-instance empty lists (the previous layout, reproduced below), plus the size of a model
+loaded from a synthetic .def file.
+
+Usage: python benchmarks/bench_early_model_memory.py [--fields N]
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from early_model import EarlyField, EarlyMessage  # noqa: E402
+from def_file_loader import load_def_file  # noqa: E402
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+class DictEarlyField:
+    def __init__(self, name, type_name, file, namespace, line, raw_type, options=None, comment="", doc=""):
+        self.name = name
+        self.type_name = type_name
+        self.file = file
+        self.namespace = namespace
+        self.line = line
+        self.raw_type = raw_type
+        self.options_raw = options or {}
+        self.comment = comment
+        self.doc = doc
+        self.element_type_raw = None
+        self.map_key_type_raw = None
+        self.map_value_type_raw = None
+        self.compound_base_type_raw = None
+        self.compound_components_raw = []
+        self.referenced_name_raw = None
+        self.is_inline_enum = False
+        self.is_inline_options = False
+        self.inline_values_raw = []
+        self.modifiers_raw = []
+        self.default_value_raw = None
+
+
+class DictEarlyMessage:
+    def __init__(self, name, fields, file, namespace, line, parent_raw=None, comment="", doc=""):
+        self.name = name
+        self.fields = fields
+        self.file = file
+        self.namespace = namespace
+        self.line = line
+        self.comment = comment
+        self.doc = doc
+        self.parent_raw = parent_raw
+
+
+def build(field_cls, message_cls, n_fields, per_message=10):
+    messages = []
+    for m in range(0, n_fields, per_message):
+        # Fresh strings per message, as a parser produces them
+        file, namespace = ''.join(['schema', '.def']), ''.join(['sch', 'ema'])
+        fields = []
+        for i in range(m, min(m + per_message, n_fields)):
+            field = field_cls(f"f{i}", 'int', file, namespace, i, 'int')
+            field.type_type = 'primitive'
+            fields.append(field)
+        messages.append(message_cls(f"M{m}", fields, file, namespace, -1))
+    return messages
+
+
+def retained(fn):
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--fields', type=int, default=100000)
+    args = ap.parse_args()
+    print(f"{args.fields} fields")
+    _, plain = retained(lambda: build(DictEarlyField, DictEarlyMessage, args.fields))
+    _, slotted = retained(lambda: build(EarlyField, EarlyMessage, args.fields))
+    print(f"  __dict__ classes: {plain / 1e6:8.1f} MB ({plain / args.fields:.0f} B/field)")
+    print(f"  __slots__ classes:{slotted / 1e6:8.1f} MB ({slotted / args.fields:.0f} B/field)")
+    with tempfile.TemporaryDirectory() as out_dir:
+        path = os.path.join(out_dir, 'big.def')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(synthetic_def(args.fields // 6))  # six fields per synthetic message
+        load_def_file(path)  # build the parser outside the measurement
+        model, loaded = retained(lambda: load_def_file(path))
+        n = sum(len(msg.fields) for ns in model.namespaces for msg in ns.messages)
+        print(f"  loaded .def model: {loaded / 1e6:7.1f} MB for {n} fields ({loaded / n:.0f} B/field, incl. messages/enums)")
+
+
+if __name__ == '__main__':
+    main()
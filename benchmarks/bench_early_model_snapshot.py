@@ -0,0 +1,71 @@
+"""
+bench_early_model_snapshot.py
+Transforming a parsed EarlyModel without modifying it: a deep copy followed by the in-place
+pipeline (what EarlyModelWorkspace used to do) against transform_snapshot(). Reports the time and
+the memory the new model adds on top of its input, for the standard early transforms and for a
+"what-if" re-run of a transform over the already transformed model (CanonicalizeColons, which
+leaves it unchanged, so a snapshot shares every node).
+
+Usage: python benchmarks/bench_early_model_snapshot.py [--messages N] [--repeat R]
+"""
+import argparse
+import copy
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from def_file_loader import build_early_model  # noqa: E402
+from early_transform_scheduler import default_early_transforms  # noqa: E402
+from early_model_snapshot import transform_snapshot, shared_nodes  # noqa: E402
+from early_transform_pipeline import run_early_transform_pipeline  # noqa: E402
+from early_model_transforms.canonicalize_colons_transform import CanonicalizeColonsTransform  # noqa: E402
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+def deepcopy_then_transform(model, transforms):
+    return run_early_transform_pipeline(copy.deepcopy(model), transforms)
+
+
+def measure(fn, model, transforms, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(model, transforms())
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    gc.collect()
+    tracemalloc.start()
+    result = fn(model, transforms())
+    gc.collect()
+    added = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return best, added, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--messages', type=int, default=20000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+    parsed = build_early_model(synthetic_def(args.messages), 'bench', 'bench.def')
+    transformed = transform_snapshot(parsed, default_early_transforms({}))
+    cases = (
+        ('default transforms', parsed, lambda: default_early_transforms({})),
+        ('what-if re-run', transformed, lambda: [CanonicalizeColonsTransform()]),
+    )
+    print(f"{args.messages} messages")
+    print(f"{'case':>20} {'method':>10} {'best ms':>10} {'added MB':>10} {'shared nodes':>14}")
+    for name, model, transforms in cases:
+        for method, fn in (('deepcopy', deepcopy_then_transform), ('snapshot', transform_snapshot)):
+            best, added, result = measure(fn, model, transforms, args.repeat)
+            print(f"{name:>20} {method:>10} {best * 1000:10.1f} {added / 1e6:10.1f} {shared_nodes(model, result):14}")
+
+
+if __name__ == '__main__':
+    main()
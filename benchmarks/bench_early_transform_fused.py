@@ -0,0 +1,44 @@
+"""
+bench_early_transform_fused.py
+Time the standard early transform pipeline on a large synthetic model, fused into a single walk
+against running the transforms one after another (fuse=False).
+
+Usage: python benchmarks/bench_early_transform_fused.py [--messages N] [--repeat R]
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from def_file_loader import build_early_model  # noqa: E402
+from early_transform_scheduler import default_early_transforms  # noqa: E402
+from early_transform_pipeline import run_early_transform_pipeline  # noqa: E402
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--messages', type=int, default=20000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+    parsed = build_early_model(synthetic_def(args.messages), 'bench', 'bench.def')
+    print(f"{args.messages} messages")
+    print(f"{'pipeline':>10} {'best ms':>10}")
+    for name, fuse in (('sequential', False), ('fused', True)):
+        best = None
+        for _ in range(args.repeat):
+            model = copy.deepcopy(parsed)
+            t0 = time.perf_counter()
+            run_early_transform_pipeline(model, default_early_transforms({}), fuse=fuse)
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:>10} {best * 1000:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+bench_earlymodel_to_model_scaling.py
+Time EarlyModelToModel.process on synthetic .def files of increasing size; with the QFN suffix
+index the time per message should stay roughly flat.
+
+Usage: python benchmarks/bench_earlymodel_to_model_scaling.py [--max-messages N]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from def_file_loader import build_early_model  # noqa: E402
+from early_transform_scheduler import default_early_transforms  # noqa: E402
+from early_transform_pipeline import run_early_transform_pipeline  # noqa: E402
+from earlymodel_to_model import EarlyModelToModel  # noqa: E402
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--max-messages', type=int, default=8000)
+    args = ap.parse_args()
+    print(f"{'messages':>10} {'ms':>10} {'us/msg':>10}")
+    n = 1000
+    while n <= args.max_messages:
+        early = build_early_model(synthetic_def(n), 'bench', 'bench.def')
+        run_early_transform_pipeline(early, default_early_transforms({}))
+        t0 = time.perf_counter()
+        EarlyModelToModel().process(early)
+        elapsed = time.perf_counter() - t0
+        print(f"{n:>10} {elapsed * 1000:10.1f} {elapsed * 1e6 / n:10.1f}")
+        n *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+bench_lark_parser_modes.py
+Compare Earley and LALR parse times over tests/def and a synthetic large .def.
+
+Usage: python benchmarks/bench_lark_parser_modes.py [--messages N] [--repeat R]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from lark_parser import parse_message_dsl  # noqa: E402
+
+
+def synthetic_def(n_messages):
+    parts = ['/// Synthetic benchmark file\n']
+    for i in range(n_messages):
+        parts.append(
+            f"/// Message {i}\n"
+            f"message Msg{i} {{\n"
+            f"    id: int;\n"
+            f"    name: string;\n"
+            f"    kind: enum {{ A, B, C }};\n"
+            f"    tags: string[];\n"
+            f"}}\n"
+        )
+    return ''.join(parts)
+
+
+def time_mode(texts, mode, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            parse_message_dsl(text, mode=mode)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--messages', type=int, default=500)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(ROOT, 'tests', 'def', '*.def'))):
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        try:
+            parse_message_dsl(text)
+        except Exception:
+            continue
+        corpus.append(text)
+    big = [synthetic_def(args.messages)]
+
+    for label, texts in (('tests/def corpus', corpus), (f'synthetic {args.messages} messages', big)):
+        earley = time_mode(texts, 'earley', args.repeat)
+        lalr = time_mode(texts, 'lalr', args.repeat)
+        print(f"{label:32s} earley {earley * 1000:9.1f} ms  lalr {lalr * 1000:9.1f} ms  speedup {earley / lalr:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
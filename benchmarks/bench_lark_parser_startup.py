@@ -0,0 +1,46 @@
+"""
+bench_lark_parser_startup.py
+Measure the startup cost of `import lark_parser` plus building the LALR parser, in a
+fresh interpreter, with a cold (empty) and warm (populated) parser cache.
+
+Usage: python benchmarks/bench_lark_parser_startup.py [--repeat R]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+SNIPPET = (
+    "import time; t0 = time.perf_counter(); import lark_parser; t1 = time.perf_counter(); "
+    "lark_parser.get_parser('lalr'); t2 = time.perf_counter(); "
+    "print(t1 - t0, t2 - t1)"
+)
+
+
+def run(cache_dir):
+    env = dict(os.environ, MESSAGEWRANGLER_CACHE_DIR=cache_dir, PYTHONPATH=ROOT)
+    out = subprocess.check_output([sys.executable, '-c', SNIPPET], env=env, cwd=ROOT, text=True)
+    imp, build = (float(x) for x in out.split())
+    return imp, build
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+    cold, warm = [], []
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold.append(run(cache_dir))
+            warm.append(run(cache_dir))
+    for label, samples in (('cold cache', cold), ('warm cache', warm)):
+        imp = min(s[0] for s in samples)
+        build = min(s[1] for s in samples)
+        print(f"{label}: import {imp * 1000:7.1f} ms  lalr parser {build * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+bench_model_memory.py
+Memory and throughput of a generated 50k-message Model (the shape of synthetic_def: six fields
+per message covering primitives, an enum reference, inline options, an array and a map): the
+__slots__ node classes with tuple type data and interned names against plain-__dict__ classes
+with per-field lists (the previous layout, reproduced below). Throughput is the time to build
+the nodes and to walk every field the way the generators do.
+
+Usage: python benchmarks/bench_model_memory.py [--messages N]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import model  # noqa: E402
+from model import FieldType  # noqa: E402
+
+
+class DictModelReference:
+    def __init__(self, qfn, kind):
+        self.qfn = qfn
+        self.kind = kind
+
+
+class DictModelField:
+    type_ref = model.ModelField.type_ref
+    type = model.ModelField.type
+
+    def __init__(self, name, field_types, type_refs=None, type_names=None, modifiers=None, default=None, doc=None,
+                 comment=None, inline_values=None, file=None, line=None, namespace=None, compound_base_type=None,
+                 compound_components=None):
+        self.name = name
+        self.field_types = field_types
+        self.type_refs = type_refs or [None] * len(field_types)
+        self.type_names = type_names or [None] * len(field_types)
+        self.modifiers = modifiers or []
+        self.default = default
+        self.doc = doc
+        self.comment = comment
+        self.inline_values = inline_values or []
+        self.file = file
+        self.line = line
+        self.namespace = namespace
+        self.compound_base_type = compound_base_type
+        self.compound_components = compound_components or []
+
+
+class DictModelEnumValue:
+    def __init__(self, name, value, doc=None, comment=None, file=None, line=None, namespace=None):
+        self.name = name
+        self.value = value
+        self.doc = doc
+        self.comment = comment
+        self.file = file
+        self.line = line
+        self.namespace = namespace
+
+
+class DictModelEnum:
+    def __init__(self, name, values, is_open=False, parent=None, doc=None, comment=None, parent_raw=None, file=None,
+                 line=None, namespace=None, is_options=False):
+        self.name = name
+        self.values = values
+        self.is_open = is_open
+        self.parent = parent
+        self.doc = doc
+        self.comment = comment
+        self.parent_raw = parent_raw
+        self.file = file
+        self.line = line
+        self.namespace = namespace
+        self.is_options = is_options
+
+
+class DictModelMessage:
+    def __init__(self, name, fields, parent=None, doc=None, comment=None, parent_raw=None, file=None, line=None,
+                 namespace=None):
+        self.name = name
+        self.fields = fields
+        self.parent = parent
+        self.doc = doc
+        self.comment = comment
+        self.parent_raw = parent_raw
+        self.file = file
+        self.line = line
+        self.namespace = namespace
+
+
+PREVIOUS = (DictModelReference, DictModelField, DictModelEnumValue, DictModelEnum, DictModelMessage)
+CURRENT = (model.ModelReference, model.ModelField, model.ModelEnumValue, model.ModelEnum, model.ModelMessage)
+
+
+def build(classes, n_messages, per_namespace=100):
+    Reference, Field, EnumValue, Enum, Message = classes
+    messages, enums = [], []
+    for ns in range(0, n_messages, per_namespace):
+        # Fresh strings, as the converter produces them from the parsed file
+        file, namespace = ''.join(['schema', '.def']), f"N{ns}"
+        kind = Enum(f"Kind{ns}", [EnumValue(n, v, file=file, line=1, namespace=namespace)
+                                  for n, v in (('A', 0), ('B', 4), ('C', 5))], file=file, line=1, namespace=namespace)
+        enums.append(kind)
+        for i in range(ns, min(ns + per_namespace, n_messages)):
+            line = i * 8
+            where = dict(file=file, namespace=namespace)
+            fields = [
+                Field('id', [FieldType.INT], type_names=['int'], line=line + 1, **where),
+                Field('name', [FieldType.STRING], type_names=['string'], default=f"m{i}", line=line + 2, **where),
+                Field('kind', [FieldType.ENUM], type_refs=[Reference(f"{namespace}::Kind{ns}", 'enum')],
+                      type_names=[f"{namespace}::Kind{ns}"], line=line + 3, **where),
+                Field('flags', [FieldType.OPTIONS], type_names=['options'], line=line + 4,
+                      inline_values=[EnumValue(n, 1 << v, file=file, line=line + 4, namespace=namespace)
+                                     for v, n in enumerate(('X', 'Y', 'Z'))], **where),
+                Field('tags', [FieldType.ARRAY, FieldType.STRING], type_names=['array', 'string'], line=line + 5,
+                      **where),
+                Field('lookup', [FieldType.MAP, FieldType.STRING, FieldType.INT], type_names=['MAP', 'string', 'int'],
+                      line=line + 6, **where),
+            ]
+            message = Message(f"Msg{i}", fields, doc=f"/// Message {i}", line=line, **where)
+            for field in fields:
+                field.parent = message
+            messages.append(message)
+    return messages, enums
+
+
+def walk(messages):
+    """Read what the generators read for every field."""
+    n = 0
+    for message in messages:
+        for field in message.fields:
+            if field.type is FieldType.ENUM and field.type_ref is not None:
+                n += 1
+            n += len(field.field_types) + len(field.type_names) + len(field.inline_values) + len(field.modifiers)
+            n += field.parent.name is not None
+    return n
+
+
+def measure(classes, n_messages):
+    gc.collect()
+    tracemalloc.start()
+    nodes = build(classes, n_messages)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    total = walk(nodes[0])
+    walked = time.perf_counter() - t0
+    # Time the build again without tracemalloc's overhead
+    del nodes
+    gc.collect()
+    t0 = time.perf_counter()
+    nodes = build(classes, n_messages)
+    built = time.perf_counter() - t0
+    return size, built, walked, total
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--messages', type=int, default=50000)
+    args = ap.parse_args()
+    results = [(label, measure(classes, args.messages)) for label, classes in
+               (('__dict__ + lists', PREVIOUS), ('__slots__ + tuples', CURRENT))]
+    assert results[0][1][3] == results[1][1][3]
+    print(f"{args.messages} messages, {args.messages * 6} fields")
+    print(f"{'':>20} {'MB':>8} {'B/msg':>8} {'build ms':>10} {'walk ms':>9}")
+    for label, (size, built, walked, _) in results:
+        print(f"{label:>20} {size / 1e6:8.1f} {size / args.messages:8.0f} {built * 1000:10.1f} {walked * 1000:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+bench_model_qfn_lookup.py
+A chain of Models, each importing the previous one under an alias, built with the previous eager
+_qfn_lookup (reproduced below: every namespace walked in __init__, then every import's table
+copied in) and with the lazy, layered QfnLookup: construction time, entries held and (QFN, kind)
+lookups. Then Model.resolve_reference end to end, direct and alias-qualified, against the previous
+resolution index (reproduced below: the merged lookup plus every aliased import's index
+rewritten under its alias, built on first use): the first pass over the references, the calls
+after it and the entries held afterwards.
+
+Usage: python benchmarks/bench_model_qfn_lookup.py [--files N] [--messages N]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from model import Model, ModelEnum, ModelMessage, ModelNamespace, ModelReference  # noqa: E402
+
+
+def previous_qfn_lookup(model):
+    lookup = {}
+
+    def walk_ns(ns, prefix):
+        ns_qfn = '::'.join(prefix + [ns.name]) if ns.name else '::'.join(prefix)
+        for msg in getattr(ns, 'messages', []):
+            lookup[(ns_qfn + '::' + msg.name if ns_qfn else msg.name, 'message')] = msg
+        for enum in getattr(ns, 'enums', []):
+            lookup[(ns_qfn + '::' + enum.name if ns_qfn else enum.name, 'enum')] = enum
+        for nested in getattr(ns, 'namespaces', []):
+            walk_ns(nested, prefix + [ns.name] if ns.name else prefix)
+    for ns in model.namespaces:
+        walk_ns(ns, [])
+    for imported in model.imports.values():
+        lookup.update(imported._previous_lookup)
+    return lookup
+
+
+def previous_resolution_index(model):
+    index = getattr(model, '_previous_index', None)
+    if index is None:
+        index = {}
+        for alias, real_ns in model.alias_map.items():
+            imported = model.imports.get(alias)
+            if imported is not None:
+                prefix = real_ns + '::' if real_ns else ''
+                for (qfn, kind), obj in previous_resolution_index(imported).items():
+                    if qfn.startswith(prefix):
+                        index[(alias + '::' + qfn[len(prefix):], kind)] = obj
+        index.update(model._qfn_lookup.merged())
+        model._previous_index = index
+    return index
+
+
+def namespaces(index, messages):
+    msgs = [ModelMessage(name=f"Msg{i}", fields=[]) for i in range(messages)]
+    enums = [ModelEnum(name=f"Enum{i}", values=[]) for i in range(messages // 4)]
+    return [ModelNamespace(name=f"file{index}", messages=msgs, enums=enums)]
+
+
+def build_chain(files, messages, eager):
+    chain, previous = [], None
+    t0 = time.perf_counter()
+    for i in range(files):
+        model = Model(file=f"file{i}.def", namespaces=namespaces(i, messages),
+                      imports={f"F{i - 1}": previous} if previous else {},
+                      alias_map={f"F{i - 1}": f"file{i - 1}"} if previous else {})
+        if eager:
+            model._previous_lookup = previous_qfn_lookup(model)
+        else:
+            model._qfn_lookup.local()  # what the first resolution builds
+        chain.append(model)
+        previous = model
+    return chain, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--files', type=int, default=100)
+    ap.add_argument('--messages', type=int, default=200)
+    args = ap.parse_args()
+    eager, eager_time = build_chain(args.files, args.messages, eager=True)
+    lazy, lazy_time = build_chain(args.files, args.messages, eager=False)
+    eager_entries = sum(len(m._previous_lookup) for m in eager)
+    lazy_entries = sum(len(m._qfn_lookup.local()) for m in lazy)
+    keys = [(f"file{i}::Msg{i % args.messages}", 'message') for i in range(args.files)]
+    top_eager, top_lazy = eager[-1]._previous_lookup, lazy[-1]._qfn_lookup
+    assert all((top_eager[k].name == top_lazy[k].name) for k in keys)
+    t0 = time.perf_counter()
+    for _ in range(100):
+        for key in keys:
+            top_eager.get(key)
+    eager_get = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(100):
+        for key in keys:
+            top_lazy.get(key)
+    lazy_get = time.perf_counter() - t0
+    calls = 100 * len(keys)
+    print(f"{args.files} chained files x {args.messages} messages (+{args.messages // 4} enums)")
+    print(f"{'':>10} {'build ms':>10} {'entries':>12} {'get ns':>10}")
+    print(f"{'eager':>10} {eager_time * 1000:10.1f} {eager_entries:12d} {eager_get * 1e9 / calls:10.0f}")
+    print(f"{'layered':>10} {lazy_time * 1000:10.1f} {lazy_entries:12d} {lazy_get * 1e9 / calls:10.0f}")
+
+    top = lazy[-1]
+    refs = [ModelReference(f"file{i}::Msg{i % args.messages}", 'message') for i in range(args.files)]
+    refs += [ModelReference(f"F{args.files - 2}::Msg{i}", 'message') for i in range(args.messages)]
+    assert all(previous_resolution_index(top).get((r.qfn, r.kind)) is top.resolve_reference(r) for r in refs)
+    for m in lazy:
+        m._previous_index = None
+        m.invalidate_resolution()
+    rows = []
+    for label, resolve in (('previous', lambda r: previous_resolution_index(top).get((r.qfn, r.kind))),
+                           ('layered', top.resolve_reference)):
+        t0 = time.perf_counter()
+        for ref in refs:
+            resolve(ref)
+        first = time.perf_counter() - t0
+        gc.disable()  # collections scanning the previous indexes would be charged to whichever runs
+        t0 = time.perf_counter()
+        for _ in range(100):
+            for ref in refs:
+                resolve(ref)
+        per_call = (time.perf_counter() - t0) / (100 * len(refs))
+        gc.enable()
+        rows.append((label, first, per_call))
+    held_previous = sum(len(m._previous_index or {}) for m in lazy)
+    held_layered = sum(len(m._resolve_memo or {}) for m in lazy)
+    print(f"resolve_reference from the top file, {len(refs)} references x 100")
+    print(f"{'':>10} {'1st pass ms':>11} {'held':>12} {'call ns':>10}")
+    for (label, first, per_call), held in zip(rows, (held_previous, held_layered)):
+        print(f"{label:>10} {first * 1000:11.1f} {held:12d} {per_call * 1e9:10.0f}")
+
+
+if __name__ == '__main__':
+    main()
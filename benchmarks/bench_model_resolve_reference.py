@@ -0,0 +1,89 @@
+"""
+bench_model_resolve_reference.py
+1M Model.resolve_reference calls on a two-file graph (a root importing an aliased file): direct
+QFNs, alias-qualified QFNs and misses, against the previous implementation (reproduced below:
+a trace check, a direct lookup, then an alias rewrite and a recursive call into the imported Model).
+
+Usage: python benchmarks/bench_model_resolve_reference.py [--messages N] [--calls N]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from debug_trace import get_logger  # noqa: E402
+from model import ModelReference  # noqa: E402
+from model_compiler import compile_def_graph  # noqa: E402
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+_log = get_logger('model.resolve')
+
+
+def previous_resolve_reference(model, ref):
+    if not ref or not ref.qfn:
+        return None
+    _log.isEnabledFor(logging.DEBUG)  # the trace check every call made (tracing off here)
+    found = model._qfn_lookup.get((ref.qfn, ref.kind))
+    if found:
+        return found
+    if '::' in ref.qfn and model.alias_map:
+        alias, rest = ref.qfn.split('::', 1)
+        if alias in model.imports and alias in model.alias_map:
+            real_ns = model.alias_map[alias]
+            rewritten = f"{real_ns}::{rest}" if real_ns else rest
+            return previous_resolve_reference(model.imports[alias], ModelReference(rewritten, ref.kind))
+    return None
+
+
+def references(model, count):
+    """`count` references cycling through direct, alias-qualified and unresolvable QFNs."""
+    refs = []
+    for (qfn, kind) in list(model.imports['Lib']._qfn_lookup)[:1000]:
+        refs.append(ModelReference(qfn, kind))
+        refs.append(ModelReference('Lib::' + qfn.split('::', 1)[1], kind))
+        refs.append(ModelReference('Lib::Missing::' + qfn, kind))
+    return (refs * (count // len(refs) + 1))[:count]
+
+
+def timed(fn, model, refs):
+    t0 = time.perf_counter()
+    for ref in refs:
+        fn(model, ref)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--messages', type=int, default=2000)
+    ap.add_argument('--calls', type=int, default=1000000)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'lib.def'), 'w', encoding='utf-8') as f:
+            f.write(synthetic_def(args.messages))
+        with open(os.path.join(tmp, 'root.def'), 'w', encoding='utf-8') as f:
+            f.write('import "lib.def" as Lib\nmessage Root { id: int }\n')
+        model = compile_def_graph(os.path.join(tmp, 'root.def')).model
+    refs = references(model, args.calls)
+    assert all(previous_resolve_reference(model, r) is model.resolve_reference(r) for r in refs[:3000])
+    previous = timed(previous_resolve_reference, model, refs)
+    t0 = time.perf_counter()
+    model.invalidate_resolution()
+    model.resolve_reference(refs[0])
+    build = time.perf_counter() - t0
+    current = timed(lambda m, r: m.resolve_reference(r), model, refs)
+    print(f"{args.calls} resolutions (1/3 direct, 1/3 via alias, 1/3 misses)")
+    print(f"{'':>18} {'total ms':>10} {'ns/call':>10}")
+    print(f"{'previous':>18} {previous * 1000:10.1f} {previous * 1e9 / args.calls:10.0f}")
+    print(f"{'memoized':>18} {current * 1000:10.1f} {current * 1e9 / args.calls:10.0f}")
+    print(f"{'first call':>18} {build * 1000:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+bench_model_snapshot.py
+Loading a resolved Model from a binary snapshot against compiling it from its .def file, with
+pickle as a reference point for the snapshot's size and speed.
+
+Usage: python benchmarks/bench_model_snapshot.py [--messages N] [--repeat R]
+"""
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from model_compiler import compile_def_graph  # noqa: E402
+from model_snapshot import dumps_model, loads_model  # noqa: E402
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+def best_of(repeat, fn):
+    best, result = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--messages', type=int, default=5000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.def')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(synthetic_def(args.messages))
+        compile_time, graph = best_of(1, lambda: compile_def_graph(path))
+    model = graph.model
+    dump_time, data = best_of(args.repeat, lambda: dumps_model(model))
+    load_time, _ = best_of(args.repeat, lambda: loads_model(data))
+    pickle_dump_time, pickled = best_of(args.repeat, lambda: pickle.dumps(model, pickle.HIGHEST_PROTOCOL))
+    pickle_load_time, _ = best_of(args.repeat, lambda: pickle.loads(pickled))
+    print(f"{args.messages} messages")
+    print(f"{'':>16} {'ms':>10} {'KB':>10}")
+    print(f"{'compile .def':>16} {compile_time * 1000:10.1f} {'':>10}")
+    print(f"{'snapshot dump':>16} {dump_time * 1000:10.1f} {len(data) / 1024:10.1f}")
+    print(f"{'snapshot load':>16} {load_time * 1000:10.1f} {'':>10}")
+    print(f"{'pickle dump':>16} {pickle_dump_time * 1000:10.1f} {len(pickled) / 1024:10.1f}")
+    print(f"{'pickle load':>16} {pickle_load_time * 1000:10.1f} {'':>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+bench_model_transform_pipeline.py
+The TypeScript generator's model transforms (plus option bitflags) on a synthetic model: run one
+after another (fuse=False: one walk each, as before the pipeline fused them) and fused into shared
+walks. Each case starts from a fresh copy of the compiled model (via a model snapshot). 'rerun'
+runs the pipeline again on a transformed model, skipping the transforms nothing wrote the inputs
+of since they ran.
+
+Usage: python benchmarks/bench_model_transform_pipeline.py [--messages N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from model_compiler import compile_def_graph  # noqa: E402
+from model_snapshot import dumps_model, loads_model  # noqa: E402
+from model_transforms.assign_dummy_option_enums_transform import AssignDummyOptionEnumsTransform  # noqa: E402
+from model_transforms.assign_enum_values_transform import AssignEnumValuesTransform  # noqa: E402
+from model_transforms.assign_option_bitflag_values_transform import AssignOptionBitflagValuesTransform  # noqa: E402
+from model_transforms.assign_unique_names_transform import AssignUniqueNamesTransform  # noqa: E402
+from model_transforms.model_transform_pipeline import ModelTransformStats, run_model_transform_pipeline  # noqa: E402
+from model_transforms.prefix_enum_value_names_transform import PrefixEnumValueNamesTransform  # noqa: E402
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+def transforms():
+    return [AssignDummyOptionEnumsTransform(), PrefixEnumValueNamesTransform(), AssignUniqueNamesTransform(),
+            AssignOptionBitflagValuesTransform(), AssignEnumValuesTransform()]
+
+
+def run(data, fuse, stats=None, rerun=False):
+    """Time of a pipeline run on a fresh copy of the model (or of a second run, with rerun)."""
+    model = loads_model(data)
+    if rerun:
+        run_model_transform_pipeline(model, transforms())
+    t0 = time.perf_counter()
+    run_model_transform_pipeline(model, transforms(), fuse=fuse, stats=stats)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--messages', type=int, default=20000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.def')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(synthetic_def(args.messages))
+        data = dumps_model(compile_def_graph(path).model)
+    print(f"{args.messages} messages, {len(transforms())} transforms")
+    print(f"{'':>12} {'ms':>9} {'walks':>6}")
+    for label, fuse in (('sequential', False), ('fused', True)):
+        seconds = min(run(data, fuse) for _ in range(args.repeat))
+        stats = ModelTransformStats()  # timing every hook slows the run: counted separately
+        run(data, fuse, stats)
+        print(f"{label:>12} {seconds * 1000:9.1f} {stats.walks:6d}")
+    seconds = min(run(data, True, rerun=True) for _ in range(args.repeat))
+    stats = ModelTransformStats()
+    run(data, True, stats, rerun=True)
+    print(f"{'rerun':>12} {seconds * 1000:9.1f} {stats.walks:6d}  skipped: {', '.join(stats.skipped)}")
+    stats = ModelTransformStats()
+    run(data, True, stats=stats)
+    print("fused, per transform (ms): " + ', '.join(f"{name} {s * 1000:.1f}" for name, s in stats.timings.items()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+bench_promote_inline_enums_inheritance.py
+Time the early transforms (PromoteInlineEnumsTransform resolves message parents through its
+inheritance index) on a chain of files, each importing the previous one and each holding a deep
+message inheritance hierarchy whose root has inline enums and continues the previous file's.
+
+Usage: python benchmarks/bench_promote_inline_enums_inheritance.py [--files F] [--depth D] [--width W]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from def_file_loader import build_early_model  # noqa: E402
+from early_transform_scheduler import default_early_transforms  # noqa: E402
+from early_transform_pipeline import run_early_transform_pipeline  # noqa: E402
+
+
+def hierarchy_def(f, depth, width):
+    parts = []
+    if f:
+        parts.append(f'import "h{f - 1}.def"\n')
+    parts.append(f'namespace H{f} {{\n')
+    for w in range(width):
+        # Derived messages come first, so their parents' inline enums are still inline when visited
+        for level in reversed(range(depth)):
+            name = f'M{w}_{level}'
+            if level:
+                parent = f' : h{f}::H{f}::M{w}_{level - 1}'
+            elif f:
+                parent = f' : h{f - 1}::H{f - 1}::M{w}_{depth - 1}'
+            else:
+                parent = ''
+            fields = f'kind: enum {{ A, B, C }}; state: enum {{ ON, OFF }}; v{level}: int' if level == 0 else \
+                f'kindX: int; stateY: int; v{level}: int'
+            parts.append(f'  message {name}{parent} {{ {fields} }}\n')
+    parts.append('}\n')
+    return ''.join(parts)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--files', type=int, default=40)
+    ap.add_argument('--depth', type=int, default=12)
+    ap.add_argument('--width', type=int, default=20)
+    args = ap.parse_args()
+    parsed = [build_early_model(hierarchy_def(f, args.depth, args.width), f'h{f}', f'h{f}.def')
+              for f in range(args.files)]
+    transformed = {}
+    t0 = time.perf_counter()
+    for f, model in enumerate(parsed):
+        imports = {f'h{f - 1}.def': transformed[f - 1]} if f else {}
+        transformed[f] = run_early_transform_pipeline(model, default_early_transforms(imports))
+    elapsed = time.perf_counter() - t0
+    messages = args.files * args.depth * args.width
+    print(f"{args.files} files x {args.width} hierarchies x depth {args.depth} ({messages} messages): "
+          f"{elapsed * 1000:.1f} ms, {elapsed * 1e6 / messages:.1f} us/message")
+
+
+if __name__ == '__main__':
+    main()
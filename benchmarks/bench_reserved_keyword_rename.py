@@ -0,0 +1,116 @@
+"""
+bench_reserved_keyword_rename.py
+ReservedKeywordRenameTransform on a synthetic model where every tenth message (and every enum)
+has a reserved name, against the previous implementation (reproduced below: every field type
+name compared with every rename, splitting its QFN each time). Then three targets (Python,
+TypeScript, C++ keywords): three transforms, each on its own copy of the model, against one
+rename_views() pass over the shared model. Each case starts from a fresh copy (via a model snapshot).
+
+Usage: python benchmarks/bench_reserved_keyword_rename.py [--messages N] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(__file__))
+
+from model_compiler import compile_def_graph  # noqa: E402
+from model_snapshot import dumps_model, loads_model  # noqa: E402
+from model_transforms.reserved_keyword_rename_transform import (  # noqa: E402
+    ReservedKeywordRenameTransform, rename_views, PYTHON_KEYWORDS, TYPESCRIPT_KEYWORDS, CPP_KEYWORDS)
+from bench_def_file_loader_scaling import synthetic_def  # noqa: E402
+
+
+def previous_transform(model, reserved, prefix):
+    rename_map = {}
+
+    def collect(ns, parent_ns):
+        ns_qfn = ns.name if not parent_ns else f"{parent_ns}::{ns.name}"
+        if ns.name in reserved:
+            rename_map[ns_qfn] = prefix + ns.name
+        for node in list(ns.enums) + list(ns.messages):
+            if node.name in reserved:
+                rename_map[f"{ns_qfn}::{node.name}"] = prefix + node.name
+        for child in ns.namespaces:
+            collect(child, ns_qfn)
+
+    def apply(ns, parent_ns):
+        ns_qfn = ns.name if not parent_ns else f"{parent_ns}::{ns.name}"
+        if ns_qfn in rename_map:
+            ns.name = rename_map[ns_qfn]
+            ns_qfn = ns.name if not parent_ns else f"{parent_ns}::{ns.name}"
+        for enum in ns.enums:
+            if f"{ns_qfn}::{enum.name}" in rename_map:
+                enum.name = rename_map[f"{ns_qfn}::{enum.name}"]
+            for value in enum.values:
+                if value.name in reserved:
+                    value.name = prefix + value.name
+        for msg in ns.messages:
+            if f"{ns_qfn}::{msg.name}" in rename_map:
+                msg.name = rename_map[f"{ns_qfn}::{msg.name}"]
+            for field in msg.fields:
+                if field.name in reserved:
+                    field.name = prefix + field.name
+                type_names = list(field.type_names)
+                for i, tname in enumerate(type_names):
+                    if tname is not None:
+                        for k, v in rename_map.items():
+                            if tname == k.split('::')[-1]:
+                                type_names[i] = v
+                            elif tname == k:
+                                type_names[i] = v
+                if type_names != list(field.type_names):
+                    field.type_names = tuple(type_names)
+        for child in ns.namespaces:
+            apply(child, ns_qfn)
+
+    for ns in model.namespaces:
+        collect(ns, None)
+    for ns in model.namespaces:
+        apply(ns, None)
+    return model
+
+
+def best(fn, data, repeat):
+    times = []
+    for _ in range(repeat):
+        model = loads_model(data)
+        t0 = time.perf_counter()
+        fn(model)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--messages', type=int, default=5000)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.def')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(synthetic_def(args.messages))
+        data = dumps_model(compile_def_graph(path).model)
+    reserved = {f"Msg{i}" for i in range(0, args.messages, 10)} | {f"Kind{i}" for i in range(0, args.messages, 100)}
+    reserved |= {'id', 'name'}
+    targets = {name: (keywords | reserved, name + '_')
+               for name, keywords in (('py', PYTHON_KEYWORDS), ('ts', TYPESCRIPT_KEYWORDS), ('cpp', CPP_KEYWORDS))}
+    previous = best(lambda m: previous_transform(m, reserved, 'gen_'), data, args.repeat)
+    indexed = best(lambda m: ReservedKeywordRenameTransform(reserved, 'gen_').transform(m), data, args.repeat)
+    separate = best(lambda m: [ReservedKeywordRenameTransform(kw, p).transform(loads_model(data))
+                               for kw, p in targets.values()], data, args.repeat)
+    batch = best(lambda m: rename_views(m, targets), data, args.repeat)
+    print(f"{args.messages} messages, {len(reserved) - 2} reserved type names")
+    print(f"{'':>22} {'ms':>9}")
+    print(f"{'previous':>22} {previous * 1000:9.1f}")
+    print(f"{'indexed':>22} {indexed * 1000:9.1f}")
+    print(f"{'3 targets, 3 copies':>22} {separate * 1000:9.1f}")
+    print(f"{'3 targets, views':>22} {batch * 1000:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+conversion_context.py
+State shared by the EarlyModelToModel conversions of one import graph, so that every file is
+converted and indexed once however many files import it.
+
+The context keeps:
+  - the converted Model of each EarlyModel (imports are converted once and shared by importers)
+  - the enum/message QFN lookups of each EarlyModel's own namespaces
+  - the enums of each converted Model by QFN (cross-file enum parents resolve without a walk)
+  - model_enum_by_qfn, every converted ModelEnum by QFN
+  - per-file memos of (scope, raw name) -> resolution; a file's memo is dropped when its lookups
+    change (e.g. an inline enum is promoted during conversion)
+EarlyModels are keyed by identity: a context describes one set of EarlyModel objects and must not
+be reused after they are modified.
+"""
+from typing import Dict, Optional, Tuple
+
+
+class ConversionContext:
+    def __init__(self):
+        self.model_enum_by_qfn: Dict[str, object] = {}
+        self._models: Dict[int, tuple] = {}  # id(EarlyModel) -> (EarlyModel, Model)
+        self._lookups: Dict[int, tuple] = {}  # id(EarlyModel) -> (EarlyModel, enums, messages)
+        self._model_enums: Dict[int, tuple] = {}  # id(Model) -> (Model, {QFN: ModelEnum})
+        self._memos: Dict[int, dict] = {}  # id(EarlyModel) -> {(kind, raw name): resolution}
+        # Counters, for tests and benchmarks
+        self.converted = 0
+        self.indexed = 0
+        self.memo_hits = 0
+
+    def model_for(self, early_model) -> Optional[object]:
+        """The Model already converted from early_model, or None."""
+        entry = self._models.get(id(early_model))
+        return entry[1] if entry is not None else None
+
+    def add_model(self, early_model, model) -> None:
+        self._models[id(early_model)] = (early_model, model)
+        self.converted += 1
+
+    def lookups(self, early_model) -> Tuple[Dict[str, object], Dict[str, object]]:
+        """
+        (enums, messages): the EarlyEnums and EarlyMessages declared in early_model's own
+        namespaces by QFN, in declaration order. Built once per model; callers must not modify them.
+        """
+        entry = self._lookups.get(id(early_model))
+        if entry is not None:
+            return entry[1], entry[2]
+        enums: Dict[str, object] = {}
+        messages: Dict[str, object] = {}
+
+        def build_lookup_ns(ns, prefix):
+            ns_qfn = '::'.join(prefix + [ns.name]) if ns.name else '::'.join(prefix)
+            for enum in ns.enums:
+                enums[ns_qfn + '::' + enum.name if ns_qfn else enum.name] = enum
+            for msg in ns.messages:
+                messages[ns_qfn + '::' + msg.name if ns_qfn else msg.name] = msg
+            for nested in ns.namespaces:
+                build_lookup_ns(nested, prefix + [ns.name] if ns.name else prefix)
+
+        for ns in getattr(early_model, 'namespaces', []):
+            build_lookup_ns(ns, [])
+        self._lookups[id(early_model)] = (early_model, enums, messages)
+        self.indexed += 1
+        return enums, messages
+
+    def model_enums(self, model) -> Dict[str, object]:
+        """The ModelEnums of a converted Model by QFN (the first one, in namespace order, per QFN)."""
+        entry = self._model_enums.get(id(model))
+        if entry is not None:
+            return entry[1]
+        enums: Dict[str, object] = {}
+        stack = [(ns, []) for ns in reversed(getattr(model, 'namespaces', []))]
+        while stack:
+            ns, prefix = stack.pop()
+            parts = prefix + [ns.name] if ns.name else prefix
+            ns_qfn = '::'.join(parts)
+            for enum in getattr(ns, 'enums', []):
+                enums.setdefault(ns_qfn + '::' + enum.name if ns_qfn else enum.name, enum)
+            for nested in reversed(getattr(ns, 'namespaces', [])):
+                stack.append((nested, parts))
+        self._model_enums[id(model)] = (model, enums)
+        return enums
+
+    def memo(self, early_model) -> dict:
+        """The (kind, raw name) -> resolution memo of early_model's conversion scope."""
+        memo = self._memos.get(id(early_model))
+        if memo is None:
+            memo = self._memos[id(early_model)] = {}
+        return memo
+
+    def invalidate(self, early_model) -> None:
+        """Forget the memoized resolutions of early_model (its lookups changed)."""
+        memo = self._memos.get(id(early_model))
+        if memo:
+            memo.clear()
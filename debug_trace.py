@@ -0,0 +1,66 @@
+"""
+debug_trace.py
+Shared debug tracing for the loader, transforms, model conversion and generators.
+
+Tracing uses the standard logging module under the 'messagewrangler' logger hierarchy, one child
+logger per area, and is off by default. Trace output is guarded once per stage and only formatted
+when enabled, so disabled tracing costs one cached level check per stage:
+
+    _log = get_logger('qfn')
+
+    def transform(self, model):
+        debug = _log.isEnabledFor(logging.DEBUG)
+        ...
+        if debug:
+            _log.debug(f"resolved {name} -> {qfn}")
+
+Turn it on with enable_tracing(), or by setting MESSAGEWRANGLER_TRACE to 1/all or to a
+comma-separated list of areas (e.g. MESSAGEWRANGLER_TRACE=qfn,model).
+"""
+import logging
+import os
+import sys
+from typing import Iterable, Optional
+
+ROOT_LOGGER = 'messagewrangler'
+
+_root = logging.getLogger(ROOT_LOGGER)
+_root.setLevel(logging.WARNING)  # opt-in even when the application logs DEBUG globally
+_handler = None
+
+
+def get_logger(area: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT_LOGGER}.{area}")
+
+
+def enable_tracing(areas: Optional[Iterable[str]] = None, level: int = logging.DEBUG, stream=None) -> None:
+    """Write trace output for `areas` (default: all) to `stream` (default: stderr)."""
+    global _handler
+    if _handler is None:
+        _handler = logging.StreamHandler(stream or sys.stderr)
+        _handler.setFormatter(logging.Formatter('[%(name)s] %(message)s'))
+        _root.addHandler(_handler)
+    elif stream is not None:
+        _handler.setStream(stream)
+    if areas is None:
+        _root.setLevel(level)
+    else:
+        for area in areas:
+            get_logger(area).setLevel(level)
+
+
+def disable_tracing() -> None:
+    global _handler
+    _root.setLevel(logging.WARNING)
+    prefix = ROOT_LOGGER + '.'
+    for name, logger in list(logging.Logger.manager.loggerDict.items()):
+        if name.startswith(prefix) and isinstance(logger, logging.Logger):
+            logger.setLevel(logging.NOTSET)
+    if _handler is not None:
+        _root.removeHandler(_handler)
+        _handler = None
+
+
+_env = os.environ.get('MESSAGEWRANGLER_TRACE', '').strip()
+if _env and _env != '0':
+    enable_tracing(None if _env.lower() in ('1', 'all') else [a.strip() for a in _env.split(',') if a.strip()])
@@ -1,706 +1,690 @@
 # def_file_loader.py
 # Handles reading .def files and resolving imports recursively for MessageWrangler.
 import os
-from lark_parser import parse_message_dsl
-from lark import Token, Tree
-from early_model import EarlyModel, EarlyNamespace, EarlyMessage, EarlyField, EarlyEnum, EarlyEnumValue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Tuple
+from lark_parser import parse_message_dsl, grammar_fingerprint, build_parser
+from lark import Token, Tree, Transformer
+from lark.exceptions import LarkError
+from early_model import EarlyModel, EarlyNamespace, EarlyMessage, EarlyField, EarlyEnum, EarlyEnumValue, EMPTY
+from early_model_cache import EarlyModelCache
+from early_model_transforms.dependency_sort import import_edges, normalize_path, topological_sort_earlymodels
+
+# Bump whenever _build_early_model_from_lark_tree (or the tree it consumes) changes
+# in a way that alters the EarlyModel; invalidates EarlyModelCache entries.
+LOADER_VERSION = '5'
+
+
+# 'treeless': LALR parser with EarlyModelBuilder embedded, no parse tree is materialised.
+# 'lalr' / 'earley': build a parse tree with lark_parser.parse_message_dsl, then convert it.
+# Input rejected by the LALR grammar is always re-parsed with Earley.
+LOADER_MODES = ('treeless', 'lalr', 'earley')
+
+
+def loader_fingerprint(parse_mode: str = 'treeless') -> str:
+    return f"{LOADER_VERSION}:{parse_mode}:{grammar_fingerprint()}"
 
 # Convenience function to load a .def file and return an EarlyModel
 
-def load_def_file(def_file_path: str):
+def load_def_file(def_file_path: str, parse_mode: str = 'treeless', cache: Optional[EarlyModelCache] = None):
+    """
+    Load a .def file into an EarlyModel.
+    If `cache` (an EarlyModelCache) is given, an unchanged file is served from the cache
+    instead of being re-parsed.
+    """
     with open(def_file_path, 'r', encoding='utf-8') as f:
         text = f.read()
-    file_namespace = os.path.splitext(os.path.basename(def_file_path))[0]
-    tree = parse_message_dsl(text)
-    return _build_early_model_from_lark_tree(tree, file_namespace, source_file=def_file_path)
+    return load_def_text(text, def_file_path, parse_mode, cache)
 
-def _build_early_model_from_lark_tree(tree, current_processing_file_namespace: str, source_file: str = None):
-    # Top-level: scan for namespaces, messages, enums, options_def, compound_def, import_stmt
-    namespaces = []
-    free_messages = [] # Top-level messages
-    free_enums = [] # Top-level enums
-    options = [] # Top-level options_def
-    compounds = [] # Top-level compound_def
-    imports_raw = [] # List of (path, alias) tuples
-
-    # DEBUG: Print tree for inspection
-    print(f"[DEBUG] Parse tree: {tree}")
-
-    """Build an EarlyModel from a Lark parse tree, capturing raw information."""
 
-    file = source_file or "?"
-
-    def _extract_comments(node, parent_children=None, node_index=None):
-        """Extract doc comments (///) and other comments (//, /* */) associated with a node."""
-        doc_comments = []
-        other_comments = []
-
-        # Look for preceding comments in parent_children
-        if parent_children is not None and node_index is not None:
-            i = node_index - 1
-            while i >= 0:
-                prev = parent_children[i]
-                if isinstance(prev, Tree) and prev.data == "comment":
-                    for c in prev.children:
-                        if isinstance(c, Token):
-                            if c.type == "DOC_COMMENT":
-                                doc_comments.append(str(c).strip())
-                            elif c.type in ("LOCAL_COMMENT", "C_COMMENT"):
-                                other_comments.append(str(c).strip())
-                    # Stop looking backwards after finding the first non-comment item
-                    # or a comment block that isn't directly attached (simplification)
-                    break
-                # If the previous item is not a comment, stop looking backwards
-                if not (isinstance(prev, Tree) and prev.data == "comment"):
-                     break
-                i -= 1
-
-        doc = "\n".join(doc_comments)
-        comment = "\n".join(doc_comments + other_comments) # 'comment' includes all types
-        return doc, comment
-
-    def get_line(node):
-        return getattr(node, 'line', None) or getattr(node, 'line_no', None) or -1
-
-    def parse_enum(enum_node, namespace, file, parent_children=None, node_index=None):
-        name = "?"
-        line = get_line(enum_node)
+def load_def_text(text: str, def_file_path: str, parse_mode: str = 'treeless', cache: Optional[EarlyModelCache] = None):
+    """Like load_def_file, for the already read contents `text` of def_file_path."""
+    key = None
+    if cache is not None:
+        key = EarlyModelCache.make_key(text, def_file_path, loader_fingerprint(parse_mode))
+        model = cache.get(key)
+        if model is not None:
+            return model
+    file_namespace = os.path.splitext(os.path.basename(def_file_path))[0]
+    model = build_early_model(text, file_namespace, source_file=def_file_path, parse_mode=parse_mode)
+    if cache is not None:
+        cache.put(key, model)
+    return model
+
+
+def _load_def_file_timed(def_file_path: str, parse_mode: str, cache: Optional[EarlyModelCache]) -> Tuple[EarlyModel, float]:
+    t0 = time.perf_counter()
+    model = load_def_file(def_file_path, parse_mode, cache)
+    return model, time.perf_counter() - t0
+
+
+def load_def_files(root_def_file: str, workers: Optional[int] = None, parse_mode: str = 'treeless',
+                   cache: Optional[EarlyModelCache] = None,
+                   timings: Optional[Dict[str, float]] = None) -> List[EarlyModel]:
+    """
+    Load a .def file and everything it imports, transitively.
+    The import graph is discovered breadth-first; each newly discovered file is parsed as soon as
+    its importer has been, in a pool of `workers` processes (default os.cpu_count(); 1 parses
+    in this process). Returns the EarlyModels in topological_sort_earlymodels order. If `timings`
+    is given, the seconds spent loading each file are stored in it by normalized path.
+    """
+    root = normalize_path(root_def_file)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    loaded = {}
+    seconds = {}
+    if workers <= 1:
+        queue, seen = deque([root]), {root}
+        while queue:
+            path = queue.popleft()
+            loaded[path], seconds[path] = _load_def_file_timed(path, parse_mode, cache)
+            for _, dep in import_edges(path, loaded[path]):
+                if dep not in seen:
+                    seen.add(dep)
+                    queue.append(dep)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(_load_def_file_timed, root, parse_mode, cache): root}
+            seen = {root}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    loaded[path], seconds[path] = future.result()
+                    for _, dep in import_edges(path, loaded[path]):
+                        if dep not in seen:
+                            seen.add(dep)
+                            pending[pool.submit(_load_def_file_timed, dep, parse_mode, cache)] = dep
+        if cache is not None:
+            # The workers wrote to copies of the cache: count their entries, evicting if over the limit
+            cache.evict()
+    # Files finish in arbitrary order; sort from breadth-first discovery order so the result is stable
+    order, queue = {root: None}, deque([root])
+    while queue:
+        path = queue.popleft()
+        for _, dep in import_edges(path, loaded[path]):
+            if dep not in order:
+                order[dep] = None
+                queue.append(dep)
+    if timings is not None:
+        timings.update((path, seconds[path]) for path in order)
+    return topological_sort_earlymodels({path: loaded[path] for path in order})
+
+
+def build_early_model(text: str, file_namespace: str, source_file: str = None, parse_mode: str = 'treeless'):
+    """Parse .def text and build its EarlyModel using one of LOADER_MODES."""
+    if parse_mode not in LOADER_MODES:
+        raise ValueError(f"Unknown parse mode {parse_mode!r}, expected one of {LOADER_MODES}")
+    if parse_mode == 'treeless':
+        parser, builder = _treeless_parser()
+        with _treeless_lock:
+            builder.file_namespace = file_namespace
+            builder.file = source_file or "?"
+            try:
+                return parser.parse(text)
+            except LarkError:
+                pass
+        parse_mode = 'earley'
+    tree = parse_message_dsl(text, mode=parse_mode)
+    return _build_early_model_from_lark_tree(tree, file_namespace, source_file=source_file)
+
+
+_treeless = None
+# The embedded builder carries per-file state, so tree-less parses are serialised
+_treeless_lock = threading.Lock()
+
+
+def _treeless_parser():
+    global _treeless
+    if _treeless is None:
+        builder = EarlyModelBuilder(fold_comments=True)
+        _treeless = (build_parser('lalr', transformer=builder, propagate_positions=False), builder)
+    return _treeless
+
+
+COMMENT_TOKEN_TYPES = frozenset(('DOC_COMMENT', 'LOCAL_COMMENT', 'C_COMMENT'))
+
+
+def _type_info(type_name, **values):
+    """Raw type details for a type_def subtree (same keys as the EarlyField *_raw attributes)."""
+    info = {
+        'type_name': type_name,
+        'raw_type': '?',
+        'element_type_raw': None,
+        'map_key_type_raw': None,
+        'map_value_type_raw': None,
+        'compound_base_type_raw': None,
+        'compound_components_raw': EMPTY,
+        'referenced_name_raw': None,
+        'is_inline_enum': False,
+        'is_inline_options': False,
+        'inline_values_raw': EMPTY,
+    }
+    info.update(values)
+    return info
+
+
+def _token_type_info(token):
+    return _type_info('?', raw_type=str(token))
+
+
+class _RawValue:
+    """
+    An enum_value/option_value node: its own DOC_COMMENT tokens, name, explicit number and the
+    line its last token ends on.
+    """
+    __slots__ = ('kind', 'name', 'value', 'docs', 'line')
+
+    def __init__(self, kind, name, value, docs, line):
+        self.kind = kind
+        self.name = name
+        self.value = value
+        self.docs = docs
+        self.line = line
+
+
+class _ValueList(list):
+    """Flattened value list: a sequence of ('doc', DOC_COMMENT token) and ('value', _RawValue) entries."""
+
+
+class _ImportStmt:
+    __slots__ = ('path', 'alias')
+
+    def __init__(self, path, alias):
+        self.path = path
+        self.alias = alias
+
+
+class EarlyModelBuilder(Transformer):
+    """
+    Builds an EarlyModel from a Lark parse tree in one bottom-up pass, with one method per
+    grammar rule. Accepts trees from either grammar in lark_parser (Earley or LALR).
+
+    Entities are created as soon as their rule completes. Values that depend on the
+    enclosing context (namespace, doc/comment taken from the preceding sibling comment) are
+    filled in by the enclosing namespace/start rule. This reproduces the rules of the original
+    recursive builder:
+      - an entity's doc/comment come only from the comment directly preceding it at top level;
+        entities inside namespaces and fields get empty docs;
+      - value lists are flattened to docs and values whatever way the parser split them; a
+        value's doc is the run of docs before it, else the doc on the same line after it
+        (see _value_docs);
+      - nested namespaces record their own name as parent_namespace, top-level ones None;
+      - only fields carry line numbers, other entities use -1.
+
+    With fold_comments=True the builder consumes raw LALR output (no _earley_compat pass) and
+    applies the same comment folding itself; this is what the tree-less loader embeds in the parser.
+    """
+
+    def __init__(self, file_namespace: str = None, source_file: str = None, fold_comments: bool = False):
+        super().__init__(visit_tokens=False)
+        self.file_namespace = file_namespace
+        self.file = source_file or "?"
+        self.fold_comments = fold_comments
+
+    def build(self, tree):
+        return self.transform(tree)
+
+    # --- comments / names -------------------------------------------------
+
+    def comment(self, children):
+        return children[0]
+
+    def qualified_name_with_dot(self, children):
+        return '::'.join(str(c) for c in children if isinstance(c, Token) and c.type == 'NAME')
+
+    def qualified_name(self, children):
+        return self.qualified_name_with_dot(children)
+
+    def inheritance(self, children):
+        first = children[0] if children else None
+        if isinstance(first, Token):
+            return str(first) if first.type == 'NAME' else None
+        return first or None
+
+    def enum_kind(self, children):
+        return bool(children) and isinstance(children[0], Token) and str(children[0]).strip() == 'open_enum'
+
+    # --- value lists --------------------------------------------------------
+
+    def _flatten_values(self, children):
+        # A value list flattens to its docs and values in source order. Docs the parser folded
+        # into a value are put back in front of it: Earley picks that split differently
+        # depending on the rest of the list, so doc attachment is decided from the flat list
+        # only (see _value_docs).
+        flat = _ValueList()
+        for c in children:
+            if isinstance(c, _ValueList):
+                flat.extend(c)
+            elif isinstance(c, _RawValue):
+                flat.extend(('doc', doc) for doc in c.docs)
+                c.docs = []
+                flat.append(('value', c))
+            elif isinstance(c, Token) and c.type == 'DOC_COMMENT':
+                flat.append(('doc', c))
+        return flat
+
+    enum_value_or_comment_seq = _flatten_values
+    enum_value_or_comment_list = _flatten_values
+    enum_value_or_comment_item = _flatten_values
+    enum_value_or_comment_sep = _flatten_values
+    option_value_or_comment_list = _flatten_values
+    option_value_or_comment_seq = _flatten_values
+    option_value_or_comment_item = _flatten_values
+    option_value_or_comment_sep = _flatten_values
+
+    def _raw_value(self, kind, children):
+        name, value, docs, line = None, None, [], None
+        for c in children:
+            if not isinstance(c, Token):
+                continue
+            if c.type == 'DOC_COMMENT':
+                docs.append(c)
+            elif c.type == 'NAME':
+                name, line = str(c), c.end_line
+            elif c.type == 'NUMBER':
+                value, line = int(str(c)), c.end_line
+        return _RawValue(kind, name, value, docs, line)
+
+    def enum_value(self, children):
+        return self._raw_value('enum', children)
+
+    def option_value(self, children):
+        return self._raw_value('option', children)
+
+    @staticmethod
+    def _value_docs(flat, kind):
+        """
+        (value, doc) for the named values of `kind` in a flattened value list. A doc on the line
+        a value ends on trails that value; every other run of docs (other comments between them
+        included) documents the next value. A value's doc is the run before it, else its trailing doc.
+        """
+        entries = []  # [value, docs before it, docs trailing it]
+        pending = []
+        for typ, item in flat:
+            if typ == 'value':
+                entries.append([item, pending, []])
+                pending = []
+            elif not pending and entries and item.end_line == entries[-1][0].line:
+                entries[-1][2].append(str(item).strip())
+            else:
+                pending.append(str(item).strip())
+        return [(value, "\n".join(before or trailing)) for value, before, trailing in entries
+                if value.kind == kind and value.name is not None]
+
+    @classmethod
+    def _values_raw(cls, flat, kind):
+        """Inline/option value dicts, documented as _value_docs decides."""
+        return [{'name': value.name, 'value': value.value, 'doc': vdoc, 'comment': vdoc}
+                for value, vdoc in cls._value_docs(flat, kind)]
+
+    # --- types ----------------------------------------------------------------
+
+    def type_def(self, children):
+        return children[0] if children else _type_info('?')
+
+    def basic_type(self, children):
+        if children and isinstance(children[0], Token):
+            return _type_info('basic_type', raw_type=str(children[0]))
+        return _type_info('basic_type')
+
+    def ref_type(self, children):
+        name = children[0] if children else None
+        if name:
+            return _type_info('ref_type', raw_type=str(name), referenced_name_raw=str(name))
+        return _type_info('ref_type')
+
+    def enum_type(self, children):
+        for c in children:
+            if isinstance(c, _ValueList):
+                return _type_info('enum_type', is_inline_enum=True, inline_values_raw=self._values_raw(c, 'enum'))
+        for c in children:
+            if isinstance(c, str) and c:
+                return _type_info(str(c), raw_type=str(c), referenced_name_raw=str(c))
+        return _type_info('enum_type')
+
+    def options_type(self, children):
         values = []
-        parent_raw = None
-        is_open_raw = False
-
-        # Grammar: enum_def: DOC_COMMENT* enum_kind NAME inheritance? "{" enum_value_or_comment_list "}"
-        # Extract name, kind, parent, and values by iterating through children
-        name_found = False
-        # Look for enum_kind node and check its token child for 'enum' or 'open_enum'
-        for child_node in enum_node.children:
-            if isinstance(child_node, Tree) and child_node.data == 'enum_kind':
-                if child_node.children and isinstance(child_node.children[0], Token):
-                    kind_val = str(child_node.children[0]).strip()
-                    is_open_raw = (kind_val == 'open_enum')
-                    print(f"[DEBUG] parse_enum: name={name} enum_kind token: {kind_val}, is_open_raw: {is_open_raw}")
-                else:
-                    print(f"[DEBUG] parse_enum: name={name} enum_kind node: {child_node} (no token child)")
+        for c in children:
+            if isinstance(c, _ValueList):
+                values = self._values_raw(c, 'option')
                 break
+        return _type_info('options_type', is_inline_options=True, inline_values_raw=values)
 
-        for child_node in enum_node.children:
-            if not name_found and isinstance(child_node, Token) and child_node.type == 'NAME':
-                name = str(child_node)
-                name_found = True
-            elif isinstance(child_node, Tree) and child_node.data == 'inheritance':
-                # Handle both qualified and unqualified parent enum names
-                if child_node.children:
-                    first_child = child_node.children[0]
-                    if isinstance(first_child, Tree) and first_child.data == 'qualified_name_with_dot':
-                        parent_raw = _extract_raw_type_info(first_child).get('referenced_name_raw')
-                        print(f"[DEBUG] parse_enum: name={name} parent_raw={parent_raw}")
-                    elif isinstance(first_child, Token) and first_child.type == 'NAME':
-                        parent_raw = str(first_child)
-                        print(f"[DEBUG] parse_enum: name={name} parent_raw={parent_raw} (unqualified)")
-            elif isinstance(child_node, Tree) and child_node.data in ('enum_value_or_comment_list', 'enum_value_or_comment_seq'):
-                # Iterate for 'enum_value' subtrees to extract values
-                for v_node in (n for n in child_node.iter_subtrees() if getattr(n, 'data', None) == 'enum_value'):
-                    vname, vval = None, None
-                    vline = get_line(v_node)
-                    v_doc_strings = []
-                    # DOC_COMMENT* are children of enum_value node as per grammar: enum_value: DOC_COMMENT* NAME ...
-                    for v_child_token in v_node.children:
-                        if isinstance(v_child_token, Token) and v_child_token.type == 'DOC_COMMENT':
-                            v_doc_strings.append(str(v_child_token).strip())
-                        elif isinstance(v_child_token, Token) and v_child_token.type == 'NAME':
-                            vname = str(v_child_token)
-                        elif isinstance(v_child_token, Token) and v_child_token.type == 'NUMBER':
-                            vval = int(str(v_child_token))
-                    vdoc = "\n".join(v_doc_strings)
-                    vcomment = vdoc
-                    if vname is not None:
-                        # Only set value if explicitly present, else use None
-                        values.append(EarlyEnumValue(vname, vval, file, namespace, vline, comment=vcomment, doc=vdoc))
-            elif isinstance(child_node, Tree) and child_node.data == 'enum_value': # Direct enum_value child (less common if list is used)
-                v_node = child_node
-                vname, vval = None, None
-                vline = get_line(v_node)
-                v_doc_strings = []
-                for v_child_token in v_node.children:
-                    if isinstance(v_child_token, Token) and v_child_token.type == 'DOC_COMMENT':
-                        v_doc_strings.append(str(v_child_token).strip())
-                    elif isinstance(v_child_token, Token) and v_child_token.type == 'NAME':
-                        vname = str(v_child_token)
-                    elif isinstance(v_child_token, Token) and v_child_token.type == 'NUMBER':
-                        vval = int(str(v_child_token))
-                vdoc = "\n".join(v_doc_strings)
-                vcomment = vdoc # Simplification for EarlyModel
-                if vname is not None:
-                    # Only set value if explicitly present, else use None
-                    values.append(EarlyEnumValue(vname, vval, file, namespace, vline, comment=vcomment, doc=vdoc))
-
-        doc, comment = _extract_comments(enum_node, parent_children, node_index) # For the enum_def itself
-
-        return EarlyEnum(name, values, file, namespace, line, parent_raw=parent_raw, is_open_raw=is_open_raw, comment=comment, doc=doc)
-
-    def _extract_raw_type_info(type_node):
-        """Extract raw type details from a type_def subtree."""
-        info = {
-            'type_name': getattr(type_node, 'data', '?'),
-            'raw_type': '?',
-            'element_type_raw': None,
-            'map_key_type_raw': None,
-            'map_value_type_raw': None,
-            'compound_base_type_raw': None,
-            'compound_components_raw': [],
-            'referenced_name_raw': None,
-            'is_inline_enum': False,
-            'is_inline_options': False,
-            'inline_values_raw': []
-        }
-
-        if isinstance(type_node, Token):
-            info['raw_type'] = str(type_node)
-        elif isinstance(type_node, Tree):
-            info['type_name'] = type_node.data
-            # If this is a primitive type node, set raw_type to its string value
-            if type_node.data in {'int', 'string', 'bool', 'float', 'double'}:
-                info['raw_type'] = type_node.data
-            if type_node.data == 'array_type':
-                if type_node.children:
-                    info['element_type_raw'] = _extract_raw_type_info(type_node.children[0]).get('raw_type')
-            elif type_node.data == 'map_type':
-                # Map type: Map < key , value >
-                # Children: [map_key_type, map_value_type]
-                # Defensive: flatten wrappers and handle missing children
-                key_node = None
-                value_node = None
-                if len(type_node.children) > 1:
-                    key_node = type_node.children[0]
-                    value_node = type_node.children[1]
-                elif len(type_node.children) == 1:
-                    # Sometimes the parser may wrap both in a single child
-                    if hasattr(type_node.children[0], 'children') and len(type_node.children[0].children) == 2:
-                        key_node = type_node.children[0].children[0]
-                        value_node = type_node.children[0].children[1]
-                # Descend into map_key_type/map_value_type wrappers if present
-                if key_node and hasattr(key_node, 'data') and key_node.data == 'map_key_type' and key_node.children:
-                    key_node = key_node.children[0]
-                if value_node and hasattr(value_node, 'data') and value_node.data == 'map_value_type' and value_node.children:
-                    value_node = value_node.children[0]
-                # Unwrap type_def for key_node if present
-                if key_node and hasattr(key_node, 'data') and key_node.data == 'type_def' and key_node.children:
-                    key_node = key_node.children[0]
-                # Unwrap type_def for value_node if present
-                if value_node and hasattr(value_node, 'data') and value_node.data == 'type_def' and value_node.children:
-                    value_node = value_node.children[0]
-                key_info = _extract_raw_type_info(key_node) if key_node else {'raw_type': '?', 'type_name': '?'}
-                value_info = _extract_raw_type_info(value_node) if value_node else {'raw_type': '?', 'type_name': '?'}
-                # Prefer raw_type if set and not '?', else type_name
-                info['map_key_type_raw'] = key_info.get('raw_type') if key_info.get('raw_type') not in (None, '?') else key_info.get('type_name') or '?'
-                info['map_value_type_raw'] = value_info.get('raw_type') if value_info.get('raw_type') not in (None, '?') else value_info.get('type_name') or '?'
-                # Set the type_name for the map itself
-                key_type_str = info.get('map_key_type_raw', '?')
-                value_type_str = info.get('map_value_type_raw', '?')
-                info['type_name'] = f"Map<{key_type_str}, {value_type_str}>"
-            elif type_node.data == 'compound_type':
-                if type_node.children:
-                    base_type_node = type_node.children[0]
-                    if isinstance(base_type_node, Tree) and base_type_node.data == 'basic_type' and base_type_node.children:
-                        info['compound_base_type_raw'] = str(base_type_node.children[0])
-                        info['raw_type'] = str(base_type_node.children[0])
-                    elif isinstance(base_type_node, Token) and base_type_node.type == 'NAME':
-                        info['compound_base_type_raw'] = str(base_type_node)
-                        info['raw_type'] = str(base_type_node)
-                    else:
-                        info['compound_base_type_raw'] = 'UNKNOWN'
-
-                for child in type_node.children:
-                    if isinstance(child, Tree) and child.data == 'compound_component_seq':
-                        for comp_item in (n for n in child.iter_subtrees() if getattr(n, 'data', None) == 'compound_component_item'):
-                            for name_token in comp_item.children:
-                                if isinstance(name_token, Token) and name_token.type == 'NAME':
-                                    info['compound_components_raw'].append(str(name_token))
-                        break
-            elif type_node.data == 'ref_type':
-                # Handle qualified_name_with_dot (usual case)
-                if type_node.children and isinstance(type_node.children[0], Tree) and type_node.children[0].data == 'qualified_name_with_dot':
-                    names = []
-                    for c in type_node.children[0].children:
-                        if isinstance(c, Token) and c.type == 'NAME':
-                            names.append(str(c))
-                    # Patch: handle single-name qualified_name_with_dot as well
-                    if names:
-                        val = '::'.join(names)
-                        info['referenced_name_raw'] = val
-                        info['raw_type'] = val
-                # Handle direct Token (for basic types parsed as ref_type)
-                elif type_node.children and isinstance(type_node.children[0], Token):
-                    val = str(type_node.children[0])
-                    info['referenced_name_raw'] = val
-                    info['raw_type'] = val
-            # Patch: handle qualified_name_with_dot anywhere (for enum inheritance, etc.)
-            elif type_node.data == 'qualified_name_with_dot':
-                names = []
-                for c in type_node.children:
-                    if isinstance(c, Token) and c.type == 'NAME':
-                        names.append(str(c))
-                if names:
-                    val = '::'.join(names)
-                    info['referenced_name_raw'] = val
-                    info['raw_type'] = val
-            elif type_node.data == 'basic_type':
-                if type_node.children and isinstance(type_node.children[0], Token):
-                    info['raw_type'] = str(type_node.children[0])
-            elif type_node.data == 'enum_type':
-                # Patch: distinguish between inline enum and referenced enum
-                has_inline_values = False
-                for child in type_node.children:
-                    if isinstance(child, Tree) and child.data == 'enum_value_or_comment_list':
-                        info['inline_values_raw'] = _parse_value_list_raw(child, kind='enum')
-                        has_inline_values = True
-                        break
-                if has_inline_values:
-                    info['is_inline_enum'] = True
-                else:
-                    # Look for referenced enum name (qualified_name_with_dot or NAME)
-                    for child in type_node.children:
-                        if isinstance(child, Tree) and child.data == 'qualified_name_with_dot':
-                            names = []
-                            for c in child.children:
-                                if isinstance(c, Token) and c.type == 'NAME':
-                                    names.append(str(c))
-                            if names:
-                                val = '::'.join(names)
-                                info['referenced_name_raw'] = val
-                                info['raw_type'] = val
-                                info['type_name'] = val
-                                break
-                        elif isinstance(child, Token) and child.type == 'NAME':
-                            val = str(child)
-                            info['referenced_name_raw'] = val
-                            info['raw_type'] = val
-                            info['type_name'] = val
-                            break
-                    # Do NOT set is_inline_enum if no inline values
-                    info['is_inline_enum'] = False
-            elif type_node.data == 'options_type':
-                info['is_inline_options'] = True
-                for child in type_node.children:
-                    if isinstance(child, Tree) and child.data == 'option_value_or_comment_list':
-                        info['inline_values_raw'] = _parse_value_list_raw(child, kind='option')
-                        break
-            else:
-                for child in type_node.children:
-                    if isinstance(child, Token) and child.type == 'NAME':
-                        info['raw_type'] = str(child)
-                        break
+    def compound_component_item(self, children):
+        return [str(c) for c in children if isinstance(c, Token) and c.type == 'NAME']
 
-        return info
+    def compound_component_sep(self, children):
+        return None
+
+    def compound_component_seq(self, children):
+        return [name for c in children if isinstance(c, list) for name in c]
 
-    def _parse_value_list_raw(values_tree, kind):
-        # (Debug output removed)
-        value_node_name = 'enum_value' if kind == 'enum' else 'option_value'
-        def flatten_nodes(nodes, out):
-            for node in nodes:
-                if isinstance(node, Tree) and getattr(node, 'data', None) in (
-                    'option_value_or_comment_list',
-                    'option_value_or_comment_seq',
-                    'option_value_or_comment_item',
-                    'enum_value_or_comment_list',
-                    'enum_value_or_comment_seq',
-                    'enum_value_or_comment_item',
-                    'option_value_or_comment_sep',
-                    'enum_value_or_comment_sep',
-                ):
-                    flatten_nodes(node.children, out)
-                elif isinstance(node, Tree) and getattr(node, 'data', None) == value_node_name:
-                    out.append(('value', node))
-                elif isinstance(node, Tree) and getattr(node, 'data', None) == 'comment':
-                    for c in node.children:
-                        if isinstance(c, Token) and c.type == 'DOC_COMMENT':
-                            out.append(('doc', str(c).strip()))
-                elif isinstance(node, Token) and node.type == 'DOC_COMMENT':
-                    out.append(('doc', str(node).strip()))
-                # Ignore other nodes (LOCAL_COMMENT, C_COMMENT, etc.)
-        """Generic raw value list parser for enums/options. Returns list of raw value dicts."""
-        raw_values = []
-        if values_tree is None:
-            return raw_values
-
-        value_node_name = 'enum_value' if kind == 'enum' else 'option_value'
-
-        # Flatten the tree into a sequence of ('doc', docstring) and ('value', value_node) pairs
-        def flatten_nodes(nodes, out):
-            for node in nodes:
-                if isinstance(node, Tree) and getattr(node, 'data', None) in (
-                    'option_value_or_comment_list',
-                    'option_value_or_comment_seq',
-                    'option_value_or_comment_item',
-                    'enum_value_or_comment_list',
-                    'enum_value_or_comment_seq',
-                    'enum_value_or_comment_item',
-                    'option_value_or_comment_sep',
-                    'enum_value_or_comment_sep',
-                ):
-                    flatten_nodes(node.children, out)
-                elif isinstance(node, Tree) and getattr(node, 'data', None) == value_node_name:
-                    out.append(('value', node))
-                elif isinstance(node, Tree) and getattr(node, 'data', None) == 'comment':
-                    for c in node.children:
-                        if isinstance(c, Token) and c.type == 'DOC_COMMENT':
-                            out.append(('doc', str(c).strip()))
-                elif isinstance(node, Token) and node.type == 'DOC_COMMENT':
-                    out.append(('doc', str(node).strip()))
-                # Ignore other nodes (LOCAL_COMMENT, C_COMMENT, etc.)
-
-        flat_seq = []
-        if hasattr(values_tree, 'children'):
-            flatten_nodes(values_tree.children, flat_seq)
-
-        # Robust doc association: attach all preceding DOCs to a value, and also attach an inline DOC if it immediately follows
-        doc_buffer = []
-        i = 0
-        n = len(flat_seq)
-        while i < n:
-            typ, item = flat_seq[i]
-            if typ == 'doc':
-                doc_buffer.append(item)
-                i += 1
-            elif typ == 'value':
-                vname = None
-                vval = None
-                child_doc_strings = []
-                for child_token in item.children:
-                    if isinstance(child_token, Token) and child_token.type == 'DOC_COMMENT':
-                        child_doc_strings.append(str(child_token).strip())
-                    elif isinstance(child_token, Token) and child_token.type == 'NAME':
-                        vname = str(child_token)
-                    elif isinstance(child_token, Token) and child_token.type == 'NUMBER':
-                        vval = int(str(child_token))
-                doc_strings = []
-                # Preceding doc comments (buffer) or child doc comments
-                if doc_buffer:
-                    doc_strings.extend(doc_buffer)
-                elif child_doc_strings:
-                    doc_strings.extend(child_doc_strings)
-                # If neither, look for inline doc comment (immediately after value)
-                elif i + 1 < n and flat_seq[i + 1][0] == 'doc':
-                    doc_strings.append(flat_seq[i + 1][1])
-                    i += 1  # Skip the inline doc for the next value
-                vdoc_str = "\n".join([d.strip() for d in doc_strings])
-                vcomment_str = vdoc_str
-                if vname is not None:
-                    raw_values.append({
-                        'name': vname,
-                        'value': vval, # Can be None if no explicit value
-                        'doc': vdoc_str,
-                        'comment': vcomment_str
-                    })
-                doc_buffer.clear()
-                i += 1
+    def compound_type(self, children):
+        info = _type_info('compound_type')
+        if children:
+            base = children[0]
+            if isinstance(base, dict):
+                info['compound_base_type_raw'] = info['raw_type'] = base['raw_type']
+            elif isinstance(base, Token) and base.type == 'NAME':
+                info['compound_base_type_raw'] = info['raw_type'] = str(base)
             else:
-                i += 1
-        return raw_values
+                info['compound_base_type_raw'] = 'UNKNOWN'
+        for c in children[1:]:
+            if isinstance(c, list):
+                info['compound_components_raw'] = c
+                break
+        return info
 
-    def parse_field(field_node, namespace, file, parent_children=None, node_index=None):
+    def array_type(self, children):
+        element = None
+        if children:
+            element = children[0]['raw_type'] if isinstance(children[0], dict) else str(children[0])
+        return _type_info('array_type', element_type_raw=element)
+
+    def map_key_type(self, children):
+        key = children[0]
+        return key if isinstance(key, dict) else _token_type_info(key)
+
+    def map_value_type(self, children):
+        return children[0]
+
+    def map_type(self, children):
+        def type_str(info):
+            if info is None:
+                return '?'
+            raw = info.get('raw_type')
+            return raw if raw not in (None, '?') else info.get('type_name') or '?'
+        key_info = children[0] if len(children) > 0 else None
+        value_info = children[1] if len(children) > 1 else None
+        key_raw = type_str(key_info)
+        value_raw = type_str(value_info)
+        return _type_info(f"Map<{key_raw}, {value_raw}>", map_key_type_raw=key_raw, map_value_type_raw=value_raw)
+
+    # --- fields / definitions ---------------------------------------------------
+
+    def field_modifier(self, children):
+        return [str(c) for c in children if isinstance(c, Token)]
+
+    def default_expr(self, children):
+        tok = children[0] if children else ''
+        if isinstance(tok, Token) and tok.type == 'STRING':
+            return tok.value[1:-1]
+        return str(tok).strip()
+
+    def field_default(self, children):
+        return ('default', children[0]) if children else ('default', None)
+
+    def field(self, children):
         name = "?"
-        line = get_line(field_node)
-        doc, comment = _extract_comments(field_node, parent_children, node_index)
-
+        line = -1
         modifiers_raw = []
-        type_def_node = None
+        type_info = None
         default_value_raw = None
-        options_raw = {}
-
-        for child in field_node.children:
-            if isinstance(child, Tree) and child.data == 'field_modifier':
-                for mod_token in child.children:
-                    if isinstance(mod_token, Token):
-                        modifiers_raw.append(str(mod_token))
-            elif isinstance(child, Token) and child.type == 'NAME':
-                name = str(child)
-            elif isinstance(child, Tree) and child.data == 'type_def':
-                type_def_node = child
-            elif isinstance(child, Tree) and child.data == 'field_default':
-                if child.children:
-                    # default_expr is a regex token or a Token/Tree
-                    val = child.children[0]
-                    # If it's a Token, get its value
-                    if isinstance(val, Token):
-                        # Remove quotes for strings
-                        if val.type == 'STRING':
-                            default_value_raw = val.value[1:-1]
-                        else:
-                            default_value_raw = val.value.strip()
-                    elif isinstance(val, Tree):
-                        # If it's a Tree, try to extract the first token
-                        if val.children:
-                            tok = val.children[0]
-                            if isinstance(tok, Token):
-                                if tok.type == 'STRING':
-                                    default_value_raw = tok.value[1:-1]
-                                else:
-                                    default_value_raw = tok.value.strip()
-                            else:
-                                default_value_raw = str(tok).strip()
-                        else:
-                            default_value_raw = str(val).strip()
-                    else:
-                        default_value_raw = str(val).strip()
-            elif isinstance(child, Tree) and child.data == 'field_options':
-                 # field_options: [ option_assignments ]
-                 for opt_assign_node in child.iter_subtrees('option_assignment'):
-                     opt_name = None
-                     opt_value = None
-                     for opt_part in opt_assign_node.children: # Corrected variable name
-                         if isinstance(opt_part, Token) and opt_part.type == 'NAME':
-                             opt_name = str(opt_part)
-                         elif isinstance(opt_part, Token) and opt_part.type in ('NUMBER', 'STRING'): # Handle simple tokens
-                             opt_value = str(opt_part)
-                         elif isinstance(opt_part, Tree) and opt_part.data == 'default_expr': # Handle default_expr tree
-                             if opt_part.children:
-                                 opt_value = str(opt_part.children[0]).strip()
-                     if opt_name:
-                         options_raw[opt_name] = opt_value
-
-        # Extract raw type info from type_def
-        type_info = _extract_raw_type_info(type_def_node.children[0] if type_def_node and type_def_node.children else None)
-
-
-
-        # Patch: type_name is the type string (prefer referenced_name_raw, then raw_type, then type_type)
-        type_name = type_info.get('referenced_name_raw') or type_info.get('raw_type') or type_info.get('type_name', '?')
-
-        # Set type_type for map/array/compound/enum/options
-        if type_info.get('map_key_type_raw') is not None or type_info.get('map_value_type_raw') is not None:
+        for c in children:
+            if isinstance(c, Token):
+                if c.type == 'NAME':
+                    name = str(c)
+                    line = c.line or -1
+            elif isinstance(c, dict):
+                type_info = c
+            elif isinstance(c, list):
+                modifiers_raw.extend(c)
+            elif isinstance(c, tuple) and c[0] == 'default':
+                default_value_raw = c[1]
+        if type_info is None:
+            type_info = _type_info('?')
+
+        type_name = type_info['referenced_name_raw'] or type_info['raw_type'] or type_info['type_name']
+        if type_info['map_key_type_raw'] is not None or type_info['map_value_type_raw'] is not None:
             type_type = 'map_type'
-        elif type_info.get('element_type_raw') is not None:
+        elif type_info['element_type_raw'] is not None:
             type_type = 'array_type'
-        elif type_info.get('compound_base_type_raw') and type_info.get('compound_components_raw'):
+        elif type_info['compound_base_type_raw'] and type_info['compound_components_raw']:
             type_type = 'compound'
-        elif type_info.get('is_inline_enum', False):
+        elif type_info['is_inline_enum']:
             type_type = 'enum_type'
-        elif type_info.get('is_inline_options', False):
+        elif type_info['is_inline_options']:
             type_type = 'options_type'
+        elif type_name in ('int', 'float', 'string', 'bool', 'double'):
+            type_type = 'primitive'
         else:
-            primitives = {'int', 'float', 'string', 'bool', 'double'}
-            if type_name in primitives:
-                type_type = 'primitive'
-            else:
-                type_type = type_info.get('type_name', '?')
-
-        field = EarlyField(
-            name=name,
-            type_name=type_name,
-            file=file,
-            namespace=namespace,
-            line=line,
-            raw_type=type_info.get('raw_type', '?'),
-            options=options_raw,
-            comment=comment,
-            doc=doc
-        )
+            type_type = type_info['type_name']
+
+        field = EarlyField(name=name, type_name=type_name, file=self.file, namespace=None, line=line,
+                           raw_type=type_info['raw_type'], comment="", doc="")
         field.type_type = type_type
-        field.modifiers_raw = modifiers_raw
+        field.modifiers_raw = modifiers_raw or EMPTY
         field.default_value_raw = default_value_raw
-        field.element_type_raw = type_info.get('element_type_raw')
-        field.map_key_type_raw = type_info.get('map_key_type_raw')
-        field.map_value_type_raw = type_info.get('map_value_type_raw')
-        field.compound_base_type_raw = type_info.get('compound_base_type_raw')
-        field.compound_components_raw = type_info.get('compound_components_raw', [])
-        field.referenced_name_raw = type_info.get('referenced_name_raw')
-        field.is_inline_enum = type_info.get('is_inline_enum', False)
-        field.is_inline_options = type_info.get('is_inline_options', False)
-        field.inline_values_raw = type_info.get('inline_values_raw', [])
-
+        field.element_type_raw = type_info['element_type_raw']
+        field.map_key_type_raw = type_info['map_key_type_raw']
+        field.map_value_type_raw = type_info['map_value_type_raw']
+        field.compound_base_type_raw = type_info['compound_base_type_raw']
+        field.compound_components_raw = type_info['compound_components_raw']
+        field.referenced_name_raw = type_info['referenced_name_raw']
+        field.is_inline_enum = type_info['is_inline_enum']
+        field.is_inline_options = type_info['is_inline_options']
+        field.inline_values_raw = type_info['inline_values_raw']
         return field
 
-    def parse_message(msg_node, namespace, file, parent_children=None, node_index=None):
+    def message_body(self, children):
+        return [c for c in children if isinstance(c, EarlyField)]
+
+    def message(self, children):
         name = "?"
-        line = get_line(msg_node)
-        doc, comment = _extract_comments(msg_node, parent_children, node_index)
+        parent_raw = None
         fields = []
+        for c in children:
+            if isinstance(c, Token):
+                if c.type == 'NAME':
+                    name = str(c)
+            elif isinstance(c, list):
+                fields.extend(c)
+            elif isinstance(c, EarlyField):
+                fields.append(c)
+            elif isinstance(c, str):
+                parent_raw = c
+        return EarlyMessage(name, fields, self.file, None, -1, parent_raw=parent_raw)
+
+    def enum_def(self, children):
+        name = None
         parent_raw = None
-
-        for child in msg_node.children:
-            if isinstance(child, Token) and child.type == 'NAME':
-                name = str(child)
-            elif isinstance(child, Tree) and child.data == 'inheritance':
-                if child.children and isinstance(child.children[0], Tree) and child.children[0].data == 'qualified_name_with_dot':
-                    parent_raw = _extract_raw_type_info(child.children[0]).get('referenced_name_raw')
-            elif isinstance(child, Tree) and child.data == 'message_body':
-                for f_idx, f in enumerate(child.children):
-                    if isinstance(f, Tree) and f.data == 'field':
-                        fields.append(parse_field(f, namespace, file, child.children, f_idx))
-            elif isinstance(child, Tree) and child.data == 'field': # Handle fields directly under message
-                 fields.append(parse_field(child, namespace, file, msg_node.children, msg_node.children.index(child)))
-
-        return EarlyMessage(name, fields, file, namespace, line, parent_raw=parent_raw, comment=comment, doc=doc)
-
-    def parse_namespace(ns_node, file, parent_children=None, node_index=None):
-        name = "?"
-        line = get_line(ns_node)
-        doc, comment = _extract_comments(ns_node, parent_children, node_index)
-        messages, enums, options, compounds, namespaces = [], [], [], [], []
-
-        if ns_node.children:
-             name_token = ns_node.children[0]
-             if isinstance(name_token, Token) and name_token.type == 'NAME':
-                 name = str(name_token)
-
-        # Iterate through items within the namespace body
-        # Assuming grammar: "namespace" NAME "{" item* "}"
-        # Items are children after NAME and '{' up to '}'
-        # The loop should start from index 1 (after NAME)
-        print(f"[DEBUG] parse_namespace: ns='{name}' children after NAME: {[getattr(c, 'data', type(c)) for c in ns_node.children[1:]]}")
-        def flatten_namespace_items(nodes):
-            result = []
-            for n in nodes:
-                if not isinstance(n, Tree):
-                    continue
-                if hasattr(n, 'data') and n.data in ('block', 'item'):
-                    result.extend(flatten_namespace_items(n.children))
-                else:
-                    result.append(n)
-            return result
-
-        flat_nodes = flatten_namespace_items(ns_node.children[1:])
-        for child_idx, subnode in enumerate(flat_nodes):
-            if not isinstance(subnode, Tree):
-                continue
-            print(f"[DEBUG] parse_namespace: ns='{name}' subnode data: {getattr(subnode, 'data', type(subnode))}")
-            if subnode.data == 'namespace':
-                namespaces.append(parse_namespace(subnode, file, flat_nodes, child_idx + 1))
-            elif subnode.data == 'message':
-                messages.append(parse_message(subnode, name, file, ns_node.children, child_idx + 1))
-            elif subnode.data == 'enum_def':
-                enums.append(parse_enum(subnode, name, file, ns_node.children, child_idx + 1))
-            elif subnode.data == 'options_def':
-                options.append(_parse_options_def(subnode, name, file, ns_node.children, child_idx + 1))
-            elif subnode.data == 'compound_def':
-                compounds.append(_parse_compound_def(subnode, name, file, ns_node.children, child_idx + 1))
-            # Ignore 'comment' and 'import_stmt' at this level if they appear (grammar might prevent imports)
-
-        # Determine parent namespace name (None if root)
-        parent_ns = None
-        if parent_children is not None and node_index is not None:
-            # Find the parent namespace node if any
-            for i in range(node_index - 1, -1, -1):
-                prev = parent_children[i]
-                if isinstance(prev, Tree) and getattr(prev, 'data', None) == 'namespace':
-                    if prev.children and isinstance(prev.children[0], Token) and prev.children[0].type == 'NAME':
-                        parent_ns = str(prev.children[0])
-                    break
-
-        return EarlyNamespace(name, messages, enums, file, line, options=options, compounds=compounds, comment=comment, doc=doc, namespaces=namespaces, parent_namespace=parent_ns)
-
-    def _parse_options_def(options_node, namespace, file, parent_children=None, node_index=None):
+        is_open_raw = None
+        values = []
+        for c in children:
+            if isinstance(c, bool):
+                if is_open_raw is None:
+                    is_open_raw = c
+            elif isinstance(c, Token):
+                if c.type == 'NAME' and name is None:
+                    name = str(c)
+            elif isinstance(c, _ValueList):
+                for value, vdoc in self._value_docs(c, 'enum'):
+                    values.append(EarlyEnumValue(value.name, value.value, self.file, None, -1, comment=vdoc, doc=vdoc))
+            elif isinstance(c, str):
+                parent_raw = c
+        return EarlyEnum(name or "?", values, self.file, None, -1, parent_raw=parent_raw,
+                         is_open_raw=bool(is_open_raw))
+
+    def options_def(self, children):
         name = "?"
-        line = get_line(options_node)
-        # Robust doc extraction: check both preceding siblings and direct children for DOC_COMMENT
-        doc, comment = _extract_comments(options_node, parent_children, node_index)
-        # If doc is empty, check for DOC_COMMENT tokens as direct children
-        if not doc:
-            doc_comments = []
-            for child in options_node.children:
-                if isinstance(child, Token) and child.type == 'DOC_COMMENT':
-                    doc_comments.append(str(child).strip())
-            if doc_comments:
-                doc = "\n".join(doc_comments)
-        values_tree = None
-
-        for child in options_node.children:
-            if isinstance(child, Token) and child.type == 'NAME':
-                name = str(child)
-            elif isinstance(child, Tree) and child.data == 'option_value_or_comment_list':
-                values_tree = child
-
-        values_raw = _parse_value_list_raw(values_tree, kind='option')
-
-        return {
-            'name': name,
-            'namespace': namespace,
-            'file': file,
-            'line': line,
-            'doc': doc,
-            'comment': comment,
-            'values_raw': values_raw
-        }
-
-    def _parse_compound_def(compound_node, namespace, file, parent_children=None, node_index=None):
+        docs = []
+        values_raw = []
+        for c in children:
+            if isinstance(c, Token):
+                if c.type == 'NAME':
+                    name = str(c)
+                elif c.type == 'DOC_COMMENT':
+                    docs.append(str(c).strip())
+            elif isinstance(c, _ValueList):
+                values_raw = self._values_raw(c, 'option')
+        # 'doc' holds the DOC_COMMENT children; used when no preceding comment supplies one
+        return {'name': name, 'namespace': None, 'file': self.file, 'line': -1,
+                'doc': "\n".join(docs), 'comment': "", 'values_raw': values_raw}
+
+    def compound_def(self, children):
         name = "?"
-        line = get_line(compound_node)
-        doc, comment = _extract_comments(compound_node, parent_children, node_index)
         base_type_raw = None
         components_raw = []
-
-        for child in compound_node.children:
-            if isinstance(child, Tree) and child.data == 'basic_type':
-                if child.children and isinstance(child.children[0], Token):
-                    base_type_raw = str(child.children[0])
-            elif isinstance(child, Token) and child.type == 'NAME':
-                # The first NAME after basic_type is the compound definition name
+        for c in children:
+            if isinstance(c, dict):
+                base_type_raw = c['raw_type'] if c['raw_type'] != '?' else None
+            elif isinstance(c, Token) and c.type == 'NAME':
                 if name == "?":
-                    name = str(child)
-                else: # Subsequent NAME tokens are components
-                    components_raw.append(str(child))
-            elif isinstance(child, Tree) and child.data == 'compound_component_seq':
-                 # This rule seems to be for inline compounds, but grammar uses it for standalone too
-                 for comp_item in child.iter_subtrees('compound_component_item'):
-                     for name_token in comp_item.children:
-                         if isinstance(name_token, Token) and name_token.type == 'NAME':
-                             components_raw.append(str(name_token))
-
-        return {
-            'name': name,
-            'namespace': namespace,
-            'file': file,
-            'line': line,
-            'doc': doc,
-            'comment': comment,
-            'base_type_raw': base_type_raw,
-            'components_raw': components_raw
-        }
-
-    namespaces = []
-    free_messages = [] # Top-level messages
-    free_enums = [] # Top-level enums
-    options = [] # Top-level options_def
-    compounds = [] # Top-level compound_def
-    imports_raw = [] # List of (path, alias) tuples
-
-    # Top-level: scan for namespaces, messages, enums, options_def, compound_def, import_stmt
-    for idx, node in enumerate(tree.children):
-      if not isinstance(node, Tree):
-          continue
-      # Flat logic: if this is an 'item', process its children as if they were top-level
-      nodes_to_check = [node]
-      if node.data == 'item':
-          nodes_to_check = node.children
-      for subnode in nodes_to_check:
-          if not isinstance(subnode, Tree):
-              continue
-          if subnode.data == 'namespace':
-              namespaces.append(parse_namespace(subnode, file, tree.children, idx))
-          elif subnode.data == 'message':
-              ns_name = current_processing_file_namespace
-              free_messages.append(parse_message(subnode, ns_name, file, tree.children, idx))
-          elif subnode.data == 'enum_def':
-              ns_name = current_processing_file_namespace
-              free_enums.append(parse_enum(subnode, ns_name, file, tree.children, idx))
-          elif subnode.data == 'options_def':
-              ns_name = current_processing_file_namespace
-              options.append(_parse_options_def(subnode, ns_name, file, tree.children, idx))
-          elif subnode.data == 'compound_def':
-              ns_name = current_processing_file_namespace
-              compounds.append(_parse_compound_def(subnode, ns_name, file, tree.children, idx))
-          elif subnode.data == 'import_stmt':
-              path = None
-              alias = None
-              for child in subnode.children:
-                  if isinstance(child, Token) and child.type == 'STRING':
-                      path = str(child).strip('"')
-                  elif isinstance(child, Token) and child.type == 'NAME':
-                      alias = str(child)
-              if path:
-                  imports_raw.append((path, alias))
-          # Ignore 'comment' at this level
-
-    # The EarlyModel constructor needs to be updated to accept the new lists
-    return EarlyModel(namespaces, free_enums, free_messages, options, compounds, imports_raw, file)
\ No newline at end of file
+                    name = str(c)
+                else:
+                    components_raw.append(str(c))
+            elif isinstance(c, list):
+                components_raw.extend(c)
+        return {'name': name, 'namespace': None, 'file': self.file, 'line': -1, 'doc': "", 'comment': "",
+                'base_type_raw': base_type_raw, 'components_raw': components_raw}
+
+    def import_stmt(self, children):
+        path, alias = None, None
+        for c in children:
+            if isinstance(c, Token):
+                if c.type == 'STRING':
+                    path = str(c).strip('"')
+                elif c.type == 'NAME':
+                    alias = str(c)
+        return _ImportStmt(path, alias)
+
+    def item(self, children):
+        return children
+
+    # --- containers ----------------------------------------------------------
+
+    @staticmethod
+    def _place(entity, namespace, doc, comment):
+        """Give a definition its enclosing namespace and its doc/comment."""
+        if isinstance(entity, dict):
+            entity['namespace'] = namespace
+            if 'values_raw' in entity:
+                entity['doc'] = doc or entity['doc']
+            else:
+                entity['doc'] = doc
+            entity['comment'] = comment
+            return
+        entity.doc = doc
+        entity.comment = comment
+        if isinstance(entity, EarlyNamespace):
+            return
+        entity.namespace = namespace
+        for child in getattr(entity, 'fields', None) or getattr(entity, 'values', None) or ():
+            child.namespace = namespace
+
+    @staticmethod
+    def _sort(entity, namespaces, messages, enums, options, compounds):
+        if isinstance(entity, EarlyNamespace):
+            namespaces.append(entity)
+        elif isinstance(entity, EarlyMessage):
+            messages.append(entity)
+        elif isinstance(entity, EarlyEnum):
+            enums.append(entity)
+        elif isinstance(entity, dict):
+            (options if 'values_raw' in entity else compounds).append(entity)
+        else:
+            return False
+        return True
+
+    @staticmethod
+    def _absorbs(entity, comment):
+        if isinstance(entity, EarlyMessage):
+            return True
+        if isinstance(entity, (EarlyEnum, dict)):
+            return comment.type == 'DOC_COMMENT'
+        return False
+
+    def _fold(self, elements, started=False):
+        """
+        Object-level equivalent of lark_parser._fold_comments(): drop the comments that the
+        Earley parser would have folded into the following definition, so they no longer act
+        as its preceding comment. Folded doc comments become an options_def's own docs.
+        `started` tells whether `elements` continue a block that already had a definition or import.
+        """
+        out = []
+        pending = []  # (element, comment token)
+        for el in elements:
+            if isinstance(el, Token):
+                pending.append((el, el))
+                continue
+            entity = el[0] if isinstance(el, list) and el else None
+            if isinstance(entity, Token):
+                pending.append((el, entity))
+                continue
+            if entity is not None and pending:
+                k = 0
+                while k < len(pending) and self._absorbs(entity, pending[-1 - k][1]):
+                    k += 1
+                take = k if (not out and not started and k == len(pending)) else k - k % 2
+                if take:
+                    taken = [tok for _, tok in pending[len(pending) - take:]]
+                    del pending[len(pending) - take:]
+                    if isinstance(entity, dict) and 'values_raw' in entity:
+                        docs = [str(tok).strip() for tok in taken if tok.type == 'DOC_COMMENT']
+                        if entity['doc']:
+                            docs.append(entity['doc'])
+                        entity['doc'] = "\n".join(docs)
+            out.extend(e for e, _ in pending)
+            pending = []
+            out.append(el)
+        out.extend(e for e, _ in pending)
+        return out
+
+    def namespace(self, children):
+        name = str(children[0]) if children and isinstance(children[0], Token) and children[0].type == 'NAME' else "?"
+        namespaces, messages, enums, options, compounds = [], [], [], [], []
+        items = self._fold(children[1:]) if self.fold_comments else children[1:]
+        for c in items:
+            for entity in (c if isinstance(c, list) else (c,)):
+                if self._sort(entity, namespaces, messages, enums, options, compounds):
+                    self._place(entity, name, "", "")
+        for ns in namespaces:
+            ns.parent_namespace = ns.name
+        return EarlyNamespace(name, messages, enums, self.file, -1, options=options, compounds=compounds,
+                              namespaces=namespaces)
+
+    def start(self, children):
+        namespaces, messages, enums, options, compounds = [], [], [], [], []
+        imports_raw = []
+        if self.fold_comments:
+            children = self._fold(children)
+        for entity in self._top_level(children):
+            if isinstance(entity, _ImportStmt):
+                imports_raw.append((entity.path, entity.alias))
+            else:
+                self._sort(entity, namespaces, messages, enums, options, compounds)
+        return EarlyModel(namespaces, enums, messages, options, compounds, imports_raw, self.file)
+
+    def _top_level(self, children):
+        """
+        Yield the imports and definitions among the top-level `children`, in order. Definitions
+        are placed in the file namespace with the doc/comment of the comment directly before them.
+        """
+        prev = None
+        for c in children:
+            if isinstance(c, _ImportStmt):
+                if c.path:
+                    yield c
+            elif isinstance(c, list):
+                doc, comment = "", ""
+                if isinstance(prev, Token) and prev.type in COMMENT_TOKEN_TYPES:
+                    comment = str(prev).strip()
+                    if prev.type == 'DOC_COMMENT':
+                        doc = comment
+                for entity in c:
+                    if isinstance(entity, _ImportStmt):
+                        if entity.path:
+                            yield entity
+                    elif isinstance(entity, (EarlyNamespace, EarlyMessage, EarlyEnum, dict)):
+                        self._place(entity, self.file_namespace, doc, comment)
+                        yield entity
+            prev = c
+
+
+def _build_early_model_from_lark_tree(tree, current_processing_file_namespace: str, source_file: str = None):
+    """Build an EarlyModel from a Lark parse tree, capturing raw information."""
+    return EarlyModelBuilder(current_processing_file_namespace, source_file).build(tree)
@@ -0,0 +1,146 @@
+"""
+def_file_stream.py
+Streaming reader for very large .def files.
+
+The file is memory-mapped and split into top-level segments without decoding it as a whole: each
+segment runs up to the closing brace of the next top-level definition (and so carries the comments
+and imports in front of it). Segments are parsed one at a time by the tree-less LALR parser, and
+the resulting top-level items are yielded as soon as their segment is parsed, so consumers can
+start working before the rest of the file has been read. load_def_file_streaming() builds the same
+EarlyModel as def_file_loader.load_def_file.
+"""
+import mmap
+import os
+import re
+import threading
+from typing import Iterator, Tuple
+
+from lark.exceptions import LarkError
+from lark_parser import build_parser, parse_message_dsl
+from early_model import EarlyModel, EarlyNamespace, EarlyMessage, EarlyEnum
+from def_file_loader import EarlyModelBuilder, _ImportStmt
+
+# Characters that matter when looking for the end of a top-level definition
+_SCAN = re.compile(rb'[{}"]|//|/\*')
+_STRING_TAIL = re.compile(rb'(?:\\.|[^"\\])*"', re.DOTALL)
+
+
+def iter_segments(data) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) byte offsets of the top-level segments of .def source `data` (bytes or an
+    mmap). Braces inside comments and string literals are ignored.
+    """
+    size = len(data)
+    pos = start = depth = 0
+    while True:
+        m = _SCAN.search(data, pos)
+        if m is None:
+            break
+        tok, pos = m.group(), m.end()
+        if tok == b'//':
+            nl = data.find(b'\n', pos)
+            pos = size if nl < 0 else nl + 1
+        elif tok == b'/*':
+            end = data.find(b'*/', pos)
+            pos = size if end < 0 else end + 2
+        elif tok == b'"':
+            m = _STRING_TAIL.match(data, pos)
+            pos = size if m is None else m.end()
+        elif tok == b'{':
+            depth += 1
+        elif depth > 0:
+            depth -= 1
+            if depth == 0:
+                yield start, pos
+                start = pos
+    if start < size:
+        yield start, size
+
+
+class _SegmentBuilder(EarlyModelBuilder):
+    """Builds the raw top-level children of one segment; folding and placement happen in the stream."""
+
+    def start(self, children):
+        return children
+
+
+_segment_parser = None
+_segment_lock = threading.Lock()
+
+
+def _parse_segment(text, file_namespace, source_file):
+    global _segment_parser
+    with _segment_lock:
+        if _segment_parser is None:
+            builder = _SegmentBuilder(fold_comments=True)
+            _segment_parser = (build_parser('lalr', transformer=builder, propagate_positions=False), builder)
+        parser, builder = _segment_parser
+        builder.file_namespace = file_namespace
+        builder.file = source_file
+        try:
+            return parser.parse(text)
+        except LarkError:
+            pass
+    return _SegmentBuilder(file_namespace, source_file).transform(parse_message_dsl(text, mode='earley'))
+
+
+def _shift_lines(entity, offset):
+    """Move the field line numbers of a definition parsed from a segment to file line numbers."""
+    if isinstance(entity, EarlyMessage):
+        for field in entity.fields:
+            if field.line is not None and field.line > 0:
+                field.line += offset
+    elif isinstance(entity, EarlyNamespace):
+        for child in entity.messages + entity.namespaces:
+            _shift_lines(child, offset)
+
+
+def _kind(entity):
+    if isinstance(entity, EarlyNamespace):
+        return 'namespace'
+    if isinstance(entity, EarlyMessage):
+        return 'message'
+    if isinstance(entity, EarlyEnum):
+        return 'enum'
+    return 'options' if 'values_raw' in entity else 'compound'
+
+
+def iter_def_file(def_file_path: str) -> Iterator[Tuple[str, object]]:
+    """
+    Stream the top-level items of a .def file in source order, as (kind, item) pairs:
+    ('import', (path, alias)), or 'namespace' / 'message' / 'enum' / 'options' / 'compound' with
+    the item exactly as it appears in the EarlyModel built by load_def_file.
+    """
+    file_namespace = os.path.splitext(os.path.basename(def_file_path))[0]
+    with open(def_file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            folder = EarlyModelBuilder(file_namespace, def_file_path)
+            started = False
+            line = 0  # newlines before the current segment
+            for start, end in iter_segments(data):
+                raw = data[start:end]
+                text = raw.decode('utf-8')
+                if '\r' in text:
+                    text = text.replace('\r\n', '\n').replace('\r', '\n')
+                if text.strip():
+                    children = folder._fold(_parse_segment(text, file_namespace, def_file_path), started)
+                    for entity in folder._top_level(children):
+                        started = True
+                        if isinstance(entity, _ImportStmt):
+                            yield 'import', (entity.path, entity.alias)
+                            continue
+                        if line:
+                            _shift_lines(entity, line)
+                        yield _kind(entity), entity
+                line += raw.count(b'\n')
+
+
+def load_def_file_streaming(def_file_path: str) -> EarlyModel:
+    """Load a .def file into an EarlyModel through iter_def_file."""
+    items = {'namespace': [], 'message': [], 'enum': [], 'options': [], 'compound': [], 'import': []}
+    for kind, item in iter_def_file(def_file_path):
+        items[kind].append(item)
+    return EarlyModel(items['namespace'], items['enum'], items['message'], items['options'],
+                      items['compound'], items['import'], def_file_path)
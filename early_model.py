@@ -1,10 +1,86 @@
 """
 early_model.py
 A raw representation of the parsed message model, capturing information directly from the parser (including file, namespace, line number, type, comments, modifiers, etc.). This is the raw model before any manipulations or semantic processing.
+
+The node classes use __slots__ to keep large models small: empty list/dict attributes share the
+immutable EMPTY / EMPTY_OPTIONS defaults (assign a new list to change them) and file/namespace
+strings are interned whenever they are assigned. Attributes the builder and transforms set after
+construction (qfn, type_type, ...) have slots too, and the nodes have no instance __dict__:
+setting an attribute without a slot raises AttributeError. EarlyModel is a plain class.
 """
+import sys
 from typing import List, Optional, Dict, Any, Tuple
 
+EMPTY: tuple = ()
+
+
+class _EmptyOptions(dict):
+    """Immutable, shared empty options mapping."""
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("EMPTY_OPTIONS is immutable; assign a new dict instead")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return 'EMPTY_OPTIONS'
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+EMPTY_OPTIONS: Dict[str, Any] = _EmptyOptions()
+
+
+class _Interned:
+    """Wraps a slot so that strings assigned to it are interned."""
+    __slots__ = ('slot',)
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, obj, cls=None):
+        return self if obj is None else self.slot.__get__(obj, cls)
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, sys.intern(value) if type(value) is str else value)
+
+    def __delete__(self, obj):
+        self.slot.__delete__(obj)
+
+
+def _interned(*names):
+    """Class decorator: intern strings assigned to the slots `names`."""
+    def decorate(cls):
+        for name in names:
+            setattr(cls, name, _Interned(cls.__dict__[name]))
+        return cls
+    return decorate
+
+
+def node_attributes(obj) -> Dict[str, Any]:
+    """All attributes set on an early model node (slots, then __dict__), like vars() for plain objects."""
+    attrs = {}
+    for cls in reversed(type(obj).__mro__):
+        for name in cls.__dict__.get('__slots__', ()):
+            if name != '__dict__' and hasattr(obj, name):
+                attrs[name] = getattr(obj, name)
+    attrs.update(getattr(obj, '__dict__', {}))
+    return attrs
+
+
+@_interned('file', 'namespace')
 class EarlyField:
+    __slots__ = ('name', 'type_name', 'file', 'namespace', 'line', 'raw_type', 'options_raw', 'comment', 'doc',
+                 'element_type_raw', 'map_key_type_raw', 'map_value_type_raw', 'compound_base_type_raw',
+                 'compound_components_raw', 'referenced_name_raw', 'is_inline_enum', 'is_inline_options',
+                 'inline_values_raw', 'modifiers_raw', 'default_value_raw',
+                 'type_type', '_patch_enum_qfn_hint')
+
     def __init__(self, name: str, type_name: str, file: str, namespace: str, line: int, raw_type: str, options: Optional[Dict[str, Any]] = None, comment: str = "", doc: str = ""):
         self.name: str = name
         self.type_name: str = type_name
@@ -12,7 +88,7 @@ class EarlyField:
         self.namespace: str = namespace
         self.line: int = line
         self.raw_type: str = raw_type  # e.g. 'int', 'string', 'MyEnum', 'array_type', 'map_type', etc.
-        self.options_raw: Dict[str, str] = options or {} # Raw options like [default=5]
+        self.options_raw: Dict[str, str] = options or EMPTY_OPTIONS # Raw options like [default=5]
         self.comment: str = comment # All comments (///, //, /* */)
         self.doc: str = doc # Only doc comments (///)
 
@@ -21,16 +97,19 @@ class EarlyField:
         self.map_key_type_raw: Optional[str] = None # For map_type
         self.map_value_type_raw: Optional[str] = None # For map_type
         self.compound_base_type_raw: Optional[str] = None # For compound_type
-        self.compound_components_raw: List[str] = [] # For compound_type
+        self.compound_components_raw: List[str] = EMPTY # For compound_type
         self.referenced_name_raw: Optional[str] = None # For ref_type
         self.is_inline_enum: bool = False # For inline enum_type
         self.is_inline_options: bool = False # For inline options_type
-        self.inline_values_raw: List[Dict[str, Any]] = [] # Raw values for inline enums/options
+        self.inline_values_raw: List[Dict[str, Any]] = EMPTY # Raw values for inline enums/options
 
-        self.modifiers_raw: List[str] = [] # e.g., ['optional', 'repeated']
+        self.modifiers_raw: List[str] = EMPTY # e.g., ['optional', 'repeated']
         self.default_value_raw: Optional[str] = None # Raw string from default_expr
 
+@_interned('file', 'namespace')
 class EarlyEnumValue:
+    __slots__ = ('name', 'value', 'file', 'namespace', 'line', 'comment', 'doc')
+
     def __init__(self, name: str, value: int, file: str, namespace: str, line: int, comment: str = "", doc: str = ""):
         self.name = name
         self.value = value
@@ -40,7 +119,11 @@ class EarlyEnumValue:
         self.comment = comment
         self.doc = doc
 
+@_interned('file', 'namespace')
 class EarlyEnum:
+    __slots__ = ('name', 'values', 'file', 'namespace', 'line', 'comment', 'doc', 'parent_raw', 'is_open_raw',
+                 'qfn', 'is_options_raw')
+
     def __init__(self, name: str, values: List[EarlyEnumValue], file: str, namespace: str, line: int,
                  parent_raw: Optional[str] = None, is_open_raw: bool = False,
                  comment: str = "", doc: str = ""):
@@ -54,7 +137,10 @@ class EarlyEnum:
         self.parent_raw = parent_raw
         self.is_open_raw = is_open_raw
 
+@_interned('file', 'namespace')
 class EarlyMessage:
+    __slots__ = ('name', 'fields', 'file', 'namespace', 'line', 'comment', 'doc', 'parent_raw', 'qfn')
+
     def __init__(self, name: str, fields: List[EarlyField], file: str, namespace: str, line: int, parent_raw: Optional[str] = None, comment: str = "", doc: str = ""):
         self.name = name
         self.fields = fields
@@ -65,7 +151,11 @@ class EarlyMessage:
         self.doc = doc
         self.parent_raw = parent_raw
 
+@_interned('file')
 class EarlyNamespace:
+   __slots__ = ('name', 'messages', 'enums', 'file', 'line', 'comment', 'doc', 'options', 'compounds', 'namespaces',
+                'parent_namespace', 'qfn')
+
    def __init__(self, name: str, messages: List[EarlyMessage], enums: List[EarlyEnum], file: str, line: int,
                  options: List[Dict[str, Any]] = None, compounds: List[Dict[str, Any]] = None,
                  comment: str = "", doc: str = "", namespaces: List['EarlyNamespace'] = None, parent_namespace: str = None):
@@ -81,6 +171,9 @@ class EarlyNamespace:
         self.namespaces = namespaces if namespaces is not None else []
         self.parent_namespace = parent_namespace
 
+# The node classes: slotted, with no instance __dict__ (tree walkers test for these, not for __dict__)
+EARLY_NODE_CLASSES = (EarlyField, EarlyEnumValue, EarlyEnum, EarlyMessage, EarlyNamespace)
+
 class EarlyModel:
   def __init__(
     self,
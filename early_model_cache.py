@@ -0,0 +1,131 @@
+"""
+early_model_cache.py
+Opt-in, content-addressed on-disk cache of built EarlyModels for def_file_loader.load_def_file.
+
+Entries are keyed by the .def file's content hash, its path (the model records the source file),
+the grammar fingerprint and def_file_loader.LOADER_VERSION. Each entry is a zlib-compressed pickle
+of the EarlyModel. The cache directory is bounded by total size; the least recently used entries
+(by mtime, refreshed on every hit) are evicted first. The total is counted once when the cache is
+opened and then kept up to date by put(), which only scans the directory again to evict once the
+total is over the limit. Entries written by other processes (or by copies of this cache sent to
+worker processes) are counted at the next evict(); entries dropped by get() are counted until then.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+from typing import Optional
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_SUFFIX = '.earlymodel'
+
+
+class EarlyModelCache:
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.total_bytes = self.size()  # bytes in the cache as far as this instance knows
+
+    @staticmethod
+    def make_key(text: str, source_file: str, version: str) -> str:
+        h = hashlib.sha256()
+        h.update(version.encode('utf-8'))
+        h.update(b'\0')
+        h.update(source_file.encode('utf-8'))
+        h.update(b'\0')
+        h.update(text.encode('utf-8'))
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + _SUFFIX)
+
+    def get(self, key: str):
+        """Return the cached EarlyModel for `key`, or None on a miss or unreadable entry."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            model = pickle.loads(zlib.decompress(data))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # Corrupt/truncated/incompatible entry: drop it and rebuild
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        self.hits += 1
+        return model
+
+    def put(self, key: str, model) -> None:
+        data = zlib.compress(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+        # Write atomically so concurrent builds never observe a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        path = self._path(key)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            try:
+                replaced = os.stat(path).st_size
+            except OSError:
+                replaced = 0
+            os.replace(tmp, path)
+        except OSError:
+            self._remove(tmp)
+            return
+        self.total_bytes += len(data) - replaced
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def size(self) -> int:
+        return sum(size for _, _, size in self._entries())
+
+    def evict(self, max_bytes: Optional[int] = None) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes (and recount it)."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self._entries()
+        total = sum(size for _, _, size in entries)
+        if total > limit:
+            for _, path, size in sorted(entries):
+                if total <= limit:
+                    break
+                self._remove(path)
+                total -= size
+        self.total_bytes = total
+
+    def clear(self) -> None:
+        for _, path, _ in self._entries():
+            self._remove(path)
+        self.total_bytes = 0
+
+    def _entries(self):
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, path, st.st_size))
+        return entries
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
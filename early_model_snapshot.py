@@ -0,0 +1,161 @@
+"""
+early_model_snapshot.py
+Copy-on-write EarlyModel snapshots: run early transforms without touching the input model and
+get back a new model that shares every node the transforms left alone.
+
+transform_snapshot() clones the node tree (new node objects, and new lists and dicts for their
+attributes down to the dicts inside them, such as option entries and raw inline values; strings,
+tuples and other values are shared), runs the transforms
+on the clone in place, then folds the result back onto the input bottom-up. A cloned namespace,
+message, field, enum or enum value whose attributes and children all come out identical is
+replaced by its original, so whole untouched subtrees are the input's own objects; a changed node
+keeps the original lists it did not change.
+
+Snapshots share structure, so treat them as read-only: transform them again with
+transform_snapshot() (not in place) and every earlier snapshot stays valid. Values the model
+publishes that index its nodes (model.symbol_table, model.inheritance_index) are copied for the
+run and re-pointed at the shared nodes afterwards; see their copy() and remap_nodes() methods.
+"""
+from typing import Dict, List, Tuple
+
+from early_model import EarlyModel, EarlyNamespace, EarlyMessage, EarlyEnum, EarlyEnumValue, EarlyField
+from early_transform_pipeline import EarlyTransform, run_early_transform_pipeline
+
+# Attributes holding child nodes, per node class
+_CHILDREN: Dict[type, Tuple[str, ...]] = {
+    EarlyModel: ('namespaces', 'messages', 'enums'),
+    EarlyNamespace: ('namespaces', 'messages', 'enums'),
+    EarlyMessage: ('fields',),
+    EarlyEnum: ('values',),
+    EarlyField: (),
+    EarlyEnumValue: (),
+}
+_SCALARS = (str, int, bool, float, tuple, type(None))
+_MISSING = object()
+_slot_cache: Dict[type, Tuple[str, ...]] = {}
+
+
+def _slots(cls) -> Tuple[str, ...]:
+    names = _slot_cache.get(cls)
+    if names is None:
+        names = _slot_cache[cls] = tuple(name for klass in reversed(cls.__mro__)
+                                         for name in klass.__dict__.get('__slots__', ()) if name != '__dict__')
+    return names
+
+
+def _copy_value(value):
+    """Copy of the lists and dicts in value (nested ones too); anything else is shared."""
+    t = type(value)
+    if t is list:
+        return [_copy_value(v) for v in value]
+    if t is dict:
+        return {k: _copy_value(v) for k, v in value.items()}
+    return value
+
+
+def _same(a, b) -> bool:
+    if a is b:
+        return True
+    t = type(a)
+    if t is not type(b):
+        return False
+    if t in _SCALARS:
+        return a == b
+    if t is list:
+        return len(a) == len(b) and all(x is y or _same(x, y) for x, y in zip(a, b))
+    if t is dict:
+        return a.keys() == b.keys() and all(v is b[k] or _same(v, b[k]) for k, v in a.items())
+    return False
+
+
+def _clone(node, originals: Dict[object, object]):
+    """Copy of node and (recursively) its child nodes; records clone -> original."""
+    cls = type(node)
+    new = cls.__new__(cls)
+    for name in _slots(cls):
+        value = getattr(node, name, _MISSING)
+        if value is not _MISSING:
+            setattr(new, name, _copy_value(value))
+    attrs = getattr(node, '__dict__', None)
+    if attrs:
+        new.__dict__.update({name: _copy_value(value) for name, value in attrs.items()})
+    for name in _CHILDREN[cls]:
+        children = getattr(new, name, None)
+        if type(children) is list:
+            setattr(new, name, [_clone(child, originals) for child in children])
+    originals[new] = node
+    return new
+
+
+def _fold(node, originals: Dict[object, object], shared: Dict[object, object]):
+    """Replace unchanged clones under (and including) node by their originals; returns the node to keep."""
+    cls = type(node)
+    for name in _CHILDREN.get(cls, ()):
+        children = getattr(node, name, None)
+        if type(children) is list:
+            children[:] = [_fold(child, originals, shared) for child in children]
+    original = originals.get(node)
+    if original is None:
+        return node  # added by a transform
+    unchanged = True
+    restore = []
+    for name in _slots(cls):
+        value, old = getattr(node, name, _MISSING), getattr(original, name, _MISSING)
+        if value is old:
+            continue
+        if value is not _MISSING and old is not _MISSING and _same(value, old):
+            restore.append((name, old))
+        else:
+            unchanged = False
+    attrs, old_attrs = getattr(node, '__dict__', None) or {}, getattr(original, '__dict__', None) or {}
+    if attrs.keys() != old_attrs.keys():
+        unchanged = False
+    for name, value in attrs.items():
+        old = old_attrs.get(name, _MISSING)
+        if value is old:
+            continue
+        if old is not _MISSING and _same(value, old):
+            restore.append((name, old))
+        else:
+            unchanged = False
+    if unchanged:
+        shared[node] = original
+        return original
+    # A changed node still shares the lists and dicts that did not change
+    for name, old in restore:
+        setattr(node, name, old)
+    return node
+
+
+def transform_snapshot(model: EarlyModel, transforms: List[EarlyTransform], fuse: bool = True) -> EarlyModel:
+    """
+    Run `transforms` (see run_early_transform_pipeline) on a copy-on-write snapshot of `model`.
+    `model` is left as it is; the returned model shares every node the transforms did not change.
+    """
+    originals: Dict[object, object] = {}
+    working = _clone(model, originals)
+    for name, value in list(vars(working).items()):
+        if hasattr(value, 'remap_nodes'):
+            setattr(working, name, value.copy())
+    result = run_early_transform_pipeline(working, transforms, fuse=fuse)
+    shared: Dict[object, object] = {}
+    result = _fold(result, originals, shared)
+    if shared:
+        for value in list(vars(result).values()):
+            if hasattr(value, 'remap_nodes'):
+                value.remap_nodes(shared)
+    return result
+
+
+def shared_nodes(a: EarlyModel, b: EarlyModel) -> int:
+    """The number of namespace/message/field/enum/enum value objects two models have in common."""
+    def nodes(model):
+        found, stack = set(), [model]
+        while stack:
+            node = stack.pop()
+            for name in _CHILDREN[type(node)]:
+                for child in getattr(node, name, ()):
+                    found.add(id(child))
+                    stack.append(child)
+        return found
+    return len(nodes(a) & nodes(b))
@@ -1,14 +1,20 @@
 """
 AddFileLevelNamespaceTransform: Wraps all top-level items in a file-level namespace named after the file (without extension).
 """
+import logging
 import os
+from debug_trace import get_logger
 from early_model import EarlyModel, EarlyNamespace, EarlyMessage, EarlyEnum
-from early_transform_pipeline import EarlyTransform
+from early_transform_pipeline import EarlyVisitorTransform
 from typing import List
 
-class AddFileLevelNamespaceTransform(EarlyTransform):
-    def transform(self, model: EarlyModel) -> EarlyModel:
-        print(f"[FILELEVELNS DEBUG] Running AddFileLevelNamespaceTransform on file: {model.file}")
+_log = get_logger('early.file_namespace')
+
+class AddFileLevelNamespaceTransform(EarlyVisitorTransform):
+    def prepass(self, model: EarlyModel) -> None:
+        debug = _log.isEnabledFor(logging.DEBUG)
+        if debug:
+            _log.debug(f"Running AddFileLevelNamespaceTransform on file: {model.file}")
         # Always create a file-level namespace named after the file (without extension)
         file_ns = os.path.splitext(os.path.basename(model.file))[0]
         # If the only namespace is already the file-level namespace and all top-level items are inside it, do nothing
@@ -17,10 +23,12 @@ class AddFileLevelNamespaceTransform(EarlyTransform):
             model.namespaces[0].name == file_ns and
             not model.messages and not model.enums and not model.options and not model.compounds
         ):
-            print(f"[FILELEVELNS DEBUG] File-level namespace already present: {file_ns}")
-            return model
+            if debug:
+                _log.debug(f"File-level namespace already present: {file_ns}")
+            return
         # Otherwise, wrap all top-level items (including namespaces) in the file-level namespace
-        print(f"[FILELEVELNS DEBUG] Creating file-level namespace: {file_ns}")
+        if debug:
+            _log.debug(f"Creating file-level namespace: {file_ns}")
         new_ns = EarlyNamespace(
             name=file_ns,
             messages=model.messages,
@@ -36,5 +44,5 @@ class AddFileLevelNamespaceTransform(EarlyTransform):
         model.enums = []
         model.options = []
         model.compounds = []
-        print(f"[FILELEVELNS DEBUG] Namespaces after transform: {[ns.name for ns in model.namespaces]}")
-        return model
+        if debug:
+            _log.debug(f"Namespaces after transform: {[ns.name for ns in model.namespaces]}")
@@ -1,25 +1,33 @@
 """
 AttachImportedModelsTransform: For each import in imports_raw, attaches the corresponding EarlyModel to the 'imports' field.
 """
+import logging
+from debug_trace import get_logger
 from early_model import EarlyModel
-from early_transform_pipeline import EarlyTransform
+from early_transform_pipeline import EarlyVisitorTransform
 from typing import Dict
 
-class AttachImportedModelsTransform(EarlyTransform):
+_log = get_logger('early.imports')
+
+class AttachImportedModelsTransform(EarlyVisitorTransform):
     def __init__(self, import_models: Dict[str, EarlyModel]):
         self.import_models = import_models
 
-    def transform(self, model: EarlyModel) -> EarlyModel:
+    def prepass(self, model: EarlyModel) -> None:
         # For each import in imports_raw, attach the corresponding EarlyModel if available
-        print(f"[DEBUG] AttachImportedModelsTransform: model.file={getattr(model, 'file', None)}")
-        print(f"[DEBUG]   model.imports_raw={model.imports_raw}")
-        print(f"[DEBUG]   self.import_models keys={list(self.import_models.keys())}")
+        debug = _log.isEnabledFor(logging.DEBUG)
+        if debug:
+            _log.debug(f"AttachImportedModelsTransform: model.file={getattr(model, 'file', None)}")
+            _log.debug(f"  model.imports_raw={model.imports_raw}")
+            _log.debug(f"  self.import_models keys={list(self.import_models.keys())}")
         for import_path, alias in model.imports_raw:
             key = alias if alias else import_path
             if key in self.import_models:
-                print(f"[DEBUG]     Attaching import for key: {key}")
+                if debug:
+                    _log.debug(f"    Attaching import for key: {key}")
                 model.imports[key] = self.import_models[key]
             else:
-                print(f"[DEBUG]     No import found for key: {key}")
-        print(f"[DEBUG]   model.imports keys after attach: {list(model.imports.keys())}")
-        return model
+                if debug:
+                    _log.debug(f"    No import found for key: {key}")
+        if debug:
+            _log.debug(f"  model.imports keys after attach: {list(model.imports.keys())}")
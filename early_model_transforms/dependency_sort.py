@@ -1,46 +1,116 @@
 """
 Dependency sort utility for EarlyModels based on their imports.
 Raises an error if a cycle is detected.
+
+The sort is an iterative depth-first search (no recursion, so deep import chains are fine) in
+O(files + imports); every file path and import edge is normalized once. The order is the DFS
+post-order: files in the order given, each after its imports (in import order).
 """
+import os
 from early_model import EarlyModel
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Tuple
 
 class DependencyCycleError(Exception):
-    pass
+    def __init__(self, cycles: List[List[str]]):
+        # Each cycle is a path of normalized file paths starting and ending with the same file
+        self.cycles = cycles
+        super().__init__('Cycle detected: ' + '; '.join(' -> '.join(cycle) for cycle in cycles))
+
+def normalize_path(path: str) -> str:
+    return os.path.abspath(os.path.normpath(path))
+
+def import_edges(path: str, model: EarlyModel, joined: Optional[Dict[tuple, str]] = None) -> List[Tuple[str, str]]:
+    """
+    (import key, normalized imported path) for each import of the file at normalized `path`, in
+    import order. The key is the alias, or the import path when there is no alias. `joined`
+    memoizes normalized paths by (directory, import path) across calls.
+    """
+    base = os.path.dirname(path)
+    if joined is None:
+        joined = {}
+    edges = []
+    for import_path, alias in getattr(model, 'imports_raw', []):
+        dep = joined.get((base, import_path))
+        if dep is None:
+            dep = joined[(base, import_path)] = normalize_path(os.path.join(base, import_path))
+        edges.append((alias or import_path, dep))
+    return edges
+
+class DependencyGraph:
+    """The import graph of a set of EarlyModels, keyed by normalized file path."""
+    def __init__(self, models: Dict[str, EarlyModel]):
+        self.models: Dict[str, EarlyModel] = {normalize_path(k): v for k, v in models.items()}
+        # path -> import_edges of the file (imports outside the set included)
+        self.edges: Dict[str, List[Tuple[str, str]]] = {}
+        # path -> imported paths within the set, in import order
+        self.deps: Dict[str, List[str]] = {}
+        joined: Dict[tuple, str] = {}
+        for path, model in self.models.items():
+            edges = self.edges[path] = import_edges(path, model, joined)
+            self.deps[path] = [dep for _, dep in edges if dep in self.models]
+
+    def sort(self) -> List[str]:
+        """
+        Paths with dependencies first. Raises DependencyCycleError listing every cycle found (one
+        per back edge of the search) if the imports are not acyclic.
+        """
+        deps = self.deps
+        done = set()
+        on_stack: Dict[str, int] = {}  # path -> index in stack
+        result: List[str] = []
+        cycles: List[List[str]] = []
+        for start in self.models:
+            if start in done:
+                continue
+            stack = [start]
+            iters = [iter(deps[start])]
+            on_stack[start] = 0
+            while stack:
+                dep = next(iters[-1], None)
+                if dep is None:
+                    path = stack.pop()
+                    iters.pop()
+                    del on_stack[path]
+                    done.add(path)
+                    result.append(path)
+                elif dep in on_stack:
+                    cycles.append(stack[on_stack[dep]:] + [dep])
+                elif dep not in done:
+                    on_stack[dep] = len(stack)
+                    stack.append(dep)
+                    iters.append(iter(deps[dep]))
+        if cycles:
+            raise DependencyCycleError(cycles)
+        return result
+
+    def levels(self) -> List[List[str]]:
+        """
+        Paths grouped by depth: level 0 imports nothing in the set, and every other file is one
+        level above its deepest import. Files in the same level do not depend on each other.
+        """
+        level: Dict[str, int] = {}
+        levels: List[List[str]] = []
+        for path in self.sort():
+            n = max((level[dep] + 1 for dep in self.deps[path]), default=0)
+            level[path] = n
+            if n == len(levels):
+                levels.append([])
+            levels[n].append(path)
+        return levels
 
 def topological_sort_earlymodels(models: Dict[str, EarlyModel]) -> List[EarlyModel]:
     """
     Given a dict of name -> EarlyModel, returns a list of EarlyModels sorted so that dependencies come first.
     Raises DependencyCycleError if a cycle is detected.
     """
-    visited = set()
-    temp_mark = set()
-    result = []
-
-    import os
-    def normalize_path(path):
-        return os.path.abspath(os.path.normpath(path))
-
-    # Build a mapping from normalized file path to model
-    norm_models = {normalize_path(k): v for k, v in models.items()}
-
-    def visit(name: str):
-        nname = normalize_path(name)
-        if nname in visited:
-            return
-        if nname in temp_mark:
-            raise DependencyCycleError(f"Cycle detected involving {nname}")
-        temp_mark.add(nname)
-        model = norm_models[nname]
-        for dep_name, _ in model.imports_raw:
-            dep_file = os.path.join(os.path.dirname(nname), dep_name)
-            dep_file = normalize_path(dep_file)
-            if dep_file in norm_models:
-                visit(dep_file)
-        temp_mark.remove(nname)
-        visited.add(nname)
-        result.append(model)
-
-    for name in norm_models:
-        visit(name)
-    return result
+    graph = DependencyGraph(models)
+    return [graph.models[path] for path in graph.sort()]
+
+def dependency_levels(models: Dict[str, EarlyModel]) -> List[List[EarlyModel]]:
+    """
+    Given a dict of name -> EarlyModel, returns the models grouped into dependency levels: each
+    level only depends on earlier levels, so the models of one level can be processed in parallel.
+    Raises DependencyCycleError if a cycle is detected.
+    """
+    graph = DependencyGraph(models)
+    return [[graph.models[path] for path in level] for level in graph.levels()]
@@ -0,0 +1,125 @@
+"""
+Per-file message inheritance index for PromoteInlineEnumsTransform: the messages of a file by
+qualified name, and the inline enum fields of each (field name -> promoted enum name).
+
+PromoteInlineEnumsTransform builds the index of each file it transforms, keeps it current as it
+promotes the file's inline enums, and publishes it as model.inheritance_index. An importer chains
+the published indexes of its import graph instead of walking the imported namespaces again.
+"""
+from typing import Dict, List, Optional, Set
+
+
+def inline_enum_fields(msg) -> Dict[str, str]:
+    """The fields of msg that still hold inline enums: field name -> promoted enum name."""
+    result = {}
+    for field in getattr(msg, 'fields', []):
+        if getattr(field, 'is_inline_enum', False) and getattr(field, 'inline_values_raw', None):
+            result[field.name] = f"{msg.name}_{field.name}"
+    return result
+
+
+class InheritanceIndex:
+    # No __dict__: debug dumps and object_state treat the index as a value, not as part of the tree
+    __slots__ = ('messages', 'inline_fields', 'roots')
+
+    def __init__(self):
+        self.messages: Dict[str, object] = {}  # qualified name -> EarlyMessage (the last one wins)
+        self.inline_fields: Dict[str, Dict[str, str]] = {}  # qualified name -> inline enum fields, if any
+        self.roots: Set[str] = set()  # first segments of the qualified names
+
+    def __repr__(self):
+        return f"InheritanceIndex(messages={len(self.messages)}, with_inline_enums={len(self.inline_fields)})"
+
+    def __eq__(self, other):
+        if not isinstance(other, InheritanceIndex):
+            return NotImplemented
+        return list(self.messages) == list(other.messages) and self.inline_fields == other.inline_fields
+
+    __hash__ = None
+
+    @classmethod
+    def build(cls, model) -> 'InheritanceIndex':
+        """Index the messages in model's own namespaces (names as build_message_lookup makes them)."""
+        index = cls()
+        messages, inline = index.messages, index.inline_fields
+        stack = [(ns, None) for ns in reversed(getattr(model, 'namespaces', []))]
+        while stack:
+            ns, prefix = stack.pop()
+            ns_prefix = f"{prefix}::{ns.name}" if prefix else ns.name
+            for msg in getattr(ns, 'messages', []):
+                qfn = f"{ns_prefix}::{msg.name}"
+                messages[qfn] = msg
+                fields = inline_enum_fields(msg)
+                if fields:
+                    inline[qfn] = fields
+                else:
+                    inline.pop(qfn, None)
+            for nested in reversed(getattr(ns, 'namespaces', [])):
+                stack.append((nested, ns_prefix))
+        index.roots = {qfn.split('::', 1)[0] for qfn in messages}
+        return index
+
+    def copy(self) -> 'InheritanceIndex':
+        index = InheritanceIndex()
+        index.messages = dict(self.messages)
+        index.inline_fields = dict(self.inline_fields)
+        index.roots = set(self.roots)
+        return index
+
+    def remap_nodes(self, nodes: Dict[object, object]) -> None:
+        """Point entries at nodes[msg] where the message is a key of `nodes` (see early_model_snapshot)."""
+        self.messages = {qfn: nodes.get(msg, msg) for qfn, msg in self.messages.items()}
+
+    def promoted(self, qfn: str, msg) -> None:
+        """Record that msg (indexed as qfn) no longer has inline enum fields."""
+        if self.messages.get(qfn) is msg:
+            self.inline_fields.pop(qfn, None)
+
+
+class InheritanceChain:
+    """
+    The indexes of a model and its transitive imports, searched like one lookup built over the
+    model and then each import depth first (later entries overriding earlier ones).
+    """
+    __slots__ = ('indexes', '_by_root')
+
+    def __init__(self, indexes: List[InheritanceIndex]):
+        self.indexes = indexes
+        # First segment -> the indexes with names under it, in chain order
+        self._by_root: Dict[str, List[InheritanceIndex]] = {}
+        for index in indexes:
+            for root in index.roots:
+                self._by_root.setdefault(root, []).append(index)
+
+    @classmethod
+    def build(cls, model, index: InheritanceIndex) -> 'InheritanceChain':
+        """Chain `index` (model's own) with the published (or freshly built) indexes of its imports."""
+        indexes = [index]
+        visited = {id(model)}
+        stack = [iter(getattr(model, 'imports', {}).values())]
+        while stack:
+            imported = next(stack[-1], None)
+            if imported is None:
+                stack.pop()
+                continue
+            if id(imported) in visited:
+                continue
+            visited.add(id(imported))
+            imported_index = getattr(imported, 'inheritance_index', None)
+            indexes.append(imported_index if imported_index is not None else InheritanceIndex.build(imported))
+            stack.append(iter(getattr(imported, 'imports', {}).values()))
+        return cls(indexes)
+
+    def find(self, qfn: str) -> Optional[InheritanceIndex]:
+        """The index that holds the message named qfn, or None."""
+        for index in reversed(self._by_root.get(qfn.split('::', 1)[0], ())):
+            if qfn in index.messages:
+                return index
+        return None
+
+    def inline_enum_fields(self, qfn: str) -> Optional[Dict[str, str]]:
+        """The current inline enum fields of the message named qfn, or None if there is no such message."""
+        index = self.find(qfn)
+        if index is None:
+            return None
+        return index.inline_fields.get(qfn, {})
@@ -0,0 +1,120 @@
+"""
+Per-file symbol table for EarlyModels: indexes the messages and enums under a file-level
+namespace so references resolve with a few dict lookups.
+
+QfnReferenceTransform builds the table of each file it transforms and publishes it as
+model.symbol_table; later stages can reuse it instead of walking the namespaces again.
+"""
+from typing import Dict, List, Optional, Tuple
+
+
+class SymbolTable:
+    # No __dict__: debug dumps and object_state treat the table as a value, not as part of the tree
+    __slots__ = ('root', 'entities', 'scoped', 'short', 'imports', 'aliases')
+
+    def __init__(self, root: str):
+        self.root = root  # QFN of the file-level namespace (or the import alias it is seen through)
+        self.entities: Dict[str, object] = {}  # QFN -> EarlyMessage / EarlyEnum
+        self.scoped: Dict[Tuple[str, str], str] = {}  # (namespace QFN, short name) -> QFN
+        self.short: Dict[str, str] = {}  # short name -> QFN (the last definition wins)
+        self.imports: List['SymbolTable'] = []  # non-aliased imports, in import order
+        self.aliases: Dict[str, 'SymbolTable'] = {}  # alias -> imported table rooted at the alias
+
+    def __repr__(self):
+        return f"SymbolTable(root={self.root!r}, symbols={len(self.entities)})"
+
+    def __eq__(self, other):
+        if not isinstance(other, SymbolTable):
+            return NotImplemented
+        return (self.root == other.root and self.scoped == other.scoped and self.short == other.short
+                and self.imports == other.imports and self.aliases == other.aliases)
+
+    __hash__ = None
+
+    @classmethod
+    def build(cls, file_ns, root: Optional[str] = None, assign_qfn: bool = False) -> 'SymbolTable':
+        """
+        Index the messages and enums under `file_ns`. QFNs start at `root` (default: the namespace
+        name); with assign_qfn, the qfn attribute of every namespace, message and enum is set too.
+        """
+        table = cls(root or file_ns.name)
+        stack = [(file_ns, table.root)]
+        while stack:
+            ns, ns_qfn = stack.pop()
+            if assign_qfn:
+                ns.qfn = ns_qfn
+            for msg in ns.messages:
+                qfn = table.add(ns_qfn, msg.name, msg)
+                if assign_qfn:
+                    msg.qfn = qfn
+            for enum in ns.enums:
+                qfn = table.add(ns_qfn, enum.name, enum)
+                if assign_qfn:
+                    enum.qfn = qfn
+            # Reversed so nested namespaces are indexed in source order (the last definition wins)
+            for nested in reversed(ns.namespaces):
+                stack.append((nested, ns_qfn + '::' + nested.name if nested.name else ns_qfn))
+        return table
+
+    def copy(self) -> 'SymbolTable':
+        """A copy that can be added to without changing this table (imported tables are shared)."""
+        table = SymbolTable(self.root)
+        table.entities = dict(self.entities)
+        table.scoped = dict(self.scoped)
+        table.short = dict(self.short)
+        table.imports = list(self.imports)
+        table.aliases = dict(self.aliases)
+        return table
+
+    def remap_nodes(self, nodes: Dict[object, object]) -> None:
+        """Point entries at nodes[entity] where the entity is a key of `nodes` (see early_model_snapshot)."""
+        self.entities = {qfn: nodes.get(entity, entity) for qfn, entity in self.entities.items()}
+
+    def add(self, ns_qfn: str, name: str, entity) -> str:
+        """Register a message or enum declared in namespace `ns_qfn`; returns its QFN."""
+        qfn = ns_qfn + '::' + name if ns_qfn else name
+        self.entities[qfn] = entity
+        self.scoped[(ns_qfn, name)] = qfn
+        self.short[name] = qfn
+        return qfn
+
+    def get(self, qfn: str):
+        """The message or enum with this QFN, or None."""
+        return self.entities.get(qfn)
+
+    def resolve_unqualified(self, name: str, scope: List[str]) -> Optional[str]:
+        """
+        Resolve a short name used inside the namespaces `scope` (their QFNs, outermost first):
+        the enclosing namespaces from the innermost out, then anywhere in this file, then the
+        non-aliased imports in import order.
+        """
+        scoped = self.scoped
+        for ns_qfn in reversed(scope):
+            qfn = scoped.get((ns_qfn, name))
+            if qfn is not None:
+                return qfn
+        qfn = self.short.get(name)
+        if qfn is not None:
+            return qfn
+        for table in self.imports:
+            qfn = table.short.get(name)
+            if qfn is not None:
+                return qfn
+        return None
+
+    def resolve_qualified(self, name: str) -> Optional[str]:
+        """Resolve a '::'-qualified name: a QFN of this file, or alias::Name for an aliased import."""
+        if name in self.entities:
+            return name
+        alias, sep, rest = name.partition('::')
+        table = self.aliases.get(alias) if sep else None
+        if table is None:
+            return None
+        if name in table.entities:
+            return name
+        return table.short.get(rest)
+
+    def resolve(self, name: str, scope: List[str]) -> Optional[str]:
+        if '::' in name:
+            return self.resolve_qualified(name)
+        return self.resolve_unqualified(name, scope)
@@ -0,0 +1,125 @@
+"""
+early_model_workspace.py
+A long-lived workspace over the import closure of a root .def file, for fast edit-regenerate loops.
+
+The workspace keeps, per file, the content hash, the freshly parsed EarlyModel and the
+transformed EarlyModel, plus the import graph in both directions. update() re-hashes files,
+re-parses only those whose contents changed, and re-runs the early transforms only for the
+changed files and their (transitive) reverse dependents; every other transformed EarlyModel
+is reused as is. Transforms run on copy-on-write snapshots of the parsed models (see
+early_model_snapshot), so a transformed model shares every node the transforms did not change
+with its parsed model instead of deep-copying it.
+"""
+import hashlib
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from early_model import EarlyModel
+from def_file_loader import load_def_text
+from early_model_cache import EarlyModelCache
+from early_model_transforms.dependency_sort import import_edges, normalize_path, topological_sort_earlymodels
+from early_transform_pipeline import EarlyTransform
+from early_model_snapshot import transform_snapshot
+from early_transform_scheduler import default_early_transforms
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EarlyModelWorkspace:
+    def __init__(self, root_def_file: str, parse_mode: str = 'treeless',
+                 transforms: Callable[[Dict[str, EarlyModel]], List[EarlyTransform]] = default_early_transforms,
+                 cache: Optional[EarlyModelCache] = None):
+        self.root = normalize_path(root_def_file)
+        self.parse_mode = parse_mode
+        self.transforms = transforms
+        self.cache = cache
+        self.hashes: Dict[str, str] = {}
+        self.parsed: Dict[str, EarlyModel] = {}  # as loaded; only transformed as snapshots
+        self.transformed: Dict[str, EarlyModel] = {}
+        self.imports: Dict[str, List[tuple]] = {}  # path -> [(import key, imported path)]
+        self.dependents: Dict[str, Set[str]] = {}  # path -> paths importing it
+        self.order: List[str] = []  # dependencies first
+        # Paths re-parsed / re-transformed by the last load() or update()
+        self.last_parsed: Set[str] = set()
+        self.last_transformed: Set[str] = set()
+
+    def load(self) -> EarlyModel:
+        """(Re)build the whole workspace from disk and return the transformed root model."""
+        self.hashes.clear()
+        self.parsed.clear()
+        self.transformed.clear()
+        return self.update()
+
+    def update(self, changed: Optional[Iterable[str]] = None) -> EarlyModel:
+        """
+        Bring the workspace up to date and return the transformed root model.
+        `changed` limits the content check to the given files; by default every tracked file is
+        re-hashed. Files that become imported are loaded; files no longer reachable are dropped
+        without being read, so they may have been deleted.
+        """
+        check = None if changed is None else {normalize_path(p) for p in changed}
+        # Walk the imports from the root, refreshing each file before following its (new) imports
+        dirty = set()
+        reachable, queue = {self.root: None}, deque([self.root])
+        while queue:
+            path = queue.popleft()
+            if path not in self.parsed or check is None or path in check:
+                if self._refresh(path):
+                    dirty.add(path)
+            for _, dep in import_edges(path, self.parsed[path]):
+                if dep not in reachable:
+                    reachable[dep] = None
+                    queue.append(dep)
+        self._rebuild_graph(reachable)
+        self.last_parsed = set(dirty)
+        affected = self._with_dependents(dirty) | (set(self.order) - set(self.transformed))
+        for path in self.order:
+            if path in affected:
+                import_models = {key: self.transformed[dep] for key, dep in self.imports[path]}
+                self.transformed[path] = transform_snapshot(self.parsed[path], self.transforms(import_models))
+        self.last_transformed = affected
+        return self.transformed[self.root]
+
+    def model(self, def_file: Optional[str] = None) -> EarlyModel:
+        """The transformed EarlyModel of `def_file` (default: the root file)."""
+        return self.transformed[normalize_path(def_file) if def_file else self.root]
+
+    def models(self) -> List[EarlyModel]:
+        """All transformed EarlyModels, dependencies first."""
+        return [self.transformed[path] for path in self.order]
+
+    def _refresh(self, path: str) -> bool:
+        """Re-read `path`; re-parse it if its contents changed. Returns True if it was re-parsed."""
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        digest = _content_hash(text)
+        if self.hashes.get(path) == digest and path in self.parsed:
+            return False
+        self.parsed[path] = load_def_text(text, path, self.parse_mode, self.cache)
+        self.hashes[path] = digest
+        return True
+
+    def _rebuild_graph(self, reachable: Dict[str, None]) -> None:
+        for path in list(self.parsed):
+            if path not in reachable:
+                del self.parsed[path]
+                self.hashes.pop(path, None)
+                self.transformed.pop(path, None)
+        self.imports = {path: import_edges(path, self.parsed[path]) for path in reachable}
+        self.dependents = {path: set() for path in reachable}
+        for path, edges in self.imports.items():
+            for _, dep in edges:
+                self.dependents[dep].add(path)
+        sorted_models = topological_sort_earlymodels({path: self.parsed[path] for path in reachable})
+        self.order = [normalize_path(m.file) for m in sorted_models]
+
+    def _with_dependents(self, paths: Set[str]) -> Set[str]:
+        result, queue = set(paths), deque(paths)
+        while queue:
+            for dependent in self.dependents.get(queue.popleft(), ()):
+                if dependent not in result:
+                    result.add(dependent)
+                    queue.append(dependent)
+        return result
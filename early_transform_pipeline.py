@@ -1,22 +1,128 @@
 """
 early_transform_pipeline.py
 Defines a pipeline for transforming EarlyModel objects using a sequence of EarlyTransform objects.
+
+Transforms written as EarlyVisitorTransform subclasses express their work as per-node hooks
+(on_namespace, on_message, on_field, on_enum) plus an optional global prepass(). The pipeline
+fuses consecutive visitor transforms: their pre-passes run in pipeline order, then a single walk
+over the namespace/message/field tree calls every transform's hooks on each node, in pipeline
+order. Plain EarlyTransforms (anything with just a transform() method) end the fused group and
+run on their own.
+
+Fusing gives the same result as running the transforms one after another as long as a hook only
+reads and writes the node it is given (plus state its own pre-pass built), and a pre-pass does not
+read what the hooks of the transforms before it write. A transform whose pre-pass does need
+those effects sets prepass_barrier, and the runner finishes the pending walk before running it.
 """
 from typing import List, Protocol
-from early_model import EarlyModel
+from early_model import EarlyModel, EarlyNamespace, EarlyMessage, EarlyEnum, EarlyField
 
 class EarlyTransform(Protocol):
     def transform(self, model: EarlyModel) -> EarlyModel:
         ...
 
+class EarlyVisitorTransform:
+    """
+    Base class for early transforms expressed as node hooks. ns_stack is the list of enclosing
+    namespaces, innermost last (empty for top-level messages and enums). A message's fields are
+    visited before on_message is called for it; a namespace's messages, then enums, then nested
+    namespaces are visited after on_namespace. Nodes a hook adds to the tree are not visited.
+    """
+    # True if prepass() must see the node hooks of the transforms before it in the pipeline
+    prepass_barrier = False
+
+    def prepass(self, model: EarlyModel) -> None:
+        """Global pass over the model, run before the walk (may restructure the tree)."""
+
+    def on_namespace(self, ns: EarlyNamespace, ns_stack: List[EarlyNamespace]) -> None:
+        pass
+
+    def on_message(self, msg: EarlyMessage, ns_stack: List[EarlyNamespace]) -> None:
+        pass
+
+    def on_field(self, field: EarlyField, msg: EarlyMessage, ns_stack: List[EarlyNamespace]) -> None:
+        pass
+
+    def on_enum(self, enum: EarlyEnum, ns_stack: List[EarlyNamespace]) -> None:
+        pass
+
+    def transform(self, model: EarlyModel) -> EarlyModel:
+        return run_early_transform_pipeline(model, [self])
+
+def _hooks(visitors, name):
+    base = getattr(EarlyVisitorTransform, name)
+    return [getattr(v, name) for v in visitors if getattr(type(v), name) is not base]
+
+def walk_early_model(model: EarlyModel, visitors: List[EarlyVisitorTransform]) -> None:
+    """Walk the model once, calling the node hooks of all visitors on each node."""
+    ns_hooks = _hooks(visitors, 'on_namespace')
+    msg_hooks = _hooks(visitors, 'on_message')
+    field_hooks = _hooks(visitors, 'on_field')
+    enum_hooks = _hooks(visitors, 'on_enum')
+    if not (ns_hooks or msg_hooks or field_hooks or enum_hooks):
+        return
+
+    def visit_messages(messages, ns_stack):
+        for msg in messages:
+            if field_hooks:
+                for field in list(msg.fields):
+                    for hook in field_hooks:
+                        hook(field, msg, ns_stack)
+            for hook in msg_hooks:
+                hook(msg, ns_stack)
+
+    def visit_enums(enums, ns_stack):
+        for enum in enums:
+            for hook in enum_hooks:
+                hook(enum, ns_stack)
+
+    def walk_ns(ns, outer):
+        ns_stack = outer + [ns]
+        for hook in ns_hooks:
+            hook(ns, ns_stack)
+        # Snapshot the child lists so nodes added by hooks are not visited
+        messages, enums, nested = list(ns.messages), list(ns.enums), list(ns.namespaces)
+        visit_messages(messages, ns_stack)
+        visit_enums(enums, ns_stack)
+        for child in nested:
+            walk_ns(child, ns_stack)
+
+    messages, enums = list(model.messages), list(model.enums)
+    for ns in list(model.namespaces):
+        walk_ns(ns, [])
+    visit_messages(messages, [])
+    visit_enums(enums, [])
+
 def run_early_transform_pipeline(
-    model: EarlyModel, 
-    transforms: List[EarlyTransform]
+    model: EarlyModel,
+    transforms: List[EarlyTransform],
+    fuse: bool = True
 ) -> EarlyModel:
     """
     Applies a sequence of EarlyTransform objects to an EarlyModel.
     Each transform takes an EarlyModel and returns a new EarlyModel.
+    With fuse (the default), consecutive EarlyVisitorTransforms share a single tree walk;
+    fuse=False runs every transform on its own, one after another.
     """
+    if not fuse:
+        for transform in transforms:
+            if isinstance(transform, EarlyVisitorTransform):
+                transform.prepass(model)
+                walk_early_model(model, [transform])
+            else:
+                model = transform.transform(model)
+        return model
+    group: List[EarlyVisitorTransform] = []
     for transform in transforms:
-        model = transform.transform(model)
+        if isinstance(transform, EarlyVisitorTransform):
+            if transform.prepass_barrier and group:
+                walk_early_model(model, group)
+                group = []
+            transform.prepass(model)
+            group.append(transform)
+        else:
+            walk_early_model(model, group)
+            group = []
+            model = transform.transform(model)
+    walk_early_model(model, group)
     return model
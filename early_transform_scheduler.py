@@ -0,0 +1,58 @@
+"""
+early_transform_scheduler.py
+Run the early transforms of a whole import graph, one dependency level at a time.
+
+Files in the same dependency level do not import each other; each level is transformed once every
+level below it is done, and a file's transforms get the already transformed models of its
+imports. Every file is transformed in this process. Concurrency comes from parsing
+(load_def_files' process pool): parsing a file costs an order of magnitude more than its early
+transforms (about 195 ms against 15 ms for a synthetic file of 400 messages), and a pool would
+have to send every transformed model back to this process, which costs more than transforming it
+here.
+"""
+import time
+from typing import Callable, Dict, List, Optional
+
+from early_model import EarlyModel
+from early_model_transforms.dependency_sort import DependencyGraph
+from early_transform_pipeline import EarlyTransform, run_early_transform_pipeline
+from early_model_transforms.add_file_level_namespace_transform import AddFileLevelNamespaceTransform
+from early_model_transforms.canonicalize_colons_transform import CanonicalizeColonsTransform
+from early_model_transforms.qfn_reference_transform import QfnReferenceTransform
+from early_model_transforms.attach_imported_models_transform import AttachImportedModelsTransform
+from early_model_transforms.promote_inline_enums_transform import PromoteInlineEnumsTransform
+
+TransformFactory = Callable[[Dict[str, EarlyModel]], List[EarlyTransform]]
+
+
+def default_early_transforms(import_models: Dict[str, EarlyModel]) -> List[EarlyTransform]:
+    """The standard early transform sequence for one file, given its transformed imports by key."""
+    return [
+        AddFileLevelNamespaceTransform(),
+        CanonicalizeColonsTransform(),
+        QfnReferenceTransform(),
+        AttachImportedModelsTransform(import_models),
+        PromoteInlineEnumsTransform(),
+    ]
+
+
+def transform_early_models(parsed: Dict[str, EarlyModel],
+                           transforms: TransformFactory = default_early_transforms,
+                           timings: Optional[Dict[str, float]] = None) -> Dict[str, EarlyModel]:
+    """
+    Transform every parsed EarlyModel (keyed by file path) with `transforms(import_models)`,
+    level by level. Returns normalized path -> transformed model, level by level; every
+    transformed model's imports are the returned models of the imported files. As with
+    sequential pipelines, the parsed models may be modified. If `timings` is given, the seconds
+    spent transforming each file are stored in it by path.
+    """
+    graph = DependencyGraph(parsed)
+    transformed: Dict[str, EarlyModel] = {}
+    for level in graph.levels():
+        for path in level:
+            import_models = {key: transformed[dep] for key, dep in graph.edges[path] if dep in transformed}
+            t0 = time.perf_counter()
+            transformed[path] = run_early_transform_pipeline(graph.models[path], transforms(import_models))
+            if timings is not None:
+                timings[path] = time.perf_counter() - t0
+    return transformed
@@ -1,50 +1,95 @@
 """
 Transform: Converts a fully-resolved EarlyModel into a concrete Model for code generation.
 """
-import sys
+import logging
+from typing import Optional
+from debug_trace import get_logger
 from early_model import EarlyModel
 from model import Model, ModelNamespace, ModelMessage, ModelEnum, ModelField, ModelEnumValue, FieldType, FieldModifier
 from model import ModelReference
+from qfn_index import QfnIndex
+from conversion_context import ConversionContext
+
+_log = get_logger('model.convert')
 
 class EarlyModelToModel:
-    def __init__(self):
+    def __init__(self, context: Optional[ConversionContext] = None):
+        # Converted imports, per-file lookups and resolution memos; share one context to convert
+        # an import graph with every file converted and indexed once
+        self.context = context if context is not None else ConversionContext()
         # Mapping from QFN to ModelEnum for all enums (local and imported)
-        self.model_enum_by_qfn = {}
+        self.model_enum_by_qfn = self.context.model_enum_by_qfn
     def process(self, early_model: EarlyModel) -> Model:
         """
         Convert a fully-resolved EarlyModel to a concrete Model.
         All references must be QFN and resolvable.
+        A model already converted through this converter's context is returned as is.
         """
-        # First, build a lookup of all enums and messages by QFN for reference resolution
-        enum_lookup = {}
-        msg_lookup = {}
-        print("[DEBUG] Building enum/message lookup", file=sys.stderr)
-        def build_lookup_ns(ns, prefix):
-            ns_qfn = '::'.join(prefix + [ns.name]) if ns.name else '::'.join(prefix)
-            for enum in ns.enums:
-                qfn = ns_qfn + '::' + enum.name if ns_qfn else enum.name
-                enum_lookup[qfn] = enum
-            for msg in ns.messages:
-                qfn = ns_qfn + '::' + msg.name if ns_qfn else msg.name
-                msg_lookup[qfn] = msg
-            for nested in ns.namespaces:
-                build_lookup_ns(nested, prefix + [ns.name] if ns.name else prefix)
-
-        # Register enums and inline enums from the current model
-        for ns in early_model.namespaces:
-            build_lookup_ns(ns, [])
-
-        # Register enums and inline enums from all imported models (recursively)
+        context = self.context
+        cached = context.model_for(early_model)
+        if cached is not None:
+            return cached
+        debug = _log.isEnabledFor(logging.DEBUG)
+        # First, build a lookup of all enums and messages by QFN for reference resolution:
+        # the current model's, then those of its imports (each file is indexed once per context)
+        if debug:
+            _log.debug("Building enum/message lookup")
+        own_enums, own_msgs = context.lookups(early_model)
+        enum_lookup = dict(own_enums)
+        msg_lookup = dict(own_msgs)
+        # Namespace convert_message falls back to for inline enums: the last top-level namespace
+        # indexed (the last import's, when there are imports)
+        if early_model.namespaces:
+            ns = early_model.namespaces[-1]
         if hasattr(early_model, 'imports') and early_model.imports:
             for imported_model in early_model.imports.values():
-                for ns in getattr(imported_model, 'namespaces', []):
-                    build_lookup_ns(ns, [])
+                imported_enums, imported_msgs = context.lookups(imported_model)
+                enum_lookup.update(imported_enums)
+                msg_lookup.update(imported_msgs)
+                if getattr(imported_model, 'namespaces', None):
+                    ns = imported_model.namespaces[-1]
+        # (kind, raw name) -> resolution, for this file
+        memo = context.memo(early_model)
+
+        if debug:
+            _log.debug(f"enum_lookup keys: {list(enum_lookup.keys())}")
+
+        # Suffix / short-name indexes over the lookup keys, and the QFN of each enum object
+        enum_index = QfnIndex(enum_lookup)
+        msg_index = QfnIndex(msg_lookup)
+        enum_qfn_by_id = {}
+        for qfn, enum in enum_lookup.items():
+            enum_qfn_by_id.setdefault(id(enum), qfn)
 
-        print(f"[DEBUG] enum_lookup keys: {list(enum_lookup.keys())}", file=sys.stderr)
+        def register_enum(qfn, enum):
+            # enum_lookup[qfn] = enum, keeping the indexes in step
+            old = enum_lookup.get(qfn)
+            enum_lookup[qfn] = enum
+            context.invalidate(early_model)
+            enum_index.add(qfn)
+            if old is not None and old is not enum and enum_qfn_by_id.get(id(old)) == qfn:
+                del enum_qfn_by_id[id(old)]
+                other = next((k for k, v in enum_lookup.items() if v is old), None)
+                if other is not None:
+                    enum_qfn_by_id[id(old)] = other
+            enum_qfn_by_id.setdefault(id(enum), qfn)
 
         # Helper to map raw type to FieldType enum
         def map_field_type(field):
             # Accepts either an EarlyField or a dict with 'type_name' and 'type_type'
+            if isinstance(field, dict):
+                # A dict carries nothing but the names, so its mapping is memoized per file
+                key = ('type', field.get('type_name', None), field.get('type_type', None))
+                try:
+                    result = memo[key]
+                except KeyError:
+                    result = memo[key] = _map_field_type(field)
+                else:
+                    context.memo_hits += 1
+                return result
+            return _map_field_type(field)
+
+        def _map_field_type(field):
             if isinstance(field, dict):
                 type_name = field.get('type_name', None)
                 type_type = field.get('type_type', None)
@@ -60,7 +105,8 @@ class EarlyModelToModel:
                 'double': FieldType.DOUBLE,
             }
             # Debug: print type_name and type_type for map_field_type
-            print(f"[MAP_FIELD_TYPE DEBUG] type_name={type_name}, type_type={type_type}")
+            if debug:
+                _log.debug(f"type_name={type_name}, type_type={type_type}")
             # Use EarlyModel's type_type directly: if primitive, always map to FieldType
             if type_type == 'primitive':
                 return primitives.get(type_name, FieldType.STRING), type_name
@@ -94,9 +140,8 @@ class EarlyModelToModel:
                 if type_name in msg_lookup:
                     return FieldType.MESSAGE, type_name
                 # Try to match by suffix (unqualified name)
-                for qfn in msg_lookup.keys():
-                    if qfn.endswith(f'::{type_name}') or qfn == type_name:
-                        return FieldType.MESSAGE, qfn
+                for qfn in msg_index.with_segment_suffix(str(type_name)):
+                    return FieldType.MESSAGE, qfn
                 return FieldType.MESSAGE, type_name
             elif type_type in ('compound', 'compound_type'):
                 return FieldType.COMPOUND, type_name
@@ -121,18 +166,21 @@ class EarlyModelToModel:
             return '::'.join(prefix + [ns.name]) if ns.name else '::'.join(prefix)
 
         if hasattr(early_model, 'imports_raw') and hasattr(early_model, 'imports'):
-            print(f"[ALIAS DEBUG] early_model.file: {getattr(early_model, 'file', None)}")
-            print(f"[ALIAS DEBUG] early_model.imports_raw: {getattr(early_model, 'imports_raw', None)}")
-            print(f"[ALIAS DEBUG] early_model.imports keys: {list(getattr(early_model, 'imports', {}).keys())}")
-            print(f"[ALIAS DEBUG] alias_map after construction: {alias_map}")
+            if debug:
+                _log.debug(f"early_model.file: {getattr(early_model, 'file', None)}")
+                _log.debug(f"early_model.imports_raw: {getattr(early_model, 'imports_raw', None)}")
+            if debug:
+                _log.debug(f"early_model.imports keys: {list(getattr(early_model, 'imports', {}).keys())}")
+                _log.debug(f"alias_map after construction: {alias_map}")
             for import_path, alias in getattr(early_model, 'imports_raw', []):
                 key = alias if alias else import_path
                 imported_model = early_model.imports.get(key)
                 if imported_model:
-                    # Use the same transform instance for imports to share model_enum_by_qfn
+                    # Converted once per context and shared by every importer
                     imported_model_obj = self.process(imported_model)
                     imports_dict[key] = imported_model_obj
-                    print(f"[ALIAS DEBUG] alias: {alias}, imported_model_obj: <Model object>, namespaces: {[ns.name for ns in getattr(imported_model_obj, 'namespaces', [])]}")
+                    if debug:
+                        _log.debug(f"alias: {alias}, imported_model_obj: <Model object>, namespaces: {[ns.name for ns in getattr(imported_model_obj, 'namespaces', [])]}")
                     # Always map alias to the file-level namespace QFN (auto-generated or explicit)
                     if alias and imported_model_obj.namespaces:
                         file_ns = imported_model_obj.namespaces[0]
@@ -150,18 +198,21 @@ class EarlyModelToModel:
             # Resolve parent if not provided
             resolved_parent = parent
             parent_raw = getattr(enum, 'parent_raw', None)
-            print(f"[DEBUG] convert_enum: enum.name={getattr(enum, 'name', None)}, parent_raw={parent_raw}", file=sys.stderr)
+            if debug:
+                _log.debug(f"convert_enum: enum.name={getattr(enum, 'name', None)}, parent_raw={parent_raw}")
             # Map parent_raw using alias_map if it starts with an alias
             mapped_parent_raw = parent_raw
             if parent_raw and isinstance(parent_raw, str) and '::' in parent_raw and alias_map:
                 first = parent_raw.split('::', 1)[0]
                 if first in alias_map:
                     mapped_parent_raw = alias_map[first] + '::' + parent_raw.split('::', 1)[1]
-                    print(f"[DEBUG] Mapped parent_raw '{parent_raw}' to '{mapped_parent_raw}' using alias_map", file=sys.stderr)
+                    if debug:
+                        _log.debug(f"Mapped parent_raw '{parent_raw}' to '{mapped_parent_raw}' using alias_map")
             else:
                 mapped_parent_raw = parent_raw
             if mapped_parent_raw and parent is None:
-                print(f"[ENUM PARENT DEBUG] Trying to resolve parent_raw='{mapped_parent_raw}'", file=sys.stderr)
+                if debug:
+                    _log.debug(f"Trying to resolve parent_raw='{mapped_parent_raw}'")
 
                 # Try to resolve in the main enum_lookup (contains EarlyEnums from current and imported models)
                 target_qfn = mapped_parent_raw
@@ -177,7 +228,8 @@ class EarlyModelToModel:
                         # Check if this potential promoted QFN exists in the enum_lookup
                         if potential_promoted_qfn in enum_lookup:
                             target_qfn = potential_promoted_qfn
-                            print(f"[ENUM PARENT DEBUG] Mapped inline enum reference '{mapped_parent_raw}' to promoted QFN '{target_qfn}'", file=sys.stderr)
+                            if debug:
+                                _log.debug(f"Mapped inline enum reference '{mapped_parent_raw}' to promoted QFN '{target_qfn}'")
 
 
                 # Try to resolve in the main enum_lookup (contains EarlyEnums from current and imported models)
@@ -188,41 +240,31 @@ class EarlyModelToModel:
                     resolved_parent = enum_model_lookup.get(candidate_early_enum)
 
                     if resolved_parent:
-                        print(f"[ENUM PARENT DEBUG] Resolved enum parent for '{mapped_parent_raw}' (looked up as '{target_qfn}') via local enum_model_lookup", file=sys.stderr)
+                        if debug:
+                            _log.debug(f"Resolved enum parent for '{mapped_parent_raw}' (looked up as '{target_qfn}') via local enum_model_lookup")
                     else:
                         # If not found in the current model's lookup, search in imported models' lookups
-                        print(f"[ENUM PARENT DEBUG] Parent '{mapped_parent_raw}' (looked up as '{target_qfn}') not found in local enum_model_lookup. Searching imported models.", file=sys.stderr)
-                        for imported_model_obj in imports_dict.values():
-                            # Access the enum_model_lookup of the imported model
-                            # Note: Model objects don't directly expose enum_model_lookup,
-                            # so we need to search its namespaces.
-                            def find_enum_in_model(model, target_qfn):
-                                def search_ns(ns_list, current_qfn_parts):
-                                    for ns in ns_list:
-                                        ns_name = ns.name if ns.name else ""
-                                        current_ns_qfn = '::'.join(current_qfn_parts + [ns_name]) if ns_name else '::'.join(current_qfn_parts)
-                                        # Check enums in the current namespace
-                                        for enum in getattr(ns, 'enums', []):
-                                            enum_qfn = current_ns_qfn + '::' + enum.name if current_ns_qfn else enum.name
-                                            if enum_qfn == target_qfn:
-                                                return enum
-                                        # Recurse into nested namespaces
-                                        found_in_nested = search_ns(getattr(ns, 'namespaces', []), current_qfn_parts + [ns_name] if ns_name else current_qfn_parts)
-                                        if found_in_nested:
-                                            return found_in_nested
-                                    return None
-                                # Start search from the top-level namespaces of the imported model
-                                return search_ns(getattr(model, 'namespaces', []), [])
-
-                            resolved_parent = find_enum_in_model(imported_model_obj, target_qfn)
-                            if resolved_parent:
-                                print(f"[ENUM PARENT DEBUG] Resolved imported enum parent '{mapped_parent_raw}' (looked up as '{target_qfn}') in imported model.", file=sys.stderr)
-                                break # Found the parent, no need to search other imported models
+                        if debug:
+                            _log.debug(f"Parent '{mapped_parent_raw}' (looked up as '{target_qfn}') not found in local enum_model_lookup. Searching imported models.")
+                        memo_key = ('enum_parent', target_qfn)
+                        if memo_key in memo:
+                            resolved_parent = memo[memo_key]
+                            context.memo_hits += 1
+                        else:
+                            for imported_model_obj in imports_dict.values():
+                                resolved_parent = context.model_enums(imported_model_obj).get(target_qfn)
+                                if resolved_parent:
+                                    if debug:
+                                        _log.debug(f"Resolved imported enum parent '{mapped_parent_raw}' (looked up as '{target_qfn}') in imported model.")
+                                    break # Found the parent, no need to search other imported models
+                            memo[memo_key] = resolved_parent
 
                 if resolved_parent:
-                    print(f"[ENUM PARENT DEBUG] Final resolved parent for '{getattr(enum, 'name', None)}': {getattr(resolved_parent, 'name', None)}", file=sys.stderr)
+                    if debug:
+                        _log.debug(f"Final resolved parent for '{getattr(enum, 'name', None)}': {getattr(resolved_parent, 'name', None)}")
                 else:
-                    print(f"[ENUM PARENT DEBUG] Could not resolve parent for '{getattr(enum, 'name', None)}' (raw: {parent_raw}, looked up as: {target_qfn})", file=sys.stderr)
+                    if debug:
+                        _log.debug(f"Could not resolve parent for '{getattr(enum, 'name', None)}' (raw: {parent_raw}, looked up as: {target_qfn})")
 
             # ... rest of the function ...
             values = [
@@ -252,11 +294,7 @@ class EarlyModelToModel:
                 is_options=is_options
             )
             # Find QFN for this enum
-            qfn = None
-            for k, v in enum_lookup.items():
-                if v is enum:
-                    qfn = k
-                    break
+            qfn = enum_qfn_by_id.get(id(enum))
             if qfn:
                 self.model_enum_by_qfn[qfn] = model_enum
             enum_model_lookup[enum] = model_enum
@@ -281,7 +319,8 @@ class EarlyModelToModel:
                 # DEBUG: Print type_name, candidate_msgs, and candidate_enum_qfn for enum reference fields
                 type_name = getattr(field, 'type_name', None)
                 if type_name and ('.' in type_name or '::' in type_name):
-                    print(f"[DEBUG ENUM RESOLVE] Field '{getattr(field, 'name', None)}' type_name='{type_name}'", file=sys.stderr)
+                    if debug:
+                        _log.debug(f"Field '{getattr(field, 'name', None)}' type_name='{type_name}'")
                     msg_name = None
                     enum_field = None
                     if '.' in type_name:
@@ -289,21 +328,26 @@ class EarlyModelToModel:
                     else:
                         msg_path, enum_field = type_name.rsplit('::', 1)
                     msg_name = msg_path.split('::')[-1]
-                    candidate_msgs = [qfn for qfn in msg_lookup.keys() if qfn.split('::')[-1] == msg_name]
-                    print(f"[DEBUG ENUM RESOLVE] candidate_msgs for msg_name '{msg_name}': {candidate_msgs}", file=sys.stderr)
+                    candidate_msgs = msg_index.with_last(msg_name)
+                    if debug:
+                        _log.debug(f"candidate_msgs for msg_name '{msg_name}': {candidate_msgs}")
                     for msg_qfn in candidate_msgs:
                         candidate_enum_qfn = f"{msg_qfn}::{enum_field}"
-                        print(f"[DEBUG ENUM RESOLVE] Trying candidate_enum_qfn: {candidate_enum_qfn}", file=sys.stderr)
+                        if debug:
+                            _log.debug(f"Trying candidate_enum_qfn: {candidate_enum_qfn}")
                         if candidate_enum_qfn in enum_lookup:
-                            print(f"[DEBUG ENUM RESOLVE] SUCCESS: Found enum QFN '{candidate_enum_qfn}' in enum_lookup", file=sys.stderr)
+                            if debug:
+                                _log.debug(f"SUCCESS: Found enum QFN '{candidate_enum_qfn}' in enum_lookup")
                             # PATCH: If found, set ftype and ref_qfn immediately
                             ftype = FieldType.ENUM
                             ref_qfn = candidate_enum_qfn
                         # PATCH: Also try promoted QFN form (Namespace::Message_field)
                         candidate_enum_qfn_promoted = f"{msg_qfn}_{enum_field}"
-                        print(f"[DEBUG ENUM RESOLVE] Trying candidate_enum_qfn_promoted: {candidate_enum_qfn_promoted}", file=sys.stderr)
+                        if debug:
+                            _log.debug(f"Trying candidate_enum_qfn_promoted: {candidate_enum_qfn_promoted}")
                         if candidate_enum_qfn_promoted in enum_lookup:
-                            print(f"[DEBUG ENUM RESOLVE] SUCCESS: Found promoted enum QFN '{candidate_enum_qfn_promoted}' in enum_lookup", file=sys.stderr)
+                            if debug:
+                                _log.debug(f"SUCCESS: Found promoted enum QFN '{candidate_enum_qfn_promoted}' in enum_lookup")
                             # PATCH: If found, set ftype and ref_qfn immediately
                             ftype = FieldType.ENUM
                             ref_qfn = candidate_enum_qfn_promoted
@@ -339,9 +383,8 @@ class EarlyModelToModel:
                     if (type_type == 'ref_type' or type_type is None):
                         if type_name in msg_lookup:
                             return 'message_type'
-                        for qfn in msg_lookup.keys():
-                            if qfn.endswith(f'::{type_name}') or qfn == type_name:
-                                return 'message_type'
+                        if msg_index.with_segment_suffix(str(type_name)):
+                            return 'message_type'
                     return None
                 type_name = getattr(field, 'type_name', None)
                 type_type = getattr(field, 'type_type', None)
@@ -354,8 +397,9 @@ class EarlyModelToModel:
                         ref_qfn = None
                     raw_type = getattr(field, 'raw_type', None)
                     referenced_name_raw = getattr(field, 'referenced_name_raw', None)
-                    print(f"[MODEL PATCH DEBUG] Field '{getattr(field, 'name', '?')}' in message '{msg.name}' has type_name='?'. raw_type='{raw_type}', referenced_name_raw='{referenced_name_raw}'", file=sys.stderr)
-                    print(f"[MODEL PATCH DEBUG] enum_lookup keys: {list(enum_lookup.keys())}", file=sys.stderr)
+                    if debug:
+                        _log.debug(f"Field '{getattr(field, 'name', '?')}' in message '{msg.name}' has type_name='?'. raw_type='{raw_type}', referenced_name_raw='{referenced_name_raw}'")
+                        _log.debug(f"enum_lookup keys: {list(enum_lookup.keys())}")
                     fallback_type = raw_type or referenced_name_raw
                     field_name = getattr(field, 'name', None)
                     found_enum_qfn = None
@@ -409,35 +453,27 @@ class EarlyModelToModel:
                                         promoted_enum_qfn = f"{ns_qfn}::{promoted_enum_name}"
                                     else:
                                         promoted_enum_qfn = promoted_enum_name
-                                    enum_lookup[promoted_enum_qfn] = promoted_enum
-                                    print(f"[MODEL PATCH] Promoted parent's inline enum for derived field: {promoted_enum_qfn}", file=sys.stderr)
-                    # Try to resolve by QFN suffix (field name)
-                    for qfn in enum_lookup.keys():
-                        # Direct field name
-                        if qfn.endswith(f'::{field_name}') or qfn.split('::')[-1] == field_name:
-                            found_enum_qfn = qfn
-                            qfn_suffix_attempts.append(qfn)
-                            break
-                        # Promoted: Message_fieldName (search all namespaces, including current file)
-                        if parent_msg_name and (qfn.endswith(f'{parent_msg_name}_{field_name}') or qfn.split('::')[-1] == f'{parent_msg_name}_{field_name}'):
-                            found_enum_qfn = qfn
-                            qfn_suffix_attempts.append(qfn)
-                            break
-                        # Promoted: Namespace::Message_fieldName (search all namespaces, including current file)
-                        if parent_msg_qfn and (qfn.endswith(f'{parent_msg_qfn}_{field_name}') or qfn == f'{parent_msg_qfn}_{field_name}'):
-                            found_enum_qfn = qfn
-                            qfn_suffix_attempts.append(qfn)
-                            break
-                        # Promoted: Message_type (for fields like typeX, try Message_type in current file's namespace)
-                        if parent_msg_name and field_name.lower().startswith('type'):
-                            if qfn.endswith(f'{parent_msg_name}_type') or qfn.split('::')[-1] == f'{parent_msg_name}_type':
-                                found_enum_qfn = qfn
-                                qfn_suffix_attempts.append(qfn)
-                                break
-                        qfn_suffix_attempts.append(qfn)
+                                    register_enum(promoted_enum_qfn, promoted_enum)
+                                    if debug:
+                                        _log.debug(f"Promoted parent's inline enum for derived field: {promoted_enum_qfn}")
+                    # Try to resolve by QFN suffix: the first enum QFN (in lookup order) matching any form
+                    # Direct field name
+                    qfn_suffix_attempts.append(next(iter(enum_index.with_last(field_name)), None))
+                    qfn_suffix_attempts.append(enum_index.first_ending_with(f'::{field_name}'))
+                    # Promoted: Message_fieldName (search all namespaces, including current file)
+                    if parent_msg_name:
+                        qfn_suffix_attempts.append(enum_index.first_ending_with(f'{parent_msg_name}_{field_name}'))
+                    # Promoted: Namespace::Message_fieldName (search all namespaces, including current file)
+                    if parent_msg_qfn:
+                        qfn_suffix_attempts.append(enum_index.first_ending_with(f'{parent_msg_qfn}_{field_name}'))
+                    # Promoted: Message_type (for fields like typeX, try Message_type in current file's namespace)
+                    if parent_msg_name and field_name.lower().startswith('type'):
+                        qfn_suffix_attempts.append(enum_index.first_ending_with(f'{parent_msg_name}_type'))
+                    found_enum_qfn = enum_index.first(*qfn_suffix_attempts)
                     if not found_enum_qfn:
-                        print(f"[MODEL PATCH DEBUG] QFN suffix search for field '{field_name}' in message '{msg.name}' tried: {qfn_suffix_attempts}", file=sys.stderr)
-                        print(f"[MODEL PATCH DEBUG] QFN suffix search did NOT find a match for '{field_name}', '{parent_msg_name}_{field_name}', '{parent_msg_qfn}_{field_name}', or '{parent_msg_name}_type' in any namespace", file=sys.stderr)
+                        if debug:
+                            _log.debug(f"QFN suffix search for field '{field_name}' in message '{msg.name}' tried: {qfn_suffix_attempts}")
+                            _log.debug(f"QFN suffix search did NOT find a match for '{field_name}', '{parent_msg_name}_{field_name}', '{parent_msg_qfn}_{field_name}', or '{parent_msg_name}_type' in any namespace")
                     # Try to resolve by message parent chain (for inherited fields), recursively
                     def resolve_enum_from_parent_chain(msg_obj, fname):
                         visited = set()
@@ -448,17 +484,18 @@ class EarlyModelToModel:
                                     parent_type_name = getattr(parent_field, 'type_name', None)
                                     # Try direct type_name
                                     if parent_type_name and parent_type_name != '?':
-                                        for qfn in enum_lookup.keys():
-                                            if qfn.endswith(f'::{parent_type_name}') or qfn.split('::')[-1] == parent_type_name:
-                                                print(f"[DEBUG] Parent chain: matched direct type_name '{parent_type_name}' to QFN '{qfn}'", file=sys.stderr)
-                                                parent_chain_attempts.append(qfn)
-                                                return qfn, 'direct_type_name', parent_chain_attempts
-                                            else:
-                                                parent_chain_attempts.append(qfn)
+                                        qfn = enum_index.first(next(iter(enum_index.with_last(parent_type_name)), None),
+                                                               enum_index.first_ending_with(f'::{parent_type_name}'))
+                                        if qfn:
+                                            if debug:
+                                                _log.debug(f"Parent chain: matched direct type_name '{parent_type_name}' to QFN '{qfn}'")
+                                            parent_chain_attempts.append(qfn)
+                                            return qfn, 'direct_type_name', parent_chain_attempts
                                     # Try _patch_enum_qfn_hint
                                     if hasattr(parent_field, '_patch_enum_qfn_hint'):
                                         qfn_hint = getattr(parent_field, '_patch_enum_qfn_hint')
-                                        print(f"[DEBUG] Parent chain: using _patch_enum_qfn_hint '{qfn_hint}'", file=sys.stderr)
+                                        if debug:
+                                            _log.debug(f"Parent chain: using _patch_enum_qfn_hint '{qfn_hint}'")
                                         parent_chain_attempts.append(qfn_hint)
                                         return qfn_hint, '_patch_enum_qfn_hint', parent_chain_attempts
                                     # Try promoted QFN: Namespace::Message_field
@@ -470,24 +507,27 @@ class EarlyModelToModel:
                                     if parent_msg_name:
                                         possible_qfns.append(f"{parent_msg_name}_{fname}")
                                     # Brute-force: try any QFN ending with _{fname} or ::{parent_msg_name}_{fname}
-                                    for enum_qfn in enum_lookup.keys():
-                                        if enum_qfn.endswith(f'_{fname}'):
-                                            print(f"[DEBUG] Parent chain: brute-force matched QFN ending with _{fname}: '{enum_qfn}'", file=sys.stderr)
-                                            parent_chain_attempts.append(enum_qfn)
-                                            return enum_qfn, 'brute_force_underscore', parent_chain_attempts
-                                        if parent_msg_name and enum_qfn.endswith(f'::{parent_msg_name}_{fname}'):
-                                            print(f"[DEBUG] Parent chain: brute-force matched QFN ending with ::{parent_msg_name}_{fname}: '{enum_qfn}'", file=sys.stderr)
-                                            parent_chain_attempts.append(enum_qfn)
-                                            return enum_qfn, 'brute_force_colon', parent_chain_attempts
+                                    enum_qfn = enum_index.first(
+                                        enum_index.first_ending_with(f'_{fname}'),
+                                        enum_index.first_ending_with(f'::{parent_msg_name}_{fname}') if parent_msg_name else None)
+                                    if enum_qfn and enum_qfn.endswith(f'_{fname}'):
+                                        if debug:
+                                            _log.debug(f"Parent chain: brute-force matched QFN ending with _{fname}: '{enum_qfn}'")
                                         parent_chain_attempts.append(enum_qfn)
+                                        return enum_qfn, 'brute_force_underscore', parent_chain_attempts
+                                    if enum_qfn:
+                                        if debug:
+                                            _log.debug(f"Parent chain: brute-force matched QFN ending with ::{parent_msg_name}_{fname}: '{enum_qfn}'")
+                                        parent_chain_attempts.append(enum_qfn)
+                                        return enum_qfn, 'brute_force_colon', parent_chain_attempts
                                     for qfn in possible_qfns:
-                                        for enum_qfn in enum_lookup.keys():
-                                            if enum_qfn.endswith(qfn):
-                                                print(f"[DEBUG] Parent chain: matched possible_qfn '{qfn}' to QFN '{enum_qfn}'", file=sys.stderr)
-                                                parent_chain_attempts.append(enum_qfn)
-                                                return enum_qfn, 'possible_qfn', parent_chain_attempts
-                                            else:
-                                                parent_chain_attempts.append(enum_qfn)
+                                        enum_qfn = enum_index.first_ending_with(qfn)
+                                        if enum_qfn:
+                                            if debug:
+                                                _log.debug(f"Parent chain: matched possible_qfn '{qfn}' to QFN '{enum_qfn}'")
+                                            parent_chain_attempts.append(enum_qfn)
+                                            return enum_qfn, 'possible_qfn', parent_chain_attempts
+                                        parent_chain_attempts.append(qfn)
                                     # Otherwise, try to resolve recursively up the parent chain
                                     parent_ref = getattr(msg_obj, 'parent', None)
                                     if parent_ref and hasattr(parent_ref, 'qfn') and parent_ref.qfn in msg_lookup:
@@ -504,8 +544,9 @@ class EarlyModelToModel:
                                     msg_obj = next_msg
                                     continue
                             break
-                        print(f"[DEBUG] Parent chain: no QFN match found for field '{fname}' in parent chain. enum_lookup keys: {list(enum_lookup.keys())}", file=sys.stderr)
-                        print(f"[DEBUG] Parent chain: attempted QFNs: {parent_chain_attempts}", file=sys.stderr)
+                        if debug:
+                            _log.debug(f"Parent chain: no QFN match found for field '{fname}' in parent chain. enum_lookup keys: {list(enum_lookup.keys())}")
+                            _log.debug(f"Parent chain: attempted QFNs: {parent_chain_attempts}")
                         return None, None, parent_chain_attempts
                     if not found_enum_qfn and hasattr(msg, 'parent') and msg.parent:
                         parent_ref = msg.parent
@@ -515,26 +556,31 @@ class EarlyModelToModel:
                         if parent_msg:
                             found_enum_qfn, match_type, parent_chain_attempts = resolve_enum_from_parent_chain(parent_msg, field_name)
                             if found_enum_qfn:
-                                print(f"[MODEL PATCH] Field '{field_name}' in message '{msg.name}' resolved type_name by QFN suffix or parent: '{found_enum_qfn}' (match_type={match_type})", file=sys.stderr)
+                                if debug:
+                                    _log.debug(f"Field '{field_name}' in message '{msg.name}' resolved type_name by QFN suffix or parent: '{found_enum_qfn}' (match_type={match_type})")
                                 type_name = found_enum_qfn.split('::')[-1]
                                 ref_qfn = found_enum_qfn
                                 setattr(field, '_patch_enum_qfn_hint', found_enum_qfn)
                                 type_type = 'enum_type'
                             else:
-                                print(f"[MODEL PATCH DEBUG] Parent chain search for field '{field_name}' in message '{msg.name}' attempted QFNs: {parent_chain_attempts}", file=sys.stderr)
+                                if debug:
+                                    _log.debug(f"Parent chain search for field '{field_name}' in message '{msg.name}' attempted QFNs: {parent_chain_attempts}")
                     if found_enum_qfn:
                         # Ensure type_type and ftype are set for enum
                         type_type = 'enum_type'
                         ftype = FieldType.ENUM
-                        print(f"[MODEL PATCH] Field '{field_name}' in message '{msg.name}' FINAL PATCH: type_name='{type_name}', ref_qfn='{ref_qfn}', type_type='{type_type}', ftype='{ftype}'", file=sys.stderr)
+                        if debug:
+                            _log.debug(f"Field '{field_name}' in message '{msg.name}' FINAL PATCH: type_name='{type_name}', ref_qfn='{ref_qfn}', type_type='{type_type}', ftype='{ftype}'")
                     if found_enum_qfn:
-                        print(f"[MODEL PATCH] Field '{field_name}' in message '{msg.name}' resolved type_name by QFN suffix or parent: '{found_enum_qfn}'", file=sys.stderr)
+                        if debug:
+                            _log.debug(f"Field '{field_name}' in message '{msg.name}' resolved type_name by QFN suffix or parent: '{found_enum_qfn}'")
                         type_name = found_enum_qfn.split('::')[-1]
                         ref_qfn = found_enum_qfn
                         setattr(field, '_patch_enum_qfn_hint', found_enum_qfn)
                         type_type = 'enum_type'
                     elif fallback_type and fallback_type != '?':
-                        print(f"[MODEL PATCH] Field '{getattr(field, 'name', '?')}' in message '{msg.name}' has type_name='?'. Using fallback_type='{fallback_type}'", file=sys.stderr)
+                        if debug:
+                            _log.debug(f"Field '{getattr(field, 'name', '?')}' in message '{msg.name}' has type_name='?'. Using fallback_type='{fallback_type}'")
                         type_name = fallback_type
                 # Special handling for map_type: always treat as map, even if type_name is '?'
                 if (type_type == 'map_type' or getattr(field, 'raw_type', None) == 'map_type'):
@@ -598,26 +644,30 @@ class EarlyModelToModel:
                         # If ref_qfn was set by the QFN patch above, use it
                         if hasattr(field, '_patch_enum_qfn_hint'):
                             patched_qfn = getattr(field, '_patch_enum_qfn_hint')
-                            print(f"[MODEL PATCH] For field '{getattr(field, 'name', '?')}' using patched QFN '{patched_qfn}' for enum resolution.", file=sys.stderr)
+                            if debug:
+                                _log.debug(f"For field '{getattr(field, 'name', '?')}' using patched QFN '{patched_qfn}' for enum resolution.")
                             type_name = patched_qfn.split('::')[-1]
                             ref_qfn = patched_qfn
                             type_type = 'enum_type'
                             ftype = FieldType.ENUM
                         else:
-                            print(f"[MODEL ERROR] Field '{getattr(field, 'name', '?')}' in message '{msg.name}' has invalid type_name ('?'). Skipping enum/message resolution.")
+                            _log.warning(f"Field '{getattr(field, 'name', '?')}' in message '{msg.name}' has invalid type_name ('?'). Skipping enum/message resolution.")
                             if ftype is None:
                                 ftype = FieldType.STRING
                             if ref_qfn is None:
                                 ref_qfn = type_name
                     else:
                         # Debug: print type_name and type_type before inference
-                        print(f"[MODEL DEBUG] Field '{getattr(field, 'name', '?')}' initial type_name='{type_name}', type_type='{type_type}'")
+                        if debug:
+                            _log.debug(f"Field '{getattr(field, 'name', '?')}' initial type_name='{type_name}', type_type='{type_type}'")
                         # Always infer type_type if not set or is '?' or is 'ref_type'
                         if not type_type or type_type == '?' or type_type == 'ref_type':
                             type_type = infer_type_type(type_name, type_type)
-                        print(f"[MODEL DEBUG] Field '{getattr(field, 'name', '?')}' after inference type_name='{type_name}', type_type='{type_type}'")
+                        if debug:
+                            _log.debug(f"Field '{getattr(field, 'name', '?')}' after inference type_name='{type_name}', type_type='{type_type}'")
                         ftype, ref_qfn = map_field_type({'type_name': type_name, 'type_type': type_type})
-                        print(f"[MODEL DEBUG] Field '{getattr(field, 'name', '?')}' resolved ftype={ftype}, ref_qfn={ref_qfn}")
+                        if debug:
+                            _log.debug(f"Field '{getattr(field, 'name', '?')}' resolved ftype={ftype}, ref_qfn={ref_qfn}")
                     # Only append the top-level ftype for non-MAP fields
                     if ftype != FieldType.MAP:
                         field_types.append(ftype)
@@ -634,38 +684,49 @@ class EarlyModelToModel:
                             candidate_qfn2 = '_'.join(parts)
                             candidate_qfn3 = '::'.join(parts[:-2] + [parts[-2] + '_' + parts[-1]]) if len(parts) > 2 else None
                             tried = []
-                            print(f"[DEBUG ENUM PATCH] enum_lookup keys: {list(enum_lookup.keys())}", file=sys.stderr)
-                            print(f"[DEBUG ENUM PATCH] Attempting QFNs for type_name '{type_name}': {[candidate_qfn1, candidate_qfn2, candidate_qfn3]}", file=sys.stderr)
+                            if debug:
+                                _log.debug(f"enum_lookup keys: {list(enum_lookup.keys())}")
+                                _log.debug(f"Attempting QFNs for type_name '{type_name}': {[candidate_qfn1, candidate_qfn2, candidate_qfn3]}")
                             candidates = [candidate_qfn1, candidate_qfn2, candidate_qfn3]
                             # Try file-level namespace prefix if available
                             if filelevelns:
                                 candidates += [f"{filelevelns}::{qfn}" for qfn in [candidate_qfn1, candidate_qfn2, candidate_qfn3] if qfn]
-                            print(f"[DEBUG ENUM PATCH] Candidates for '{type_name}': {candidates}", file=sys.stderr)
-                            print(f"[DEBUG ENUM PATCH] enum_lookup keys: {list(enum_lookup.keys())}", file=sys.stderr)
+                            if debug:
+                                _log.debug(f"Candidates for '{type_name}': {candidates}")
+                                _log.debug(f"enum_lookup keys: {list(enum_lookup.keys())}")
                             for candidate_qfn in candidates:
                                 if candidate_qfn and candidate_qfn in enum_lookup:
                                     ref_qfn = candidate_qfn
                                     ftype = FieldType.ENUM  # PATCH: ensure field type is set to ENUM
-                                    print(f"[PATCH] Resolved enum reference '{type_name}' to QFN '{candidate_qfn}' (set ftype=ENUM)", file=sys.stderr)
+                                    if debug:
+                                        _log.debug(f"Resolved enum reference '{type_name}' to QFN '{candidate_qfn}' (set ftype=ENUM)")
                                     break
                                 tried.append(candidate_qfn)
                             else:
                                 # Try all QFNs ending with the field name
                                 field_part = parts[-1]
-                                for qfn in enum_lookup.keys():
-                                    if qfn.endswith(f'::{field_part}') or qfn.endswith(f'_{field_part}'):
-                                        ref_qfn = qfn
-                                        print(f"[PATCH] Fallback resolved enum reference '{type_name}' to QFN '{qfn}'", file=sys.stderr)
-                                        break
-                            print(f"[DEBUG ENUM PATCH] Final ref_qfn for '{type_name}': {ref_qfn}", file=sys.stderr)
+                                qfn = enum_index.first(enum_index.first_ending_with(f'::{field_part}'),
+                                                       enum_index.first_ending_with(f'_{field_part}'))
+                                if qfn:
+                                    ref_qfn = qfn
+                                    if debug:
+                                        _log.debug(f"Fallback resolved enum reference '{type_name}' to QFN '{qfn}'")
+                            if debug:
+                                _log.debug(f"Final ref_qfn for '{type_name}': {ref_qfn}")
                     # If still not found, try MessageName::fieldName for all messages (legacy fallback)
                     if (not ref_qfn or ref_qfn not in enum_lookup) and type_name and '.' not in type_name and '.' not in ref_qfn if ref_qfn else True:
-                        for msg_qfn in msg_lookup.keys():
-                            candidate_qfn = f"{msg_qfn}::{type_name.split('.')[-1]}"
-                            if candidate_qfn in enum_lookup:
-                                ref_qfn = candidate_qfn
-                                print(f"[PATCH] Fallback resolved enum reference '{type_name}' to QFN '{candidate_qfn}'", file=sys.stderr)
-                                break
+                        # The first message (in lookup order) with an enum MessageQfn::name
+                        enum_part = type_name.split('.')[-1]
+                        owners = {}
+                        for candidate_qfn in enum_index.with_segment_suffix(enum_part):
+                            msg_qfn = candidate_qfn[:-len(enum_part) - 2]
+                            if candidate_qfn.endswith(f'::{enum_part}') and msg_qfn in msg_index:
+                                owners.setdefault(msg_qfn, candidate_qfn)
+                        if owners:
+                            candidate_qfn = owners[msg_index.first(*owners)]
+                            ref_qfn = candidate_qfn
+                            if debug:
+                                _log.debug(f"Fallback resolved enum reference '{type_name}' to QFN '{candidate_qfn}'")
                     # Always promote inline enums to the containing namespace and set type_ref
                     resolved_enum = None
                     resolved_qfn = ref_qfn
@@ -701,11 +762,7 @@ class EarlyModelToModel:
                             ns_for_inline.enums.append(promoted_enum)
                         resolved_enum = promoted_enum
                         # Always set type_ref to a ModelReference for promoted enums
-                        promoted_enum_qfn = None
-                        for k, v in enum_lookup.items():
-                            if v is promoted_enum:
-                                promoted_enum_qfn = k
-                                break
+                        promoted_enum_qfn = enum_qfn_by_id.get(id(promoted_enum))
                         if promoted_enum_qfn:
                             type_ref = promoted_enum
                         else:
@@ -756,22 +813,20 @@ class EarlyModelToModel:
                                     type_ref = resolved_enum
                         # Try to resolve by searching all enums by suffix (unqualified name)
                         if not resolved_enum and ref_qfn:
-                            for qfn, early_enum in enum_lookup.items():
-                                if qfn.endswith(f'::{ref_qfn}') or qfn == ref_qfn or qfn.split('::')[-1] == ref_qfn:
-                                    resolved_enum = enum_model_lookup.get(early_enum)
-                                    if resolved_enum:
-                                        type_names.append(qfn)
-                                        type_ref = resolved_enum
-                                        break
+                            for qfn in enum_index.with_suffix_or_last(ref_qfn):
+                                resolved_enum = enum_model_lookup.get(enum_lookup[qfn])
+                                if resolved_enum:
+                                    type_names.append(qfn)
+                                    type_ref = resolved_enum
+                                    break
                         # Try to resolve by searching all enums by field type_name (if ref_qfn is None)
                         if not resolved_enum and type_name and type_name != '?':
-                            for qfn, early_enum in enum_lookup.items():
-                                if qfn.endswith(f'::{type_name}') or qfn == type_name or qfn.split('::')[-1] == type_name:
-                                    resolved_enum = enum_model_lookup.get(early_enum)
-                                    if resolved_enum:
-                                        type_names.append(qfn)
-                                        type_ref = resolved_enum
-                                        break
+                            for qfn in enum_index.with_suffix_or_last(type_name):
+                                resolved_enum = enum_model_lookup.get(enum_lookup[qfn])
+                                if resolved_enum:
+                                    type_names.append(qfn)
+                                    type_ref = resolved_enum
+                                    break
                     # Extra: Try to resolve by searching enums in the current namespace if still not found
                     if not resolved_enum and type_name and type_name != '?':
                         for enum in getattr(ns_for_inline, 'enums', []):
@@ -782,9 +837,10 @@ class EarlyModelToModel:
                                 type_ref = enum
                                 break
                     if not resolved_enum:
-                        print(f"[MODEL ERROR] Field '{getattr(field, 'name', '?')}' in message '{msg.name}' references unknown enum '{ref_qfn}'. Skipping type_ref.", file=sys.stderr)
-                        print(f"[MODEL ERROR]   type_name: {type_name}", file=sys.stderr)
-                        print(f"[MODEL ERROR]   enum_lookup keys: {list(enum_lookup.keys())}", file=sys.stderr)
+                        _log.warning(f"Field '{getattr(field, 'name', '?')}' in message '{msg.name}' references unknown enum '{ref_qfn}'. Skipping type_ref.")
+                        _log.warning(f"  type_name: {type_name}")
+                        if debug:
+                            _log.debug(f"  enum_lookup keys: {list(enum_lookup.keys())}")
                         # Try promoted inline QFN forms: e.g., EnumContainer.status -> EnumContainer_status, EnumContainer::status
                         promoted_qfn1 = type_name.replace('.', '_').replace('::', '_')
                         promoted_qfn2 = type_name.replace('.', '::')
@@ -799,7 +855,8 @@ class EarlyModelToModel:
                             if candidate in enum_lookup:
                                 enum_obj = enum_lookup[candidate]
                                 type_ref = enum_model_lookup.get(enum_obj, enum_obj)
-                                print(f"[PATCH] Promoted fallback: matched enum for field '{getattr(field, 'name', None)}' to QFN '{candidate}'", file=sys.stderr)
+                                if debug:
+                                    _log.debug(f"Promoted fallback: matched enum for field '{getattr(field, 'name', None)}' to QFN '{candidate}'")
                                 found_promoted = True
                                 break
                         if not found_promoted:
@@ -819,7 +876,7 @@ class EarlyModelToModel:
                                 else:
                                     msg_path, enum_field = type_name.rsplit('::', 1)
                                 msg_name = msg_path.split('::')[-1]
-                                candidate_msgs = [qfn for qfn in msg_lookup.keys() if qfn == msg_path or qfn.endswith(f'::{msg_name}')]
+                                candidate_msgs = [qfn for qfn in msg_index.with_segment_suffix(msg_name) if qfn == msg_path or qfn.endswith(f'::{msg_name}')]
                                 for msg_qfn in candidate_msgs:
                                     candidate_enum_qfn = f"{msg_qfn}::{enum_field}"
                                     if candidate_enum_qfn in enum_lookup:
@@ -829,11 +886,11 @@ class EarlyModelToModel:
                             # Fallback: search all enums for a match by field name and parent message/namespace
                             if type_ref is None:
                                 field_name = getattr(field, 'name', None)
-                                for qfn, enum_obj in enum_lookup.items():
-                                    if qfn.split('::')[-1] == field_name:
-                                        type_ref = enum_model_lookup.get(enum_obj, enum_obj)
-                                        print(f"[PATCH] Fallback: matched enum for field '{field_name}' to QFN '{qfn}'", file=sys.stderr)
-                                        break
+                                for qfn in enum_index.with_last(field_name)[:1]:
+                                    enum_obj = enum_lookup[qfn]
+                                    type_ref = enum_model_lookup.get(enum_obj, enum_obj)
+                                    if debug:
+                                        _log.debug(f"Fallback: matched enum for field '{field_name}' to QFN '{qfn}'")
                     # --- PATCH: Ensure enum fields have aligned field_types/type_refs/type_names ---
                     # Always set the first entry to the resolved enum type, reference, and name
                     field_types.clear()
@@ -858,10 +915,8 @@ class EarlyModelToModel:
                     resolved_ref_qfn = ref_qfn
                     if not resolved_ref_qfn and type_name and type_name != '?':
                         # Try to resolve by suffix (unqualified name)
-                        for qfn in msg_lookup.keys():
-                            if qfn.endswith(f'::{type_name}') or qfn == type_name:
-                                resolved_ref_qfn = qfn
-                                break
+                        for qfn in msg_index.with_segment_suffix(type_name)[:1]:
+                            resolved_ref_qfn = qfn
                     if resolved_ref_qfn and resolved_ref_qfn in msg_lookup:
                         msg_obj = msg_lookup[resolved_ref_qfn]
                         type_ref = ModelReference(resolved_ref_qfn, kind='message')
@@ -890,10 +945,8 @@ class EarlyModelToModel:
                     elif etype == FieldType.MESSAGE:
                         resolved_ref_qfn = etype_ref_qfn
                         if not resolved_ref_qfn and etype_raw and etype_raw != '?':
-                            for qfn in msg_lookup.keys():
-                                if qfn.endswith(f'::{etype_raw}') or qfn == etype_raw:
-                                    resolved_ref_qfn = qfn
-                                    break
+                            for qfn in msg_index.with_segment_suffix(etype_raw)[:1]:
+                                resolved_ref_qfn = qfn
                         if resolved_ref_qfn and resolved_ref_qfn in msg_lookup:
                             msg_obj = msg_lookup[resolved_ref_qfn]
                             element_type_ref = ModelReference(resolved_ref_qfn, kind='message')
@@ -916,7 +969,8 @@ class EarlyModelToModel:
                     ktype_raw = getattr(field, 'map_key_type_raw', None)
                     vtype_raw = getattr(field, 'map_value_type_raw', None)
                     primitives = {'int', 'string', 'bool', 'float', 'double'}
-                    print(f"[MAP DEBUG] dict_field: ktype_raw={ktype_raw}, vtype_raw={vtype_raw}")
+                    if debug:
+                        _log.debug(f"dict_field: ktype_raw={ktype_raw}, vtype_raw={vtype_raw}")
                     # Key type
                     if ktype_raw is not None:
                         # Always treat primitives as 'primitive', never 'map_type' for keys
@@ -930,10 +984,12 @@ class EarlyModelToModel:
                         # Defensive: if ktype_type is 'map_type', but ktype_raw is primitive, force to 'primitive'
                         if ktype_type == 'map_type' and ktype_raw in primitives:
                             ktype_type = 'primitive'
-                        print(f"[MAP DEBUG] dict_field: after infer, ktype_type={ktype_type}")
-                        print(f"[MAP DEBUG] ktype_raw={ktype_raw}, ktype_type={ktype_type}")
+                        if debug:
+                            _log.debug(f"dict_field: after infer, ktype_type={ktype_type}")
+                            _log.debug(f"ktype_raw={ktype_raw}, ktype_type={ktype_type}")
                         ktype, ktype_ref_qfn = map_field_type({'type_name': ktype_raw, 'type_type': ktype_type})
-                        print(f"[MAP DEBUG] ktype result: ktype={ktype}, ktype_ref_qfn={ktype_ref_qfn}")
+                        if debug:
+                            _log.debug(f"ktype result: ktype={ktype}, ktype_ref_qfn={ktype_ref_qfn}")
                     else:
                         ktype, ktype_ref_qfn = None, None
                     # Value type
@@ -946,10 +1002,12 @@ class EarlyModelToModel:
                             vtype_type = 'primitive'
                         if vtype_type == 'map_type' and vtype_raw in primitives:
                             vtype_type = 'primitive'
-                        print(f"[MAP DEBUG] dict_field: after infer, vtype_type={vtype_type}")
-                        print(f"[MAP DEBUG] vtype_raw={vtype_raw}, vtype_type={vtype_type}")
+                        if debug:
+                            _log.debug(f"dict_field: after infer, vtype_type={vtype_type}")
+                            _log.debug(f"vtype_raw={vtype_raw}, vtype_type={vtype_type}")
                         vtype, vtype_ref_qfn = map_field_type({'type_name': vtype_raw, 'type_type': vtype_type})
-                        print(f"[MAP DEBUG] vtype result: vtype={vtype}, vtype_ref_qfn={vtype_ref_qfn}")
+                        if debug:
+                            _log.debug(f"vtype result: vtype={vtype}, vtype_ref_qfn={vtype_ref_qfn}")
                     else:
                         vtype, vtype_ref_qfn = None, None
                     # Only three entries: [MAP, key_type, value_type]
@@ -1075,7 +1133,8 @@ class EarlyModelToModel:
                 # DEBUG: Print ModelField construction for enum fields
                 try:
                     if any((hasattr(ftype, 'name') and ftype.name == 'ENUM') or ftype == FieldType.ENUM for ftype in field_types):
-                        print(f"[DEBUG MODELFIELD] name={field.name} field_types={field_types} type_refs={type_refs} type_names={type_names}", file=sys.stderr)
+                        if debug:
+                            _log.debug(f"name={field.name} field_types={field_types} type_refs={type_refs} type_names={type_names}")
                 except Exception as e:
                     pass            # Convert parent_raw to ModelReference if present
             parent_ref = None
@@ -1090,10 +1149,8 @@ class EarlyModelToModel:
                 # Try to resolve the mapped_parent_raw QFN to set name and file for generator import logic
                 resolved_parent_qfn = mapped_parent_raw
                 if resolved_parent_qfn not in msg_lookup and mapped_parent_raw and mapped_parent_raw != '?':
-                    for qfn in msg_lookup.keys():
-                        if qfn.endswith(f'::{mapped_parent_raw}') or qfn == mapped_parent_raw:
-                            resolved_parent_qfn = qfn
-                            break
+                    for qfn in msg_index.with_segment_suffix(mapped_parent_raw)[:1]:
+                        resolved_parent_qfn = qfn
                 parent_ref = ModelReference(resolved_parent_qfn, kind='message')
                 parent_msg_obj = msg_lookup.get(resolved_parent_qfn)
                 if parent_msg_obj is not None:
@@ -1122,7 +1179,8 @@ class EarlyModelToModel:
 
         # Convert namespaces recursively
         def convert_namespace(ns):
-            print(f"[DEBUG] Model transform: enums in namespace '{ns.name}': {[e.name for e in ns.enums]}", file=sys.stderr)
+            if debug:
+                _log.debug(f"Model transform: enums in namespace '{ns.name}': {[e.name for e in ns.enums]}")
             enums = [convert_enum(e) for e in getattr(ns, 'enums', [])]
             messages = [convert_message(m) for m in getattr(ns, 'messages', [])]
             namespaces = [convert_namespace(n) for n in getattr(ns, 'namespaces', [])]
@@ -1181,7 +1239,7 @@ class EarlyModelToModel:
 
         options = collect_options_from_namespaces(getattr(early_model, 'namespaces', []))
         compounds = getattr(early_model, 'compounds', [])
-        return Model(
+        model = Model(
             file=early_model.file,
             namespaces=model_namespaces,
             options=options,
@@ -1189,3 +1247,5 @@ class EarlyModelToModel:
             alias_map=alias_map,
             imports=imports_dict
         )
+        context.add_model(early_model, model)
+        return model
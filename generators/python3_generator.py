@@ -2,6 +2,8 @@
 Python 3 generator for Model (new system).
 Outputs Python dataclasses and Enum classes for all messages and enums in the Model.
 """
+import logging
+from debug_trace import get_logger
 from model import Model
 from typing import List, Callable
 
@@ -9,25 +11,28 @@ from model_transforms.flatten_imports_transform import FlattenImportsTransform
 
 from model_transforms.assign_unique_names_transform import AssignUniqueNamesTransform
 from model_transforms.flatten_enums_transform import FlattenEnumsTransform
+from model_transforms.model_transform_pipeline import run_model_transform_pipeline
+
+_log = get_logger('gen.python3')
 
 
 def generate_python3_code(model: Model, module_name: str = "messages", transforms: List[Callable] = None):
     # Apply enum value assignment and enum flattening so all enums/messages have a flat, unique name and values are set
     from model_transforms.assign_enum_values_transform import AssignEnumValuesTransform
-    model = AssignEnumValuesTransform().transform(model)
-    model = FlattenEnumsTransform().transform(model)
+    model = run_model_transform_pipeline(model, [AssignEnumValuesTransform(), FlattenEnumsTransform()])
+    debug = _log.isEnabledFor(logging.DEBUG)
     # DEBUG: Print all enums and their parent/file info
-    import sys
-    print("[PYGEN DEBUG] ENUMS AND PARENTS:", file=sys.stderr)
     def debug_print_enum_parents(ns, indent=""):
         for enum in getattr(ns, 'enums', []):
             parent = getattr(enum, 'parent', None)
             parent_file = getattr(parent, 'file', None) if parent else None
-            print(f"{indent}Enum {enum.name}: parent={getattr(parent, 'name', None)}, parent_file={parent_file}, file={getattr(enum, 'file', None)}", file=sys.stderr)
+            _log.debug(f"{indent}Enum {enum.name}: parent={getattr(parent, 'name', None)}, parent_file={parent_file}, file={getattr(enum, 'file', None)}")
         for nested in getattr(ns, 'namespaces', []):
             debug_print_enum_parents(nested, indent + "  ")
-    for ns in getattr(model, 'namespaces', []):
-        debug_print_enum_parents(ns)
+    if debug:
+        _log.debug("ENUMS AND PARENTS:")
+        for ns in getattr(model, 'namespaces', []):
+            debug_print_enum_parents(ns)
 
     # --- Collect imports for referenced base enums/messages using shared utility ---
     from generators.generator_utils import collect_referenced_imports
@@ -126,8 +131,8 @@ def generate_python3_code(model: Model, module_name: str = "messages", transform
                 parent_name = getattr(enum.parent, 'name', enum.parent.name)
                 parent_mod = getattr(enum.parent, 'namespace', None)
                 fq_flat_name = parent_name
-                import sys
-                print(f"[PYGEN DEBUG] emit_enum: {enum.name} parent={fq_flat_name}", file=sys.stderr)
+                if debug:
+                    _log.debug(f"emit_enum: {enum.name} parent={fq_flat_name}")
                 parent_file_ns = None
                 if hasattr(enum.parent, 'file') and enum.parent.file:
                     import os
@@ -458,6 +463,7 @@ def get_qualified_name(obj, parent_ns=None):
         return get_local_name(name, parent_ns)
     return name
 
+    debug = _log.isEnabledFor(logging.DEBUG)
 
     def emit_enum_inner(enum, indent="", parent_ns=None):
         base = "Enum"
@@ -466,8 +472,8 @@ def get_qualified_name(obj, parent_ns=None):
             parent_name = getattr(enum.parent, 'name', enum.parent.name)
             parent_mod = getattr(enum.parent, 'namespace', None)
             fq_flat_name = parent_name
-            import sys
-            print(f"[PYGEN DEBUG] emit_enum: {enum.name} parent={fq_flat_name}", file=sys.stderr)
+            if debug:
+                _log.debug(f"emit_enum: {enum.name} parent={fq_flat_name}")
             parent_file_ns = None
             if hasattr(enum.parent, 'file') and enum.parent.file:
                 import os
@@ -526,8 +532,8 @@ def get_qualified_name(obj, parent_ns=None):
             parent_name = getattr(enum.parent, 'name', enum.parent.name)
             parent_mod = getattr(enum.parent, 'namespace', None)
             fq_flat_name = parent_name
-            import sys
-            print(f"[PYGEN DEBUG] emit_enum: {enum.name} parent={fq_flat_name}", file=sys.stderr)
+            if debug:
+                _log.debug(f"emit_enum: {enum.name} parent={fq_flat_name}")
             parent_file_ns = None
             if hasattr(enum.parent, 'file') and enum.parent.file:
                 import os
@@ -584,8 +590,8 @@ def get_qualified_name(obj, parent_ns=None):
                     val = 0
             assigned[value.name] = val
             last_value = val
-            import sys
-            print(f"[PYGEN ENUM DEBUG] Assign {value.name} = {val} (idx={idx}, explicit_child={value.name in child_explicit}, explicit_any={value.value is not None})", file=sys.stderr)
+            if debug:
+                _log.debug(f"Assign {value.name} = {val} (idx={idx}, explicit_child={value.name in child_explicit}, explicit_any={value.value is not None})")
 
         emitted = set()
         for value in all_values:
@@ -623,8 +629,8 @@ def get_qualified_name(obj, parent_ns=None):
                     val = 0
             assigned[value.name] = val
             last_value = val
-            import sys
-            print(f"[PYGEN ENUM DEBUG] Assign {value.name} = {val} (idx={idx}, explicit_child={value.name in child_explicit}, explicit_any={value.value is not None})", file=sys.stderr)
+            if debug:
+                _log.debug(f"Assign {value.name} = {val} (idx={idx}, explicit_child={value.name in child_explicit}, explicit_any={value.value is not None})")
 
         emitted = set()
         for value in all_values:
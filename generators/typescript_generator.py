@@ -2,35 +2,41 @@
 TypeScript generator for Model (new system).
 Outputs TypeScript interfaces and enums for all messages and enums in the Model.
 """
+import logging
+from debug_trace import get_logger
 from model import Model
 from typing import List, Callable
-import sys
 from model_transforms.flatten_imports_transform import FlattenImportsTransform
 from model_transforms.assign_unique_names_transform import AssignUniqueNamesTransform
 from model_transforms.flatten_enums_transform import FlattenEnumsTransform
+from model_transforms.model_transform_pipeline import run_model_transform_pipeline
+
+_log = get_logger('gen.typescript')
 
 def generate_typescript_code(model: Model, module_name: str = "messages", transforms: List[Callable] = None):
-    # --- Model transform: assign dummy enums for missing options types ---
-    from model_transforms.assign_dummy_option_enums_transform import AssignDummyOptionEnumsTransform
-    model = AssignDummyOptionEnumsTransform().transform(model)
+    debug = _log.isEnabledFor(logging.DEBUG)
     # --- Ensure all namespaces have correct parent pointers ---
     def set_namespace_parents(namespaces, parent=None):
         for ns in namespaces:
             setattr(ns, 'parent', parent)
             set_namespace_parents(getattr(ns, 'namespaces', []), ns)
     set_namespace_parents(getattr(model, 'namespaces', []))
-    # Apply enum value prefixing transform for TypeScript to avoid enum value name collisions
+    # Model transforms, in one pipeline run (non-conflicting ones share a walk): assign dummy enums for
+    # missing options types, prefix enum value names to avoid TypeScript enum value name collisions,
+    # then unique name assignment, enum value assignment and enum flattening
+    from model_transforms.assign_dummy_option_enums_transform import AssignDummyOptionEnumsTransform
     from model_transforms.prefix_enum_value_names_transform import PrefixEnumValueNamesTransform
-    model = PrefixEnumValueNamesTransform().transform(model)
+    from model_transforms.assign_enum_values_transform import AssignEnumValuesTransform
+    model = run_model_transform_pipeline(model, [
+        AssignDummyOptionEnumsTransform(),
+        PrefixEnumValueNamesTransform(),
+        AssignUniqueNamesTransform(),
+        AssignEnumValuesTransform(),
+        FlattenEnumsTransform(),
+    ])
     # Track emitted inline enums to avoid duplicates
     emitted_inline_enums = set()
 
-    # Apply unique name assignment, enum value assignment, and enum flattening
-    from model_transforms.assign_enum_values_transform import AssignEnumValuesTransform
-    model = AssignUniqueNamesTransform().transform(model)
-    model = AssignEnumValuesTransform().transform(model)
-    model = FlattenEnumsTransform().transform(model)
-
     # (Removed) Assign bitflag values to all enums used as options: now handled in early model transforms and model conversion.
 
     lines = []
@@ -245,7 +251,7 @@ def generate_typescript_code(model: Model, module_name: str = "messages", transf
                         return get_local_name(enum.name, parent_ns)
             # Fallback: emit error or 'never' for unresolved enum references
             if field is not None:
-                print(f"[TSGEN ERROR] Unresolved enum type for field '{getattr(field, 'name', None)}' in parent '{getattr(field.parent, 'name', None) if field and hasattr(field, 'parent') else None}'. type_names={getattr(field, 'type_names', None)}", file=sys.stderr)
+                _log.warning(f"Unresolved enum type for field '{getattr(field, 'name', None)}' in parent '{getattr(field.parent, 'name', None) if field and hasattr(field, 'parent') else None}'. type_names={getattr(field, 'type_names', None)}")
             return "never /* UNRESOLVED_ENUM */"
         if ftype.name == "MESSAGE":
             if tref is not None and hasattr(tref, 'name'):
@@ -274,7 +280,7 @@ def generate_typescript_code(model: Model, module_name: str = "messages", transf
                         return get_local_name(tname, parent_ns)
             # Fallback: emit error or 'never' for unresolved message references
             if field is not None:
-                print(f"[TSGEN ERROR] Unresolved message type for field '{getattr(field, 'name', None)}' in parent '{getattr(field.parent, 'name', None) if field and hasattr(field, 'parent') else None}'. type_names={getattr(field, 'type_names', None)}", file=sys.stderr)
+                _log.warning(f"Unresolved message type for field '{getattr(field, 'name', None)}' in parent '{getattr(field.parent, 'name', None) if field and hasattr(field, 'parent') else None}'. type_names={getattr(field, 'type_names', None)}")
             return "never /* UNRESOLVED_MESSAGE */"
         if ftype.name == "COMPOUND":
             if field is not None and hasattr(field, 'parent') and hasattr(field, 'name'):
@@ -304,9 +310,10 @@ def generate_typescript_code(model: Model, module_name: str = "messages", transf
 
     def emit_namespace(ns, indent=""):
         ns_name_dbg = getattr(ns, 'name', None)
-        print(f"[TSGEN DEBUG] Namespace: {ns_name_dbg}")
-        for e in getattr(ns, 'enums', []):
-            print(f"[TSGEN DEBUG]   Enum: {e.name} (CamelCase: {get_local_name(e.name, ns_name_dbg, keep_full_for_options=True)}) Values: {[v.name for v in getattr(e, 'values', [])]}")
+        if debug:
+            _log.debug(f"Namespace: {ns_name_dbg}")
+            for e in getattr(ns, 'enums', []):
+                _log.debug(f"  Enum: {e.name} (CamelCase: {get_local_name(e.name, ns_name_dbg, keep_full_for_options=True)}) Values: {[v.name for v in getattr(e, 'values', [])]}")
         # Build the full namespace path for this ns
         ns_obj = ns
         ns_names = []
@@ -403,8 +410,7 @@ def write_typescript_file(model: Model, out_path):
 # TESTS
 if __name__ == "__main__":
     import os
-    from def_file_loader import load_early_model_with_imports
-    from earlymodel_to_model import early_model_to_model
+    from model_compiler import compile_def_graph
 
     def test_typescript_generator():
         test_dir = os.path.join(os.path.dirname(__file__), "..", "tests", "def")
@@ -412,8 +418,7 @@ if __name__ == "__main__":
             if not fname.endswith(".def") or "invalid" in fname or "unresolved" in fname:
                 continue
             main_path = os.path.join(test_dir, fname)
-            early_main, all_early_models = load_early_model_with_imports(main_path)
-            model_main = early_model_to_model(early_main)
+            model_main = compile_def_graph(main_path).model
             ts_code = generate_typescript_code(model_main)
             assert ts_code.strip(), f"No TypeScript code generated for {fname}"
             print(f"[PASS] {fname}")
@@ -1,4 +1,9 @@
-from lark import Lark, Transformer, v_args
+import hashlib
+import os
+
+import lark
+from lark import Lark, Transformer, Tree, v_args
+from lark.exceptions import LarkError
 
 
 # Extended grammar for full message format
@@ -30,7 +35,7 @@ grammar = r"""
     compound_def: DOC_COMMENT* basic_type NAME "{" NAME ("," NAME)* "}"
 
     comment: DOC_COMMENT | LOCAL_COMMENT | C_COMMENT
-    C_COMMENT: /\/\*[\s\S]*\*\//
+    C_COMMENT: /\/\*[\s\S]*?\*\//
     DOC_COMMENT: /\s*\/{3}[^\n]*/
     LOCAL_COMMENT: /\s*\/\/[^\n]*/
 
@@ -85,15 +90,249 @@ default_expr: /[^;\n]+/
     %ignore WS
 """
 
-parser = Lark(
-    grammar,
-    start='start',
-    propagate_positions=True
-)
+
+
+# Deterministic variant of the grammar above for the LALR(1) fast path.
+# Differences from the Earley grammar, all chosen so that the resulting
+# EarlyModel is identical to the Earley one:
+#   - basic types are lexed as NAME inside type positions and resolved as
+#     ref_type, which is what Earley picks for the ambiguous case anyway;
+#   - comments are never attached to the following message/field/value by
+#     the grammar itself, see _earley_compat() and EarlyModelBuilder for the
+#     attachment rules;
+#   - comments inside message bodies and value lists use their own rules
+#     (aliased back to `comment`) so that LALR state merging cannot let a
+#     keyword shadow a NAME, e.g. a field called `message` after a comment
+#     or a top-level `int Vec {..}` compound after a comment.
+lalr_grammar = r"""
+    start: (comment | import_stmt | item)+
+    import_stmt: "import" STRING ("as" NAME)?
+
+    item: namespace | message | enum_def | options_def | compound_def
+    namespace_item: comment -> item
+        | namespace -> item
+        | message -> item
+        | enum_def -> item
+        | options_def -> item
+        | compound_def -> item
+
+    enum_def: enum_kind NAME inheritance? "{" enum_value_or_comment_list "}"
+    inheritance: ":" qualified_name_with_dot
+    enum_value_or_comment_list: enum_value_or_comment_seq?
+    enum_value_or_comment_seq: (enum_value | value_comment | COMMA)+
+    enum_kind: ENUM_KIND | OPEN_ENUM_KIND
+    options_def: "options" NAME "{" option_value_or_comment_list "}"
+    option_value_or_comment_list: option_value_or_comment_seq?
+    option_value_or_comment_seq: (option_value | value_comment | COMMA)+
+    compound_def: basic_type NAME "{" NAME ("," NAME)* "}"
+
+    comment: DOC_COMMENT | LOCAL_COMMENT | C_COMMENT
+    C_COMMENT: /\/\*[\s\S]*?\*\//
+    DOC_COMMENT.3: /\s*\/{3}[^\n]*/
+    LOCAL_COMMENT.2: /\s*\/\/[^\n]*/
+
+    namespace: "namespace" NAME "{" namespace_item* "}"
+    message: "message" NAME inheritance? "{" message_body* "}"
+    message_body: body_comment | field
+    body_comment: DOC_COMMENT -> comment
+        | LOCAL_COMMENT -> comment
+        | C_COMMENT -> comment
+    value_comment: DOC_COMMENT -> comment
+        | LOCAL_COMMENT -> comment
+        | C_COMMENT -> comment
+    qualified_name_with_dot: NAME ("::" NAME)* ("." NAME)?
+
+    field: field_modifier* NAME ":" type_def field_default? ";"?
+    field_modifier: NAME
+    type_def: enum_type
+        | options_type
+        | compound_type
+        | array_type
+        | map_type
+        | ref_type
+
+    array_type: (enum_type | options_type | compound_type | ref_type) "[" "]"
+    map_type: "Map" "<" map_key_type "," map_value_type ">"
+    map_key_type: ref_type
+    map_value_type: type_def
+
+    enum_type: enum_kind ("{" enum_value_or_comment_list "}" | qualified_name_with_dot)
+    enum_value: NAME ("=" NUMBER)? ";"?
+
+    options_type: "options" "{" option_value_or_comment_list "}"
+    option_value: NAME ("=" NUMBER)?
+
+    compound_type: NAME "{" compound_component_seq? "}"
+    compound_component_seq: compound_component_item (compound_component_sep compound_component_item)*
+    compound_component_item: NAME
+    compound_component_sep: (COMMA | value_comment)*
+
+    ref_type: qualified_name_with_dot
+
+    field_default: "=" default_expr
+    default_expr: /[^;\n]+/
+
+    COMMA: ","
+    NAME: /[a-zA-Z_][a-zA-Z0-9_]*/
+    ENUM_KIND: "enum"
+    OPEN_ENUM_KIND: "open_enum"
+    basic_type: BASIC_TYPE
+    BASIC_TYPE: "string" | "int" | "float" | "bool" | "byte"
+    NUMBER: /-?[0-9]+/
+    STRING: /"(\\.|[^"\\])*"/
+    %import common.WS
+    %ignore WS
+"""
+
+
+# Parsers are built on first use rather than at import. The LALR tables are also
+# persisted on disk (lark's own cache format) keyed by grammar text + lark version,
+# so a warm process skips grammar analysis entirely. Earley parsers cannot be
+# serialized by lark, so that one is only made lazy.
+# Set MESSAGEWRANGLER_CACHE_DIR to relocate the cache, or to an empty string to disable it.
+_PARSER_OPTIONS = {
+    'earley': dict(start='start', propagate_positions=True),
+    'lalr': dict(start='start', parser='lalr', propagate_positions=True),
+}
+PARSE_MODES = ('earley', 'lalr')
+_GRAMMARS = {'earley': grammar, 'lalr': lalr_grammar}
+_parsers = {}
+
+
+def parser_cache_dir():
+    env = os.environ.get('MESSAGEWRANGLER_CACHE_DIR')
+    if env is not None:
+        return env or None
+    return os.path.join(os.path.expanduser('~'), '.cache', 'messagewrangler')
+
+
+def parser_cache_path(mode, **options):
+    """Path of the on-disk parser cache for `mode`, or None if caching is unavailable."""
+    cache_dir = parser_cache_dir()
+    if mode != 'lalr' or not cache_dir:
+        return None
+    key = grammar_fingerprint(mode)
+    if options:
+        key = hashlib.sha256((key + repr(sorted(options.items()))).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f"lark_{mode}_{key[:16]}.cache")
+
+
+def grammar_fingerprint(mode=None):
+    """
+    Hash of the grammar text, parser options and lark version for `mode`
+    (or for all modes if None). Changes whenever parse trees could change.
+    """
+    modes = PARSE_MODES if mode is None else (mode,)
+    h = hashlib.sha256(lark.__version__.encode('utf-8'))
+    for m in modes:
+        h.update(_GRAMMARS[m].encode('utf-8'))
+        h.update(repr(sorted(_PARSER_OPTIONS[m].items())).encode('utf-8'))
+    return h.hexdigest()
+
+
+def build_parser(mode, transformer=None, **options):
+    """
+    Build a new Lark parser for `mode`, loading the analysed grammar from the disk cache if possible.
+    `options` override the default Lark options for the mode; `transformer` is embedded (LALR only).
+    """
+    opts = dict(_PARSER_OPTIONS[mode], **options)
+    if transformer is not None:
+        opts['transformer'] = transformer
+    cache_path = parser_cache_path(mode, **options)
+    if cache_path:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            return Lark(_GRAMMARS[mode], cache=cache_path, **opts)
+        except OSError:
+            pass
+    return Lark(_GRAMMARS[mode], **opts)
+
+
+def get_parser(mode='earley'):
+    """Return the (memoized) Lark parser for `mode`."""
+    p = _parsers.get(mode)
+    if p is None:
+        p = _parsers[mode] = build_parser(mode)
+    return p
+
+
+def __getattr__(name):
+    # Backwards compatible module attributes, built lazily
+    if name == 'parser':
+        return get_parser('earley')
+    if name == 'lalr_parser':
+        return get_parser('lalr')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _is_comment(node):
+    return isinstance(node, Tree) and node.data == 'comment'
+
+
+def _absorbs(definition, comment):
+    # message: comment* "message" ...   /   enum_def etc.: DOC_COMMENT* ...
+    if definition.data == 'message':
+        return True
+    if definition.data in ('enum_def', 'options_def', 'compound_def'):
+        return comment.children[0].type == 'DOC_COMMENT'
+    return False
+
+
+def _fold_comments(children):
+    """
+    Fold runs of comments into the following definition the way the Earley
+    parser resolves `comment*` / `DOC_COMMENT*` ambiguity: a run that starts
+    the block is absorbed entirely if the definition can take all of it;
+    otherwise only an even number of trailing absorbable comments is taken.
+    """
+    out = []
+    pending = []  # (node as it appears in children, its comment tree)
+    for child in children:
+        if _is_comment(child):
+            pending.append((child, child))
+            continue
+        definition = None
+        if isinstance(child, Tree) and child.data == 'item' and child.children and isinstance(child.children[0], Tree):
+            definition = child.children[0]
+            if _is_comment(definition):
+                pending.append((child, definition))
+                continue
+        if definition is not None and pending:
+            k = 0
+            while k < len(pending) and _absorbs(definition, pending[-1 - k][1]):
+                k += 1
+            take = k if (not out and k == len(pending)) else k - k % 2
+            if take:
+                taken = [c for _, c in pending[len(pending) - take:]]
+                del pending[len(pending) - take:]
+                if definition.data == 'message':
+                    definition.children[:0] = taken
+                else:
+                    definition.children[:0] = [c.children[0] for c in taken]
+        out.extend(node for node, _ in pending)
+        pending = []
+        out.append(child)
+    out.extend(node for node, _ in pending)
+    return out
+
+
+def _earley_compat(tree):
+    """
+    Reshape an LALR parse tree so it matches the tree the Earley parser picks
+    for the same input: comments before a definition (top level or inside a
+    namespace) are folded into it as described in _fold_comments().
+    Doc comments inside enum/option value lists are left as separate comments.
+    Earley's split of them between values and comments depends on how many
+    list items follow, so EarlyModelBuilder decides their attachment from the
+    flattened list instead, for trees from either grammar.
+    """
+    tree.children = _fold_comments(tree.children)
+    for ns in tree.find_data('namespace'):
+        ns.children[1:] = _fold_comments(ns.children[1:])
+    return tree
 
 
 # Transformer to attach line numbers to field nodes
-from lark import Transformer
 class AttachFieldLineNumbers(Transformer):
     def field(self, items):
         # Find the first NAME token (field name)
@@ -108,8 +347,26 @@ class AttachFieldLineNumbers(Transformer):
             node.line = line
         return node
 
-def parse_message_dsl(text):
-    tree = parser.parse(text)
+
+
+def parse_message_dsl(text, mode='earley'):
+    """
+    Parse .def text into a lark tree.
+    mode='earley' (default) uses the original ambiguous grammar.
+    mode='lalr' uses the deterministic LALR(1) grammar, which is much faster and
+    yields the same EarlyModel; input the LALR grammar rejects is re-parsed with
+    Earley so behaviour (including error messages) never regresses.
+    """
+    if mode not in PARSE_MODES:
+        raise ValueError(f"Unknown parse mode {mode!r}, expected one of {PARSE_MODES}")
+    tree = None
+    if mode == 'lalr':
+        try:
+            tree = _earley_compat(get_parser('lalr').parse(text))
+        except LarkError:
+            tree = None
+    if tree is None:
+        tree = get_parser('earley').parse(text)
     # Attach line numbers to field nodes
     tree = AttachFieldLineNumbers().transform(tree)
     return tree
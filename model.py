@@ -1,18 +1,39 @@
 """
 model.py
 Concrete, generator-ready representation of a parsed .def file. All references are resolved and all fields are concrete.
+
+The node classes below Model use __slots__ to keep large models small. A field's per-type data
+(field_types, type_refs, type_names) and its modifiers, inline_values and compound_components
+are tuples (assign a new tuple to change them), and names, files and namespaces are interned.
+Attributes set after construction (ModelField.parent, the name/file/namespace of a resolved
+ModelReference) have slots too; anything else still lands in the instance __dict__.
 """
+import itertools
+import sys
 from enum import Enum, auto
-from typing import List, Dict, Optional, Union, Any
+from typing import List, Dict, Optional, Union, Any, Tuple
+from qfn_lookup import QfnLookup
+
+
+_MISSING = object()
+# Stamps of Model.mark_written() calls, increasing across all models
+_write_clock = itertools.count(1)
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
 
 class ModelReference:
     """
     Reference to any entity in the Model (message, enum, namespace, etc.).
     Stores the QFN (qualified fully name) and the kind (e.g., 'message', 'enum', 'namespace').
     """
+    __slots__ = ('qfn', 'kind', 'name', 'file', 'namespace', '__dict__')
+
     def __init__(self, qfn: str, kind: str):
-        self.qfn = qfn
-        self.kind = kind
+        self.qfn = _intern(qfn)
+        self.kind = _intern(kind)
     def __repr__(self):
         return f"ModelReference(qfn={self.qfn!r}, kind={self.kind!r})"
 
@@ -37,6 +58,10 @@ class FieldType(Enum):
     # Add more as needed to match all EarlyModel types
 
 class ModelField:
+    __slots__ = ('name', 'field_types', 'type_refs', 'type_names', 'modifiers', 'default', 'doc', 'comment',
+                 'inline_values', 'file', 'line', 'namespace', 'compound_base_type', 'compound_components',
+                 'parent', '__dict__')
+
     @property
     def type_ref(self):
         """
@@ -54,9 +79,9 @@ class ModelField:
     def __init__(
         self,
         name: str,
-        field_types: list,  # List[FieldType], always at least 1, up to 3 for maps
-        type_refs: list = None,  # List[Optional[Any]], same length as field_types
-        type_names: list = None,  # List[Optional[str]], for debugging
+        field_types: list,  # FieldTypes, always at least 1, up to 3 for maps (stored as a tuple)
+        type_refs: list = None,  # Optional[Any] per field type (stored as a tuple)
+        type_names: list = None,  # Optional[str] per field type, for debugging (stored as a tuple)
         modifiers: Optional[List[FieldModifier]] = None,
         default: Optional[Any] = None,
         doc: Optional[str] = None,
@@ -68,61 +93,71 @@ class ModelField:
         compound_base_type: Optional[str] = None,
         compound_components: Optional[list] = None,
     ):
-        self.name = name
-        self.field_types = field_types
-        self.type_refs = type_refs or [None] * len(field_types)
-        self.type_names = type_names or [None] * len(field_types)
-        self.modifiers = modifiers or []
+        self.name = _intern(name)
+        self.field_types: Tuple[FieldType, ...] = tuple(field_types)
+        self.type_refs: Tuple[Optional[Any], ...] = tuple(type_refs) if type_refs else (None,) * len(self.field_types)
+        self.type_names: Tuple[Optional[str], ...] = tuple(map(_intern, type_names)) if type_names else (None,) * len(self.field_types)
+        self.modifiers: Tuple[FieldModifier, ...] = tuple(modifiers) if modifiers else ()
         self.default = default
         self.doc = doc
         self.comment = comment
-        self.inline_values = inline_values or []
-        self.file = file
+        self.inline_values: Tuple['ModelEnumValue', ...] = tuple(inline_values) if inline_values else ()
+        self.file = _intern(file)
         self.line = line
-        self.namespace = namespace
+        self.namespace = _intern(namespace)
         self.compound_base_type = compound_base_type
-        self.compound_components = compound_components or []
+        self.compound_components: Tuple[str, ...] = tuple(compound_components) if compound_components else ()
 
 class ModelEnumValue:
+    __slots__ = ('name', 'value', 'doc', 'comment', 'file', 'line', 'namespace', '__dict__')
+
     def __init__(self, name: str, value: int, doc: Optional[str] = None, comment: Optional[str] = None, file: Optional[str] = None, line: Optional[int] = None, namespace: Optional[str] = None):
-        self.name = name
+        self.name = _intern(name)
         self.value = value
         self.doc = doc
         self.comment = comment
-        self.file = file
+        self.file = _intern(file)
         self.line = line
-        self.namespace = namespace
+        self.namespace = _intern(namespace)
 
 class ModelEnum:
+    __slots__ = ('name', 'values', 'is_open', 'parent', 'doc', 'comment', 'parent_raw', 'file', 'line', 'namespace',
+                 'is_options', '__dict__')
+
     def __init__(self, name: str, values: List['ModelEnumValue'], is_open: bool = False, parent: Optional['ModelEnum'] = None, doc: Optional[str] = None, comment: Optional[str] = None, parent_raw: Optional[str] = None, file: Optional[str] = None, line: Optional[int] = None, namespace: Optional[str] = None, is_options: bool = False):
-        self.name = name
+        self.name = _intern(name)
         self.values = values
         self.is_open = is_open
         self.parent = parent
         self.doc = doc
         self.comment = comment
         self.parent_raw = parent_raw
-        self.file = file
+        self.file = _intern(file)
         self.line = line
-        self.namespace = namespace
+        self.namespace = _intern(namespace)
         self.is_options = is_options
 
 class ModelMessage:
+    __slots__ = ('name', 'fields', 'parent', 'doc', 'comment', 'parent_raw', 'file', 'line', 'namespace', '__dict__')
+
     def __init__(self, name: str, fields: List['ModelField'], parent: Optional['ModelReference'] = None, doc: Optional[str] = None, comment: Optional[str] = None, parent_raw: Optional[str] = None, file: Optional[str] = None, line: Optional[int] = None, namespace: Optional[str] = None):
-        self.name = name
+        self.name = _intern(name)
         self.fields = fields
         self.parent = parent  # ModelReference or None
         self.doc = doc
         self.comment = comment
         self.parent_raw = parent_raw  # Still keep the raw string for debugging
-        self.file = file
+        self.file = _intern(file)
         self.line = line
-        self.namespace = namespace
+        self.namespace = _intern(namespace)
 
 class ModelNamespace:
+    __slots__ = ('name', 'messages', 'enums', 'namespaces', 'doc', 'comment', 'options', 'compounds', 'file', 'line',
+                 'parent_namespace', '__dict__')
+
     def __init__(self, name: str, messages: List['ModelMessage'], enums: List['ModelEnum'], namespaces: Optional[List['ModelNamespace']] = None,
                  doc: Optional[str] = None, comment: Optional[str] = None, options: Optional[list] = None, compounds: Optional[list] = None, file: Optional[str] = None, line: Optional[int] = None, parent_namespace: Optional[str] = None):
-        self.name = name
+        self.name = _intern(name)
         self.messages = messages
         self.enums = enums
         self.namespaces = namespaces or []
@@ -130,7 +165,7 @@ class ModelNamespace:
         self.comment = comment
         self.options = options or []
         self.compounds = compounds or []
-        self.file = file
+        self.file = _intern(file)
         self.line = line
         self.parent_namespace = parent_namespace
 
@@ -142,65 +177,85 @@ class Model:
         self.compounds = compounds or []
         self.alias_map = alias_map or {}
         self.imports = imports or {}  # key: alias or import path, value: Model
-        self._qfn_lookup = self._build_qfn_lookup()
-
-    def _build_qfn_lookup(self):
-        lookup = {}
-        def walk_ns(ns, prefix):
-            ns_qfn = '::'.join(prefix + [ns.name]) if ns.name else '::'.join(prefix)
-            for msg in getattr(ns, 'messages', []):
-                msg_qfn = ns_qfn + '::' + msg.name if ns_qfn else msg.name
-                lookup[(msg_qfn, 'message')] = msg
-            for enum in getattr(ns, 'enums', []):
-                enum_qfn = ns_qfn + '::' + enum.name if ns_qfn else enum.name
-                lookup[(enum_qfn, 'enum')] = enum
-            for nested in getattr(ns, 'namespaces', []):
-                walk_ns(nested, prefix + [ns.name] if ns.name else prefix)
-        for ns in getattr(self, 'namespaces', []):
-            walk_ns(ns, [])
-        # PATCH: Also include all imported models' QFN lookups for cross-file reference resolution
-        if hasattr(self, 'imports') and self.imports:
-            for imported_model in self.imports.values():
-                if hasattr(imported_model, '_qfn_lookup'):
-                    lookup.update(imported_model._qfn_lookup)
-        return lookup
+        # (QFN, kind) -> message/enum, over this model and (layered, not copied) its imports
+        self._qfn_lookup = QfnLookup(self)
+        self._resolve_memo = None  # see _resolution_memo()
+        # Transform name ('enum.values', ...) -> stamp of its last recorded write, and (transform
+        # class, settings) -> stamp of its last run; see mark_written()
+        self._write_stamps: Dict[str, int] = {}
+        self._transform_runs: Dict[tuple, int] = {}
+
+    def __setattr__(self, name, value):
+        # Replacing an existing model's imports may change the layer order of every QfnLookup; a
+        # new model's first assignment cannot, as no lookup layers it yet
+        replaced = name == 'imports' and 'imports' in self.__dict__
+        object.__setattr__(self, name, value)
+        if replaced:
+            QfnLookup.imports_changed()
+
+    def _resolution_memo(self) -> Dict[tuple, Any]:
+        """
+        (QFN, kind) -> object (or None) for the references this model has resolved so far. It
+        holds only those answers, not a copy of any lookup, and is dropped when the lookup of this
+        model or of any model it imports changed since (or on invalidate_resolution()).
+        """
+        memo = self._resolve_memo
+        if memo is None or self._resolve_stamp != QfnLookup.last_change:
+            # Something changed somewhere: keep the answers unless it was one of our layers
+            versions = [(id(layer), layer.version) for layer in self._qfn_lookup.layers()]
+            if memo is None or versions != self._resolve_versions:
+                memo = self._resolve_memo = {}
+                self._resolve_versions = versions
+            self._resolve_stamp = QfnLookup.last_change
+        return memo
+
+    def mark_written(self, names=('*',)) -> int:
+        """
+        Record that the attributes `names` of this model's nodes changed, named as transforms
+        declare them ('enum.values', 'field', ...; the default is everything), and return the
+        write's stamp. The transform pipeline runs a transform again only if something it reads
+        or writes was written since its last run, so edits made outside transforms must be
+        reported here.
+        """
+        stamp = next(_write_clock)
+        for name in names:
+            self._write_stamps[name] = stamp
+        return stamp
+
+    def invalidate_resolution(self) -> None:
+        """Drop the resolved references (after changing this model, its aliases or its imports)."""
+        self._resolve_memo = None
+        QfnLookup.imports_changed()
+
+    def _resolve(self, qfn: str, kind: str) -> Optional[Any]:
+        memo = self._resolution_memo()
+        key = (qfn, kind)
+        found = memo.get(key, _MISSING)
+        if found is _MISSING:
+            # This model's lookup (layered over its imports), then, for alias::rest, the aliased
+            # import's own resolution of the real namespace's rest
+            found = self._qfn_lookup.get(key)
+            if found is None and '::' in qfn:
+                alias, rest = qfn.split('::', 1)
+                real_ns = (getattr(self, 'alias_map', None) or {}).get(alias)
+                imported_model = (getattr(self, 'imports', None) or {}).get(alias)
+                if real_ns is not None and imported_model is not None:
+                    found = imported_model._resolve(f"{real_ns}::{rest}" if real_ns else rest, kind)
+            memo[key] = found
+        return found
 
     def resolve_reference(self, ref: 'ModelReference') -> Optional[Any]:
         """
         Resolve a ModelReference to the actual object in the Model (message, enum, namespace, etc.).
         Returns None if not found. Handles import alias mapping and matches full QFN at any depth.
+        Answers are memoized per model, so repeated references cost one dict lookup.
         """
         if not ref or not ref.qfn:
             return None
-        qfn_target = ref.qfn
-        kind = ref.kind
-        # Debug: print the QFN lookup table and the target QFN
-        print(f"[DEBUG] Model.resolve_reference: Looking for QFN '{qfn_target}' of kind '{kind}'")
-        print(f"[DEBUG] Model.resolve_reference: QFN lookup keys:")
-        for k in self._qfn_lookup.keys():
-            print(f"    {k}")
-        # Debug: print all aliases in alias_map
-        if hasattr(self, 'alias_map') and self.alias_map:
-            print(f"[DEBUG] Model.resolve_reference: Aliases in alias_map:")
-            for alias, ns in self.alias_map.items():
-                print(f"    alias '{alias}' -> '{ns}'")
-        # Try direct QFN match
-        found = self._qfn_lookup.get((qfn_target, kind))
-        if found:
-            print(f"[DEBUG] Model.resolve_reference: Found direct QFN match for {qfn_target}")
-            return found
-        # Try alias mapping: delegate to imported Model if alias is present
-        if '::' in qfn_target and hasattr(self, 'alias_map') and self.alias_map:
-            alias, rest = qfn_target.split('::', 1)
-            if alias in self.imports and alias in self.alias_map:
-                real_ns = self.alias_map[alias]
-                # If real_ns is empty, just use rest as the QFN
-                if real_ns:
-                    rewritten_qfn = f"{real_ns}::{rest}"
-                else:
-                    rewritten_qfn = rest
-                print(f"[DEBUG] Model.resolve_reference: Delegating lookup of '{rewritten_qfn}' of kind '{kind}' to import '{alias}' (alias for '{real_ns}')")
-                imported_model = self.imports[alias]
-                return imported_model.resolve_reference(ModelReference(qfn=rewritten_qfn, kind=kind))
-        print(f"[DEBUG] Model.resolve_reference: No match found for {qfn_target}")
-        return None
\ No newline at end of file
+        memo = self._resolve_memo
+        if memo is not None and self._resolve_stamp == QfnLookup.last_change:
+            try:
+                return memo[(ref.qfn, ref.kind)]
+            except KeyError:
+                pass
+        return self._resolve(ref.qfn, ref.kind)
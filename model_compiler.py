@@ -0,0 +1,104 @@
+"""
+model_compiler.py
+One call from a root .def file to a fully resolved Model graph.
+
+compile_def_graph() loads the root file and everything it imports, runs the early transforms and
+EarlyModelToModel on every file exactly once in dependency order (imports first), and hands each
+importer the already converted Models of its imports through a shared ConversionContext. An
+optional list of ModelTransforms is applied to the root Model only. The time spent on every file
+in each stage is recorded, and the time spent in each model transform.
+"""
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from early_model import EarlyModel
+from model import Model
+from def_file_loader import load_def_files
+from early_model_cache import EarlyModelCache
+from early_model_transforms.dependency_sort import normalize_path
+from early_transform_pipeline import EarlyTransform
+from early_transform_scheduler import default_early_transforms, transform_early_models
+from conversion_context import ConversionContext
+from earlymodel_to_model import EarlyModelToModel
+from model_transforms.model_transform_pipeline import ModelTransform, ModelTransformStats, run_model_transform_pipeline
+
+STAGES = ('parse', 'early_transforms', 'convert', 'model_transforms')
+
+
+class CompiledGraph:
+    def __init__(self, root_path: str, context: ConversionContext):
+        self.root_path = root_path
+        self.context = context
+        self.order: List[str] = []  # dependencies first
+        self.early_models: Dict[str, EarlyModel] = {}  # path -> transformed EarlyModel
+        self.models: Dict[str, Model] = {}  # path -> converted Model (the root after model transforms)
+        self.timings: Dict[str, Dict[str, float]] = {}  # path -> stage -> seconds
+        self.model_transform_stats = ModelTransformStats()  # per-transform times of the model_transforms stage
+
+    @property
+    def model(self) -> Model:
+        """The root file's Model, with its imports populated."""
+        return self.models[self.root_path]
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Seconds spent in each stage, over all files."""
+        totals = {stage: 0.0 for stage in STAGES}
+        for stages in self.timings.values():
+            for stage, seconds in stages.items():
+                totals[stage] += seconds
+        return totals
+
+    def format_timings(self) -> str:
+        """A table of per-file, per-stage times in milliseconds, with a total row."""
+        width = max([len('total')] + [len(os.path.basename(p)) for p in self.order])
+        lines = [f"{'file':<{width}} " + ' '.join(f"{stage:>16}" for stage in STAGES)]
+        rows = [(os.path.basename(p), self.timings[p]) for p in self.order]
+        rows.append(('total', self.stage_totals()))
+        for name, stages in rows:
+            lines.append(f"{name:<{width}} " + ' '.join(f"{stages.get(stage, 0.0) * 1000:16.2f}" for stage in STAGES))
+        return '\n'.join(lines)
+
+
+def compile_def_graph(root_def_file: str, parse_mode: str = 'treeless',
+                      cache: Optional[EarlyModelCache] = None,
+                      early_transforms: Callable[[Dict[str, EarlyModel]], List[EarlyTransform]] = default_early_transforms,
+                      model_transforms: Optional[List[ModelTransform]] = None,
+                      context: Optional[ConversionContext] = None, workers: Optional[int] = 1) -> CompiledGraph:
+    """
+    Load, transform and convert `root_def_file` and its transitive imports.
+    `early_transforms` builds the early transform list of a file from its transformed imports by
+    import key (alias, or import path when there is no alias). With workers > 1 (None:
+    os.cpu_count()) the files are parsed in a process pool (see load_def_files).
+    `model_transforms` run on the root Model only; imported Models are shared by every file that
+    imports them and are left as converted. Returns a CompiledGraph whose `model` is the root Model; every imported Model
+    appears once in `models` and is the same object in the `imports` of every file that imports it.
+    """
+    root = normalize_path(root_def_file)
+    graph = CompiledGraph(root, context if context is not None else ConversionContext())
+    timings = graph.timings
+
+    parse_times: Dict[str, float] = {}
+    loaded = load_def_files(root, workers, parse_mode, cache, parse_times)
+    parsed: Dict[str, EarlyModel] = {normalize_path(m.file): m for m in loaded}
+    for path, seconds in parse_times.items():
+        timings[path] = {'parse': seconds}
+
+    transform_times: Dict[str, float] = {}
+    graph.early_models = transform_early_models(parsed, early_transforms, transform_times)
+    graph.order = list(graph.early_models)
+    for path, seconds in transform_times.items():
+        timings[path]['early_transforms'] = seconds
+
+    converter = EarlyModelToModel(graph.context)
+    for path in graph.order:
+        t0 = time.perf_counter()
+        graph.models[path] = converter.process(graph.early_models[path])
+        timings[path]['convert'] = time.perf_counter() - t0
+
+    if model_transforms:
+        t0 = time.perf_counter()
+        graph.models[root] = run_model_transform_pipeline(graph.models[root], model_transforms,
+                                                          stats=graph.model_transform_stats)
+        timings[root]['model_transforms'] = time.perf_counter() - t0
+    return graph
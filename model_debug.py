@@ -6,7 +6,7 @@ import os
 import json
 from typing import Any
 
-from early_model import EarlyModel
+from early_model import EARLY_NODE_CLASSES, EarlyModel, node_attributes
 
 def pretty_print_model(model: Any, file_path: str = None, out_dir: str = "./generated/model_builder"):
     """
@@ -22,8 +22,8 @@ def pretty_print_model(model: Any, file_path: str = None, out_dir: str = "./gene
 
     # Use a custom encoder to handle non-serializable objects
     def default_encoder(obj):
-        if hasattr(obj, '__dict__'):
-            return obj.__dict__
+        if hasattr(obj, '__dict__') or isinstance(obj, EARLY_NODE_CLASSES):
+            return node_attributes(obj)
         return str(obj)
     with open(file_path, "w", encoding="utf-8") as f:
         json.dump(model, f, indent=2, default=default_encoder)
@@ -339,7 +339,7 @@ def debug_print_model(model, indent=0, file_path=None, out_dir="./generated/mode
             if hasattr(field, 'compound_base_type') and field.compound_base_type:
                 field_details.append(f"base_type={field.compound_base_type}")
             if hasattr(field, 'compound_components') and field.compound_components:
-                field_details.append(f"components={field.compound_components}")
+                field_details.append(f"components={list(field.compound_components)}")
             if field.modifiers:
                 field_details.append(f"modifiers={[m.name for m in field.modifiers]}")
             if field.default is not None:
@@ -0,0 +1,230 @@
+"""
+model_snapshot.py
+Versioned binary snapshots of fully resolved Model graphs.
+
+A snapshot holds a root Model and everything reachable from it: imported Models, namespaces,
+messages, enums, fields, ModelReferences and any other node objects of model / early_model.
+Object identity is preserved, so an enum or message shared between fields, parents and imports
+is one object again after loading. Model._qfn_lookup and the memo of resolved references are
+derived data: they are not stored but rebuilt on first use after loading. A loaded model has no
+record of transform runs (write stamps are only ordered within one process), so the transform
+pipeline runs every transform on it once.
+
+Layout: MAGIC, the format version (little-endian uint16), then a zlib-compressed marshal payload
+    (classes, shapes, objects, root)
+classes is a list of (module, qualified name); shapes a list of (class index, attribute names);
+objects a list of (shape index, attribute values) in discovery order. Values are None, bool,
+int, float, str and lists as themselves; anything else is a tagged tuple: ('r', object index),
+('e', class index, enum value), ('t', *items) for tuples and ('d', [keys], [values]) for dicts.
+Equal strings are stored once and equal tuples are loaded as one shared tuple. Only classes from
+SNAPSHOT_MODULES are written or loaded.
+"""
+import gc
+import importlib
+import marshal
+import struct
+import zlib
+from enum import Enum
+from typing import Dict, List, Tuple
+
+from model import Model
+from qfn_lookup import QfnLookup
+
+MAGIC = b'MWMS'
+FORMAT_VERSION = 2
+SNAPSHOT_MODULES = ('model', 'early_model')
+# Attributes rebuilt on load instead of stored, per class name
+_DERIVED = {'Model': ('_qfn_lookup', '_resolve_memo', '_resolve_stamp', '_resolve_versions',
+                      '_write_stamps', '_transform_runs')}
+_HEADER = struct.Struct('<4sH')
+_MISSING = object()
+
+
+class ModelSnapshotError(Exception):
+    pass
+
+
+def _attributes(obj) -> Dict[str, object]:
+    attrs = {}
+    for cls in reversed(type(obj).__mro__):
+        for name in cls.__dict__.get('__slots__', ()):
+            if name != '__dict__':
+                value = getattr(obj, name, _MISSING)
+                if value is not _MISSING:
+                    attrs[name] = value
+    attrs.update(getattr(obj, '__dict__', {}))
+    for name in _DERIVED.get(type(obj).__name__, ()):
+        attrs.pop(name, None)
+    return attrs
+
+
+class _Writer:
+    def __init__(self):
+        self.classes: List[Tuple[str, str]] = []
+        self.class_index: Dict[type, int] = {}
+        self.shapes: List[Tuple[int, Tuple[str, ...]]] = []
+        self.shape_index: Dict[tuple, int] = {}
+        self.objects: List[tuple] = []
+        self.object_index: Dict[int, int] = {}  # id(obj) -> index
+        self.keep: List[object] = []  # keeps the ids above valid
+        self.strings: Dict[str, str] = {}
+        self.pending: List[tuple] = []  # (index, obj) still to be encoded
+
+    def class_ref(self, cls) -> int:
+        index = self.class_index.get(cls)
+        if index is None:
+            if cls.__module__ not in SNAPSHOT_MODULES:
+                raise ModelSnapshotError(f"Cannot snapshot {cls.__module__}.{cls.__qualname__} objects")
+            index = self.class_index[cls] = len(self.classes)
+            self.classes.append((cls.__module__, cls.__qualname__))
+        return index
+
+    def object_ref(self, obj) -> int:
+        index = self.object_index.get(id(obj))
+        if index is None:
+            self.class_ref(type(obj))
+            index = self.object_index[id(obj)] = len(self.objects)
+            self.objects.append(None)
+            self.keep.append(obj)
+            self.pending.append((index, obj))
+        return index
+
+    def value(self, value):
+        t = type(value)
+        if t is str:
+            return self.strings.setdefault(value, value)
+        if value is None or t is bool or t is int or t is float:
+            return value
+        if t is list:
+            return [self.value(item) for item in value]
+        if t is tuple:
+            return ('t',) + tuple([self.value(item) for item in value])
+        if t is dict:
+            return ('d', [self.value(k) for k in value], [self.value(v) for v in value.values()])
+        if isinstance(value, Enum):
+            return ('e', self.class_ref(t), self.value(value.value))
+        return ('r', self.object_ref(value))
+
+    def encode(self, root) -> bytes:
+        root_value = self.value(root)
+        while self.pending:
+            index, obj = self.pending.pop()
+            attrs = _attributes(obj)
+            shape_key = (type(obj), tuple(attrs))
+            shape = self.shape_index.get(shape_key)
+            if shape is None:
+                shape = self.shape_index[shape_key] = len(self.shapes)
+                self.shapes.append((self.class_ref(type(obj)), tuple(self.value(name) for name in attrs)))
+            self.objects[index] = (shape, [self.value(v) for v in attrs.values()])
+        payload = marshal.dumps((self.classes, self.shapes, self.objects, root_value), 4)
+        return _HEADER.pack(MAGIC, FORMAT_VERSION) + zlib.compress(payload)
+
+
+def dumps_model(model: Model) -> bytes:
+    """Serialize `model` and everything reachable from it (imports included)."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _Writer().encode(model)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _load_class(module: str, name: str):
+    if module not in SNAPSHOT_MODULES:
+        raise ModelSnapshotError(f"Snapshot refers to {module}.{name}, which is not a model class")
+    obj = importlib.import_module(module)
+    for part in name.split('.'):
+        obj = getattr(obj, part, None)
+        if obj is None:
+            raise ModelSnapshotError(f"Unknown class {module}.{name} in snapshot")
+    # Only classes defined in the module itself: not its functions or the names it imports
+    if not isinstance(obj, type) or obj.__module__ != module:
+        raise ModelSnapshotError(f"Snapshot refers to {module}.{name}, which is not a model class")
+    return obj
+
+
+def loads_model(data: bytes) -> Model:
+    """Load a Model serialized by dumps_model. Raises ModelSnapshotError for other data or versions."""
+    if len(data) < _HEADER.size:
+        raise ModelSnapshotError("Not a model snapshot (too short)")
+    magic, version = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ModelSnapshotError("Not a model snapshot (bad magic)")
+    if version != FORMAT_VERSION:
+        raise ModelSnapshotError(f"Unsupported model snapshot version {version} (expected {FORMAT_VERSION})")
+    try:
+        payload = marshal.loads(zlib.decompress(data[_HEADER.size:]))
+    except (zlib.error, ValueError, EOFError, TypeError) as e:
+        raise ModelSnapshotError(f"Corrupt model snapshot: {e}") from e
+    if type(payload) is not tuple or len(payload) != 4:
+        raise ModelSnapshotError("Corrupt model snapshot: unexpected payload")
+    # Loading allocates many long-lived objects and frees almost nothing: pause the cyclic
+    # collector, whose passes would only re-scan them
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _load(*payload)
+    except (IndexError, KeyError, TypeError, ValueError, AttributeError) as e:
+        # Well-formed marshal data whose tables do not fit together (an index out of range, a
+        # bad tag or enum value, a value of the wrong shape)
+        raise ModelSnapshotError(f"Corrupt model snapshot: {type(e).__name__}: {e}") from e
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _load(classes, shapes, objects, root) -> Model:
+    classes = [_load_class(module, name) for module, name in classes]
+    members = [{member.value: member for member in cls} if isinstance(cls, type) and issubclass(cls, Enum) else None
+               for cls in classes]
+    shapes = [(classes[cls], names, not hasattr(classes[cls], '__slots__')) for cls, names in shapes]
+    # Create every object first so references can be resolved in one pass
+    nodes = [shapes[shape][0].__new__(shapes[shape][0]) for shape, _ in objects]
+
+    tuples = {}  # encoded tuple -> decoded tuple: equal tuples are decoded once and shared
+
+    def decode(value):
+        if type(value) is list:
+            return [decode(item) if type(item) is tuple or type(item) is list else item for item in value]
+        tag = value[0]
+        if tag == 'r':
+            return nodes[value[1]]
+        if tag == 'e':
+            return members[value[1]][value[2]]
+        if tag == 't':
+            try:
+                return tuples[value]
+            except KeyError:
+                decoded = tuples[value] = tuple(decode(list(value[1:])))
+            except TypeError:  # holds a list or dict: not shareable
+                decoded = tuple(decode(list(value[1:])))
+            return decoded
+        if tag == 'd':
+            return dict(zip(decode(value[1]), decode(value[2])))
+        raise ModelSnapshotError(f"Corrupt model snapshot: unknown tag {tag!r}")
+
+    for node, (shape, values) in zip(nodes, objects):
+        cls, names, plain = shapes[shape]
+        values = [decode(v) if type(v) is tuple or type(v) is list else v for v in values]
+        if plain:
+            node.__dict__.update(zip(names, values))
+        else:
+            for name, v in zip(names, values):
+                setattr(node, name, v)
+        if cls is Model:
+            node._qfn_lookup = QfnLookup(node)
+            node._resolve_memo = None
+            node._write_stamps, node._transform_runs = {}, {}
+    return decode(root) if type(root) is tuple else root
+
+
+def save_model(model: Model, path: str) -> None:
+    with open(path, 'wb') as f:
+        f.write(dumps_model(model))
+
+
+def load_model(path: str) -> Model:
+    with open(path, 'rb') as f:
+        return loads_model(f.read())
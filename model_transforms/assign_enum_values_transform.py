@@ -2,20 +2,23 @@
 Model Transform: AssignEnumValuesTransform
 Assigns values to all ModelEnum values, including inherited and auto-incremented values, so generators do not need to handle value assignment logic.
 """
+import logging
 from typing import Optional
+from debug_trace import get_logger
 from model import Model, ModelEnum, ModelEnumValue, ModelNamespace
+from model_transforms.model_transform_pipeline import ModelVisitorTransform
 
-class AssignEnumValuesTransform:
-    def transform(self, model: Model) -> Model:
-        for ns in getattr(model, 'namespaces', []):
-            self._process_namespace(ns)
-        return model
+_log = get_logger('model.enum_values')
 
-    def _process_namespace(self, ns: ModelNamespace):
-        for enum in getattr(ns, 'enums', []):
-            self._assign_enum_values(enum)
-        for nested in getattr(ns, 'namespaces', []):
-            self._process_namespace(nested)
+class AssignEnumValuesTransform(ModelVisitorTransform):
+    reads = frozenset({'enum.name', 'enum.parent', 'enum.values', 'enum_value'})
+    writes = frozenset({'enum.values', 'enum_value.value'})
+
+    def prepass(self, model: Model) -> None:
+        self._debug = _log.isEnabledFor(logging.DEBUG)
+
+    def on_enum(self, enum: ModelEnum, ns_stack):
+        self._assign_enum_values(enum)
 
     def _assign_enum_values(self, enum: ModelEnum):
         # Recursively assign values to parent first
@@ -48,9 +51,10 @@ class AssignEnumValuesTransform:
             merged = [v for v in merged if v.name != cval.name]
             merged.append(cval)
         # Debug: print merged list before value assignment
-        print(f"[DEBUG] Enum '{enum.name}' merged values before assignment:")
-        for v in merged:
-            print(f"    name={v.name!r}, value={v.value!r}")
+        if self._debug:
+            _log.debug(f"Enum '{enum.name}' merged values before assignment:")
+            for v in merged:
+                _log.debug(f"    name={v.name!r}, value={v.value!r}")
 
         # Assign values in order, auto-incrementing and resetting after explicit assignments
         # If any value is set, preserve it, but assign missing values by incrementing from the last explicit value
@@ -66,8 +70,9 @@ class AssignEnumValuesTransform:
                 v.value = last_value
 
         # Debug: print merged list after value assignment
-        print(f"[DEBUG] Enum '{enum.name}' merged values after assignment:")
-        for v in merged:
-            print(f"    name={v.name!r}, value={v.value!r}")
+        if self._debug:
+            _log.debug(f"Enum '{enum.name}' merged values after assignment:")
+            for v in merged:
+                _log.debug(f"    name={v.name!r}, value={v.value!r}")
 
         enum.values = merged
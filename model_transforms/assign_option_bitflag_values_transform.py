@@ -3,50 +3,60 @@ Model Transform: AssignOptionBitflagValuesTransform
 Assigns bitflag (1, 2, 4, ...) values to all enums used as options in the Model.
 This ensures that all options enums (including those promoted from inline options) have correct bitflag values before code generation.
 """
+import logging
+from debug_trace import get_logger
 from model import Model, ModelEnum, ModelEnumValue, ModelNamespace
+from model_transforms.model_transform_pipeline import ModelVisitorTransform
 
-class AssignOptionBitflagValuesTransform:
-    def transform(self, model: Model) -> Model:
-        # Collect all enums used as options
-        option_enum_names = set()
-        def collect_option_enums(ns: ModelNamespace):
-            for msg in getattr(ns, 'messages', []):
-                for field in getattr(msg, 'fields', []):
-                    ftypes = getattr(field, 'field_types', [])
-                    if ftypes and ftypes[0].name == 'OPTIONS':
-                        # The type name for the enum used by this options field
-                        trefs = getattr(field, 'type_refs', [])
-                        if trefs and hasattr(trefs[0], 'name') and trefs[0].name:
-                            option_enum_names.add(trefs[0].name)
-                        elif hasattr(field, 'type_names') and field.type_names:
-                            for tname in field.type_names:
-                                if tname:
-                                    option_enum_names.add(tname)
-                        else:
-                            # Fallback: promoted inline options, use CamelCase
-                            camel = lambda s: ''.join([p[:1].upper() + p[1:] for p in s.replace('::','').split('_') if p])
-                            option_enum_names.add(camel(f"{msg.name}_{field.name}"))
-            for nested in getattr(ns, 'namespaces', []):
-                collect_option_enums(nested)
-        for ns in getattr(model, 'namespaces', []):
-            collect_option_enums(ns)
+_log = get_logger('model.option_bitflags')
+
+def _camel(s):
+    return ''.join([p[:1].upper() + p[1:] for p in s.replace('::', '').split('_') if p])
+
+class AssignOptionBitflagValuesTransform(ModelVisitorTransform):
+    reads = frozenset({'message.name', 'field.name', 'field.field_types', 'field.type_refs', 'field.type_names',
+                       'reference.name', 'enum.name', 'enum.values'})
+    writes = frozenset({'enum_value.value'})
+
+    def prepass(self, model: Model) -> None:
+        # All enums used as options, and every enum (matched against them once all fields are seen)
+        self._option_enum_names = set()
+        self._enums = []
+
+    def on_field(self, field, msg, ns_stack):
+        ftypes = getattr(field, 'field_types', [])
+        if ftypes and ftypes[0].name == 'OPTIONS':
+            # The type name for the enum used by this options field
+            trefs = getattr(field, 'type_refs', [])
+            if trefs and hasattr(trefs[0], 'name') and trefs[0].name:
+                self._option_enum_names.add(trefs[0].name)
+            elif hasattr(field, 'type_names') and field.type_names:
+                for tname in field.type_names:
+                    if tname:
+                        self._option_enum_names.add(tname)
+            else:
+                # Fallback: promoted inline options, use CamelCase
+                self._option_enum_names.add(_camel(f"{msg.name}_{field.name}"))
+
+    def on_enum(self, enum: ModelEnum, ns_stack):
+        self._enums.append(enum)
+
+    def finish(self, model: Model) -> None:
+        debug = _log.isEnabledFor(logging.DEBUG)
+        option_enum_names = self._option_enum_names
         # Assign bitflag values to all enums whose name matches
-        def assign_bitflags(ns: ModelNamespace):
-            for enum in getattr(ns, 'enums', []):
-                # Match by CamelCase name
-                camel = lambda s: ''.join([p[:1].upper() + p[1:] for p in s.replace('::','').split('_') if p])
-                print(f"[BITFLAG] Enum: {enum.name} (Camel: {camel(enum.name)})")
-                print(f"[BITFLAG] option_enum_names: {option_enum_names}")
-                if enum.name in option_enum_names or camel(enum.name) in option_enum_names:
-                    print(f"[BITFLAG] Assigning bitflags to enum: {enum.name}")
-                    val = 1
-                    for v in enum.values:
-                        v.value = None  # Clear any existing value
-                    for v in enum.values:
-                        v.value = val
-                        val <<= 1
-            for nested in getattr(ns, 'namespaces', []):
-                assign_bitflags(nested)
-        for ns in getattr(model, 'namespaces', []):
-            assign_bitflags(ns)
-        return model
+        for enum in self._enums:
+            # Match by CamelCase name
+            if debug:
+                _log.debug(f"Enum: {enum.name} (Camel: {_camel(enum.name)})")
+                _log.debug(f"option_enum_names: {option_enum_names}")
+            if enum.name in option_enum_names or _camel(enum.name) in option_enum_names:
+                if debug:
+                    _log.debug(f"Assigning bitflags to enum: {enum.name}")
+                val = 1
+                for v in enum.values:
+                    v.value = None  # Clear any existing value
+                for v in enum.values:
+                    v.value = val
+                    val <<= 1
+        self._option_enum_names, self._enums = set(), []
@@ -3,7 +3,12 @@ AssignUniqueNamesTransform: Assigns a unique, context-aware name to every enum (
 This is useful for generators that need a flat, unique name for inline enums (e.g., Message_Field for inline enums).
 The unique name is stored as the 'unique_name' attribute on ModelEnum/ModelMessage.
 """
+import logging
+from debug_trace import get_logger
 from model import Model, ModelEnum, ModelMessage, ModelNamespace
+from model_transforms.model_transform_pipeline import ModelVisitorTransform
+
+_log = get_logger('model.unique_names')
 
 def assign_unique_names(model: Model, enum_prefix: str = "", message_prefix: str = ""):
     """
@@ -11,30 +16,39 @@ def assign_unique_names(model: Model, enum_prefix: str = "", message_prefix: str
     For inline enums, the name will be <MessageName>_<FieldName>.
     For top-level enums, the name will be just the enum name (optionally prefixed).
     """
-    def walk_namespace(ns: ModelNamespace, prefix: str = ""):
-        import sys
-        # Flatten namespace chain for unique_name
-        new_prefix = f"{prefix}{ns.name}_" if ns.name else prefix
-        for enum in getattr(ns, 'enums', []):
-            parent = getattr(enum, 'parent_container', None)
-            if parent and isinstance(parent, ModelMessage):
-                unique_name = f"{new_prefix}{parent.name}_{enum.name}"
-            else:
-                unique_name = f"{new_prefix}{enum.name}"
-            setattr(enum, 'unique_name', unique_name)
-            print(f"[DEBUG] AssignUniqueNames: enum {enum.name} assigned unique_name={unique_name}", file=sys.stderr)
-        for msg in getattr(ns, 'messages', []):
-            unique_name = f"{new_prefix}{msg.name}"
-            setattr(msg, 'unique_name', unique_name)
-        for nested in getattr(ns, 'namespaces', []):
-            walk_namespace(nested, new_prefix)
-    for ns in getattr(model, 'namespaces', []):
-        walk_namespace(ns, enum_prefix)
-    return model
-
-class AssignUniqueNamesTransform:
+    return AssignUniqueNamesTransform(enum_prefix, message_prefix).transform(model)
+
+class AssignUniqueNamesTransform(ModelVisitorTransform):
+    reads = frozenset({'namespace.name', 'message.name', 'enum.name', 'enum.parent_container'})
+    writes = frozenset({'message.unique_name', 'enum.unique_name'})
+    settings = ('enum_prefix', 'message_prefix')
+
     def __init__(self, enum_prefix: str = "", message_prefix: str = ""):
         self.enum_prefix = enum_prefix
         self.message_prefix = message_prefix
-    def transform(self, model: Model) -> Model:
-        return assign_unique_names(model, self.enum_prefix, self.message_prefix)
+
+    def prepass(self, model: Model) -> None:
+        self._debug = _log.isEnabledFor(logging.DEBUG)
+        self._prefixes = {}  # id(namespace) -> its flattened namespace chain, e.g. "Outer_Inner_"
+
+    def on_namespace(self, ns: ModelNamespace, ns_stack):
+        # Flatten namespace chain for unique_name
+        prefix = self._prefixes[id(ns_stack[-2])] if len(ns_stack) > 1 else self.enum_prefix
+        self._prefixes[id(ns)] = f"{prefix}{ns.name}_" if ns.name else prefix
+
+    def on_enum(self, enum: ModelEnum, ns_stack):
+        new_prefix = self._prefixes[id(ns_stack[-1])]
+        parent = getattr(enum, 'parent_container', None)
+        if parent and isinstance(parent, ModelMessage):
+            unique_name = f"{new_prefix}{parent.name}_{enum.name}"
+        else:
+            unique_name = f"{new_prefix}{enum.name}"
+        setattr(enum, 'unique_name', unique_name)
+        if self._debug:
+            _log.debug(f"AssignUniqueNames: enum {enum.name} assigned unique_name={unique_name}")
+
+    def on_message(self, msg: ModelMessage, ns_stack):
+        setattr(msg, 'unique_name', f"{self._prefixes[id(ns_stack[-1])]}{msg.name}")
+
+    def finish(self, model: Model) -> None:
+        self._prefixes = {}
@@ -3,6 +3,7 @@ FlattenEnumsTransform: Flattens all enums in the Model so that each enum's name
 This is useful for generators that require flat, globally unique enum names (e.g., Python, C++).
 """
 from model import Model, ModelEnum, ModelNamespace, ModelMessage
+from model_transforms.model_transform_pipeline import record_transform_run
 import copy
 
 def flatten_enums(model: Model) -> Model:
@@ -12,6 +13,8 @@ def flatten_enums(model: Model) -> Model:
     """
     # Build a mapping from original enum object to new flat name
     enum_to_flat_name = {}
+    # Enum -> (namespace QFN, original name), to move its _qfn_lookup entry afterwards
+    enum_location = {}
     # Helper to build flat name from namespace/message chain
     def build_flat_name(ns_chain, enum_name):
         return '_'.join(ns_chain + [enum_name])
@@ -20,6 +23,7 @@ def flatten_enums(model: Model) -> Model:
         for enum in getattr(ns, 'enums', []):
             flat_name = build_flat_name(ns_chain, enum.name)
             enum_to_flat_name[enum] = flat_name
+            enum_location[enum] = ('::'.join(ns_chain), enum.name)
         for msg in getattr(ns, 'messages', []):
             pass
         for nested in getattr(ns, 'namespaces', []):
@@ -41,11 +45,7 @@ def flatten_enums(model: Model) -> Model:
                 for i, tref in enumerate(getattr(field, 'type_refs', [])):
                     if tref in enum_to_flat_name:
                         tref.name = enum_to_flat_name[tref]
-                # If the field itself is an enum, update type_names
-                if hasattr(field, 'type_names'):
-                    for i, tname in enumerate(field.type_names):
-                        if tname in enum_to_flat_name.values():
-                            field.type_names[i] = tname
+                # type_names keep the names the field was declared with
         for nested in getattr(ns, 'namespaces', []):
             update_namespace(nested, ns_chain + [nested.name] if nested.name else ns_chain)
     for ns in getattr(model, 'namespaces', []):
@@ -61,8 +61,19 @@ def flatten_enums(model: Model) -> Model:
                     enum.parent = candidate
                     enum.parent.name = enum_to_flat_name[candidate]
                     break
+    lookup = getattr(model, '_qfn_lookup', None)
+    if lookup is not None:
+        for enum, (ns_qfn, old_name) in enum_location.items():
+            old_qfn = ns_qfn + '::' + old_name if ns_qfn else old_name
+            lookup.rename(old_qfn, ns_qfn + '::' + enum.name if ns_qfn else enum.name, 'enum')
     return model
 
 class FlattenEnumsTransform:
+    reads = frozenset({'model.namespaces', 'namespace.name', 'namespace.namespaces', 'namespace.enums',
+                       'namespace.messages', 'message.fields', 'field.type_refs', 'enum.name', 'enum.parent'})
+    writes = frozenset({'enum.name', 'enum.unique_name', 'enum.parent', 'reference.name'})
+
     def transform(self, model: Model) -> Model:
-        return flatten_enums(model)
+        flatten_enums(model)
+        record_transform_run(model, self)
+        return model
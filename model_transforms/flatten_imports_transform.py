@@ -3,9 +3,13 @@ flatten_imports_transform.py
 A ModelTransform that flattens all imported namespaces, messages, and enums into the root model, for single-file output (e.g., JSON Schema).
 """
 from model import Model, ModelNamespace, ModelMessage, ModelEnum
+from model_transforms.model_transform_pipeline import record_transform_run
 from typing import Set
 
 class FlattenImportsTransform:
+    reads = frozenset({'model.namespaces', 'model.imports', 'namespace.name'})
+    writes = frozenset({'model.namespaces', 'model.imports'})
+
     def transform(self, model: Model) -> Model:
         """Flatten all imported namespaces, messages, and enums into the root model."""
         # Collect all namespaces, messages, and enums from imports recursively
@@ -33,6 +37,8 @@ class FlattenImportsTransform:
         # Create a new model with all namespaces flattened
         model.namespaces = flat_namespaces
         model.imports = {}  # Remove imports
+        model._qfn_lookup.reset()
+        record_transform_run(model, self)
         return model
 
     def __call__(self, model: Model) -> Model:
@@ -1,22 +1,268 @@
 """
 model_transform_pipeline.py
 Defines a pipeline for transforming Model objects using a sequence of ModelTransform objects.
+
+A transform declares what it reads and writes as two sets of names: a node kind ('model',
+'namespace', 'message', 'field', 'enum', 'enum_value', 'reference') or a kind and attribute
+('enum.name', 'field.type_names', ...). A bare kind covers all of its attributes. A transform
+that declares nothing is taken to read and write everything. Two transforms conflict when one
+writes a name the other reads or writes.
+
+Transforms written as ModelVisitorTransform subclasses express their work as per-node hooks
+(on_namespace, on_message, on_field, on_enum) plus an optional prepass() and finish(). The
+pipeline fuses consecutive, non-conflicting visitor transforms into one walk over the namespace
+tree: their pre-passes run in pipeline order, then every transform's hooks are called on each
+node in pipeline order, then their finish() steps. Visiting a node counts as reading the list
+that holds it (an on_enum hook reads 'namespace.enums', ...). Plain ModelTransforms (anything
+with just a transform() method) run on their own.
+
+A transform is skipped when its inputs did not change: when it already ran on this model, with
+the same settings, and nothing it reads or writes was written since, in the model or any model
+it imports. Changes are tracked through explicit writes, not by inspecting the model: every
+transform the pipeline runs stamps its declared writes on the model and records its run (an
+undeclared transform stamps everything and is never skipped), and ModelVisitorTransform
+.transform() and the plain transforms here do the same when called on their own. Anything else
+that edits a model (code changing nodes in place, a transform without that call) must report it
+with Model.mark_written(), or a later pipeline may skip a transform whose inputs it changed. A
+transform's `settings` names the attributes (constructor arguments) that change what it writes;
+a run with other settings or other declarations is not skipped.
 """
-from typing import List, Protocol
-from model import Model
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional, Protocol, Tuple
+from model import Model, ModelNamespace, ModelMessage, ModelEnum, ModelField
+
+EVERYTHING = frozenset({'*'})
+# The lists a walk reads to reach the nodes a hook is given, per hook
+_HOOK_READS = {
+    'on_namespace': frozenset(),
+    'on_message': frozenset({'namespace.messages'}),
+    'on_field': frozenset({'namespace.messages', 'message.fields'}),
+    'on_enum': frozenset({'namespace.enums'}),
+}
+_WALK_READS = frozenset({'model.namespaces', 'namespace.namespaces'})
+_HOOKS = tuple(_HOOK_READS)
+
 
 class ModelTransform(Protocol):
     def transform(self, model: Model) -> Model:
         ...
 
+
+class ModelVisitorTransform:
+    """
+    Base class for model transforms expressed as node hooks. ns_stack is the list of enclosing
+    namespaces, innermost last. A message's fields are visited before on_message is called for
+    it; a namespace's messages, then enums, then nested namespaces are visited after
+    on_namespace, so nodes on_namespace adds to the namespace are visited too. reads and writes
+    must cover everything the pre-pass, hooks and finish step touch, on any node.
+    """
+    reads: FrozenSet[str] = frozenset()
+    writes: FrozenSet[str] = frozenset()
+    settings: Tuple[str, ...] = ()
+
+    def prepass(self, model: Model) -> None:
+        """Global pass over the model, run before the walk."""
+
+    def on_namespace(self, ns: ModelNamespace, ns_stack: List[ModelNamespace]) -> None:
+        pass
+
+    def on_message(self, msg: ModelMessage, ns_stack: List[ModelNamespace]) -> None:
+        pass
+
+    def on_field(self, field: ModelField, msg: ModelMessage, ns_stack: List[ModelNamespace]) -> None:
+        pass
+
+    def on_enum(self, enum: ModelEnum, ns_stack: List[ModelNamespace]) -> None:
+        pass
+
+    def finish(self, model: Model) -> None:
+        """Global pass over the model, run after the walk."""
+
+    def transform(self, model: Model) -> Model:
+        """Run this transform on its own: pre-pass, walk, finish."""
+        self.prepass(model)
+        walk_model(model, [self])
+        self.finish(model)
+        record_transform_run(model, self)
+        return model
+
+
+class ModelTransformStats:
+    """What a run_model_transform_pipeline call did: seconds per transform (by class name, hooks
+    timed individually within fused walks), the walks it made and the transforms it skipped."""
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.walks = 0
+        self.skipped: List[str] = []
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+
+def _overlaps(a: str, b: str) -> bool:
+    return a == b or a == '*' or b == '*' or a.startswith(b + '.') or b.startswith(a + '.')
+
+
+def _intersects(names: Iterable[str], others: Iterable[str]) -> bool:
+    return any(_overlaps(a, b) for a in names for b in others)
+
+
+def _hooks(visitors, name):
+    """(visitor, hook) for the visitors that override hook `name`."""
+    base = getattr(ModelVisitorTransform, name)
+    return [(v, getattr(v, name)) for v in visitors if getattr(type(v), name) is not base]
+
+
+def _declared(transform):
+    """(reads, writes) of a transform, including what its walk reads; everything if undeclared."""
+    reads, writes = getattr(transform, 'reads', None), getattr(transform, 'writes', None)
+    if reads is None or writes is None:
+        return EVERYTHING, EVERYTHING
+    if isinstance(transform, ModelVisitorTransform):
+        reads = set(reads) | _WALK_READS
+        for hook in _HOOKS:
+            if _hooks([transform], hook):
+                reads |= _HOOK_READS[hook]
+    return frozenset(reads), frozenset(writes)
+
+
+def _settings(transform) -> tuple:
+    """What a transform's run depends on besides the model: its declarations and settings."""
+    values = (getattr(transform, name) for name in getattr(transform, 'settings', ()))
+    return _declared(transform) + tuple(frozenset(v) if isinstance(v, (set, frozenset)) else v for v in values)
+
+
+def _record(model: Model, transforms, writes: Iterable[str]) -> None:
+    stamp = model.mark_written(writes)
+    for transform in transforms:
+        model._transform_runs[type(transform), _settings(transform)] = stamp
+
+
+def record_transform_run(model: Model, transform) -> None:
+    """Stamp the writes of a transform that just ran on `model` and record its run."""
+    _record(model, [transform], _declared(transform)[1])
+
+
+def _write_stamps(model: Model):
+    """The write stamps of the model and of every model it imports, directly or not."""
+    seen, stack = set(), [model]
+    while stack:
+        m = stack.pop()
+        if id(m) not in seen:
+            seen.add(id(m))
+            yield getattr(m, '_write_stamps', {})
+            stack.extend((getattr(m, 'imports', None) or {}).values())
+
+
+def _unchanged(model: Model, transform, reads, writes) -> bool:
+    """Whether `transform` ran on the model with its current settings and nothing it reads or
+    writes was written since."""
+    ran = getattr(model, '_transform_runs', {}).get((type(transform), _settings(transform)))
+    if ran is None or '*' in reads:
+        return False
+    names = reads | writes
+    return not any(stamp > ran and _intersects((name,), names)
+                   for stamps in _write_stamps(model) for name, stamp in stamps.items())
+
+
+def _timed(hook, name, stats):
+    def timed(*args):
+        t0 = time.perf_counter()
+        hook(*args)
+        stats.add_time(name, time.perf_counter() - t0)
+    return timed
+
+
+def walk_model(model: Model, visitors: List[ModelVisitorTransform], stats: Optional[ModelTransformStats] = None) -> None:
+    """Walk the model's namespaces once, calling the node hooks of all visitors on each node."""
+    def hooks(name):
+        if stats is None:
+            return [hook for _, hook in _hooks(visitors, name)]
+        return [_timed(hook, type(v).__name__, stats) for v, hook in _hooks(visitors, name)]
+    ns_hooks, msg_hooks, field_hooks, enum_hooks = (hooks(name) for name in _HOOKS)
+    if not (ns_hooks or msg_hooks or field_hooks or enum_hooks):
+        return
+
+    def walk_ns(ns, outer):
+        ns_stack = outer + [ns]
+        for hook in ns_hooks:
+            hook(ns, ns_stack)
+        # Snapshot the child lists so nodes added by message/field/enum hooks are not visited
+        messages, enums, nested = list(ns.messages), list(ns.enums), list(ns.namespaces)
+        if field_hooks or msg_hooks:
+            for msg in messages:
+                if field_hooks:
+                    for field in list(msg.fields):
+                        for hook in field_hooks:
+                            hook(field, msg, ns_stack)
+                for hook in msg_hooks:
+                    hook(msg, ns_stack)
+        for enum in enums:
+            for hook in enum_hooks:
+                hook(enum, ns_stack)
+        for child in nested:
+            walk_ns(child, ns_stack)
+
+    for ns in list(model.namespaces):
+        walk_ns(ns, [])
+
+
 def run_model_transform_pipeline(
     model: Model,
-    transforms: List[ModelTransform]
+    transforms: List[ModelTransform],
+    fuse: bool = True,
+    stats: Optional[ModelTransformStats] = None
 ) -> Model:
     """
     Applies a sequence of ModelTransform objects to a Model.
     Each transform takes a Model and returns a new Model.
+    With fuse (the default), consecutive non-conflicting ModelVisitorTransforms share a single
+    walk; fuse=False runs every transform on its own, one after another. Transforms whose inputs
+    did not change since they last ran on the model are skipped. If `stats` is given, it records
+    the time spent in each transform, the walks made and the transforms skipped.
     """
+    group: List[tuple] = []  # (transform, reads, writes) sharing the pending walk
+
+    def flush():
+        if not group:
+            return
+        visitors = [transform for transform, _, _ in group]
+        walk_model(model, visitors, stats)
+        for transform in visitors:
+            t1 = time.perf_counter()
+            transform.finish(model)
+            if stats is not None:
+                stats.add_time(type(transform).__name__, time.perf_counter() - t1)
+        _record(model, visitors, set().union(*(w for _, _, w in group)))
+        if stats is not None:
+            stats.walks += 1
+        group.clear()
+
     for transform in transforms:
-        model = transform.transform(model)
+        reads, writes = _declared(transform)
+        name = type(transform).__name__
+        pending = any(_intersects(w, reads | writes) for _, _, w in group)
+        if not pending and _unchanged(model, transform, reads, writes):
+            if stats is not None:
+                stats.skipped.append(name)
+            continue
+        if isinstance(transform, ModelVisitorTransform):
+            conflict = any(_intersects(writes, r | w) or _intersects(w, reads) for _, r, w in group)
+            if not fuse or conflict:
+                flush()
+            t0 = time.perf_counter()
+            transform.prepass(model)
+            if stats is not None:
+                stats.add_time(name, time.perf_counter() - t0)
+            group.append((transform, reads, writes))
+            if not fuse:
+                flush()
+        else:
+            flush()
+            t0 = time.perf_counter()
+            model = transform.transform(model)
+            if stats is not None:
+                stats.add_time(name, time.perf_counter() - t0)
+            _record(model, [transform], writes)
+    flush()
     return model
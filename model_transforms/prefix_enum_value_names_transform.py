@@ -2,22 +2,22 @@
 Model transform to make enum value names unique by prefixing them with the enum name.
 This is only intended for use in the TypeScript generator pipeline.
 """
+from model_transforms.model_transform_pipeline import ModelVisitorTransform
 
-class PrefixEnumValueNamesTransform:
-    def transform(self, model):
-        for ns in getattr(model, 'namespaces', []):
-            for enum in getattr(ns, 'enums', []):
-                # Only prefix value names for derived/inline enums (those with a parent_container)
-                if hasattr(enum, 'parent_container') and enum.parent_container is not None:
-                    enum_name = enum.name
-                    seen = set()
-                    for value in enum.values:
-                        # Only prefix if not already prefixed
-                        original_name = value.name
-                        prefixed_name = f"{enum_name}_{original_name}" if not original_name.startswith(enum_name + "_") else original_name
-                        # Avoid double prefixing
-                        value.name = prefixed_name
-                        if prefixed_name in seen:
-                            raise ValueError(f"Duplicate enum value name after prefixing: {prefixed_name}")
-                        seen.add(prefixed_name)
-        return model
+class PrefixEnumValueNamesTransform(ModelVisitorTransform):
+    reads = frozenset({'enum.name', 'enum.parent_container', 'enum.values', 'enum_value.name'})
+    writes = frozenset({'enum_value.name'})
+
+    def on_enum(self, enum, ns_stack):
+        # Only the enums of top-level namespaces
+        if len(ns_stack) != 1:
+            return
+        # Only prefix value names for derived/inline enums (those with a parent_container)
+        if hasattr(enum, 'parent_container') and enum.parent_container is not None:
+            enum_name = enum.name
+            for value in enum.values:
+                # Only prefix if not already prefixed
+                original_name = value.name
+                prefixed_name = f"{enum_name}_{original_name}" if not original_name.startswith(enum_name + "_") else original_name
+                # Avoid double prefixing
+                value.name = prefixed_name
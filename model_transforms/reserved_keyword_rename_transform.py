@@ -1,89 +1,241 @@
 """
 reserved_keyword_rename_transform.py
 A ModelTransform that renames any message, field, or enum name that matches a reserved keyword list, adding a generator-specific prefix.
+
+Renaming is planned in one walk over the namespaces that decides, per node, its new name, and
+records the QFN -> new name renames of namespaces, messages and enums. Field type names are then
+matched against two indexes built from those renames (by full QFN and by short, last-segment
+name), so each type name costs two dict lookups however many renames there are.
+
+rename_views() plans several targets (keyword set and prefix each, e.g. the PYTHON_KEYWORDS,
+TYPESCRIPT_KEYWORDS and CPP_KEYWORDS below) in that same single walk and returns one
+RenamedView per target: the renamed names of the nodes that change, read through the view,
+without mutating or copying the model. transform() plans its own target and applies the plan.
 """
-from typing import List, Set
+import keyword
+from typing import Dict, List, Optional, Set, Tuple
 from model import Model, ModelNamespace, ModelMessage, ModelEnum, ModelField
+from model_transforms.model_transform_pipeline import record_transform_run
 
-class ReservedKeywordRenameTransform:
+PYTHON_KEYWORDS = frozenset(keyword.kwlist) | frozenset(keyword.softkwlist)
+TYPESCRIPT_KEYWORDS = frozenset({
+    'any', 'as', 'async', 'await', 'boolean', 'break', 'case', 'catch', 'class', 'const', 'constructor',
+    'continue', 'debugger', 'declare', 'default', 'delete', 'do', 'else', 'enum', 'export', 'extends',
+    'false', 'finally', 'for', 'from', 'function', 'get', 'if', 'implements', 'import', 'in', 'instanceof',
+    'interface', 'let', 'module', 'namespace', 'never', 'new', 'null', 'number', 'of', 'package', 'private',
+    'protected', 'public', 'readonly', 'require', 'return', 'set', 'static', 'string', 'super', 'switch',
+    'symbol', 'this', 'throw', 'true', 'try', 'type', 'typeof', 'undefined', 'unknown', 'var', 'void',
+    'while', 'with', 'yield',
+})
+CPP_KEYWORDS = frozenset({
+    'alignas', 'alignof', 'and', 'and_eq', 'asm', 'auto', 'bitand', 'bitor', 'bool', 'break', 'case',
+    'catch', 'char', 'char8_t', 'char16_t', 'char32_t', 'class', 'compl', 'concept', 'const', 'consteval',
+    'constexpr', 'constinit', 'const_cast', 'continue', 'co_await', 'co_return', 'co_yield', 'decltype',
+    'default', 'delete', 'do', 'double', 'dynamic_cast', 'else', 'enum', 'explicit', 'export', 'extern',
+    'false', 'float', 'for', 'friend', 'goto', 'if', 'inline', 'int', 'long', 'mutable', 'namespace', 'new',
+    'noexcept', 'not', 'not_eq', 'nullptr', 'operator', 'or', 'or_eq', 'private', 'protected', 'public',
+    'register', 'reinterpret_cast', 'requires', 'return', 'short', 'signed', 'sizeof', 'static',
+    'static_assert', 'static_cast', 'struct', 'switch', 'template', 'this', 'thread_local', 'throw', 'true',
+    'try', 'typedef', 'typeid', 'typename', 'union', 'unsigned', 'using', 'virtual', 'void', 'volatile',
+    'wchar_t', 'while', 'xor', 'xor_eq',
+})
+
+_MISSING = object()
+
+
+def _lookup_qfn(prefix: str, name: str) -> str:
+    return (f"{prefix}::{name}" if prefix else name) if name else prefix
+
+
+class RenamedView:
+    """
+    The names one target's keyword renaming gives a model, read without changing it. Only the
+    nodes that change are recorded; every accessor falls back to the node's own value.
+    """
     def __init__(self, reserved_keywords: Set[str], prefix: str):
-        self.reserved_keywords = set(reserved_keywords)
+        self.reserved_keywords = reserved_keywords
         self.prefix = prefix
+        # Original QFN -> new (short) name of renamed namespaces, messages and enums, in walk order
+        self.rename_map: Dict[str, str] = {}
+        self.names: Dict[object, str] = {}  # node -> new name
+        self.type_names: Dict[ModelField, tuple] = {}
+        self.compound_base_types: Dict[ModelField, str] = {}
+        self.parents: Dict[ModelMessage, str] = {}  # message -> parent QFN (or string) with renamed segments
 
-    def transform(self, model: Model) -> Model:
-        # Build a mapping of old_name -> new_name for all namespaces, messages, enums
-        rename_map = {}
-        # First pass: collect all renames
-        for ns in model.namespaces:
-            self._collect_renames(ns, rename_map, parent_ns=None)
-        # Second pass: apply renames and update references
-        for ns in model.namespaces:
-            self._apply_renames(ns, rename_map, parent_ns=None)
+    def __len__(self) -> int:
+        """The number of nodes this view renames something on."""
+        return len(set(self.names).union(self.type_names, self.compound_base_types, self.parents))
+
+    def name(self, node) -> str:
+        return self.names.get(node, node.name)
+
+    def field_type_names(self, field: ModelField) -> tuple:
+        return self.type_names.get(field, field.type_names)
+
+    def compound_base_type(self, field: ModelField) -> Optional[str]:
+        return self.compound_base_types.get(field, getattr(field, 'compound_base_type', None))
+
+    def parent_qfn(self, msg: ModelMessage) -> Optional[str]:
+        """The QFN of the message's parent (the parent itself when it is a plain string)."""
+        found = self.parents.get(msg, _MISSING)
+        if found is not _MISSING:
+            return found
+        parent = getattr(msg, 'parent', None)
+        return parent if isinstance(parent, str) or parent is None else getattr(parent, 'qfn', None)
+
+    def _rename(self, node, qfn: Optional[str] = None) -> None:
+        new = self.prefix + node.name
+        self.names[node] = new
+        if qfn is not None:
+            self.rename_map[qfn] = new
+
+    def _renamed_qfn(self, qfn: str) -> str:
+        """qfn with each segment that names a renamed namespace, message or enum replaced by its new name."""
+        parts = qfn.split('::')
+        rename_map = self.rename_map
+        return '::'.join(rename_map.get('::'.join(parts[:i + 1]), part) for i, part in enumerate(parts))
+
+    def _resolve(self, fields: List[ModelField], messages: List[ModelMessage]) -> None:
+        """Rename field type names and parent references once every rename is known."""
+        rename_map = self.rename_map
+        # A type name takes the new name of the last rename (in walk order) whose QFN or short
+        # name it equals, so both indexes keep the position of the rename they point at
+        by_qfn: Dict[str, Tuple[int, str]] = {}
+        by_short: Dict[str, Tuple[int, str]] = {}
+        for position, (qfn, new) in enumerate(rename_map.items()):
+            by_qfn[qfn] = (position, new)
+            by_short[qfn.rsplit('::', 1)[-1]] = (position, new)
+        if by_qfn:
+            for field in fields:
+                type_names = field.type_names
+                renamed = None
+                for i, tname in enumerate(type_names):
+                    if tname is None:
+                        continue
+                    match = by_qfn.get(tname)
+                    short = by_short.get(tname)
+                    if match is None or (short is not None and short[0] > match[0]):
+                        match = short
+                    if match is not None and match[1] != tname:
+                        if renamed is None:
+                            renamed = list(type_names)
+                        renamed[i] = match[1]
+                if renamed is not None:
+                    self.type_names[field] = tuple(renamed)
+            for msg in messages:
+                parent = msg.parent
+                qfn = getattr(parent, 'qfn', _MISSING)
+                if qfn is _MISSING:
+                    qfn = parent if isinstance(parent, str) else None
+                if qfn:
+                    renamed = self._renamed_qfn(qfn)
+                    if renamed != qfn:
+                        self.parents[msg] = renamed
+
+    def apply(self, model: Model) -> Model:
+        """Write the renames into `model`, keeping its QFN lookup current."""
+        lookup = getattr(model, '_qfn_lookup', None)
+        names = self.names
+        stack = [(ns, '') for ns in reversed(model.namespaces)]
+        while stack:
+            ns, lookup_ns = stack.pop()
+            # lookup_ns: the enclosing namespace's QFN as the model's _qfn_lookup spells it (empty names skipped)
+            old_lookup_qfn = _lookup_qfn(lookup_ns, ns.name)
+            ns.name = names.get(ns, ns.name)
+            ns_lookup_qfn = _lookup_qfn(lookup_ns, ns.name)
+            if lookup is not None and ns_lookup_qfn != old_lookup_qfn:
+                lookup.rename(old_lookup_qfn, ns_lookup_qfn, 'namespace')
+            for enum in ns.enums:
+                new = names.get(enum)
+                if new is not None:
+                    if lookup is not None:
+                        lookup.rename(_lookup_qfn(ns_lookup_qfn, enum.name), _lookup_qfn(ns_lookup_qfn, new), 'enum')
+                    enum.name = new
+                for value in enum.values:
+                    value.name = names.get(value, value.name)
+            for msg in ns.messages:
+                new = names.get(msg)
+                if new is not None:
+                    if lookup is not None:
+                        lookup.rename(_lookup_qfn(ns_lookup_qfn, msg.name), _lookup_qfn(ns_lookup_qfn, new), 'message')
+                    msg.name = new
+                # Parent reference (inheritance): a ModelReference or a plain QFN string
+                parent = self.parents.get(msg)
+                if parent is not None:
+                    if hasattr(msg.parent, 'qfn'):
+                        msg.parent.qfn = parent
+                    else:
+                        msg.parent = parent
+                for field in msg.fields:
+                    field.name = names.get(field, field.name)
+                    field.type_names = self.type_names.get(field, field.type_names)
+                    if field in self.compound_base_types:
+                        field.compound_base_type = self.compound_base_types[field]
+            for child_ns in reversed(getattr(ns, 'namespaces', [])):
+                stack.append((child_ns, ns_lookup_qfn))
         return model
 
-    def _collect_renames(self, ns: ModelNamespace, rename_map: dict, parent_ns: str = None):
-        # Namespace
-        ns_qfn = ns.name if not parent_ns else f"{parent_ns}::{ns.name}"
-        if ns.name in self.reserved_keywords:
-            rename_map[ns_qfn] = self.prefix + ns.name
-        # Enums
-        for enum in ns.enums:
-            enum_qfn = f"{ns_qfn}::{enum.name}"
-            if enum.name in self.reserved_keywords:
-                rename_map[enum_qfn] = self.prefix + enum.name
-        # Messages
-        for msg in ns.messages:
-            msg_qfn = f"{ns_qfn}::{msg.name}"
-            if msg.name in self.reserved_keywords:
-                rename_map[msg_qfn] = self.prefix + msg.name
-        # Nested namespaces
-        for child_ns in getattr(ns, 'namespaces', []):
-            self._collect_renames(child_ns, rename_map, ns_qfn)
-
-    def _apply_renames(self, ns: ModelNamespace, rename_map: dict, parent_ns: str = None):
+
+def rename_views(model: Model, targets: Dict[str, Tuple[Set[str], str]]) -> Dict[str, RenamedView]:
+    """
+    Plan the renames of several targets, {target: (reserved keywords, prefix)}, in one walk over
+    the model, returning a RenamedView per target. The model is not changed.
+    """
+    views = {target: RenamedView(frozenset(reserved), prefix) for target, (reserved, prefix) in targets.items()}
+    active = list(views.values())
+    fields: List[ModelField] = []
+    messages: List[ModelMessage] = []
+    stack = [(ns, None) for ns in reversed(model.namespaces)]
+    while stack:
+        ns, parent_ns = stack.pop()
         ns_qfn = ns.name if not parent_ns else f"{parent_ns}::{ns.name}"
-        # Rename namespace if needed
-        if ns_qfn in rename_map:
-            ns.name = rename_map[ns_qfn]
-            ns_qfn = ns.name if not parent_ns else f"{parent_ns}::{ns.name}"
-        # Enums
+        for view in active:
+            if ns.name in view.reserved_keywords:
+                view._rename(ns, ns_qfn)
         for enum in ns.enums:
-            enum_qfn = f"{ns_qfn}::{enum.name}"
-            if enum_qfn in rename_map:
-                enum.name = rename_map[enum_qfn]
-            # Enum values
-            for value in enum.values:
-                if value.name in self.reserved_keywords:
-                    value.name = self.prefix + value.name
-        # Messages
+            for view in active:
+                if enum.name in view.reserved_keywords:
+                    view._rename(enum, f"{ns_qfn}::{enum.name}")
+                for value in enum.values:
+                    if value.name in view.reserved_keywords:
+                        view._rename(value)
         for msg in ns.messages:
-            msg_qfn = f"{ns_qfn}::{msg.name}"
-            if msg_qfn in rename_map:
-                msg.name = rename_map[msg_qfn]
-            # Parent reference (inheritance)
-            if hasattr(msg, 'parent') and msg.parent:
-                # parent is a ModelReference or similar
-                if hasattr(msg.parent, 'qfn') and msg.parent.qfn in rename_map:
-                    msg.parent.qfn = rename_map[msg.parent.qfn]
-                elif isinstance(msg.parent, str) and msg.parent in rename_map:
-                    msg.parent = rename_map[msg.parent]
-            # Fields
+            for view in active:
+                if msg.name in view.reserved_keywords:
+                    view._rename(msg, f"{ns_qfn}::{msg.name}")
+            if getattr(msg, 'parent', None):
+                messages.append(msg)
             for field in msg.fields:
-                if field.name in self.reserved_keywords:
-                    field.name = self.prefix + field.name
-                # Field type references (type_names)
-                if hasattr(field, 'type_names'):
-                    for i, tname in enumerate(field.type_names):
-                        if tname is not None:
-                            # Try to match QFN or simple name
-                            for k, v in rename_map.items():
-                                if tname == k.split('::')[-1]:
-                                    field.type_names[i] = v
-                                elif tname == k:
-                                    field.type_names[i] = v
-                # Compound base type
-                if hasattr(field, 'compound_base_type') and field.compound_base_type in self.reserved_keywords:
-                    field.compound_base_type = self.prefix + field.compound_base_type
-        # Nested namespaces
-        for child_ns in getattr(ns, 'namespaces', []):
-            self._apply_renames(child_ns, rename_map, ns_qfn)
+                fields.append(field)
+                compound_base = getattr(field, 'compound_base_type', None)
+                for view in active:
+                    if field.name in view.reserved_keywords:
+                        view._rename(field)
+                    if compound_base in view.reserved_keywords:
+                        view.compound_base_types[field] = view.prefix + compound_base
+        for child_ns in reversed(getattr(ns, 'namespaces', [])):
+            stack.append((child_ns, ns_qfn))
+    for view in active:
+        view._resolve(fields, messages)
+    return views
+
+
+class ReservedKeywordRenameTransform:
+    writes = frozenset({'namespace.name', 'message.name', 'message.parent', 'field.name', 'field.type_names',
+                        'field.compound_base_type', 'enum.name', 'enum_value.name', 'reference.qfn'})
+    reads = writes | {'model.namespaces', 'namespace.namespaces', 'namespace.enums', 'namespace.messages',
+                      'message.fields', 'enum.values'}
+    settings = ('reserved_keywords', 'prefix')
+
+    def __init__(self, reserved_keywords: Set[str], prefix: str):
+        self.reserved_keywords = set(reserved_keywords)
+        self.prefix = prefix
+
+    def view(self, model: Model) -> RenamedView:
+        """The renames this transform would make, without making them."""
+        return rename_views(model, {None: (self.reserved_keywords, self.prefix)})[None]
+
+    def transform(self, model: Model) -> Model:
+        model = self.view(model).apply(model)
+        record_transform_run(model, self)
+        return model
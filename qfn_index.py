@@ -0,0 +1,119 @@
+"""
+qfn_index.py
+Suffix and short-name index over a set of QFN strings (e.g. the keys of an enum or message
+lookup), for resolving partially qualified references without scanning every QFN.
+
+Queries answer exactly what the equivalent loop over the keys would, including which key comes
+first in insertion order:
+  with_last(name)            [q for q in keys if q.split('::')[-1] == name]
+  with_segment_suffix(path)  [q for q in keys if q == path or q.endswith('::' + path)]
+  first_ending_with(suffix)  next(q for q in keys if q.endswith(suffix))
+with_suffix_or_last() combines the first two.
+Short names are a dict lookup; segment suffixes walk a trie of reversed segments; raw string
+suffixes use a table of the suffixes of every last segment, built on first use.
+"""
+from typing import Dict, Iterable, List, Optional
+
+
+def _regular(path: str) -> bool:
+    """True if every '::'-separated segment of path is non-empty and contains no ':'."""
+    return all(seg and ':' not in seg for seg in path.split('::'))
+
+
+class QfnIndex:
+    def __init__(self, qfns: Iterable[str] = ()):
+        self._position: Dict[str, int] = {}
+        self._by_last: Dict[str, List[str]] = {}
+        self._trie: Dict[str, tuple] = {}  # segment -> (children, qfns), segments from the end
+        self._irregular: List[str] = []  # QFNs the trie cannot represent; always checked directly
+        self._last_suffixes: Optional[Dict[str, str]] = None
+        for qfn in qfns:
+            self.add(qfn)
+
+    def __contains__(self, qfn) -> bool:
+        return qfn in self._position
+
+    def __len__(self) -> int:
+        return len(self._position)
+
+    def position(self, qfn: str) -> int:
+        """Insertion position of qfn."""
+        return self._position[qfn]
+
+    def add(self, qfn: str) -> None:
+        """Add qfn after the existing keys (re-adding a key keeps its position, like a dict)."""
+        if qfn in self._position:
+            return
+        self._position[qfn] = len(self._position)
+        segments = qfn.split('::')
+        self._by_last.setdefault(segments[-1], []).append(qfn)
+        if not _regular(qfn):
+            self._irregular.append(qfn)
+            return
+        level = self._trie
+        for seg in reversed(segments):
+            node = level.get(seg)
+            if node is None:
+                node = level[seg] = ({}, [])
+            node[1].append(qfn)
+            level = node[0]
+        if self._last_suffixes is not None:
+            self._add_suffixes(qfn, segments[-1])
+
+    def with_last(self, name: str) -> List[str]:
+        """Keys whose last segment is name, in insertion order."""
+        return list(self._by_last.get(name, ()))
+
+    def with_segment_suffix(self, path: str) -> List[str]:
+        """Keys equal to path or ending with '::' + path, in insertion order."""
+        def match(q):
+            return q == path or q.endswith('::' + path)
+        if not _regular(path):
+            return [q for q in self._position if match(q)]
+        level, node = self._trie, None
+        for seg in reversed(path.split('::')):
+            node = level.get(seg)
+            if node is None:
+                break
+            level = node[0]
+        found = list(node[1]) if node is not None else []
+        return self._merge(found, [q for q in self._irregular if match(q)])
+
+    def with_suffix_or_last(self, name: str) -> List[str]:
+        """Keys equal to name, ending with '::' + name, or whose last segment is name, in order."""
+        return self._merge(self.with_segment_suffix(name), self.with_last(name))
+
+    def first_ending_with(self, suffix: str) -> Optional[str]:
+        """The first key (in insertion order) ending with suffix, as a plain string suffix."""
+        head, sep, tail = suffix.rpartition('::')
+        if not tail or ':' in tail:
+            return next((q for q in self._position if q.endswith(suffix)), None)
+        if sep:
+            # A regular key ending with '...::tail' has tail as its last segment
+            candidates = [q for q in self._by_last.get(tail, ()) if q.endswith(suffix)]
+        else:
+            # A suffix without ':' lies inside the last segment of a regular key
+            if self._last_suffixes is None:
+                self._last_suffixes = {}
+                for q in self._position:
+                    if _regular(q):
+                        self._add_suffixes(q, q.rsplit('::', 1)[-1])
+            found = self._last_suffixes.get(suffix)
+            candidates = [found] if found is not None else []
+        merged = self._merge(candidates, [q for q in self._irregular if q.endswith(suffix)])
+        return merged[0] if merged else None
+
+    def first(self, *candidates: Optional[str]) -> Optional[str]:
+        """The earliest (in insertion order) of the given keys, ignoring None."""
+        present = [q for q in candidates if q is not None]
+        return min(present, key=self._position.__getitem__) if present else None
+
+    def _add_suffixes(self, qfn: str, last: str) -> None:
+        table = self._last_suffixes
+        for i in range(len(last)):
+            table.setdefault(last[i:], qfn)
+
+    def _merge(self, found: List[str], extra: List[str]) -> List[str]:
+        if not extra:
+            return found
+        return sorted(set(found) | set(extra), key=self._position.__getitem__)
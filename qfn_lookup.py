@@ -0,0 +1,179 @@
+"""
+qfn_lookup.py
+The (QFN, kind) -> message/enum lookup of a Model, built lazily and layered over its imports.
+
+A QfnLookup holds only the entries of its own model's namespaces (built on first use) and reads
+the imported models' lookups through the model's imports when queried, so no importer copies the
+symbols of its imports. It answers like the merged dict Model used to build eagerly: the model's
+own entries, updated with each import's lookup in import order (later imports win). The order of
+the layers is worked out once and kept until some model's imports are replaced (assigning
+Model.imports, or Model.invalidate_resolution() after editing them in place).
+
+Transforms that rename, add or remove messages, enums or namespaces keep it current through
+add(), rename() and remove() instead of a rebuild; reset() drops the local entries when a
+transform restructures the namespaces wholesale. Every change gives the lookup a new version,
+which Model compares with the versions it resolved against to know when its answers are stale.
+"""
+import itertools
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+Key = Tuple[str, str]  # (QFN, kind)
+_MISSING = object()
+# Versions of all lookups come from one clock; next() on it is atomic, so concurrent changes
+# never share a version
+_clock = itertools.count(1)
+
+
+class QfnLookup(Mapping):
+    __slots__ = ('_model', '_local', 'version', '_layers', '_layers_epoch')
+
+    # The version of the latest change to any lookup: while it is unchanged, nothing needs
+    # re-checking
+    last_change = 0
+    # The version at which some model's imports last changed: cached layer orders older than
+    # this are recomputed
+    imports_epoch = 0
+
+    def __init__(self, model):
+        self._model = model
+        self._local: Optional[Dict[Key, Any]] = None
+        self.version = 0
+        self._layers: Optional[Tuple['QfnLookup', ...]] = None
+        self._layers_epoch = 0
+
+    def __repr__(self):
+        return f"QfnLookup({getattr(self._model, 'file', None)!r})"
+
+    def local(self) -> Dict[Key, Any]:
+        """The entries of the model's own namespaces (built on first use)."""
+        local = self._local
+        if local is None:
+            local = self._local = {}
+            stack = [(ns, '') for ns in reversed(getattr(self._model, 'namespaces', []))]
+            while stack:
+                ns, prefix = stack.pop()
+                ns_qfn = (prefix + '::' + ns.name if prefix else ns.name) if ns.name else prefix
+                for msg in getattr(ns, 'messages', []):
+                    local[(ns_qfn + '::' + msg.name if ns_qfn else msg.name, 'message')] = msg
+                for enum in getattr(ns, 'enums', []):
+                    local[(ns_qfn + '::' + enum.name if ns_qfn else enum.name, 'enum')] = enum
+                for nested in reversed(getattr(ns, 'namespaces', [])):
+                    stack.append((nested, ns_qfn))
+        return local
+
+    def _imported(self):
+        imports = getattr(self._model, 'imports', None) or {}
+        return [m._qfn_lookup for m in imports.values() if hasattr(m, '_qfn_lookup')]
+
+    def layers(self):
+        """
+        This lookup and those of every model it imports, transitively and each once, lowest
+        precedence first. The previous merged dict applied each import's (merged) table in turn,
+        so a model reached twice took effect where it was last applied: that is the first
+        post-order visit when imports are walked in reverse, which is what this does. The order is
+        cached until imports change anywhere.
+        """
+        epoch = QfnLookup.imports_epoch
+        if self._layers is not None and self._layers_epoch == epoch:
+            return self._layers
+        order, seen = [], set()
+        stack = [(self, False)]
+        while stack:
+            lookup, done = stack.pop()
+            if done:
+                order.append(lookup)
+            elif id(lookup) not in seen:
+                seen.add(id(lookup))
+                stack.append((lookup, True))
+                stack.extend((imported, False) for imported in lookup._imported())
+        order.reverse()
+        self._layers, self._layers_epoch = tuple(order), epoch
+        return self._layers
+
+    def get(self, key: Key, default=None):
+        for layer in reversed(self.layers()):
+            local = layer._local
+            found = (layer.local() if local is None else local).get(key, _MISSING)
+            if found is not _MISSING:
+                return found
+        return default
+
+    def __getitem__(self, key: Key):
+        found = self.get(key, _MISSING)
+        if found is _MISSING:
+            raise KeyError(key)
+        return found
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[Key]:
+        seen = set()
+        for layer in self.layers():
+            for key in layer.local():
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def merged(self) -> Dict[Key, Any]:
+        """All entries as one dict."""
+        merged = {}
+        for layer in self.layers():
+            merged.update(layer.local())
+        return merged
+
+    def items(self):
+        return self.merged().items()
+
+    def values(self):
+        return self.merged().values()
+
+    # Hooks for transforms. They only touch entries already built: an unbuilt lookup reads the
+    # namespaces as they are when it is first used.
+
+    def _changed(self) -> None:
+        self.version = QfnLookup.last_change = next(_clock)
+
+    @staticmethod
+    def imports_changed() -> None:
+        """Some model's imports changed: every cached layer order is stale."""
+        QfnLookup.imports_epoch = QfnLookup.last_change = next(_clock)
+
+    def add(self, qfn: str, kind: str, entity) -> None:
+        """Register a message or enum the transform added under `qfn`."""
+        if self._local is not None:
+            self._local[(qfn, kind)] = entity
+        self._changed()
+
+    def remove(self, qfn: str, kind: str) -> None:
+        """Drop a message or enum the transform removed."""
+        if self._local is not None:
+            self._local.pop((qfn, kind), None)
+        self._changed()
+
+    def rename(self, old_qfn: str, new_qfn: str, kind: str) -> None:
+        """
+        Move a message or enum from old_qfn to new_qfn. With kind 'namespace', every entry in the
+        namespace old_qfn (nested namespaces included) moves under new_qfn.
+        """
+        local = self._local
+        if local is not None and old_qfn != new_qfn:
+            if kind == 'namespace':
+                prefix, skip = old_qfn + '::', len(old_qfn)
+                moved = [key for key in local if key[0].startswith(prefix)]
+                for key in moved:
+                    local[(new_qfn + key[0][skip:], key[1])] = local.pop(key)
+            else:
+                entity = local.pop((old_qfn, kind), _MISSING)
+                if entity is not _MISSING:
+                    local[(new_qfn, kind)] = entity
+        self._changed()
+
+    def reset(self) -> None:
+        """Forget the local entries; they are rebuilt from the namespaces on next use."""
+        self._local = None
+        self._changed()
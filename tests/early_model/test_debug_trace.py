@@ -0,0 +1,49 @@
+"""
+Debug tracing is off by default and produces no output; enable_tracing routes the per-area
+trace output to a stream.
+"""
+import io
+import pytest
+from debug_trace import enable_tracing, disable_tracing
+from def_file_loader import build_early_model
+from early_model_transforms.add_file_level_namespace_transform import AddFileLevelNamespaceTransform
+from early_model_transforms.qfn_reference_transform import QfnReferenceTransform
+
+TEXT = 'namespace A { message M { x: int } }\nmessage N { m: A::M }\n'
+
+
+def _run():
+    model = build_early_model(TEXT, 'traced', 'traced.def')
+    AddFileLevelNamespaceTransform().transform(model)
+    return QfnReferenceTransform().transform(model)
+
+
+@pytest.fixture(autouse=True)
+def _tracing_off():
+    disable_tracing()
+    yield
+    disable_tracing()
+
+
+def test_tracing_off_is_silent(capsys):
+    _run()
+    out = capsys.readouterr()
+    assert out.out == '' and out.err == ''
+
+
+def test_enable_tracing_all_areas():
+    stream = io.StringIO()
+    enable_tracing(stream=stream)
+    _run()
+    text = stream.getvalue()
+    assert '[messagewrangler.early.file_namespace] Creating file-level namespace: traced' in text
+    assert "[messagewrangler.early.qfn] After QFN transform: field 'm'" in text
+
+
+def test_enable_tracing_selected_area():
+    stream = io.StringIO()
+    enable_tracing(['early.qfn'], stream=stream)
+    _run()
+    text = stream.getvalue()
+    assert 'early.qfn' in text
+    assert 'early.file_namespace' not in text
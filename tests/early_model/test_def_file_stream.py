@@ -0,0 +1,76 @@
+"""
+The streaming (mmap + per-segment) reader must build the same EarlyModel as load_def_file and
+yield top-level items in source order.
+"""
+import os
+import pytest
+from def_file_loader import load_def_file
+from def_file_stream import iter_def_file, iter_segments, load_def_file_streaming
+from tests.lark_parser.test_lark_parser_lalr_parity import DEF_FILES, MIXED_CONSTRUCTS
+from tests.test_utils import object_state
+
+
+@pytest.mark.parametrize('def_path', DEF_FILES, ids=os.path.basename)
+def test_streaming_matches_load_def_file(def_path):
+    try:
+        expected = load_def_file(def_path)
+    except Exception:
+        pytest.skip('load_def_file rejects this file')
+    assert object_state(load_def_file_streaming(def_path)) == object_state(expected)
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+def test_streaming_mixed_constructs(tmp_path, newline):
+    path = tmp_path / 'mixed.def'
+    path.write_bytes(('import "other.def" as O\n' + MIXED_CONSTRUCTS).replace('\n', newline).encode('utf-8'))
+    expected = load_def_file(str(path))
+    assert object_state(load_def_file_streaming(str(path))) == object_state(expected)
+
+
+TWO_BLOCK_COMMENTS = """\
+/* first */
+message A { x: int }
+/* second */
+enum B { X, Y }
+message C { /* inside */ y: int }
+"""
+
+
+@pytest.mark.parametrize('parse_mode', ['treeless', 'earley'])
+def test_streaming_with_several_block_comments(tmp_path, parse_mode):
+    # Each /* */ ends at its first */; a greedy match would swallow the definitions between them
+    path = tmp_path / 'comments.def'
+    path.write_text(TWO_BLOCK_COMMENTS, encoding='utf-8')
+    expected = load_def_file(str(path), parse_mode)
+    assert [m.name for m in expected.messages] == ['A', 'C'] and [e.name for e in expected.enums] == ['B']
+    assert object_state(load_def_file_streaming(str(path))) == object_state(expected)
+
+
+def test_segments_ignore_braces_in_comments_and_strings():
+    src = (b'// a { comment\n'
+           b'message A { s: string = "}"; }\n'
+           b'/* } */ enum B { X }\n'
+           b'/// trailing\n')
+    segments = [src[start:end] for start, end in iter_segments(src)]
+    assert segments == [b'// a { comment\nmessage A { s: string = "}"; }',
+                        b'\n/* } */ enum B { X }',
+                        b'\n/// trailing\n']
+
+
+def test_iter_def_file_yields_in_order(tmp_path):
+    path = tmp_path / 'order.def'
+    path.write_text('/// doc A\nmessage A { x: int }\nimport "b.def"\n\n'
+                    'namespace N {\n  message B {\n    y: int\n  }\n}\n', encoding='utf-8')
+    items = iter_def_file(str(path))
+    kind, first = next(items)
+    assert (kind, first.name) == ('message', 'A')
+    rest = list(items)
+    assert [kind for kind, _ in rest] == ['import', 'namespace']
+    assert rest[0][1] == ('b.def', None)
+    assert rest[1][1].messages[0].fields[0].line == 7
+
+
+def test_iter_def_file_empty(tmp_path):
+    path = tmp_path / 'empty.def'
+    path.write_text('', encoding='utf-8')
+    assert list(iter_def_file(str(path))) == []
@@ -1,6 +1,8 @@
+import os
 import pytest
 from early_model import EarlyModel
-from early_model_transforms.dependency_sort import topological_sort_earlymodels, DependencyCycleError
+from early_model_transforms.dependency_sort import (topological_sort_earlymodels, dependency_levels, DependencyCycleError,
+                                                    import_edges, normalize_path)
 
 def make_model(name, imports_raw):
     return EarlyModel(namespaces=[], enums=[], messages=[], options=[], compounds=[], imports_raw=imports_raw, file=name)
@@ -19,3 +21,47 @@ def test_topological_sort_cycle():
     models = {'a': a, 'b': b}
     with pytest.raises(DependencyCycleError):
         topological_sort_earlymodels(models)
+
+def test_topological_sort_deep_chain_without_recursion():
+    # Far deeper than Python's recursion limit
+    n = 5000
+    models = {f'm{i}': make_model(f'm{i}', [(f'm{i + 1}', None)] if i + 1 < n else []) for i in range(n)}
+    sorted_models = topological_sort_earlymodels(models)
+    assert [m.file for m in sorted_models] == [f'm{i}' for i in reversed(range(n))]
+
+def test_topological_sort_keeps_depth_first_order():
+    # Files in the given order, each after its imports in import order
+    a = make_model('a', [('c', None), ('b', None)])
+    b = make_model('b', [('d', None)])
+    c = make_model('c', [('d', None)])
+    d = make_model('d', [])
+    e = make_model('e', [])
+    assert topological_sort_earlymodels({'e': e, 'a': a, 'b': b, 'c': c, 'd': d}) == [e, d, c, b, a]
+
+def test_topological_sort_reports_cycle_paths():
+    a = make_model('a', [('b', None)])
+    b = make_model('b', [('c', None)])
+    c = make_model('c', [('a', None)])
+    d = make_model('d', [('d', None)])
+    with pytest.raises(DependencyCycleError) as info:
+        topological_sort_earlymodels({'a': a, 'b': b, 'c': c, 'd': d})
+    cycles = [[os.path.basename(p) for p in cycle] for cycle in info.value.cycles]
+    assert cycles == [['a', 'b', 'c', 'a'], ['d', 'd']]
+    assert 'a -> ' in str(info.value)
+
+def test_dependency_levels():
+    a = make_model('a', [('b', None), ('c', None)])
+    b = make_model('b', [('d', None)])
+    c = make_model('c', [])
+    d = make_model('d', [])
+    levels = dependency_levels({'a': a, 'b': b, 'c': c, 'd': d})
+    assert levels == [[d, c], [b], [a]]
+
+def test_import_edges():
+    root = normalize_path(os.path.join('defs', 'root.def'))
+    model = make_model(root, [('a.def', None), ('../sub/b.def', 'B')])
+    joined = {}
+    edges = import_edges(root, model, joined)
+    assert edges == [('a.def', normalize_path(os.path.join('defs', 'a.def'))),
+                     ('B', normalize_path(os.path.join('sub', 'b.def')))]
+    assert len(joined) == 2 and import_edges(root, model, joined) == edges == import_edges(root, model)
@@ -0,0 +1,41 @@
+from lark_parser import parse_message_dsl
+from def_file_loader import EarlyModelBuilder
+
+TEXT = """\
+enum First { A }
+/// Top doc
+message Top {
+    a: int;
+    b: enum { X, Y };
+}
+// plain comment
+namespace Outer {
+    /// ignored inside namespaces
+    message Inner { c: string }
+    namespace Deeper {
+        enum E { /// value doc
+            V1 = 2, V2 }
+    }
+}
+"""
+
+
+def test_builder_context_rules():
+    for mode in ('earley', 'lalr'):
+        model = EarlyModelBuilder('file_ns', 'x.def').build(parse_message_dsl(TEXT, mode=mode))
+        top = model.messages[0]
+        assert (top.doc, top.comment, top.namespace) == ('/// Top doc', '/// Top doc', 'file_ns')
+        assert [f.namespace for f in top.fields] == ['file_ns', 'file_ns']
+        assert [f.line for f in top.fields] == [4, 5]
+        assert top.fields[1].type_type == 'enum_type'
+        assert [v['name'] for v in top.fields[1].inline_values_raw] == ['X', 'Y']
+        outer = model.namespaces[0]
+        assert (outer.doc, outer.comment, outer.parent_namespace) == ('', '// plain comment', None)
+        inner = outer.messages[0]
+        assert (inner.doc, inner.namespace) == ('', 'Outer')
+        deeper = outer.namespaces[0]
+        assert deeper.parent_namespace == 'Deeper'
+        enum = deeper.enums[0]
+        assert enum.namespace == 'Deeper'
+        assert [(v.name, v.value, v.doc, v.namespace) for v in enum.values] == [
+            ('V1', 2, '/// value doc', 'Deeper'), ('V2', None, '', 'Deeper')]
@@ -0,0 +1,73 @@
+import os
+import time
+import def_file_loader
+from def_file_loader import load_def_file
+from early_model_cache import EarlyModelCache
+from tests.test_utils import object_state
+
+DEF_DIR = os.path.join(os.path.dirname(__file__), '..', 'def')
+
+
+def test_cached_early_model_matches_fresh(tmp_path):
+    cache = EarlyModelCache(str(tmp_path))
+    path = os.path.join(DEF_DIR, 'sh4c_comms.def')
+    fresh = load_def_file(path)
+    first = load_def_file(path, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    second = load_def_file(path, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second is not first
+    assert object_state(second) == object_state(fresh)
+
+
+def test_cache_invalidated_by_content_and_loader_version(tmp_path, monkeypatch):
+    cache = EarlyModelCache(str(tmp_path / 'cache'))
+    def_path = tmp_path / 'm.def'
+    def_path.write_text('message A { x: int; }')
+    assert load_def_file(str(def_path), cache=cache).messages[0].name == 'A'
+    def_path.write_text('message B { x: int; }')
+    assert load_def_file(str(def_path), cache=cache).messages[0].name == 'B'
+    assert cache.misses == 2
+    monkeypatch.setattr(def_file_loader, 'LOADER_VERSION', def_file_loader.LOADER_VERSION + '-next')
+    load_def_file(str(def_path), cache=cache)
+    assert cache.misses == 3
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = EarlyModelCache(str(tmp_path), max_bytes=10 ** 9)
+    for i in range(3):
+        cache.put(f'k{i}', {'value': 'x' * 1000, 'i': i})
+    entry_size = cache.size() // 3
+    # Touch k0 so k1 becomes the least recently used entry
+    old = time.time() - 100
+    for i in range(3):
+        os.utime(os.path.join(str(tmp_path), f'k{i}.earlymodel'), (old + i, old + i))
+    assert cache.get('k0') is not None
+    cache.evict(max_bytes=entry_size * 2)
+    assert cache.get('k1') is None
+    assert cache.get('k0') is not None and cache.get('k2') is not None
+
+
+def test_put_scans_the_directory_only_to_evict(tmp_path, monkeypatch):
+    cache = EarlyModelCache(str(tmp_path), max_bytes=10 ** 9)
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, '_entries', lambda: scans.append(1) or entries())
+    for i in range(50):
+        cache.put(f'k{i}', {'value': 'x' * 1000, 'i': i})
+    cache.put('k0', {'value': 'y' * 1000})
+    assert scans == [] and cache.total_bytes == cache.size()
+    # Over the limit: one scan evicts down to it and recounts
+    cache.max_bytes = cache.total_bytes
+    del scans[:]
+    cache.put('k50', {'value': 'x' * 1000})
+    assert len(scans) == 1 and cache.total_bytes <= cache.max_bytes
+    assert cache.total_bytes == cache.size()
+
+
+def test_corrupt_entry_is_dropped(tmp_path):
+    cache = EarlyModelCache(str(tmp_path))
+    with open(os.path.join(str(tmp_path), 'bad.earlymodel'), 'wb') as f:
+        f.write(b'not a model')
+    assert cache.get('bad') is None
+    assert not os.path.exists(os.path.join(str(tmp_path), 'bad.earlymodel'))
@@ -0,0 +1,64 @@
+"""
+The __slots__ EarlyModel node classes have a slot for every attribute the builder and transforms
+set and no instance __dict__, shared empty defaults cannot be mutated, file/namespace strings are
+interned on every assignment, and pickle/deepcopy keep every attribute.
+"""
+import copy
+import pickle
+import sys
+import pytest
+from def_file_loader import build_early_model
+from early_model import EarlyField, EMPTY_OPTIONS, node_attributes
+from tests.test_utils import object_state
+
+TEXT = ('namespace A {\n'
+        '  message M {\n'
+        '    x: int;\n'
+        '    e: enum { P, Q };\n'
+        '    o: options { R, S } = R;\n'
+        '  }\n'
+        '}\n')
+
+
+def test_attributes_without_a_slot_are_rejected():
+    field = EarlyField('x', 'int', 'f.def', 'f', 1, 'int')
+    field.type_type = 'primitive'
+    assert node_attributes(field)['type_type'] == 'primitive'
+    assert node_attributes(field)['name'] == 'x'
+    assert not hasattr(field, '__dict__')
+    with pytest.raises(AttributeError):
+        field.resolved_type = 'int'
+
+
+def test_empty_defaults_are_shared_and_immutable():
+    a = EarlyField('a', 'int', 'f.def', 'f', 1, 'int')
+    b = EarlyField('b', 'int', 'f.def', 'f', 2, 'int')
+    assert a.options_raw is b.options_raw is EMPTY_OPTIONS
+    assert a.modifiers_raw == () and a.modifiers_raw is b.modifiers_raw
+    with pytest.raises(TypeError):
+        a.options_raw['default'] = 1
+
+
+def test_file_names_are_interned():
+    model = build_early_model(TEXT, 'slots', ''.join(['slots', '.def']))
+    message = model.namespaces[0].messages[0]
+    assert message.fields[0].file is message.fields[1].file is message.file
+
+
+def test_later_assignments_are_interned():
+    field = EarlyField('x', 'int', 'f.def', 'f', 1, 'int')
+    field.namespace = ''.join(['A', '::', 'B'])
+    field.file = ''.join(['g', '.def'])
+    assert field.namespace is sys.intern('A::B') and field.file is sys.intern('g.def')
+    field.namespace = None
+    assert field.namespace is None
+
+
+@pytest.mark.parametrize('clone', [copy.deepcopy, lambda m: pickle.loads(pickle.dumps(m))],
+                         ids=['deepcopy', 'pickle'])
+def test_copies_keep_all_attributes(clone):
+    model = build_early_model(TEXT, 'slots', 'slots.def')
+    model.namespaces[0].messages[0].qfn = 'slots::A::M'
+    copied = clone(model)
+    assert object_state(copied) == object_state(model)
+    assert copied.namespaces[0].messages[0].fields[0].options_raw is EMPTY_OPTIONS
@@ -0,0 +1,112 @@
+"""
+transform_snapshot runs early transforms without modifying its input and returns a model that
+shares every node the transforms left alone.
+"""
+import copy
+
+from def_file_loader import build_early_model
+from early_model_snapshot import transform_snapshot, shared_nodes
+from early_transform_scheduler import default_early_transforms
+from early_transform_pipeline import EarlyVisitorTransform, run_early_transform_pipeline
+from tests.test_utils import object_state
+
+TEXT = '''
+namespace A {
+    enum Level { LOW, HIGH }
+    message Base { level: Level; kind: enum { K1, K2 } }
+    message Derived : Base { extra: string }
+}
+namespace B {
+    message Other { id: int; name: string }
+}
+'''
+
+
+class RenameMessage(EarlyVisitorTransform):
+    def __init__(self, old, new):
+        self.old, self.new = old, new
+
+    def on_message(self, msg, ns_stack):
+        if msg.name == self.old:
+            msg.name = self.new
+
+
+def _parsed():
+    return build_early_model(TEXT, 'snap', 'snap.def')
+
+
+def _transformed():
+    return transform_snapshot(_parsed(), default_early_transforms({}))
+
+
+def test_snapshot_matches_in_place_pipeline_and_keeps_input():
+    parsed = _parsed()
+    before = object_state(parsed)
+    snapshot = transform_snapshot(parsed, default_early_transforms({}))
+    in_place = run_early_transform_pipeline(copy.deepcopy(parsed), default_early_transforms({}))
+    assert object_state(parsed) == before
+    assert object_state(snapshot) == object_state(in_place)
+
+
+def test_snapshot_shares_untouched_nodes():
+    base = _transformed()
+    before = object_state(base)
+    renamed = transform_snapshot(base, [RenameMessage('Other', 'Renamed')])
+    assert object_state(base) == before
+    file_ns, new_ns = base.namespaces[0], renamed.namespaces[0]
+    assert new_ns is not file_ns
+    a, b = file_ns.namespaces
+    new_a, new_b = new_ns.namespaces
+    # Namespace A is untouched: shared as a whole
+    assert new_a is a
+    # Namespace B and Other are new, Other's fields are shared
+    assert new_b is not b and new_b.enums is b.enums
+    other, renamed_other = b.messages[0], new_b.messages[0]
+    assert renamed_other.name == 'Renamed' and other.name == 'Other'
+    assert all(x is y for x, y in zip(renamed_other.fields, other.fields))
+    assert renamed_other.fields is other.fields
+
+
+def test_snapshot_tables_point_at_result_nodes():
+    base = _transformed()
+    renamed = transform_snapshot(base, [RenameMessage('Other', 'Renamed')] + default_early_transforms({})[2:3], fuse=False)
+    table = renamed.symbol_table
+    assert table is not base.symbol_table
+    new_a = renamed.namespaces[0].namespaces[0]
+    # Re-running the QFN transform leaves the Level enum as it was: the table holds the shared node
+    assert table.get('snap::A::Level') is new_a.enums[0] is base.namespaces[0].namespaces[0].enums[0]
+    assert table.get('snap::B::Renamed') is renamed.namespaces[0].namespaces[1].messages[0]
+    assert base.symbol_table.get('snap::B::Renamed') is None
+    assert renamed.inheritance_index is not base.inheritance_index
+
+
+def test_snapshot_without_changes_shares_everything():
+    base = _transformed()
+    again = transform_snapshot(base, [RenameMessage('Missing', 'Nothing')])
+    assert again.namespaces is base.namespaces
+    assert shared_nodes(base, again) == shared_nodes(base, base)
+
+
+class EditRawValuesInPlace(EarlyVisitorTransform):
+    def on_namespace(self, ns, ns_stack):
+        for option in ns.options:
+            option['doc'] = 'edited'
+            option['values_raw'][0]['name'] = 'EDITED'
+
+    def on_field(self, field, msg, ns_stack):
+        for value in field.inline_values_raw:
+            value['name'] = value['name'].lower()
+
+
+def test_in_place_edits_of_raw_entries_keep_the_input():
+    parsed = build_early_model('namespace A { options Mode { FAST, SLOW } message M { kind: enum { K1, K2 } } }',
+                               'snap', 'snap.def')
+    before = object_state(parsed)
+    edited = transform_snapshot(parsed, [EditRawValuesInPlace()])
+    assert object_state(parsed) == before
+    ns, field = edited.namespaces[0], edited.namespaces[0].messages[0].fields[0]
+    assert ns.options[0]['doc'] == 'edited' and ns.options[0]['values_raw'][0]['name'] == 'EDITED'
+    assert [v['name'] for v in field.inline_values_raw] == ['k1', 'k2']
+    # Copying the entries does not stop a run that changes nothing from sharing them
+    again = transform_snapshot(parsed, [RenameMessage('Missing', 'Nothing')])
+    assert again.namespaces is parsed.namespaces
@@ -0,0 +1,66 @@
+"""
+The tree-less loader (LALR parser with EarlyModelBuilder embedded) must build exactly the
+same EarlyModel as the Earley tree path.
+"""
+import os
+import pytest
+from def_file_loader import build_early_model, load_def_file
+from tests.lark_parser.test_lark_parser_lalr_parity import DEF_DIR, DEF_FILES, MIXED_CONSTRUCTS, _COMMENTS, _DEFINITIONS
+from tests.test_utils import object_state
+
+
+def _earley_model(text, ns, source_file=None):
+    try:
+        return build_early_model(text, ns, source_file, parse_mode='earley')
+    except Exception:
+        pytest.skip('Earley rejects this input')
+
+
+@pytest.mark.parametrize('def_path', DEF_FILES, ids=os.path.basename)
+def test_treeless_matches_earley(def_path):
+    with open(def_path, encoding='utf-8') as f:
+        text = f.read()
+    ns = os.path.splitext(os.path.basename(def_path))[0]
+    earley_model = _earley_model(text, ns, def_path)
+    assert object_state(load_def_file(def_path)) == object_state(earley_model)
+
+
+def test_treeless_matches_earley_on_mixed_constructs():
+    earley_model = _earley_model(MIXED_CONSTRUCTS, 'mixed')
+    assert object_state(build_early_model(MIXED_CONSTRUCTS, 'mixed')) == object_state(earley_model)
+
+
+@pytest.mark.parametrize('definition', _DEFINITIONS)
+@pytest.mark.parametrize('run', ['d', 'dd', 'ddd', 'ld', 'ldd', 'dcd'])
+@pytest.mark.parametrize('layout', ['start', 'after_item', 'namespace'])
+def test_treeless_comment_attachment_matches_earley(definition, run, layout):
+    comments = '\n'.join(_COMMENTS[c] for c in run)
+    text = f"{comments}\n{definition}\n"
+    if layout == 'after_item':
+        text = f"enum First {{ A }}\n{text}"
+    elif layout == 'namespace':
+        text = f"namespace W {{\n{text}}}\n"
+    earley_model = _earley_model(text, 'x')
+    assert object_state(build_early_model(text, 'x')) == object_state(earley_model)
+
+
+def test_treeless_builder_state_is_per_call():
+    a = build_early_model('message A { x: int }', 'first', 'first.def')
+    b = build_early_model('message B { y: int }', 'second', 'second.def')
+    assert a.file == 'first.def' and a.messages[0].namespace == 'first'
+    assert b.file == 'second.def' and b.messages[0].namespace == 'second'
+
+
+def test_treeless_falls_back_to_earley_errors():
+    with open(os.path.join(DEF_DIR, 'test_invalid.def'), encoding='utf-8') as f:
+        text = f.read()
+    with pytest.raises(Exception) as earley_exc:
+        build_early_model(text, 'x', parse_mode='earley')
+    with pytest.raises(Exception) as treeless_exc:
+        build_early_model(text, 'x')
+    assert type(treeless_exc.value) is type(earley_exc.value)
+
+
+def test_unknown_loader_mode():
+    with pytest.raises(ValueError):
+        build_early_model('message A { x: int }', 'x', parse_mode='cyk')
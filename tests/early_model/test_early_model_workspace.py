@@ -0,0 +1,100 @@
+"""
+EarlyModelWorkspace re-parses only edited files and re-transforms only them and their reverse
+dependents, while producing the same models as a fresh build.
+"""
+import pytest
+from early_model_workspace import EarlyModelWorkspace
+from tests.test_utils import object_state
+
+# root -> a -> common, root -> b -> common, c is imported by b only
+GRAPH = {
+    'root.def': 'import "a.def"\nimport "b.def" as B\nmessage Root { x: a::A; y: B::Bm }\n',
+    'a.def': 'import "common.def"\nmessage A : common::Base { kind: enum { K1, K2 } }\n',
+    'b.def': 'import "common.def"\nimport "c.def"\nmessage Bm { z: common::Base }\n',
+    'common.def': 'message Base { id: int }\n',
+    'c.def': 'enum C { X, Y }\n',
+}
+
+
+@pytest.fixture
+def graph_dir(tmp_path):
+    for name, text in GRAPH.items():
+        (tmp_path / name).write_text(text, encoding='utf-8')
+    return tmp_path
+
+
+def _names(paths):
+    return sorted(p.replace('\\', '/').rsplit('/', 1)[-1] for p in paths)
+
+
+def _fresh_state(graph_dir):
+    ws = EarlyModelWorkspace(str(graph_dir / 'root.def'))
+    ws.load()
+    return [object_state(m) for m in ws.models()]
+
+
+def test_workspace_initial_load(graph_dir):
+    ws = EarlyModelWorkspace(str(graph_dir / 'root.def'))
+    root = ws.load()
+    assert _names(ws.last_parsed) == sorted(GRAPH)
+    assert _names(ws.order[-1:]) == ['root.def']
+    assert set(root.imports) == {'a.def', 'B'}
+    assert ws.model(str(graph_dir / 'a.def')).imports['common.def'] is ws.model(str(graph_dir / 'common.def'))
+
+
+def test_workspace_update_without_changes(graph_dir):
+    ws = EarlyModelWorkspace(str(graph_dir / 'root.def'))
+    ws.load()
+    before = {p: id(m) for p, m in ws.transformed.items()}
+    ws.update()
+    assert ws.last_parsed == set() and ws.last_transformed == set()
+    assert {p: id(m) for p, m in ws.transformed.items()} == before
+
+
+def test_workspace_edit_retransforms_dependents_only(graph_dir):
+    ws = EarlyModelWorkspace(str(graph_dir / 'root.def'))
+    ws.load()
+    c_model = ws.model(str(graph_dir / 'c.def'))
+    common_model = ws.model(str(graph_dir / 'common.def'))
+    (graph_dir / 'a.def').write_text(GRAPH['a.def'].replace('K2', 'K2, K3'), encoding='utf-8')
+    ws.update([str(graph_dir / 'a.def')])
+    assert _names(ws.last_parsed) == ['a.def']
+    assert _names(ws.last_transformed) == ['a.def', 'root.def']
+    assert ws.model(str(graph_dir / 'c.def')) is c_model
+    assert ws.model(str(graph_dir / 'common.def')) is common_model
+    assert [object_state(m) for m in ws.models()] == _fresh_state(graph_dir)
+
+
+def test_workspace_edit_of_shared_dependency(graph_dir):
+    ws = EarlyModelWorkspace(str(graph_dir / 'root.def'))
+    ws.load()
+    (graph_dir / 'common.def').write_text('message Base { id: int; name: string }\n', encoding='utf-8')
+    ws.update()
+    assert _names(ws.last_parsed) == ['common.def']
+    assert _names(ws.last_transformed) == ['a.def', 'b.def', 'common.def', 'root.def']
+    assert [object_state(m) for m in ws.models()] == _fresh_state(graph_dir)
+
+
+def test_workspace_tracks_added_and_removed_imports(graph_dir):
+    ws = EarlyModelWorkspace(str(graph_dir / 'root.def'))
+    ws.load()
+    (graph_dir / 'd.def').write_text('message D { q: int }\n', encoding='utf-8')
+    (graph_dir / 'b.def').write_text('import "common.def"\nimport "d.def"\nmessage Bm { z: common::Base }\n',
+                                     encoding='utf-8')
+    ws.update([str(graph_dir / 'b.def')])
+    assert _names(ws.last_parsed) == ['b.def', 'd.def']
+    assert _names(ws.order) == ['a.def', 'b.def', 'common.def', 'd.def', 'root.def']
+    assert [object_state(m) for m in ws.models()] == _fresh_state(graph_dir)
+
+
+@pytest.mark.parametrize('explicit', [False, True], ids=['all', 'changed'])
+def test_workspace_drops_deleted_file_no_longer_imported(graph_dir, explicit):
+    ws = EarlyModelWorkspace(str(graph_dir / 'root.def'))
+    ws.load()
+    (graph_dir / 'b.def').write_text(GRAPH['b.def'].replace('import "c.def"\n', ''), encoding='utf-8')
+    (graph_dir / 'c.def').unlink()
+    ws.update([str(graph_dir / 'b.def')] if explicit else None)
+    assert _names(ws.last_parsed) == ['b.def']
+    assert _names(ws.order) == ['a.def', 'b.def', 'common.def', 'root.def']
+    assert _names(ws.parsed) == _names(ws.order)
+    assert [object_state(m) for m in ws.models()] == _fresh_state(graph_dir)
@@ -0,0 +1,106 @@
+"""
+Fused visitor transforms must give the same EarlyModels as running the transforms one after
+another, and the runner must respect pre-pass ordering and plain (non-visitor) transforms.
+"""
+import os
+import pytest
+from early_model import EarlyModel, EarlyNamespace, EarlyMessage, EarlyEnum, EarlyField
+from early_model_workspace import EarlyModelWorkspace
+from early_transform_scheduler import default_early_transforms
+from early_transform_pipeline import EarlyVisitorTransform, run_early_transform_pipeline
+from tests.lark_parser.test_lark_parser_lalr_parity import DEF_FILES
+from tests.test_utils import object_state
+
+
+class Sequential:
+    def __init__(self, transforms):
+        self.transforms = transforms
+
+    def transform(self, model):
+        return run_early_transform_pipeline(model, self.transforms, fuse=False)
+
+
+@pytest.mark.parametrize('def_path', DEF_FILES, ids=os.path.basename)
+def test_fused_matches_sequential(def_path):
+    try:
+        fused = EarlyModelWorkspace(def_path)
+        fused.load()
+    except Exception:
+        pytest.skip('file does not load')
+    sequential = EarlyModelWorkspace(def_path, transforms=lambda imports: [Sequential(default_early_transforms(imports))])
+    sequential.load()
+    assert [object_state(m) for m in fused.models()] == [object_state(m) for m in sequential.models()]
+
+
+def _model():
+    fields = [EarlyField('a', 'int', 'f.def', 'N', 2, 'int'), EarlyField('b', 'int', 'f.def', 'N', 3, 'int')]
+    msg = EarlyMessage('M', fields, 'f.def', 'N', 1)
+    enum = EarlyEnum('E', [], 'f.def', 'N', 4)
+    inner = EarlyNamespace('I', [], [], 'f.def', 5)
+    ns = EarlyNamespace('N', [msg], [enum], 'f.def', 1, namespaces=[inner])
+    return EarlyModel([ns], [], [], [], [], [], 'f.def')
+
+
+class Recorder(EarlyVisitorTransform):
+    def __init__(self, tag, log):
+        self.tag, self.log = tag, log
+
+    def prepass(self, model):
+        self.log.append((self.tag, 'prepass'))
+
+    def on_namespace(self, ns, ns_stack):
+        self.log.append((self.tag, ns.name, len(ns_stack)))
+
+    def on_message(self, msg, ns_stack):
+        self.log.append((self.tag, msg.name))
+
+    def on_field(self, field, msg, ns_stack):
+        self.log.append((self.tag, field.name))
+
+    def on_enum(self, enum, ns_stack):
+        self.log.append((self.tag, enum.name))
+
+
+class BarrierRecorder(Recorder):
+    prepass_barrier = True
+
+
+class Plain:
+    def __init__(self, log):
+        self.log = log
+
+    def transform(self, model):
+        self.log.append(('plain',))
+        return model
+
+
+def test_single_walk_calls_hooks_in_pipeline_order():
+    log = []
+    run_early_transform_pipeline(_model(), [Recorder(1, log), Recorder(2, log)])
+    assert log == [(1, 'prepass'), (2, 'prepass'),
+                   (1, 'N', 1), (2, 'N', 1),
+                   (1, 'a'), (2, 'a'), (1, 'b'), (2, 'b'),
+                   (1, 'M'), (2, 'M'),
+                   (1, 'E'), (2, 'E'),
+                   (1, 'I', 2), (2, 'I', 2)]
+
+
+def test_barrier_and_plain_transforms_split_the_walk():
+    log = []
+    run_early_transform_pipeline(_model(), [Recorder(1, log), BarrierRecorder(2, log), Plain(log), Recorder(3, log)])
+    walk = [('N', 1), ('a',), ('b',), ('M',), ('E',), ('I', 2)]
+    assert log == ([(1, 'prepass')] + [(1,) + n for n in walk]
+                   + [(2, 'prepass')] + [(2,) + n for n in walk]
+                   + [('plain',)]
+                   + [(3, 'prepass')] + [(3,) + n for n in walk])
+
+
+def test_nodes_added_by_hooks_are_not_visited():
+    class AddEnum(EarlyVisitorTransform):
+        def on_message(self, msg, ns_stack):
+            ns_stack[-1].enums.append(EarlyEnum(msg.name + '_New', [], 'f.def', 'N', 1))
+
+    log = []
+    model = run_early_transform_pipeline(_model(), [AddEnum(), Recorder(1, log)])
+    assert [e.name for e in model.namespaces[0].enums] == ['E', 'M_New']
+    assert (1, 'M_New') not in log
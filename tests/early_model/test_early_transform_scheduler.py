@@ -0,0 +1,58 @@
+"""
+transform_early_models: level-by-level transforms of an import graph give the same EarlyModels as
+transforming the files one after another, linked to one object per imported file.
+"""
+import os
+
+from def_file_loader import load_def_files
+from early_model_transforms.dependency_sort import import_edges, topological_sort_earlymodels
+from early_transform_pipeline import run_early_transform_pipeline
+from early_transform_scheduler import default_early_transforms, transform_early_models
+from tests.test_utils import object_state
+
+FILES = {
+    'base.def': 'enum Level { LOW, HIGH }\nmessage Base { level: Level; k: enum { A, B } }\n',
+    'common.def': 'message Common { x: int }\n',
+    'left.def': 'import "base.def" as B\nimport "common.def"\nmessage Left : B::Base { c: Common }\n',
+    'right.def': 'import "base.def" as B\nmessage Right : B::Base { b: int }\n',
+    'top.def': 'import "left.def" as L\nimport "right.def" as R\nmessage Top { l: L::Left; r: R::Right }\n',
+}
+
+
+def _parsed(tmp_path):
+    for name, text in FILES.items():
+        (tmp_path / name).write_text(text)
+    return {m.file: m for m in load_def_files(str(tmp_path / 'top.def'), workers=1)}
+
+
+def _state(models):
+    return {os.path.basename(path): object_state(model) for path, model in models.items()}
+
+
+def test_transform_order_and_timings(tmp_path):
+    timings = {}
+    models = transform_early_models(_parsed(tmp_path), timings=timings)
+    names = [os.path.basename(path) for path in models]
+    assert names.index('base.def') < names.index('left.def') < names.index('top.def')
+    assert names.index('right.def') < names.index('top.def')
+    assert set(timings) == set(models)
+
+
+def test_results_share_imports(tmp_path):
+    models = transform_early_models(_parsed(tmp_path))
+    by_name = {os.path.basename(path): model for path, model in models.items()}
+    assert by_name['left.def'].imports['B'] is by_name['base.def']
+    assert by_name['right.def'].imports['B'] is by_name['base.def']
+    assert by_name['top.def'].imports['L'] is by_name['left.def']
+    assert by_name['left.def'].imports['common.def'] is by_name['common.def']
+
+
+def test_levels_match_sequential_pipelines(tmp_path):
+    models = transform_early_models(_parsed(tmp_path))
+    names = [os.path.basename(path) for path in models]
+    assert set(names[:2]) == {'base.def', 'common.def'} and names[-1] == 'top.def'
+    sequential = {}
+    for model in topological_sort_earlymodels(_parsed(tmp_path)):
+        import_models = {key: sequential[dep] for key, dep in import_edges(model.file, model)}
+        sequential[model.file] = run_early_transform_pipeline(model, default_early_transforms(import_models))
+    assert _state(models) == _state(sequential)
@@ -0,0 +1,75 @@
+"""
+load_def_files discovers the import graph breadth-first and parses files in a process pool;
+results must match serial loading and come back dependencies first.
+"""
+import os
+import pytest
+from def_file_loader import load_def_file, load_def_files
+from tests.test_utils import load_early_model_with_imports, object_state
+
+DEF_DIR = os.path.join(os.path.dirname(__file__), '..', 'def')
+
+# root imports a and b, both import common; b also imports a
+GRAPH = {
+    'root.def': 'import "a.def"\nimport "sub/b.def" as B\nmessage Root { x: a::A }\n',
+    'a.def': 'import "common.def"\nmessage A : common::Base { y: int }\n',
+    'sub/b.def': 'import "../a.def"\nimport "../common.def"\nmessage B { z: a::A }\n',
+    'common.def': 'message Base { id: int }\n',
+}
+
+
+@pytest.fixture
+def graph_dir(tmp_path):
+    for name, text in GRAPH.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+    return tmp_path
+
+
+def _names(models):
+    return [os.path.relpath(m.file, DEF_DIR) for m in models]
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_load_def_files_dependencies_first(graph_dir, workers):
+    models = load_def_files(str(graph_dir / 'root.def'), workers=workers)
+    files = [os.path.relpath(m.file, graph_dir).replace(os.sep, '/') for m in models]
+    assert sorted(files) == sorted(GRAPH)
+    assert files.index('common.def') < files.index('a.def') < files.index('sub/b.def') < files.index('root.def')
+
+
+def test_load_def_files_parallel_matches_serial(graph_dir):
+    serial = load_def_files(str(graph_dir / 'root.def'), workers=1)
+    parallel = load_def_files(str(graph_dir / 'root.def'), workers=2)
+    assert [object_state(m) for m in parallel] == [object_state(m) for m in serial]
+    for model in serial:
+        assert object_state(model) == object_state(load_def_file(model.file))
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_load_def_files_timings(graph_dir, workers):
+    timings = {}
+    models = load_def_files(str(graph_dir / 'root.def'), workers=workers, timings=timings)
+    assert sorted(timings) == sorted(m.file for m in models)
+    assert all(seconds > 0 for seconds in timings.values())
+
+
+def test_load_def_files_on_test_defs():
+    models = load_def_files(os.path.join(DEF_DIR, 'main.def'), workers=2)
+    assert _names(models) == ['base.def', 'main.def']
+
+
+def test_test_helper_with_workers(graph_dir, capsys):
+    # The shared test helper parses through the pool when asked, and stays quiet
+    root, models = load_early_model_with_imports(str(graph_dir / 'root.def'), workers=2)
+    serial_root, serial_models = load_early_model_with_imports(str(graph_dir / 'root.def'))
+    assert list(models) == list(serial_models)
+    assert object_state(root) == object_state(serial_root)
+    assert capsys.readouterr().out == ''
+
+
+def test_load_def_files_missing_import(tmp_path):
+    (tmp_path / 'root.def').write_text('import "missing.def"\nmessage R { x: int }\n', encoding='utf-8')
+    with pytest.raises(FileNotFoundError):
+        load_def_files(str(tmp_path / 'root.def'), workers=2)
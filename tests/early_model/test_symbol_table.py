@@ -0,0 +1,73 @@
+"""
+The per-file SymbolTable built by QfnReferenceTransform: indexes, scoped resolution, aliased
+imports, and the table published on the model for later stages.
+"""
+from def_file_loader import build_early_model
+from early_transform_scheduler import default_early_transforms
+from early_transform_pipeline import run_early_transform_pipeline
+from early_model_transforms.symbol_table import SymbolTable
+
+MAIN = ('message Top { x: int }\n'
+        'namespace A {\n'
+        '  message Dup { x: int }\n'
+        '  namespace B {\n'
+        '    message Dup { y: int }\n'
+        '    message User { d: Dup; t: Top; k: enum { P, Q } }\n'
+        '  }\n'
+        '  message Other { d: Dup }\n'
+        '}\n')
+
+
+def _transformed(text, name, import_models=None, imports_raw=None):
+    model = build_early_model(text, name, f"{name}.def")
+    if imports_raw:
+        model.imports_raw = imports_raw
+    return run_early_transform_pipeline(model, default_early_transforms(import_models or {}))
+
+
+def _field(model, *path):
+    ns = model.namespaces[0]
+    for name in path[:-2]:
+        ns = next(n for n in ns.namespaces if n.name == name)
+    msg = next(m for m in ns.messages if m.name == path[-2])
+    return next(f for f in msg.fields if f.name == path[-1])
+
+
+def test_table_indexes_messages_and_enums():
+    model = _transformed(MAIN, 'main')
+    table = model.symbol_table
+    assert isinstance(table, SymbolTable)
+    assert table.get('main::A::B::Dup') is model.namespaces[0].namespaces[0].namespaces[0].messages[0]
+    assert table.scoped[('main::A', 'Dup')] == 'main::A::Dup'
+    assert table.short['Top'] == 'main::Top'
+    # Inline enums promoted after the QFN pass are registered too
+    assert table.get('main::A::B::User_k').qfn == 'main::A::B::User_k'
+
+
+def test_unqualified_names_resolve_innermost_first():
+    model = _transformed(MAIN, 'main')
+    assert _field(model, 'A', 'B', 'User', 'd').type_name == 'main::A::B::Dup'
+    assert _field(model, 'A', 'Other', 'd').type_name == 'main::A::Dup'
+    assert _field(model, 'A', 'B', 'User', 't').type_name == 'main::Top'
+    assert model.symbol_table.resolve('Missing', ['main']) is None
+
+
+def test_aliased_and_plain_imports():
+    lib = _transformed('message Shared { x: int }\nnamespace Inner { message Deep { y: int } }\n', 'lib')
+    model = build_early_model('message M { a: L::Shared; b: L::Deep; c: L::Inner::Deep }\n', 'main', 'main.def')
+    model.imports_raw = [('lib.def', 'L')]
+    model.imports = {'L': lib}
+    run_early_transform_pipeline(model, default_early_transforms({'L': lib}))
+    fields = model.namespaces[0].messages[0].fields
+    assert [f.type_name for f in fields] == ['L::Shared', 'L::Inner::Deep', 'L::Inner::Deep']
+    alias_table = model.symbol_table.aliases['L']
+    assert alias_table.root == 'L' and alias_table.get('L::Inner::Deep') is not None
+    # The aliased import itself is not renamed
+    assert lib.namespaces[0].namespaces[0].messages[0].qfn == 'lib::Inner::Deep'
+
+    plain = build_early_model('message M { s: Shared }\n', 'other', 'other.def')
+    plain.imports_raw = [('lib.def', None)]
+    plain.imports = {'lib.def': lib}
+    run_early_transform_pipeline(plain, default_early_transforms({'lib.def': lib}))
+    assert plain.namespaces[0].messages[0].fields[0].type_name == 'lib::Shared'
+    assert plain.symbol_table.imports == [lib.symbol_table]
@@ -0,0 +1,50 @@
+"""
+The inheritance index PromoteInlineEnumsTransform keeps per file: messages by qualified name with
+their remaining inline enum fields, published on the model and chained across imports.
+"""
+from def_file_loader import build_early_model
+from early_transform_scheduler import default_early_transforms
+from early_transform_pipeline import run_early_transform_pipeline
+from early_model_transforms.inheritance_index import InheritanceChain, InheritanceIndex
+
+
+def _transformed(text, name, import_models=None):
+    model = build_early_model(text, name, f"{name}.def")
+    if import_models:
+        model.imports_raw = [(f"{key}.def", key) for key in import_models]
+    return run_early_transform_pipeline(model, default_early_transforms(import_models or {}))
+
+
+def _fields(model, msg_name):
+    msg = next(m for m in model.namespaces[0].namespaces[0].messages if m.name == msg_name)
+    return {f.name: (f.type_name, f.type_type) for f in msg.fields}
+
+
+def test_index_is_published_and_tracks_promotion():
+    model = build_early_model('namespace N { message B { kind: enum { A, B }; x: int } }\n', 'f', 'f.def')
+    index = InheritanceIndex.build(model)
+    assert index.inline_fields == {'N::B': {'kind': 'B_kind'}}
+    run_early_transform_pipeline(model, default_early_transforms({}))
+    published = model.inheritance_index
+    assert list(published.messages) == ['f::N::B']
+    assert published.inline_fields == {}
+
+
+def test_parent_declared_later_propagates_inline_enum():
+    # The parent's inline enum is still inline when the derived message is visited
+    model = _transformed('namespace N {\n'
+                         '  message D : f::N::B { kind: int; kindX: int; other: int }\n'
+                         '  message B { kind: enum { A, B } }\n'
+                         '}\n', 'f')
+    assert _fields(model, 'D') == {'kind': ('B_kind', 'enum_type'), 'kindX': ('B_kind', 'enum_type'),
+                                   'other': ('int', 'primitive')}
+
+
+def test_chain_searches_imports_depth_first_last_wins():
+    lib = _transformed('namespace N { message B { x: int } }\n', 'lib')
+    main = build_early_model('namespace M { message D { y: int } }\n', 'main', 'main.def')
+    main.imports = {'L': lib}
+    chain = InheritanceChain.build(main, InheritanceIndex.build(main))
+    assert chain.indexes[1] is lib.inheritance_index
+    assert chain.inline_enum_fields('lib::N::B') == {}
+    assert chain.inline_enum_fields('missing::B') is None
@@ -0,0 +1,76 @@
+"""
+The generated code must not depend on the parser: every generator produces the same output for
+models loaded with the Earley parser and with the default tree-less loader.
+"""
+import os
+import pytest
+from generators.json_schema_generator import generate_json_schema
+from generators.python3_generator import generate_python3_code
+from generators.typescript_generator import generate_typescript_code
+from tests.lark_parser.test_lark_parser_lalr_parity import DEF_FILES
+from tests.test_utils import load_early_model_with_imports
+from earlymodel_to_model import EarlyModelToModel
+
+GENERATORS = {
+    'typescript': generate_typescript_code,
+    'python3': generate_python3_code,
+    'json_schema': lambda model: str(generate_json_schema(model)),
+}
+
+# Enums with an odd and an even number of values, each opened by a doc comment
+DOCUMENTED_ENUMS = """\
+enum One {
+/// one doc
+    A = 0
+}
+
+enum Three {
+/// three doc
+    A = 0,
+    B = 65536,
+    C = 2147483647
+}
+
+enum Four {
+/// four doc
+    A, B, C, D
+}
+
+message Holder {
+    kind: enum {
+    /// inline doc
+        X, Y, Z, W, V
+    };
+}
+"""
+
+
+def _generated(def_path, parse_mode):
+    """The output of each generator, or the error that stopped it, as (type, message)."""
+    try:
+        early_model, _ = load_early_model_with_imports(def_path, parse_mode=parse_mode)
+        model = EarlyModelToModel().process(early_model)
+    except Exception as e:
+        return type(e), str(e)
+    outputs = {}
+    for name, generate in GENERATORS.items():
+        try:
+            outputs[name] = generate(model)
+        except Exception as e:
+            outputs[name] = type(e), str(e)
+    return outputs
+
+
+@pytest.mark.parametrize('def_path', DEF_FILES, ids=os.path.basename)
+def test_generated_output_matches_across_parse_modes(def_path):
+    assert _generated(def_path, 'treeless') == _generated(def_path, 'earley')
+
+
+def test_documented_enum_values_generate_the_same_output(tmp_path):
+    def_path = tmp_path / 'documented_enums.def'
+    def_path.write_text(DOCUMENTED_ENUMS, encoding='utf-8')
+    earley = _generated(str(def_path), 'earley')
+    assert all(isinstance(output, str) for output in earley.values()), earley
+    assert _generated(str(def_path), 'treeless') == earley
+    for doc in ('one doc', 'three doc', 'four doc', 'inline doc'):
+        assert earley['typescript'].count(doc) == 1, doc
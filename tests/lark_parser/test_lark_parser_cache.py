@@ -0,0 +1,32 @@
+import os
+import lark_parser
+from lark_parser import parse_message_dsl
+
+
+def test_lalr_parser_cache_roundtrip(tmp_path, monkeypatch):
+    monkeypatch.setenv('MESSAGEWRANGLER_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(lark_parser, '_parsers', {})
+    path = lark_parser.parser_cache_path('lalr')
+    assert path.startswith(str(tmp_path))
+    assert not os.path.exists(path)
+    cold = parse_message_dsl('message A { x: int; }', mode='lalr')
+    assert os.path.exists(path)
+    # A fresh process-equivalent load must come from the cache and parse identically
+    monkeypatch.setattr(lark_parser, '_parsers', {})
+    warm = parse_message_dsl('message A { x: int; }', mode='lalr')
+    assert warm == cold
+
+
+def test_parser_cache_key_tracks_grammar(monkeypatch, tmp_path):
+    monkeypatch.setenv('MESSAGEWRANGLER_CACHE_DIR', str(tmp_path))
+    before = lark_parser.parser_cache_path('lalr')
+    monkeypatch.setitem(lark_parser._GRAMMARS, 'lalr', lark_parser.lalr_grammar + '\n')
+    assert lark_parser.parser_cache_path('lalr') != before
+
+
+def test_parser_cache_disabled(monkeypatch):
+    monkeypatch.setenv('MESSAGEWRANGLER_CACHE_DIR', '')
+    assert lark_parser.parser_cache_path('lalr') is None
+    # Earley parsers are never cached on disk
+    monkeypatch.delenv('MESSAGEWRANGLER_CACHE_DIR')
+    assert lark_parser.parser_cache_path('earley') is None
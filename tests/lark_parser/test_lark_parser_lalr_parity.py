@@ -0,0 +1,170 @@
+"""
+The LALR(1) fast path must produce exactly the same EarlyModel as the Earley parser
+for every .def file that Earley accepts.
+"""
+import glob
+import os
+import pytest
+from lark_parser import parse_message_dsl, lalr_parser
+from def_file_loader import LOADER_MODES, _build_early_model_from_lark_tree, build_early_model
+from tests.test_utils import object_state
+
+DEF_DIR = os.path.join(os.path.dirname(__file__), '..', 'def')
+DEF_FILES = sorted(glob.glob(os.path.join(DEF_DIR, '*.def')))
+
+
+@pytest.mark.parametrize('def_path', DEF_FILES, ids=os.path.basename)
+def test_lalr_early_model_matches_earley(def_path):
+    with open(def_path, encoding='utf-8') as f:
+        text = f.read()
+    try:
+        earley_tree = parse_message_dsl(text, mode='earley')
+    except Exception:
+        pytest.skip('Earley rejects this file')
+    # The LALR grammar itself must accept every file Earley accepts (no silent fallback)
+    lalr_parser.parse(text)
+    lalr_tree = parse_message_dsl(text, mode='lalr')
+    ns = os.path.splitext(os.path.basename(def_path))[0]
+    earley_model = _build_early_model_from_lark_tree(earley_tree, ns, source_file=def_path)
+    lalr_model = _build_early_model_from_lark_tree(lalr_tree, ns, source_file=def_path)
+    assert object_state(lalr_model) == object_state(earley_model)
+
+
+MIXED_CONSTRUCTS = """\
+/// top doc
+options TopOpts { A = 1, /// doc b
+ B, C }
+// local
+int Vec3 { x, y, z }
+/// ns doc
+namespace Outer {
+    /// inner msg doc
+    message M : Base::Cmd {
+        optional a: int = 5;
+        b: Map<string, Foo::Bar>;
+        c: enum { /// d1
+          X = 1, Y /// trailing
+          , Z };
+        d: options { P, Q = 4 };
+        e: float { r, g, b };
+        f: Other.Value[];
+        g: enum Foo::E;
+        h: string = "hi";
+    }
+    namespace Inner {
+        open_enum E : Outer::Base { /// v doc
+           V1 = 3, V2 }
+        options O { /// od
+          K }
+        message N { x: Map<int, int[]> }
+    }
+    /// ns enum doc
+    enum F { A, /// b doc
+      B }
+}
+/* c comment */
+message Last { z: bool }
+"""
+
+
+def test_lalr_matches_earley_on_mixed_constructs():
+    lalr_parser.parse(MIXED_CONSTRUCTS)
+    earley_model = _build_early_model_from_lark_tree(parse_message_dsl(MIXED_CONSTRUCTS, mode='earley'), 'mixed')
+    lalr_model = _build_early_model_from_lark_tree(parse_message_dsl(MIXED_CONSTRUCTS, mode='lalr'), 'mixed')
+    assert object_state(lalr_model) == object_state(earley_model)
+
+
+_COMMENTS = {'d': '/// doc', 'l': '// local', 'c': '/* block */'}
+_DEFINITIONS = ('message M { a: int }', 'options O { A }', 'enum E { A, B }', 'int C { x }')
+
+
+@pytest.mark.parametrize('definition', _DEFINITIONS)
+@pytest.mark.parametrize('run', ['d', 'dd', 'ddd', 'dddd', 'ld', 'ldd', 'lddd', 'lll', 'dcd'])
+@pytest.mark.parametrize('layout', ['start', 'after_item', 'namespace'])
+def test_lalr_comment_attachment_matches_earley(definition, run, layout):
+    comments = '\n'.join(_COMMENTS[c] for c in run)
+    text = f"{comments}\n{definition}\n"
+    if layout == 'after_item':
+        text = f"enum First {{ A }}\n{text}"
+    elif layout == 'namespace':
+        text = f"namespace W {{\n{text}}}\n"
+    earley_model = _build_early_model_from_lark_tree(parse_message_dsl(text, mode='earley'), 'x')
+    lalr_model = _build_early_model_from_lark_tree(parse_message_dsl(text, mode='lalr'), 'x')
+    assert object_state(lalr_model) == object_state(earley_model)
+
+
+def _value_lists(docs, count, sep):
+    values = sep.join(f'V{i}' for i in range(count))
+    return (f"enum E {{\n{docs}\n{values}\n}}\n"
+            f"message M {{\n f: enum {{\n{docs}\n{values} }};\n o: options {{\n{docs}\n{values} }};\n}}\n")
+
+
+@pytest.mark.parametrize('sep', [',\n', '\n'], ids=['commas', 'newlines'])
+@pytest.mark.parametrize('docs', ['/// d', '/// d\n/// e', '/// d\n/// e\n/// f'], ids=['1doc', '2docs', '3docs'])
+@pytest.mark.parametrize('count', [1, 2, 3, 4, 5])
+def test_enum_value_docs_match_across_parse_modes(count, docs, sep):
+    # Earley splits docs between values and comments differently depending on the list length;
+    # every mode must attach the docs opening an enum to its first value
+    text = _value_lists(docs, count, sep)
+    models = {mode: build_early_model(text, 'x', parse_mode=mode) for mode in LOADER_MODES}
+    earley_state = object_state(models['earley'])
+    for mode in LOADER_MODES:
+        assert object_state(models[mode]) == earley_state, mode
+        assert [v.doc for v in models[mode].enums[0].values] == [docs] + [''] * (count - 1)
+
+
+@pytest.mark.parametrize('body', [
+    'A,\n/// b\nB,\n/// c\n/// c2\nC',
+    '/// a\nA,\n/// b\nB,\n/// c\nC',
+    '// local\n/// a\nA, B, C',
+    '/// a\n// local\nA, B, C',
+    'A\n/// b\n/// b2\nB\nC /// c\n',
+])
+def test_docs_between_values_match_across_parse_modes(body):
+    text = (f"enum E {{\n{body}\n}}\n"
+            f"message M {{\n f: enum {{\n{body} }};\n o: options {{\n{body} }};\n}}\n")
+    states = {mode: object_state(build_early_model(text, 'x', parse_mode=mode)) for mode in LOADER_MODES}
+    assert states['lalr'] == states['earley']
+    assert states['treeless'] == states['earley']
+
+
+# Value list body -> the doc of each value; the same in enums, inline enums and options
+VALUE_DOCS = {
+    'run_before_second': ('A\n/// b\n/// b2\nB', ['', '/// b\n/// b2']),
+    'run_before_last': ('A,\nB,\n/// c\n/// c2\nC', ['', '', '/// c\n/// c2']),
+    'run_before_each': ('/// a\nA,\n/// b\nB,\n/// c\n/// c2\nC', ['/// a', '/// b', '/// c\n/// c2']),
+    'local_before_first': ('// local\n/// a\nA, B, C', ['/// a', '', '']),
+    'block_before_first': ('/* block */\n/// a\nA, B', ['/// a', '']),
+    'local_inside_run': ('A,\n/// b\n// local\n/// b2\nB', ['', '/// b\n/// b2']),
+    'trailing': ('A, /// a\nB, C /// c\n', ['/// a', '', '/// c']),
+    'trailing_then_run': ('A /// a\n/// b\nB', ['/// a', '/// b']),
+    'run_wins_over_trailing': ('/// a\nA /// trailing\nB', ['/// a', '']),
+}
+
+
+@pytest.mark.parametrize('mode', LOADER_MODES)
+@pytest.mark.parametrize('shape', VALUE_DOCS)
+def test_value_docs(shape, mode):
+    body, expected = VALUE_DOCS[shape]
+    text = (f"enum E {{\n{body}\n}}\n"
+            f"message M {{\n f: enum {{\n{body} }};\n o: options {{\n{body} }};\n}}\n")
+    model = build_early_model(text, 'x', parse_mode=mode)
+    inline, options = model.messages[0].fields
+    assert [v.doc for v in model.enums[0].values] == expected
+    assert [v['doc'] for v in inline.inline_values_raw] == expected
+    assert [v['doc'] for v in options.inline_values_raw] == expected
+
+
+def test_lalr_falls_back_to_earley_errors():
+    with open(os.path.join(DEF_DIR, 'test_invalid.def'), encoding='utf-8') as f:
+        text = f.read()
+    with pytest.raises(Exception) as earley_exc:
+        parse_message_dsl(text, mode='earley')
+    with pytest.raises(Exception) as lalr_exc:
+        parse_message_dsl(text, mode='lalr')
+    assert type(lalr_exc.value) is type(earley_exc.value)
+
+
+def test_unknown_parse_mode():
+    with pytest.raises(ValueError):
+        parse_message_dsl('message A { x: int }', mode='cyk')
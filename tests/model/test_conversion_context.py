@@ -0,0 +1,46 @@
+"""
+ConversionContext: converting an import graph converts and indexes every file once, shares the
+converted imports between importers and memoizes name resolutions per file.
+"""
+from conversion_context import ConversionContext
+from earlymodel_to_model import EarlyModelToModel
+from tests.test_utils import load_early_model_with_imports
+
+FILES = {
+    'base.def': 'enum Level { LOW, HIGH }\nmessage Base { level: Level }\n',
+    'left.def': 'import "base.def" as B\nmessage Left : B::Base { a: int }\nenum LeftLevel : B::Level { MID }\n',
+    'right.def': 'import "base.def" as B\nmessage Right : B::Base { b: int }\nenum RightLevel : B::Level { TOP }\n',
+    'top.def': 'import "left.def" as L\nimport "right.def" as R\nmessage Top { l: L::Left; r: R::Right }\n',
+}
+
+
+def _write(tmp_path):
+    for name, text in FILES.items():
+        (tmp_path / name).write_text(text)
+    return str(tmp_path / 'top.def')
+
+
+def test_diamond_graph_converts_each_file_once(tmp_path):
+    early_top, _ = load_early_model_with_imports(_write(tmp_path))
+    context = ConversionContext()
+    model = EarlyModelToModel(context).process(early_top)
+    assert context.converted == 4
+    assert context.indexed == 4
+    left, right = model.imports['L'], model.imports['R']
+    assert left.imports['B'] is right.imports['B']
+    # Cross-file enum parents resolve to the one shared base enum
+    base_level = left.imports['B'].namespaces[0].enums[0]
+    assert left.namespaces[0].enums[0].parent is base_level
+    assert right.namespaces[0].enums[0].parent is base_level
+
+
+def test_context_reuses_converted_models_and_memoizes(tmp_path):
+    early_top, _ = load_early_model_with_imports(_write(tmp_path))
+    early_left = early_top.imports['L']
+    context = ConversionContext()
+    left = EarlyModelToModel(context).process(early_left)
+    top = EarlyModelToModel(context).process(early_top)
+    assert top.imports['L'] is left
+    assert EarlyModelToModel(context).process(early_top) is top
+    assert context.converted == 4
+    assert context.memo(early_top)
@@ -0,0 +1,63 @@
+"""
+compile_def_graph: a root .def file to a resolved Model graph in one call, converting each file
+once in dependency order and timing every stage per file.
+"""
+import os
+
+from earlymodel_to_model import EarlyModelToModel
+from model_compiler import STAGES, compile_def_graph
+from tests.test_utils import load_early_model_with_imports
+
+DEF_DIR = os.path.join(os.path.dirname(__file__), '..', 'def')
+
+
+def _enum_values(model):
+    return {e.name: [(v.name, v.value) for v in e.values] for ns in model.namespaces for e in ns.enums}
+
+
+def test_matches_step_by_step_conversion():
+    path = os.path.join(DEF_DIR, 'sh4c_comms.def')
+    graph = compile_def_graph(path)
+    early, _ = load_early_model_with_imports(path)
+    manual = EarlyModelToModel().process(early)
+    model = graph.model
+    assert [ns.name for ns in model.namespaces] == [ns.name for ns in manual.namespaces]
+    assert _enum_values(model) == _enum_values(manual)
+    assert set(model.imports) == set(manual.imports) == {'Base'}
+    assert model.imports['Base'] is graph.models[graph.order[0]]
+
+
+def test_diamond_is_converted_once_with_timings(tmp_path):
+    (tmp_path / 'base.def').write_text('enum Level { LOW, HIGH }\nmessage Base { level: Level }\n')
+    (tmp_path / 'left.def').write_text('import "base.def" as B\nmessage Left : B::Base { a: int }\n')
+    (tmp_path / 'right.def').write_text('import "base.def" as B\nmessage Right : B::Base { b: int }\n')
+    (tmp_path / 'top.def').write_text('import "left.def" as L\nimport "right.def" as R\nmessage Top { x: int }\n')
+
+    applied = []
+
+    class Record:
+        def transform(self, model):
+            applied.append(model)
+            return model
+
+    graph = compile_def_graph(str(tmp_path / 'top.def'), model_transforms=[Record()])
+    assert [os.path.basename(p) for p in graph.order][0] == 'base.def'
+    assert graph.order[-1] == graph.root_path
+    assert graph.context.converted == 4
+    left, right = graph.model.imports['L'], graph.model.imports['R']
+    assert left.imports['B'] is right.imports['B'] is graph.models[graph.order[0]]
+    assert applied == [graph.model]
+    for path in graph.order:
+        assert {'parse', 'early_transforms', 'convert'} <= set(graph.timings[path])
+    assert set(graph.timings[graph.root_path]) == set(STAGES)
+    assert 'top.def' in graph.format_timings()
+    assert set(graph.model_transform_stats.timings) == {'Record'}
+
+
+def test_parses_through_the_pool():
+    path = os.path.join(DEF_DIR, 'sh4c_comms.def')
+    serial, pooled = compile_def_graph(path), compile_def_graph(path, workers=2)
+    assert pooled.order == serial.order
+    assert _enum_values(pooled.model) == _enum_values(serial.model)
+    for path in pooled.order:
+        assert {'parse', 'early_transforms', 'convert'} <= set(pooled.timings[path])
@@ -13,3 +13,49 @@ def test_model_reference_resolution():
     # Should return None for non-existent reference
     bad_ref = ModelReference(qfn="TestNS::DoesNotExist", kind="message")
     assert model.resolve_reference(bad_ref) is None
+
+def _aliased_models():
+    lib_msg = ModelMessage(name="Thing", fields=[])
+    lib = Model(file="lib.def", namespaces=[ModelNamespace(name="lib", messages=[lib_msg], enums=[])])
+    root_msg = ModelMessage(name="Root", fields=[])
+    root = Model(file="root.def", namespaces=[ModelNamespace(name="root", messages=[root_msg], enums=[])],
+                 alias_map={"L": "lib"}, imports={"L": lib})
+    return root, lib, lib_msg, root_msg
+
+def test_model_reference_alias_index():
+    root, lib, lib_msg, root_msg = _aliased_models()
+    # Direct QFNs of the file and its imports, and alias-qualified QFNs of aliased imports
+    assert root.resolve_reference(ModelReference(qfn="root::Root", kind="message")) is root_msg
+    assert root.resolve_reference(ModelReference(qfn="lib::Thing", kind="message")) is lib_msg
+    assert root.resolve_reference(ModelReference(qfn="L::Thing", kind="message")) is lib_msg
+    assert root.resolve_reference(ModelReference(qfn="L::Thing", kind="enum")) is None
+    assert root.resolve_reference(ModelReference(qfn="X::Thing", kind="message")) is None
+    assert root.resolve_reference(None) is None
+
+def test_model_reference_index_invalidation():
+    root, lib, lib_msg, _ = _aliased_models()
+    ref = ModelReference(qfn="L::Thing", kind="message")
+    assert root.resolve_reference(ref) is lib_msg
+    root.alias_map = {}
+    assert root.resolve_reference(ref) is lib_msg  # the index is kept until invalidated
+    root.invalidate_resolution()
+    assert root.resolve_reference(ref) is None
+
+def test_model_reference_memo_follows_lookup_versions():
+    root, lib, lib_msg, root_msg = _aliased_models()
+    other = Model(file="other.def", namespaces=[ModelNamespace(name="other", messages=[], enums=[])])
+    ref = ModelReference(qfn="L::Thing", kind="message")
+    assert root.resolve_reference(ref) is lib_msg
+    memo = root._resolve_memo
+    # A change to an unrelated model's lookup keeps the answers
+    other._qfn_lookup.add("other::New", "message", ModelMessage(name="New", fields=[]))
+    assert root.resolve_reference(ref) is lib_msg
+    assert root._resolve_memo is memo
+    # A change to an imported model's lookup drops them
+    lib._qfn_lookup.rename("lib::Thing", "lib::Renamed", "message")
+    assert root.resolve_reference(ref) is None
+    assert root.resolve_reference(ModelReference(qfn="L::Renamed", kind="message")) is lib_msg
+    assert root.resolve_reference(ModelReference(qfn="lib::Renamed", kind="message")) is lib_msg
+    # Only the references asked for (hits and misses) are held, not the imports' symbols
+    assert set(root._resolve_memo) == {("L::Thing", "message"), ("L::Renamed", "message"),
+                                       ("lib::Renamed", "message")}
@@ -0,0 +1,50 @@
+"""
+The __slots__ Model node classes keep their attribute API: per-type data is stored as tuples
+(with the type/type_ref compatibility properties), names are interned, extra attributes are
+still allowed, and deepcopy/pickle copy whole graphs.
+"""
+import copy
+import os
+import pickle
+import pytest
+from early_model import node_attributes
+from model import FieldModifier, FieldType, ModelField, ModelReference
+from model_compiler import compile_def_graph
+from generators.typescript_generator import generate_typescript_code
+
+DEF_DIR = os.path.join(os.path.dirname(__file__), '..', 'def')
+
+
+def test_field_type_slots_are_tuples():
+    ref = ModelReference('a::Item', 'message')
+    field = ModelField('items', [FieldType.ARRAY, FieldType.MESSAGE], type_refs=[None, ref],
+                       type_names=['array', 'Item'], modifiers=[FieldModifier.OPTIONAL])
+    assert field.field_types == (FieldType.ARRAY, FieldType.MESSAGE)
+    assert field.type_refs == (None, ref) and field.type_names == ('array', 'Item')
+    assert field.modifiers == (FieldModifier.OPTIONAL,)
+    assert field.inline_values == () and field.compound_components == ()
+    assert field.type is FieldType.ARRAY and field.type_ref is None
+    # Missing per-type data is padded to the number of field types
+    plain = ModelField('x', [FieldType.INT])
+    assert plain.type_refs == (None,) and plain.type_names == (None,)
+    with pytest.raises(TypeError):
+        plain.type_names[0] = 'int'
+
+
+def test_names_are_interned_and_extra_attributes_allowed():
+    a = ModelField(''.join(['val', 'ue']), [FieldType.INT], type_names=[''.join(['in', 't'])])
+    b = ModelField('value', [FieldType.INT], type_names=['int'])
+    assert a.name is b.name and a.type_names[0] is b.type_names[0]
+    a.unique_name = 'M_value'
+    assert node_attributes(a)['unique_name'] == 'M_value'
+    assert node_attributes(a)['name'] == 'value'
+
+
+@pytest.mark.parametrize('clone', [copy.deepcopy, lambda m: pickle.loads(pickle.dumps(m))],
+                         ids=['deepcopy', 'pickle'])
+def test_copies_keep_all_attributes(clone):
+    model = compile_def_graph(os.path.join(DEF_DIR, 'sh4c_comms.def')).model
+    copied = clone(model)
+    message = next(msg for msg in copied.namespaces[0].namespaces[0].messages if msg.fields)
+    assert all(field.parent is message for field in message.fields)
+    assert generate_typescript_code(copied) == generate_typescript_code(model)
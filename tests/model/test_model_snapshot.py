@@ -0,0 +1,106 @@
+"""
+Binary Model snapshots load back into the same graph: imports, references and shared objects
+keep their identity, and generators produce the same output from a loaded snapshot.
+"""
+import marshal
+import os
+import zlib
+
+import pytest
+
+from generators.typescript_generator import generate_typescript_code
+from model import ModelReference
+from model_compiler import compile_def_graph
+from model_snapshot import FORMAT_VERSION, MAGIC, ModelSnapshotError, dumps_model, load_model, loads_model, save_model
+
+DEF_DIR = os.path.join(os.path.dirname(__file__), '..', 'def')
+
+
+@pytest.fixture
+def graph_dir(tmp_path):
+    (tmp_path / 'base.def').write_text('enum Level { LOW, HIGH }\nmessage Base { level: Level; kind: enum { A, B } }\n')
+    (tmp_path / 'left.def').write_text('import "base.def" as B\nmessage Left : B::Base { a: int }\n')
+    (tmp_path / 'right.def').write_text('import "base.def" as B\nmessage Right : B::Base { b: B::Level }\n')
+    (tmp_path / 'top.def').write_text('import "left.def" as L\nimport "right.def" as R\nmessage Top { l: L::Left; r: R::Right }\n')
+    return tmp_path
+
+
+def test_roundtrip_keeps_identity(graph_dir):
+    model = loads_model(dumps_model(compile_def_graph(str(graph_dir / 'top.def')).model))
+    left, right = model.imports['L'], model.imports['R']
+    assert left.imports['B'] is right.imports['B']
+    base = left.imports['B']
+    level = base.resolve_reference(ModelReference('base::Level', 'enum'))
+    assert level is base.namespaces[0].enums[0]
+    # Shared objects come back as one object wherever they are referenced
+    base_msg = base.namespaces[0].messages[0]
+    assert base_msg.fields[0].type_refs[0] is level
+    assert all(field.parent is base_msg for field in base_msg.fields)
+    # _qfn_lookup is rebuilt, imports included
+    assert model.resolve_reference(ModelReference('left::Left', 'message')) is left.namespaces[0].messages[0]
+    assert ('base::Base', 'message') in right._qfn_lookup
+
+
+def test_generator_output_matches(tmp_path):
+    path = os.path.join(DEF_DIR, 'sh4c_comms.def')
+    data = dumps_model(compile_def_graph(path).model)
+    snapshot = tmp_path / 'sh4c_comms.mwms'
+    save_model(loads_model(data), str(snapshot))
+    assert snapshot.read_bytes() == data
+    assert generate_typescript_code(load_model(str(snapshot))) == generate_typescript_code(compile_def_graph(path).model)
+
+
+def test_rejects_other_data():
+    with pytest.raises(ModelSnapshotError, match='magic'):
+        loads_model(b'not a snapshot at all')
+    with pytest.raises(ModelSnapshotError, match='version'):
+        loads_model(MAGIC + (FORMAT_VERSION + 1).to_bytes(2, 'little') + b'\0' * 8)
+    with pytest.raises(ModelSnapshotError, match='Corrupt'):
+        loads_model(MAGIC + FORMAT_VERSION.to_bytes(2, 'little') + b'garbage')
+
+
+def _repacked(data, edit):
+    """`data` with its payload tables passed through edit(classes, shapes, objects, root)."""
+    payload = list(marshal.loads(zlib.decompress(data[6:])))
+    edit(*payload)
+    return data[:6] + zlib.compress(marshal.dumps(tuple(payload)))
+
+
+def test_rejects_structurally_corrupt_payload(graph_dir):
+    data = dumps_model(compile_def_graph(str(graph_dir / 'left.def')).model)
+
+    def bad_shape(classes, shapes, objects, root):
+        objects[0] = (len(shapes) + 5, objects[0][1])
+
+    def bad_reference(classes, shapes, objects, root):
+        objects[0] = (objects[0][0], [('r', len(objects) + 5)] + list(objects[0][1][1:]))
+
+    def bad_tag(classes, shapes, objects, root):
+        objects[0] = (objects[0][0], [('t',), ()] + list(objects[0][1][2:]))
+
+    def bad_enum_value(classes, shapes, objects, root):
+        enum_class = next(i for i, (module, name) in enumerate(classes) if name == 'FieldType')
+        objects[0] = (objects[0][0], [('e', enum_class, 'no such value')] + list(objects[0][1][1:]))
+
+    for edit in (bad_shape, bad_reference, bad_tag, bad_enum_value):
+        with pytest.raises(ModelSnapshotError, match='Corrupt'):
+            loads_model(_repacked(data, edit))
+
+
+@pytest.mark.parametrize('name', ['QfnLookup', 'sys.exit', 'Model.__init__', 'Enum.__new__', 'List'])
+def test_rejects_names_that_are_not_model_classes(graph_dir, name):
+    # Imported classes, functions and methods reachable from a model module are not loaded
+    data = dumps_model(compile_def_graph(str(graph_dir / 'base.def')).model)
+
+    def foreign_class(classes, shapes, objects, root):
+        classes[0] = ('model', name)
+
+    with pytest.raises(ModelSnapshotError, match='not a model class'):
+        loads_model(_repacked(data, foreign_class))
+
+
+def test_rejects_foreign_objects(graph_dir):
+    model = compile_def_graph(str(graph_dir / 'base.def')).model
+    model.namespaces[0].messages[0].extra = object()
+    with pytest.raises(ModelSnapshotError, match='builtins.object'):
+        dumps_model(model)
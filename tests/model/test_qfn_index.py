@@ -0,0 +1,56 @@
+"""
+QfnIndex answers the suffix and short-name queries EarlyModelToModel uses exactly like the loops
+over the lookup keys they replace, including which key comes first.
+"""
+import random
+
+from qfn_index import QfnIndex
+
+
+def _loop_with_last(keys, name):
+    return [q for q in keys if q.split('::')[-1] == name]
+
+
+def _loop_with_segment_suffix(keys, path):
+    return [q for q in keys if q == path or q.endswith('::' + path)]
+
+
+def _loop_first_ending_with(keys, suffix):
+    return next((q for q in keys if q.endswith(suffix)), None)
+
+
+def _random_qfn(rng):
+    segments = [rng.choice(['A', 'B', 'AB', 'Msg', 'Msg_kind', 'kind', '']) for _ in range(rng.randint(1, 4))]
+    sep = rng.choice(['::'] * 8 + [':', ':::'])
+    return sep.join(segments)
+
+
+def test_queries_match_loops():
+    keys = ['file::A::Msg', 'file::A::Msg_kind', 'file::B::Msg', 'other::Msg', 'Msg', 'file::A::B::kind']
+    index = QfnIndex(keys)
+    assert index.with_last('Msg') == _loop_with_last(keys, 'Msg')
+    assert index.with_segment_suffix('A::Msg') == ['file::A::Msg']
+    assert index.with_segment_suffix('Msg') == _loop_with_segment_suffix(keys, 'Msg')
+    assert index.first_ending_with('_kind') == 'file::A::Msg_kind'
+    assert index.first_ending_with('B::kind') == 'file::A::B::kind'
+    assert index.first_ending_with('Missing') is None
+    assert index.first('other::Msg', None, 'file::B::Msg') == 'file::B::Msg'
+    assert index.first(None) is None
+
+
+def test_randomized_equivalence_with_interleaved_adds():
+    rng = random.Random(13)
+    for _ in range(300):
+        keys = []
+        index = QfnIndex()
+        for _ in range(rng.randint(0, 12)):
+            qfn = _random_qfn(rng)
+            index.add(qfn)
+            if qfn not in keys:
+                keys.append(qfn)
+            probe = _random_qfn(rng)
+            tail = probe[rng.randint(0, len(probe)):] if probe else probe
+            assert index.with_last(probe) == _loop_with_last(keys, probe)
+            assert index.with_segment_suffix(probe) == _loop_with_segment_suffix(keys, probe)
+            assert index.first_ending_with(tail) == _loop_first_ending_with(keys, tail)
+        assert len(index) == len(keys) and all(q in index for q in keys)
@@ -0,0 +1,110 @@
+"""
+Model._qfn_lookup is built lazily, layered over the imported models' lookups without copying
+them, and kept current by the add/rename/remove hooks the model transforms call.
+"""
+from model import Model, ModelEnum, ModelMessage, ModelNamespace, ModelReference
+from model_transforms.flatten_enums_transform import FlattenEnumsTransform
+from model_transforms.reserved_keyword_rename_transform import ReservedKeywordRenameTransform
+from qfn_lookup import QfnLookup
+
+
+def _chain():
+    lib_msg = ModelMessage(name="Thing", fields=[])
+    lib = Model(file="lib.def", namespaces=[ModelNamespace(name="lib", messages=[lib_msg], enums=[])])
+    root_msg = ModelMessage(name="Root", fields=[])
+    shadow = ModelMessage(name="Thing", fields=[])
+    root = Model(file="root.def",
+                 namespaces=[ModelNamespace(name="root", messages=[root_msg], enums=[]),
+                             ModelNamespace(name="lib", messages=[shadow], enums=[])],
+                 imports={"lib.def": lib})
+    return root, lib, root_msg, lib_msg
+
+
+def test_layered_over_imports():
+    root, lib, root_msg, lib_msg = _chain()
+    lookup = root._qfn_lookup
+    assert lookup._local is None  # nothing is built until used
+    assert lookup[("root::Root", "message")] is root_msg
+    # Imported entries win over local ones, as with the previous merged dict
+    assert lookup[("lib::Thing", "message")] is lib_msg
+    assert ("lib::Missing", "message") not in lookup
+    # The importer holds only its own entries
+    assert set(lookup.local()) == {("root::Root", "message"), ("lib::Thing", "message")}
+    assert list(lookup) == [("root::Root", "message"), ("lib::Thing", "message")]
+    assert lookup.merged() == {("root::Root", "message"): root_msg, ("lib::Thing", "message"): lib_msg}
+
+
+def test_hooks_keep_lookup_current():
+    root, lib, root_msg, _ = _chain()
+    ref = ModelReference("root::Root", "message")
+    assert root.resolve_reference(ref) is root_msg
+    lookup = root._qfn_lookup
+    lookup.rename("root::Root", "root::Renamed", "message")
+    assert root.resolve_reference(ref) is None  # the resolution index follows the hooks
+    assert root.resolve_reference(ModelReference("root::Renamed", "message")) is root_msg
+    lookup.rename("root", "top", "namespace")
+    assert ("top::Renamed", "message") in lookup and ("root::Renamed", "message") not in lookup
+    added = ModelEnum(name="Kind", values=[])
+    lookup.add("top::Kind", "enum", added)
+    assert lookup[("top::Kind", "enum")] is added
+    lookup.remove("top::Kind", "enum")
+    assert ("top::Kind", "enum") not in lookup
+    # Changes to an imported model's lookup are seen through the importer
+    lib._qfn_lookup.rename("lib::Thing", "lib::Other", "message")
+    assert root.resolve_reference(ModelReference("lib::Other", "message")) is lib.namespaces[0].messages[0]
+
+
+def test_layer_order_cached_until_imports_change():
+    root, lib, _, lib_msg = _chain()
+    layers = root._qfn_lookup.layers()
+    assert [layer._model for layer in layers] == [root, lib]
+    assert root._qfn_lookup.layers() is layers  # reused by every query
+    lib._qfn_lookup.rename("lib::Thing", "lib::Other", "message")
+    assert root._qfn_lookup.layers() is layers  # entry changes keep the order
+    extra_msg = ModelMessage(name="Extra", fields=[])
+    extra = Model(file="extra.def", namespaces=[ModelNamespace(name="extra", messages=[extra_msg], enums=[])])
+    lib.imports = {"extra.def": extra}
+    assert [layer._model for layer in root._qfn_lookup.layers()] == [root, lib, extra]
+    assert root.resolve_reference(ModelReference("extra::Extra", "message")) is extra_msg
+
+
+def test_new_models_keep_cached_layer_orders():
+    root, lib, _, _ = _chain()
+    layers = root._qfn_lookup.layers()
+    epoch = QfnLookup.imports_epoch
+    Model(file="other.def", namespaces=[], imports={"lib.def": lib})
+    assert QfnLookup.imports_epoch == epoch and root._qfn_lookup.layers() is layers
+    lib.imports = {}
+    assert QfnLookup.imports_epoch != epoch
+
+
+def _assert_current(model):
+    # The maintained lookup matches one built from scratch
+    assert model._qfn_lookup.merged() == QfnLookup(model).merged()
+
+
+def test_flatten_enums_updates_lookup():
+    kind = ModelEnum(name="Kind", values=[])
+    inner = ModelNamespace(name="b", messages=[], enums=[ModelEnum(name="Level", values=[])])
+    model = Model(file="a.def", namespaces=[ModelNamespace(name="a", messages=[], enums=[kind], namespaces=[inner])])
+    assert model.resolve_reference(ModelReference("a::Kind", "enum")) is kind
+    model = FlattenEnumsTransform().transform(model)
+    _assert_current(model)
+    assert model.resolve_reference(ModelReference("a::a_Kind", "enum")) is kind
+    assert model.resolve_reference(ModelReference("a::Kind", "enum")) is None
+    assert ("a::b::a_b_Level", "enum") in model._qfn_lookup
+
+
+def test_reserved_keyword_rename_updates_lookup():
+    msg = ModelMessage(name="class", fields=[])
+    enum = ModelEnum(name="return", values=[])
+    inner_msg = ModelMessage(name="Inner", fields=[])
+    inner = ModelNamespace(name="def", messages=[inner_msg], enums=[])
+    model = Model(file="a.def", namespaces=[ModelNamespace(name="ns", messages=[msg], enums=[enum], namespaces=[inner])])
+    assert model.resolve_reference(ModelReference("ns::class", "message")) is msg
+    model = ReservedKeywordRenameTransform({"class", "def", "return"}, "py_").transform(model)
+    _assert_current(model)
+    assert model.resolve_reference(ModelReference("ns::py_class", "message")) is msg
+    assert model.resolve_reference(ModelReference("ns::py_return", "enum")) is enum
+    assert model.resolve_reference(ModelReference("ns::py_def::Inner", "message")) is inner_msg
+    assert model.resolve_reference(ModelReference("ns::class", "message")) is None
@@ -0,0 +1,182 @@
+"""
+The model transform pipeline fuses non-conflicting visitor transforms into shared walks with the
+same result as running them one after another, skips transforms whose inputs were not written
+since they last ran, and records per-transform timings.
+"""
+import os
+import pytest
+from model import Model, ModelEnum, ModelEnumValue, ModelField, ModelMessage, ModelNamespace, FieldType
+from model_compiler import compile_def_graph
+from model_snapshot import dumps_model, loads_model
+from model_transforms.assign_dummy_option_enums_transform import AssignDummyOptionEnumsTransform
+from model_transforms.assign_enum_values_transform import AssignEnumValuesTransform
+from model_transforms.assign_option_bitflag_values_transform import AssignOptionBitflagValuesTransform
+from model_transforms.assign_unique_names_transform import AssignUniqueNamesTransform
+from model_transforms.flatten_enums_transform import FlattenEnumsTransform
+from model_transforms.model_transform_pipeline import (ModelTransformStats, ModelVisitorTransform,
+                                                       run_model_transform_pipeline)
+from model_transforms.prefix_enum_value_names_transform import PrefixEnumValueNamesTransform
+from tests.lark_parser.test_lark_parser_lalr_parity import DEF_FILES
+
+
+def generator_transforms():
+    return [AssignDummyOptionEnumsTransform(), PrefixEnumValueNamesTransform(), AssignUniqueNamesTransform(),
+            AssignOptionBitflagValuesTransform(), AssignEnumValuesTransform(), FlattenEnumsTransform()]
+
+
+def model_state(model):
+    """Names, unique names and values of every message and enum."""
+    state = []
+    def walk(ns):
+        for msg in ns.messages:
+            state.append((msg.name, getattr(msg, 'unique_name', None), [f.name for f in msg.fields]))
+        for enum in ns.enums:
+            state.append((enum.name, getattr(enum, 'unique_name', None), [(v.name, v.value) for v in enum.values]))
+        for nested in ns.namespaces:
+            walk(nested)
+    for ns in model.namespaces:
+        walk(ns)
+    return state
+
+
+@pytest.mark.parametrize('def_path', DEF_FILES, ids=os.path.basename)
+def test_fused_matches_sequential(def_path):
+    try:
+        fused = compile_def_graph(def_path).model
+    except Exception:
+        pytest.skip('file does not compile')
+    sequential = compile_def_graph(def_path).model
+    try:
+        run_model_transform_pipeline(sequential, generator_transforms(), fuse=False)
+    except ValueError:
+        with pytest.raises(ValueError):
+            run_model_transform_pipeline(fused, generator_transforms())
+        return
+    stats = ModelTransformStats()
+    run_model_transform_pipeline(fused, generator_transforms(), stats=stats)
+    assert model_state(fused) == model_state(sequential)
+    # Dummy enums | value prefixes, unique names and bitflags | enum values; flattening runs on its own
+    assert stats.walks == 3
+    assert set(stats.timings) == {type(t).__name__ for t in generator_transforms()}
+
+
+class Recorder(ModelVisitorTransform):
+    settings = ('tag',)
+
+    def __init__(self, tag, log, reads=(), writes=()):
+        self.tag, self.log = tag, log
+        self.reads, self.writes = frozenset(reads), frozenset(writes)
+
+    def on_message(self, msg, ns_stack):
+        self.log.append((self.tag, msg.name))
+
+    def on_enum(self, enum, ns_stack):
+        self.log.append((self.tag, enum.name))
+
+
+def _model():
+    msg = ModelMessage('M', [ModelField('a', [FieldType.INT])])
+    enum = ModelEnum('E', [ModelEnumValue('X', None)])
+    return Model('f.def', [ModelNamespace('N', [msg], [enum])])
+
+
+def test_conflicting_transforms_get_their_own_walk():
+    log = []
+    stats = ModelTransformStats()
+    run_model_transform_pipeline(_model(), [Recorder(1, log, reads={'enum.name'}, writes={'message.doc'}),
+                                            Recorder(2, log, reads={'message.name'}, writes={'enum.doc'}),
+                                            Recorder(3, log, reads={'enum'})], stats=stats)
+    # 1 and 2 touch different things and share a walk; 3 reads the enum.doc 2 writes
+    assert log == [(1, 'M'), (2, 'M'), (1, 'E'), (2, 'E'), (3, 'M'), (3, 'E')]
+    assert stats.walks == 2
+
+
+def test_repeated_transforms_run_when_their_inputs_change():
+    class Write:
+        def __init__(self, name):
+            self.reads, self.writes = frozenset(), frozenset({name})
+
+        def transform(self, model):
+            return model
+
+    log = []
+    stats = ModelTransformStats()
+    recorder = Recorder(1, log, reads={'message.name'}, writes={'message.doc'})
+    model = _model()
+    run_model_transform_pipeline(model, [recorder, Write('model.options'), recorder], stats=stats)
+    assert log == [(1, 'M'), (1, 'E')] and stats.walks == 1 and stats.skipped == ['Recorder']
+    # A write to what it reads, in the pipeline or reported from outside, or other settings
+    run_model_transform_pipeline(model, [Write('message'), recorder])
+    model.mark_written({'message.doc'})
+    run_model_transform_pipeline(model, [recorder, Recorder(2, log, reads={'message.name'})])
+    assert log == [(1, 'M'), (1, 'E')] * 2 + [(1, 'M'), (2, 'M'), (1, 'E'), (2, 'E')]
+    run_model_transform_pipeline(model, [recorder])
+    assert len(log) == 8
+
+
+def test_writes_to_imported_models_rerun_transforms():
+    log = []
+    model, imported = _model(), _model()
+    model.imports = {'i': imported}
+    recorder = Recorder(1, log, reads={'enum.values'})
+    run_model_transform_pipeline(model, [recorder])
+    run_model_transform_pipeline(model, [recorder])
+    imported.mark_written({'enum.values'})
+    run_model_transform_pipeline(model, [recorder])
+    assert log == [(1, 'M'), (1, 'E')] * 2
+
+
+def test_writes_pending_in_a_walk_rerun_transforms():
+    log = []
+    model = _model()
+    reader = Recorder(1, log, reads={'enum.name'})
+    run_model_transform_pipeline(model, [reader])
+    # 2 shares a walk with nothing that writes enum.name yet; 1 must wait for it, not be skipped
+    run_model_transform_pipeline(model, [Recorder(2, log, writes={'enum.name'}), reader])
+    assert log == [(1, 'M'), (1, 'E'), (2, 'M'), (2, 'E'), (1, 'M'), (1, 'E')]
+
+
+def test_transform_mutate_transform_again():
+    model = _model()
+    enum = model.namespaces[0].enums[0]
+    AssignEnumValuesTransform().transform(model)
+    enum.values.append(ModelEnumValue('Y', None))
+    AssignEnumValuesTransform().transform(model)
+    assert [(v.name, v.value) for v in enum.values] == [('X', 0), ('Y', 1)]
+    # Through the pipeline too (once the edit is reported), and after a transform called directly
+    enum.values.append(ModelEnumValue('Z', None))
+    run_model_transform_pipeline(model, [AssignEnumValuesTransform()])
+    assert enum.values[-1].value is None
+    model.mark_written({'enum.values'})
+    run_model_transform_pipeline(model, [AssignEnumValuesTransform()])
+    assert enum.values[-1].value == 2
+    run_model_transform_pipeline(model, [AssignUniqueNamesTransform()])
+    assert enum.unique_name == 'N_E'
+    FlattenEnumsTransform().transform(model)
+    run_model_transform_pipeline(model, [AssignUniqueNamesTransform()])
+    assert enum.unique_name == 'N_N_E'
+
+
+def test_undeclared_transforms_run_on_their_own():
+    class Plain:
+        def transform(self, model):
+            ran.append(True)
+            return model
+
+    ran = []
+    model = _model()
+    values = AssignEnumValuesTransform()
+    stats = ModelTransformStats()
+    run_model_transform_pipeline(model, [values, Plain(), values, Plain()], stats=stats)
+    assert ran == [True, True] and stats.walks == 2
+    run_model_transform_pipeline(model, [Plain()])
+    assert ran == [True] * 3
+
+
+def test_loaded_snapshots_run_every_transform():
+    model = _model()
+    run_model_transform_pipeline(model, [AssignEnumValuesTransform()])
+    loaded = loads_model(dumps_model(model))
+    loaded.namespaces[0].enums[0].values.append(ModelEnumValue('Y', None))
+    run_model_transform_pipeline(loaded, [AssignEnumValuesTransform()])
+    assert loaded.namespaces[0].enums[0].values[-1].value == 1
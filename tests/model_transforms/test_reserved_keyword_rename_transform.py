@@ -1,6 +1,6 @@
 import pytest
 from model import Model, ModelNamespace, ModelMessage, ModelEnum, ModelField, FieldType
-from model_transforms.reserved_keyword_rename_transform import ReservedKeywordRenameTransform
+from model_transforms.reserved_keyword_rename_transform import ReservedKeywordRenameTransform, rename_views
 
 def make_simple_model():
     # Create a model with reserved keywords as names
@@ -66,3 +66,66 @@ def test_reserved_keyword_rename_transform():
     # Enum names
     assert ns.enums[0].name == "py_return"
     assert ns.enums[1].name == "normal"
+
+def make_referencing_model():
+    # "class" is referenced by a field (short name and QFN) and as a parent; "def" is a namespace
+    # holding a reserved message
+    target = ModelMessage(name="class", fields=[])
+    user = ModelMessage(
+        name="User",
+        fields=[
+            ModelField(name="a", field_types=[FieldType.MESSAGE], type_refs=[None], type_names=["class"]),
+            ModelField(name="b", field_types=[FieldType.MESSAGE], type_refs=[None], type_names=["TestNS::class"]),
+            ModelField(name="c", field_types=[FieldType.INT], type_refs=[None], type_names=["int"]),
+        ],
+        parent="TestNS::class"
+    )
+    inner = ModelNamespace(name="def", messages=[ModelMessage(name="return", fields=[])], enums=[], namespaces=[])
+    ns = ModelNamespace(name="TestNS", messages=[target, user], enums=[], namespaces=[inner])
+    return Model(file="test.def", namespaces=[ns], options=[], compounds=[], alias_map={}, imports={})
+
+def test_reserved_keyword_rename_type_names_and_nesting():
+    model = make_referencing_model()
+    ReservedKeywordRenameTransform({"class", "def", "return"}, "py_").transform(model)
+    ns = model.namespaces[0]
+    user = ns.messages[1]
+    assert [f.type_names for f in user.fields] == [("py_class",), ("py_class",), ("int",)]
+    assert user.parent == "TestNS::py_class"
+    assert ns.namespaces[0].name == "py_def"
+    assert ns.namespaces[0].messages[0].name == "py_return"
+    assert model._qfn_lookup[("TestNS::py_def::py_return", "message")] is ns.namespaces[0].messages[0]
+
+def test_parent_keeps_its_namespace_and_follows_renamed_namespaces():
+    model = make_referencing_model()
+    ns = model.namespaces[0]
+    child = ModelMessage(name="Child", fields=[], parent="TestNS::def::return")
+    ns.messages.append(child)
+    ReservedKeywordRenameTransform({"def", "return"}, "py_").transform(model)
+    assert child.parent == "TestNS::py_def::py_return"
+    assert ns.messages[1].parent == "TestNS::class"
+    assert model._qfn_lookup[(child.parent, "message")] is ns.namespaces[0].messages[0]
+
+def test_rename_views_batch_leaves_model_untouched():
+    model = make_referencing_model()
+    views = rename_views(model, {"python": ({"class", "return"}, "py_"), "cpp": ({"def"}, "cpp_")})
+    ns = model.namespaces[0]
+    user = ns.messages[1]
+    # The model keeps its names; each view reports its own target's
+    assert ns.messages[0].name == "class" and ns.namespaces[0].name == "def"
+    assert user.fields[0].type_names == ("class",)
+    python, cpp = views["python"], views["cpp"]
+    assert python.name(ns.messages[0]) == "py_class"
+    assert python.name(ns.namespaces[0]) == "def"
+    assert python.field_type_names(user.fields[1]) == ("py_class",)
+    assert python.parent_qfn(user) == "TestNS::py_class"
+    assert cpp.name(ns.namespaces[0]) == "cpp_def"
+    assert cpp.name(ns.messages[0]) == "class"
+    assert cpp.field_type_names(user.fields[0]) == ("class",)
+    assert cpp.parent_qfn(user) == "TestNS::class"
+    assert len(python) == 5 and len(cpp) == 1  # class, return, fields a and b, User (parent)
+    # A view applies to the same result as the transform
+    expected = make_referencing_model()
+    ReservedKeywordRenameTransform({"class", "return"}, "py_").transform(expected)
+    python.apply(model)
+    assert [f.type_names for f in user.fields] == [f.type_names for f in expected.namespaces[0].messages[1].fields]
+    assert sorted(model._qfn_lookup) == sorted(expected._qfn_lookup)
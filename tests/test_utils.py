@@ -1,7 +1,8 @@
 from early_model_transforms.canonicalize_colons_transform import CanonicalizeColonsTransform
-from early_model_transforms.dependency_sort import topological_sort_earlymodels
-from def_file_loader import load_def_file
+from def_file_loader import load_def_file, load_def_files
+from early_model import EARLY_NODE_CLASSES, node_attributes
 from early_transform_pipeline import run_early_transform_pipeline
+from early_transform_scheduler import transform_early_models
 from early_model_transforms.add_file_level_namespace_transform import AddFileLevelNamespaceTransform
 from early_model_transforms.qfn_reference_transform import QfnReferenceTransform
 from early_model_transforms.attach_imported_models_transform import AttachImportedModelsTransform
@@ -14,67 +15,30 @@ import tempfile
 import shutil
 import sys
 
-def load_early_model_with_imports(def_file_path):
+def load_early_model_with_imports(def_file_path, workers=1, parse_mode='treeless'):
     """
     Recursively loads a .def file and all its imports, sorts dependencies, and runs the full EarlyTransformPipeline
     (AddFileLevelNamespaceTransform, CanonicalizeColonsTransform, QfnReferenceTransform, AttachImportedModelsTransform)
     in dependency order. Returns the fully transformed EarlyModel for the root file and a dict of all EarlyModels.
+    `workers` and `parse_mode` are passed to load_def_files: with workers > 1 the files are parsed in
+    a process pool.
     """
-    # Step 1: Recursively load all EarlyModels
+    # Step 1+2: Load all EarlyModels (breadth-first over imports), sorted so dependencies come first
     def normalize_path(path):
         return os.path.abspath(os.path.normpath(path))
 
-    def recursive_load(path, loaded):
-        npath = normalize_path(path)
-        if npath in loaded:
-            return
-        early_model = load_def_file(npath)
-        loaded[npath] = early_model
-        for import_path, _ in getattr(early_model, 'imports_raw', []):
-            import_file = os.path.join(os.path.dirname(npath), import_path)
-            import_file = normalize_path(import_file)
-            recursive_load(import_file, loaded)
+    sorted_models = load_def_files(def_file_path, workers=workers, parse_mode=parse_mode)
 
-    loaded = {}
-    recursive_load(def_file_path, loaded)
-
-    # Step 2: Sort dependencies
-    sorted_models = topological_sort_earlymodels(loaded)
-    print("[DEBUG] Sorted model files:")
-    for m in sorted_models:
-        print(f"    {getattr(m, 'file', None)}")
-
-
-    # Step 3: Transform each EarlyModel in order, wrapping in alias namespace if needed
+    # Step 3: Transform each EarlyModel in dependency order, level by level
     # Alias wrapping is not needed; aliasing is handled at reference resolution time only.
-
-    transformed = {}
-    from early_model_transforms.promote_inline_enums_transform import PromoteInlineEnumsTransform
-    for model in sorted_models:
-        # Build import_models for this model (already transformed)
-        import_models = {}
-        model_file = normalize_path(model.file)
-        for import_path, alias in getattr(model, 'imports_raw', []):
-            import_file = os.path.join(os.path.dirname(model_file), import_path)
-            import_file = normalize_path(import_file)
-            key = alias if alias else import_path
-            if import_file in transformed:
-                import_models[key] = transformed[import_file]
-        transforms = [
-            AddFileLevelNamespaceTransform(),
-            CanonicalizeColonsTransform(),
-            QfnReferenceTransform(),
-            AttachImportedModelsTransform(import_models),
-            PromoteInlineEnumsTransform(),
-        ]
-        model_t = run_early_transform_pipeline(model, transforms)
+    transformed = transform_early_models({m.file: m for m in sorted_models})
+    for model_t in transformed.values():
         # Validation: ensure no inline enums remain after transform
         for ns in getattr(model_t, 'namespaces', []):
             for msg in getattr(ns, 'messages', []):
                 for field in getattr(msg, 'fields', []):
                     assert not getattr(field, 'is_inline_enum', False), f"Field {field.name} in {msg.name} should not be inline enum after PromoteInlineEnumsTransform"
                     assert not getattr(field, 'inline_values_raw', None), f"Field {field.name} in {msg.name} should not have inline_values_raw after PromoteInlineEnumsTransform"
-        transformed[model_file] = model_t
 
     # Step 4: Return the transformed root EarlyModel and all transformed models
     return transformed[normalize_path(def_file_path)], transformed
@@ -295,4 +259,17 @@ def randomize_def_file(file_path):
 def cleanup_temp_dir(temp_dir):
     """Clean up the temporary directory."""
     if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir, ignore_errors=True)
\ No newline at end of file
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def object_state(obj):
+    """
+    Recursively convert an (Early)Model object graph into plain lists/dicts/tuples so two
+    independently built graphs can be compared with ==.
+    """
+    if isinstance(obj, (list, tuple)):
+        return [object_state(x) for x in obj]
+    if isinstance(obj, dict):
+        return {k: object_state(v) for k, v in obj.items()}
+    if hasattr(obj, '__dict__') or isinstance(obj, EARLY_NODE_CLASSES):
+        return (type(obj).__name__, {k: object_state(v) for k, v in node_attributes(obj).items()})
+    return obj